@@ -252,6 +252,41 @@ class BackendClient:
         """
         return await self.get(f"/projects/{project_id}/structure_tree")
 
+    async def get_structure_tree_children(
+        self,
+        project_id: str,
+        parent_type: str = "project",
+        parent_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        按层懒加载工程结构树
+
+        Args:
+            project_id: 项目 ID
+            parent_type: 父节点类型（project / building / system / zone / device）
+            parent_id: 父节点 ID，parent_type 为 project 时省略
+
+        Returns:
+            父节点的直接子节点（带 child_count / has_children）
+        """
+        params = {"parent_type": parent_type}
+        if parent_id:
+            params["parent_id"] = parent_id
+        return await self.get(f"/projects/{project_id}/structure_tree/children", params=params)
+
+    async def get_structure_tree_changes(self, project_id: str, since: int) -> Dict[str, Any]:
+        """
+        结构树增量变更
+
+        Args:
+            project_id: 项目 ID
+            since: 上次同步到的 seq
+
+        Returns:
+            seq 之后的楼栋 / 分区 / 系统 / 设备变更；reset 为 True 时需整树重载
+        """
+        return await self.get(f"/projects/{project_id}/structure_tree/changes", params={"since": since})
+
     async def create_building(
         self,
         project_id: str,
@@ -437,3 +472,24 @@ class BackendClient:
             LLM 分析结果
         """
         return await self.post(f"/assets/{asset_id}/run_scene_llm")
+
+    # ==================== 批量请求 ====================
+
+    async def batch(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        一次往返执行多个 GET 请求（POST /batch/）
+
+        Args:
+            requests: 子请求列表，每项包含 path（相对 base_url，如 "/assets/"）、
+                可选 query 与 id（原样返回，便于对应结果）
+
+        Returns:
+            与 requests 顺序一致的结果列表，每项包含 id、status、headers、body
+        """
+        api_prefix = httpx.URL(self.base_url).path.rstrip("/")
+        payload = [
+            {**item, "path": f"{api_prefix}{item['path']}"}
+            for item in requests
+        ]
+        result = await self.post("/batch/", data=payload)
+        return result if isinstance(result, list) else []
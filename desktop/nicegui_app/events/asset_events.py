@@ -321,7 +321,11 @@ async def on_run_scene_llm_click(
 
     try:
         async with httpx.AsyncClient(timeout=120.0) as client:
-            resp = await client.post(f"{backend_base_url}/assets/{asset_id}/route_image")
+            # 交互式提交：expedite 使该资产插队到分析队列最前
+            resp = await client.post(
+                f"{backend_base_url}/assets/{asset_id}/route_image",
+                params={"expedite": "true"},
+            )
             resp.raise_for_status()
     except Exception as exc:  # noqa: BLE001
         ui.notify(f"提交 LLM 分析失败: {exc}", color="negative")
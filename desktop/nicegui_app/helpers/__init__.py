@@ -16,6 +16,8 @@ from desktop.nicegui_app.helpers.common import (
 )
 
 from desktop.nicegui_app.helpers.tree_manager import (
+    LAZY_PLACEHOLDER_PREFIX,
+    is_lazy_placeholder,
     TreeFilterHelper,
     filter_tree_nodes,
     find_tree_node,
@@ -30,6 +32,8 @@ __all__ = [
     "parse_number",
     "format_number",
     # tree_manager.py
+    "LAZY_PLACEHOLDER_PREFIX",
+    "is_lazy_placeholder",
     "TreeFilterHelper",
     "filter_tree_nodes",
     "find_tree_node",
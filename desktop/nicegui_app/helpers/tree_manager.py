@@ -9,6 +9,14 @@
 
 from typing import Any, Dict, List, Optional
 
+# 懒加载节点尚未取回子节点时的占位子节点 id 前缀（使其显示展开箭头）
+LAZY_PLACEHOLDER_PREFIX = "loading:"
+
+
+def is_lazy_placeholder(children: List[Dict[str, Any]]) -> bool:
+    """子节点列表是否只是懒加载占位（真实子节点尚未取回）"""
+    return len(children) == 1 and str(children[0].get("id", "")).startswith(LAZY_PLACEHOLDER_PREFIX)
+
 
 class TreeFilterHelper:
     """
@@ -70,11 +70,12 @@ except ImportError:
 # 使用集中式状态管理替代闭包变量
 # 新旧状态可以共存，逐步迁移
 try:
-    from desktop.nicegui_app.state.store import app_state, get_current_project
+    from desktop.nicegui_app.state.store import app_state, get_current_project, TreeState
     STATE_MANAGEMENT_ENABLED = True
 except ImportError:
     # 如果导入失败，禁用状态管理
     app_state = None
+    TreeState = None
     STATE_MANAGEMENT_ENABLED = False
     def get_current_project():
         return None
@@ -117,6 +118,7 @@ from desktop.nicegui_app.helpers import (
     format_float as helper_format_float,
     filter_tree_nodes,
     find_tree_node,
+    LAZY_PLACEHOLDER_PREFIX,
 )
 
 # ==================== 新增：事件处理（重构阶段 5）====================
@@ -153,23 +155,66 @@ async def list_projects() -> List[Dict[str, Any]]:
         return []
 
 
+# 结构树按项目缓存 (ETag, 数据)；刷新时带 If-None-Match，未变更时后端返回 304，直接复用本地数据
+_structure_tree_cache: Dict[str, tuple] = {}
+
+
 async def get_structure_tree(project_id: str) -> Dict[str, Any]:
-    return await fetch_json(f"/projects/{project_id}/structure_tree")
+    headers = {}
+    if get_auth_manager().is_authenticated():
+        headers['Authorization'] = f'Bearer {get_auth_manager().token}'
+    cached = _structure_tree_cache.get(project_id)
+    if cached is not None:
+        headers['If-None-Match'] = cached[0]
+
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        resp = await client.get(f"{BACKEND_BASE_URL}/projects/{project_id}/structure_tree", headers=headers)
+        if resp.status_code == 304 and cached is not None:
+            return cached[1]
+        resp.raise_for_status()
+        data = resp.json()
+
+    etag = resp.headers.get("ETag")
+    if etag:
+        _structure_tree_cache[project_id] = (etag, data)
+    return data
+
+
+async def get_structure_tree_changes(project_id: str, since: int) -> Dict[str, Any]:
+    """结构树增量同步：返回 seq > since 的楼栋 / 分区 / 系统 / 设备变更。"""
+    return await fetch_json(f"/projects/{project_id}/structure_tree/changes", params={"since": since})
+
+
+async def get_structure_tree_children(
+    project_id: str, parent_type: str = "project", parent_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """按层懒加载结构树：返回一个父节点的直接子节点（带 has_children / child_count）。"""
+    params = {"parent_type": parent_type}
+    if parent_id:
+        params["parent_id"] = parent_id
+    return await fetch_json(f"/projects/{project_id}/structure_tree/children", params=params)
+
+
+# 资产表格、筛选与关键词提取用到的字段及最新结果摘要；详情由 get_asset_detail 单独拉取
+ASSET_TABLE_PARAMS = {
+    "fields": "id,device_id,system_id,modality,content_role,title,capture_time,location_meta,tags,status",
+    "include": "latest_summary",
+}
 
 
 async def list_assets_for_device(device_id: str) -> List[Dict[str, Any]]:
     """List assets for a device via the backend /assets endpoint with device_id filter."""
-    return await fetch_json("/assets/", params={"device_id": device_id})
+    return await fetch_json("/assets/", params={"device_id": device_id, **ASSET_TABLE_PARAMS})
 
 
 async def list_assets_for_system(system_id: str) -> List[Dict[str, Any]]:
     """List assets for a system via the backend /assets endpoint with system_id filter."""
-    return await fetch_json("/assets/", params={"system_id": system_id})
+    return await fetch_json("/assets/", params={"system_id": system_id, **ASSET_TABLE_PARAMS})
 
 
 async def list_assets_for_zone(zone_id: str) -> List[Dict[str, Any]]:
     """List assets for a zone via the backend /assets endpoint with zone_id filter."""
-    return await fetch_json("/assets/", params={"zone_id": zone_id})
+    return await fetch_json("/assets/", params={"zone_id": zone_id, **ASSET_TABLE_PARAMS})
 
 
 async def get_asset_detail(asset_id: str) -> Dict[str, Any]:
@@ -217,6 +262,17 @@ def extract_keywords(asset: Dict[str, Any]) -> str:
             if quality:
                 keywords.append(f"质量:{quality}")
 
+    # 1b. 列表接口附带的最新结果摘要（include=latest_summary，无需逐个拉取详情）
+    summary = asset.get("latest_summary") or {}
+    if summary.get("scene_category"):
+        keywords.append(summary["scene_category"])
+    if summary.get("scene_severity"):
+        keywords.append(f"严重度:{summary['scene_severity']}")
+    if summary.get("meter_reading") is not None:
+        keywords.append(f"读数:{summary['meter_reading']:g}{summary.get('meter_unit') or ''}")
+    if summary.get("nameplate_equipment_type"):
+        keywords.append(summary["nameplate_equipment_type"])
+
     # 2. 如果还没有足够关键词，从 content_role 提取
     if len(keywords) < 2:
         role = asset.get("content_role")
@@ -283,55 +339,89 @@ def enrich_asset(asset: Dict[str, Any]) -> None:
         asset["keywords"] = ""
 
 
+def _tree_node_label(node: Dict[str, Any]) -> str:
+    """节点名称 + 资产数 / 待分析数角标（后端按节点分组计数）"""
+    label = node.get("name") or node.get("type") or "node"
+    asset_count = node.get("asset_count") or 0
+    pending_count = node.get("pending_count") or 0
+    if pending_count:
+        return f"{label} ({asset_count}, 待分析 {pending_count})"
+    if asset_count:
+        return f"{label} ({asset_count})"
+    return label
+
+
+def _tree_node_id(node: Dict[str, Any]) -> str:
+    """将 type 编码进 id 字符串，便于在 on_select 回调中区分类型"""
+    raw_id = node.get("id") or node.get("node_id")
+    node_type = node.get("type")
+    return f"{node_type}:{raw_id}" if node_type and raw_id else str(raw_id or "")
+
+
+def _group_building_children(building_id: str, children: List[Dict[str, Any]], convert) -> List[Dict[str, Any]]:
+    """楼栋节点下将系统和区域拆成两个分支显示，其余子节点保持原状"""
+    system_children_raw = [c for c in children if c.get("type") == "system"]
+    zone_children_raw = [c for c in children if c.get("type") == "zone"]
+    other_children_raw = [c for c in children if c.get("type") not in ("system", "zone")]
+
+    groups: List[Dict[str, Any]] = []
+    if system_children_raw:
+        groups.append({
+            "id": f"system_group:{building_id}",
+            "label": "系统",
+            "icon": "folder",
+            "children": [convert(c) for c in system_children_raw],
+        })
+    if zone_children_raw:
+        groups.append({
+            "id": f"zone_group:{building_id}",
+            "label": "区域",
+            "icon": "folder",
+            "children": [convert(c) for c in zone_children_raw],
+        })
+    groups.extend(convert(c) for c in other_children_raw)
+    return groups
+
+
+def build_lazy_tree_node(node: Dict[str, Any]) -> Dict[str, Any]:
+    """将单个后端节点转成 NiceGUI tree 节点；有子节点的节点先挂占位子节点，展开时再取回。"""
+    tree_id = _tree_node_id(node)
+    placeholder = [{"id": f"{LAZY_PLACEHOLDER_PREFIX}{tree_id}", "label": "加载中...", "icon": "hourglass_empty"}]
+    return {
+        "id": tree_id,
+        "label": _tree_node_label(node),
+        "icon": "devices_other" if node.get("type") == "device" else "folder",
+        # 保留计数，增量更新节点名称时沿用角标
+        "asset_count": node.get("asset_count"),
+        "pending_count": node.get("pending_count"),
+        "children": placeholder if node.get("has_children") else [],
+    }
+
+
+def build_lazy_tree_nodes(
+    children: List[Dict[str, Any]], parent_type: str = "project", parent_id: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """将 structure_tree/children 返回的一层节点转成 NiceGUI tree 节点。"""
+    if parent_type == "building":
+        # children 即同一楼栋的系统与分区，分组方式与整树一致
+        return _group_building_children(str(parent_id), children, build_lazy_tree_node)
+    return [build_lazy_tree_node(child) for child in children]
+
+
 def build_tree_nodes(tree: Dict[str, Any]) -> List[Dict[str, Any]]:
     """将后端返回的 structure_tree 转成 NiceGUI tree 所需格式."""
 
     def convert(node: Dict[str, Any]) -> Dict[str, Any]:
         raw_id = node.get("id") or node.get("node_id")
-        label = node.get("name") or node.get("type") or "node"
+        label = _tree_node_label(node)
         node_type = node.get("type")
         icon = "devices_other" if node_type == "device" else "folder"
 
-        # 为了在 on_select 回调中简单区分类型，这里将 type 编码进 id 字符串
-        tree_id = f"{node_type}:{raw_id}" if node_type and raw_id else str(raw_id or "")
-
-        # 默认子节点
-        children_nodes: List[Dict[str, Any]] = []
+        tree_id = _tree_node_id(node)
         raw_children = node.get("children", []) or []
 
-        # 对楼栋节点，将系统和区域拆成两个分支显示，其余子节点保持原状
         if node_type == "building" and raw_children:
-            system_children_raw = [c for c in raw_children if c.get("type") == "system"]
-            zone_children_raw = [c for c in raw_children if c.get("type") == "zone"]
-            other_children_raw = [
-                c for c in raw_children
-                if c not in system_children_raw and c not in zone_children_raw
-            ]
-
-            if system_children_raw:
-                system_children = [convert(c) for c in system_children_raw]
-                children_nodes.append(
-                    {
-                        "id": f"system_group:{raw_id}",
-                        "label": "系统",
-                        "icon": "folder",
-                        "children": system_children,
-                    }
-                )
-
-            if zone_children_raw:
-                zone_children = [convert(c) for c in zone_children_raw]
-                children_nodes.append(
-                    {
-                        "id": f"zone_group:{raw_id}",
-                        "label": "区域",
-                        "icon": "folder",
-                        "children": zone_children,
-                    }
-                )
-
-            for child in other_children_raw:
-                children_nodes.append(convert(child))
+            children_nodes = _group_building_children(str(raw_id), raw_children, convert)
         else:
             children_nodes = [convert(child) for child in raw_children]
 
@@ -339,6 +429,8 @@ def build_tree_nodes(tree: Dict[str, Any]) -> List[Dict[str, Any]]:
             "id": tree_id,
             "label": label,
             "icon": icon,
+            "asset_count": node.get("asset_count"),
+            "pending_count": node.get("pending_count"),
             "children": children_nodes,
         }
 
@@ -547,6 +639,11 @@ def main_page() -> None:
     # ==================== 旧状态变量（向后兼容）====================
     projects_cache: List[Dict[str, Any]] = []
     full_tree_nodes: List[Dict[str, Any]] = []
+    # 懒加载：已取回子节点的楼栋 / 系统节点；搜索时按需拉取的完整结构树（ETag 复用）
+    lazy_loaded_ids: set = set()
+    search_tree_nodes: List[Dict[str, Any]] = []
+    # 增量同步：记录已应用的变更序号并原地回放变更（无状态管理时退回整树重载）
+    tree_state = app_state.tree if STATE_MANAGEMENT_ENABLED and app_state else None
 
     # 资产状态引用（阶段 5：使用容器引用）
     asset_state_ref = AssetStateRef(
@@ -758,7 +855,7 @@ def main_page() -> None:
         selected_asset = asset_state_ref.selected_asset
         update_asset_detail()
 
-    def apply_tree_filter() -> None:
+    async def apply_tree_filter() -> None:
         """根据搜索框过滤工程结构树。"""
         text = (tree_search.value or "").strip().lower()
         if not full_tree_nodes:
@@ -770,7 +867,13 @@ def main_page() -> None:
             tree_widget.update()
             return
 
-        filtered_nodes = filter_tree_nodes(full_tree_nodes, text)
+        # 懒加载的树只含已展开的层级，搜索时拉取完整结构树（未变更时后端返回 304）
+        if not search_tree_nodes and project_select.value:
+            try:
+                search_tree_nodes.extend(build_tree_nodes(await get_structure_tree(str(project_select.value))))
+            except Exception:
+                ui.notify("完整结构树加载失败，仅搜索已展开的节点", color="warning")
+        filtered_nodes = filter_tree_nodes(search_tree_nodes or full_tree_nodes, text)
         tree_widget._props["nodes"] = filtered_nodes
         tree_widget.update()
 
@@ -840,11 +943,22 @@ def main_page() -> None:
             status_spinner.visible = False
             return
         try:
-            data = await get_structure_tree(str(project_select.value))
-            nodes = build_tree_nodes(data)
+            # 首屏只取楼栋一层，系统 / 设备在展开时按需加载
+            data = await get_structure_tree_children(str(project_select.value))
+            lazy_loaded_ids.clear()
+            search_tree_nodes.clear()
             full_tree_nodes.clear()
-            full_tree_nodes.extend(nodes)
-            apply_tree_filter()
+            full_tree_nodes.append({
+                "id": "project_root:project-root",
+                "label": "项目根",
+                "icon": "folder",
+                "children": build_lazy_tree_nodes(data.get("children") or []),
+            })
+            if tree_state is not None:
+                tree_state.set_nodes(full_tree_nodes)
+                tree_state.change_seq = data.get("seq")
+            await load_expanded_children(tree_widget._props.get("expanded") or [])
+            await apply_tree_filter()
             loading_label.text = ""
             status_spinner.visible = False
         except Exception:
@@ -854,6 +968,68 @@ def main_page() -> None:
             tree_widget.update()
             status_spinner.visible = False
 
+    async def sync_tree_changes(clear_selection: bool = False) -> None:
+        """
+        结构编辑后的增量刷新：拉取 seq 之后的变更并原地更新已加载的节点，不再整树重载
+
+        clear_selection 用于删除节点后清空当前选中节点及其资产列表。
+        未记录 seq、接口异常或服务端要求 reset 时退回 reload_tree。
+        """
+        nonlocal selected_asset, current_device_id, current_tree_node_type, current_tree_node_id
+        if not project_select.value:
+            return
+        if tree_state is None or tree_state.change_seq is None:
+            await reload_tree()
+            return
+        try:
+            feed = await get_structure_tree_changes(str(project_select.value), tree_state.change_seq)
+        except Exception:
+            await reload_tree()
+            return
+        if not tree_state.apply_changes(feed, build_lazy_tree_node):
+            await reload_tree()
+            return
+
+        if clear_selection:
+            current_device_id = None
+            current_tree_node_type = None
+            current_tree_node_id = None
+            all_assets_for_device.clear()
+            asset_table.rows = []
+            asset_table.update()
+            selected_asset = None
+            update_asset_detail()
+        # 搜索用的完整结构树已过期，下次搜索时重新拉取（ETag 随版本号变化）
+        search_tree_nodes.clear()
+        await apply_tree_filter()
+
+    async def load_expanded_children(expanded: List[str]) -> None:
+        """为已展开但尚未取回子节点的楼栋 / 系统节点拉取下一层（楼栋先于系统，系统节点随楼栋加载出现）"""
+        pending = [
+            key for key in expanded
+            if isinstance(key, str) and key.split(":", 1)[0] in ("building", "system") and key not in lazy_loaded_ids
+        ]
+        for key in sorted(pending, key=lambda k: k.startswith("system:")):
+            node = find_tree_node(full_tree_nodes, key)
+            if node is None:
+                continue
+            node_type, raw_id = key.split(":", 1)
+            data = await get_structure_tree_children(str(project_select.value), node_type, raw_id)
+            node["children"] = build_lazy_tree_nodes(data.get("children") or [], node_type, raw_id)
+            lazy_loaded_ids.add(key)
+
+    async def on_expand_tree(e: ValueChangeEventArguments) -> None:
+        # 搜索状态下显示的是完整结构树，无需懒加载
+        if (tree_search.value or "").strip() or not project_select.value:
+            return
+        before = len(lazy_loaded_ids)
+        try:
+            await load_expanded_children(list(e.value or []))
+        except Exception:
+            ui.notify("加载下级节点失败，请稍后重试", color="negative")
+        if len(lazy_loaded_ids) != before:
+            tree_widget.update()
+
     async def on_select_tree(e: ValueChangeEventArguments) -> None:
         nonlocal selected_asset, current_device_id, current_tree_node_type, current_tree_node_id
         value = e.value
@@ -966,6 +1142,7 @@ def main_page() -> None:
         update_asset_detail()
 
     tree_widget.on_select(on_select_tree)
+    tree_widget.on_expand(on_expand_tree)
 
     # ==================== 创建资产 UI 上下文（阶段 5）====================
     asset_ui_context = AssetUIContext(
@@ -1031,7 +1208,7 @@ def main_page() -> None:
 
     refresh_button.on_click(on_refresh_click)
 
-    tree_search.on_value_change(lambda _: apply_tree_filter())
+    tree_search.on_value_change(apply_tree_filter)
     modality_filter.on_value_change(lambda _: apply_asset_filters())
     role_filter.on_value_change(lambda _: apply_asset_filters())
     time_filter.on_value_change(lambda _: apply_asset_filters())
@@ -1240,7 +1417,7 @@ def main_page() -> None:
         show_create_building_dialog(
             project_id=project_id,
             backend_base_url=BACKEND_BASE_URL,
-            on_success=reload_tree,
+            on_success=sync_tree_changes,
         )
 
     async def on_create_system_click() -> None:
@@ -1254,7 +1431,7 @@ def main_page() -> None:
         show_create_system_dialog(
             building_id=building_id,
             backend_base_url=BACKEND_BASE_URL,
-            on_success=reload_tree,
+            on_success=sync_tree_changes,
         )
 
     async def on_create_zone_click() -> None:
@@ -1268,7 +1445,7 @@ def main_page() -> None:
         show_create_zone_dialog(
             building_id=building_id,
             backend_base_url=BACKEND_BASE_URL,
-            on_success=reload_tree,
+            on_success=sync_tree_changes,
         )
 
     async def on_create_device_click() -> None:
@@ -1282,7 +1459,7 @@ def main_page() -> None:
         show_create_device_dialog(
             system_id=system_id,
             backend_base_url=BACKEND_BASE_URL,
-            on_success=reload_tree,
+            on_success=sync_tree_changes,
         )
 
     async def on_delete_system_click() -> None:
@@ -1307,7 +1484,7 @@ def main_page() -> None:
             return
 
         ui.notify("系统已删除", color="positive")
-        await reload_tree()
+        await sync_tree_changes(clear_selection=True)
 
     async def on_delete_device_click() -> None:
         """删除设备点击事件（直接调用后端 /devices/{device_id}）。"""
@@ -1330,7 +1507,7 @@ def main_page() -> None:
             return
 
         ui.notify("设备已删除", color="positive")
-        await reload_tree()
+        await sync_tree_changes(clear_selection=True)
 
     async def on_edit_node_click() -> None:
         """编辑楼栋点击事件（使用新的对话框组件）"""
@@ -1343,7 +1520,7 @@ def main_page() -> None:
         show_edit_building_dialog(
             building_id=building_id,
             backend_base_url=BACKEND_BASE_URL,
-            on_success=reload_tree,
+            on_success=sync_tree_changes,
         )
 
     async def on_delete_node_click() -> None:
@@ -1357,7 +1534,7 @@ def main_page() -> None:
         show_delete_building_dialog(
             building_id=building_id,
             backend_base_url=BACKEND_BASE_URL,
-            on_success=reload_tree,
+            on_success=lambda: sync_tree_changes(clear_selection=True),
         )
 
     # 绑定按钮事件（需要检查按钮是否为 None，根据权限可能不显示）
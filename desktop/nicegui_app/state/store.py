@@ -7,10 +7,12 @@
 创建时间: 2025-01-22
 """
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
 
+from desktop.nicegui_app.helpers.tree_manager import is_lazy_placeholder
+
 
 # ==================== 项目状态 ====================
 
@@ -93,6 +95,9 @@ class TreeState:
     loading: bool = False
     expanded_node_ids: set = field(default_factory=set)
 
+    # 增量同步：已应用到 all_nodes 的结构变更序号（structure_tree/changes 的 seq）
+    change_seq: Optional[int] = None
+
     def set_nodes(self, nodes: List[Dict[str, Any]]) -> None:
         """
         设置树节点
@@ -184,6 +189,112 @@ class TreeState:
 
         return find_node(self.filtered_nodes)
 
+    def _locate_node(self, node_id: str) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+        """查找节点所在的子节点列表及其下标"""
+
+        def walk(nodes: List[Dict[str, Any]]) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+            for index, node in enumerate(nodes):
+                if node.get("id") == node_id:
+                    return nodes, index
+                found = walk(node.get("children") or [])
+                if found:
+                    return found
+            return None
+
+        return walk(self.all_nodes)
+
+    def _find_node(self, node_id: str) -> Optional[Dict[str, Any]]:
+        located = self._locate_node(node_id)
+        return located[0][located[1]] if located else None
+
+    def _children_for_insert(self, change: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """
+        新节点应插入的子节点列表
+
+        父节点不在树中，或其子节点尚未懒加载（只有占位节点）时返回 None：展开时会取回最新子节点。
+        楼栋下的系统 / 区域放在「系统」「区域」分组中，分组不存在时创建。
+        """
+        parent_type = change.get("parent_type")
+        if parent_type == "project":
+            parent = next((n for n in self.all_nodes if str(n.get("id", "")).startswith("project_root:")), None)
+        else:
+            parent = self._find_node(f"{parent_type}:{change.get('parent_id')}")
+        if parent is None:
+            return None
+        children = parent.setdefault("children", [])
+        if is_lazy_placeholder(children):
+            return None
+        if parent_type != "building":
+            return children
+
+        node_type = change["node_type"]
+        group_id = f"{node_type}_group:{change.get('parent_id')}"
+        group = next((c for c in children if c.get("id") == group_id), None)
+        if group is None:
+            group = {"id": group_id, "label": "系统" if node_type == "system" else "区域",
+                     "icon": "folder", "children": []}
+            # 「系统」分组在「区域」分组之前
+            children.insert(0 if node_type == "system" else len(children), group)
+        return group["children"]
+
+    def apply_changes(self, feed: Dict[str, Any], make_node: Callable[[Dict[str, Any]], Dict[str, Any]]) -> bool:
+        """
+        将 structure_tree/changes 返回的增量变更原地应用到 all_nodes
+
+        Args:
+            feed: 变更接口响应（seq / reset / changes）
+            make_node: 将后端节点快照转换为树组件节点的函数
+
+        Returns:
+            是否已应用；reset 时返回 False，调用方需整树重载
+        """
+        if feed.get("reset"):
+            return False
+
+        for change in feed.get("changes") or []:
+            node_id = f"{change['node_type']}:{change['node_id']}"
+            op = change.get("op")
+            located = self._locate_node(node_id)
+
+            if op == "delete":
+                if located:
+                    siblings, index = located
+                    siblings.pop(index)
+                    # 分组为空时一并移除，与整树构建时不生成空分组保持一致
+                    if not siblings:
+                        self._drop_empty_groups(self.all_nodes)
+                continue
+
+            snapshot = dict(change.get("node") or {})
+            if located:
+                # 更新（或重复回放的新增）：保留已有子节点与资产计数角标
+                existing = located[0][located[1]]
+                snapshot.setdefault("asset_count", existing.get("asset_count"))
+                snapshot.setdefault("pending_count", existing.get("pending_count"))
+                fresh = make_node(snapshot)
+                existing.update({k: v for k, v in fresh.items() if k != "children"})
+                continue
+
+            if op == "insert":
+                target = self._children_for_insert(change)
+                if target is not None:
+                    target.append(make_node(snapshot))
+
+        self.change_seq = feed.get("seq", self.change_seq)
+        return True
+
+    @staticmethod
+    def _drop_empty_groups(nodes: List[Dict[str, Any]]) -> None:
+        for node in nodes:
+            children = node.get("children") or []
+            node_children = [
+                c for c in children
+                if not (str(c.get("id", "")).split(":", 1)[0] in ("system_group", "zone_group") and not c.get("children"))
+            ]
+            if len(node_children) != len(children):
+                node["children"] = node_children
+            TreeState._drop_empty_groups(node_children)
+
     def toggle_expanded(self, node_id: str) -> None:
         """
         切换节点展开/折叠状态
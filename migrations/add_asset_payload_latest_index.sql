@@ -0,0 +1,21 @@
+-- 资产列表最新结果摘要（include=latest_summary）：按资产、结果类型取最新一条
+-- 执行方式: psql -U admin -d bdc_ai -f migrations/add_asset_payload_latest_index.sql
+-- 大表上建索引使用 CONCURRENTLY，请勿在事务块中执行
+--
+-- 版本号只能在索引建成且有效后写入：CONCURRENTLY 建索引失败会留下 INVALID 索引，psql 默认继续执行后续语句，
+-- 因此下面的版本写入以 pg_index.indisvalid 为条件，索引无效时不写入。
+-- 建索引失败后重试：先执行 DROP INDEX CONCURRENTLY IF EXISTS ix_asset_payloads_asset_schema_created;
+-- 再重新执行本脚本（IF NOT EXISTS 会跳过已存在的无效索引）。
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_asset_payloads_asset_schema_created
+ON asset_structured_payloads(asset_id, schema_type, created_at);
+
+INSERT INTO schema_version (version, description)
+SELECT 2, 'asset payload latest-summary index'
+WHERE EXISTS (
+    SELECT 1
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE c.relname = 'ix_asset_payloads_asset_schema_created' AND i.indisvalid
+)
+ON CONFLICT (version) DO NOTHING;
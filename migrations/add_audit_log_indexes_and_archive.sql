@@ -0,0 +1,34 @@
+-- 审计日志：键集分页索引 + 归档表
+-- 执行方式: psql -U admin -d bdc_ai -f migrations/add_audit_log_indexes_and_archive.sql
+-- 大表上建索引使用 CONCURRENTLY，请勿在事务块中执行
+
+-- 键集分页 (created_at, id)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_audit_logs_created_at_id
+ON audit_logs(created_at, id);
+
+-- 常用过滤条件
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_audit_logs_user_created
+ON audit_logs(user_id, created_at);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_audit_logs_action_created
+ON audit_logs(action, created_at);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_audit_logs_resource_created
+ON audit_logs(resource_type, resource_id, created_at);
+
+-- 归档表（user_id 不设外键，用户删除后归档记录仍保留）
+CREATE TABLE IF NOT EXISTS audit_logs_archive (
+    id UUID PRIMARY KEY,
+    user_id UUID,
+    action VARCHAR(100) NOT NULL,
+    resource_type VARCHAR(50),
+    resource_id VARCHAR(100),
+    details JSONB,
+    ip_address VARCHAR(50),
+    user_agent VARCHAR(500),
+    created_at TIMESTAMP NOT NULL,
+    archived_at TIMESTAMP NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS ix_audit_logs_archive_created_at_id
+ON audit_logs_archive(created_at, id);
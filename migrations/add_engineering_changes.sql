@@ -0,0 +1,22 @@
+-- 工程结构变更日志：结构树增量同步（GET /projects/{id}/structure_tree/changes?since=）
+-- 执行方式: psql -U admin -d bdc_ai -f migrations/add_engineering_changes.sql
+
+CREATE TABLE IF NOT EXISTS engineering_changes (
+    id SERIAL PRIMARY KEY,
+    project_id UUID NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    op VARCHAR(10) NOT NULL,
+    node_type VARCHAR(20) NOT NULL,
+    node_id UUID NOT NULL,
+    parent_type VARCHAR(20) NOT NULL,
+    parent_id UUID,
+    node JSONB,
+    created_at TIMESTAMP NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS ix_engineering_changes_project_seq
+ON engineering_changes(project_id, seq);
+
+INSERT INTO schema_version (version, description)
+VALUES (4, 'engineering change log')
+ON CONFLICT (version) DO NOTHING;
@@ -0,0 +1,65 @@
+-- 工程结构闭包表：子树资产查询（subtree=true）与楼栋汇总（/projects/{id}/buildings/rollup）
+-- 执行方式: psql -U admin -d bdc_ai -f migrations/add_engineering_closure.sql
+
+CREATE TABLE IF NOT EXISTS engineering_closure (
+    ancestor_id UUID NOT NULL,
+    descendant_id UUID NOT NULL,
+    project_id UUID NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    ancestor_type VARCHAR(20) NOT NULL,
+    descendant_type VARCHAR(20) NOT NULL,
+    depth INTEGER NOT NULL,
+    PRIMARY KEY (ancestor_id, descendant_id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_engineering_closure_descendant
+ON engineering_closure(descendant_id);
+
+CREATE INDEX IF NOT EXISTS ix_engineering_closure_project_ancestor_type
+ON engineering_closure(project_id, ancestor_type);
+
+-- 资产按结构节点过滤的索引
+CREATE INDEX IF NOT EXISTS ix_assets_building_id ON assets(building_id);
+CREATE INDEX IF NOT EXISTS ix_assets_zone_id ON assets(zone_id);
+CREATE INDEX IF NOT EXISTS ix_assets_system_id ON assets(system_id);
+CREATE INDEX IF NOT EXISTS ix_assets_device_id ON assets(device_id);
+CREATE INDEX IF NOT EXISTS ix_assets_structure_anchor
+ON assets ((COALESCE(device_id, system_id, zone_id, building_id)));
+
+-- 按现有结构回填（自身行 + 各级祖先行）
+INSERT INTO engineering_closure (ancestor_id, descendant_id, project_id, ancestor_type, descendant_type, depth)
+SELECT id, id, project_id, 'building', 'building', 0 FROM buildings
+UNION ALL
+SELECT z.id, z.id, b.project_id, 'zone', 'zone', 0 FROM zones z JOIN buildings b ON b.id = z.building_id
+UNION ALL
+SELECT b.id, z.id, b.project_id, 'building', 'zone', 1 FROM zones z JOIN buildings b ON b.id = z.building_id
+UNION ALL
+SELECT s.id, s.id, b.project_id, 'system', 'system', 0 FROM systems s JOIN buildings b ON b.id = s.building_id
+UNION ALL
+SELECT b.id, s.id, b.project_id, 'building', 'system', 1 FROM systems s JOIN buildings b ON b.id = s.building_id
+ON CONFLICT DO NOTHING;
+
+WITH device_nodes AS (
+    SELECT d.id, d.system_id, d.zone_id,
+           COALESCE(sb.id, zb.id) AS building_id,
+           COALESCE(sb.project_id, zb.project_id) AS project_id
+    FROM devices d
+    LEFT JOIN systems s ON s.id = d.system_id
+    LEFT JOIN buildings sb ON sb.id = s.building_id
+    LEFT JOIN zones z ON z.id = d.zone_id
+    LEFT JOIN buildings zb ON zb.id = z.building_id
+)
+INSERT INTO engineering_closure (ancestor_id, descendant_id, project_id, ancestor_type, descendant_type, depth)
+SELECT id, id, project_id, 'device', 'device', 0 FROM device_nodes WHERE project_id IS NOT NULL
+UNION ALL
+SELECT system_id, id, project_id, 'system', 'device', 1 FROM device_nodes
+WHERE project_id IS NOT NULL AND system_id IS NOT NULL
+UNION ALL
+SELECT zone_id, id, project_id, 'zone', 'device', 1 FROM device_nodes
+WHERE project_id IS NOT NULL AND zone_id IS NOT NULL
+UNION ALL
+SELECT building_id, id, project_id, 'building', 'device', 2 FROM device_nodes WHERE project_id IS NOT NULL
+ON CONFLICT DO NOTHING;
+
+INSERT INTO schema_version (version, description)
+VALUES (5, 'engineering closure table and asset structure indexes')
+ON CONFLICT (version) DO NOTHING;
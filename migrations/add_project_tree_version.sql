@@ -0,0 +1,8 @@
+-- 项目结构树版本号：工程结构增删改时递增，结构树接口据此缓存并返回 ETag
+-- 执行方式: psql -U admin -d bdc_ai -f migrations/add_project_tree_version.sql
+
+ALTER TABLE projects ADD COLUMN IF NOT EXISTS tree_version INTEGER NOT NULL DEFAULT 0;
+
+INSERT INTO schema_version (version, description)
+VALUES (3, 'project structure tree version')
+ON CONFLICT (version) DO NOTHING;
@@ -0,0 +1,14 @@
+-- 数据库结构版本表：快速启动模式（BDC_FAST_START=true）只校验此表，不再 create_all
+-- 执行方式: psql -U admin -d bdc_ai -f migrations/add_schema_version.sql
+-- 之后的每个迁移脚本末尾都应写入对应版本号（与 shared/db/schema_version.py 中 SCHEMA_VERSION 一致）
+-- 各脚本的执行顺序见 migrations/README.md（本脚本须在所有写入版本号的脚本之前执行）
+
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    description VARCHAR(200),
+    applied_at TIMESTAMP NOT NULL DEFAULT now()
+);
+
+INSERT INTO schema_version (version, description)
+VALUES (1, 'baseline: audit log indexes and archive')
+ON CONFLICT (version) DO NOTHING;
@@ -3,26 +3,54 @@
 """
 
 from nicegui import ui
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from services.backend.app.admin.services.api_client import api_client
 
 
 class AuditPage:
     """审计日志页面类"""
 
+    PAGE_SIZE = 200
+
     def __init__(self):
         self.logs_data: List[Dict[str, Any]] = []
+        self.next_cursor: Optional[str] = None
+        self.filters: Dict[str, str] = {}
 
     def load_logs(self):
-        """加载审计日志"""
-        self.logs_data = api_client.get_audit_logs(limit=200)
+        """加载第一页审计日志"""
+        self.logs_data, self.next_cursor = api_client.get_audit_logs_page(
+            limit=self.PAGE_SIZE, **self.filters
+        )
+        self.refresh_table()
+
+    def load_more(self):
+        """按游标追加下一页"""
+        if not self.next_cursor:
+            ui.notify("没有更多日志了", type="info")
+            return
+        logs, self.next_cursor = api_client.get_audit_logs_page(
+            limit=self.PAGE_SIZE, cursor=self.next_cursor, **self.filters
+        )
+        self.logs_data.extend(logs)
         self.refresh_table()
 
+    def set_filter(self, key: str, value: Optional[str]):
+        """更新过滤条件并重新加载"""
+        if value:
+            self.filters[key] = value
+        else:
+            self.filters.pop(key, None)
+        self.load_logs()
+
     def refresh_table(self):
         """刷新表格数据"""
         if hasattr(self, 'table'):
             self.table.rows = self.format_logs_for_table()
             self.table.update()
+        if hasattr(self, 'count_label'):
+            suffix = '，还有更多' if self.next_cursor else ''
+            self.count_label.text = f'已加载 {len(self.logs_data)} 条日志{suffix}'
 
     def format_logs_for_table(self) -> List[Dict[str, Any]]:
         """格式化日志数据用于表格显示"""
@@ -31,7 +59,7 @@ class AuditPage:
             formatted.append({
                 'id': log.get('id'),
                 'timestamp': log.get('created_at', '-')[:19].replace('T', ' '),
-                'username': log.get('user', {}).get('username') if log.get('user') else '-',
+                'username': log.get('username') or '-',
                 'action': log.get('action', '-'),
                 'resource_type': log.get('resource_type', '-'),
                 'ip_address': log.get('ip_address', '-'),
@@ -58,8 +86,15 @@ def show_audit_page():
                 ui.label('审计日志').classes('text-2xl font-bold')
                 ui.button(icon='refresh', on_click=audit_page.load_logs).props('flat').tooltip('刷新')
 
+            # 过滤条件
+            with ui.row().classes('w-full gap-4 items-center'):
+                ui.input('操作类型', on_change=lambda e: audit_page.set_filter('action', e.value)) \
+                    .props('clearable debounce=500')
+                ui.input('资源类型', on_change=lambda e: audit_page.set_filter('resource_type', e.value)) \
+                    .props('clearable debounce=500')
+
             # 统计信息
-            ui.label(f'共 {len(audit_page.logs_data)} 条日志').classes('text-gray-600')
+            audit_page.count_label = ui.label('').classes('text-gray-600')
 
             # 日志列表表格
             with ui.card().classes('w-full'):
@@ -77,3 +112,7 @@ def show_audit_page():
                     row_key='id',
                     pagination=20
                 ).classes('w-full')
+
+                ui.button('加载更多', on_click=audit_page.load_more).props('flat')
+
+            audit_page.refresh_table()
@@ -3,7 +3,7 @@
 """
 
 from nicegui import ui
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from services.backend.app.admin.services.api_client import api_client
 
 
@@ -12,8 +12,10 @@ class UsersPage:
 
     def __init__(self):
         self.users_data: List[Dict[str, Any]] = []
-        self.current_page = 0
-        self.page_size = 20
+        self.page_size = 50
+        # 键集分页：下一页游标与服务端搜索关键字
+        self.next_cursor: Optional[str] = None
+        self.search: Optional[str] = None
         # 缓存角色列表用于创建/编辑用户时选择
         self.all_roles: List[Dict[str, Any]] = []
         # 角色下拉：label -> code 的映射，避免前端显示 [object Object]
@@ -29,30 +31,51 @@ class UsersPage:
             print(f"[FRONTEND ERROR] Failed to load roles for user form: {e}")
 
     def load_users(self):
-        """加载用户列表"""
+        """加载第一页用户（服务端搜索 + 键集分页）"""
         try:
-            print(f"[FRONTEND] Loading users... (page={self.current_page}, size={self.page_size})")
-            self.users_data = api_client.get_users(
-                skip=self.current_page * self.page_size,
-                limit=self.page_size
+            print(f"[FRONTEND] Loading users... (search={self.search!r}, size={self.page_size})")
+            self.users_data, self.next_cursor = api_client.get_users_page(
+                limit=self.page_size,
+                search=self.search,
+                sort="username",
+                order="asc",
             )
-            print(f"[FRONTEND] Loaded {len(self.users_data)} users, type={type(self.users_data)}")
-            if self.users_data:
-                print(f"[FRONTEND] First user data keys: {list(self.users_data[0].keys())}")
-            else:
-                print("[FRONTEND] No user data returned")
+            print(f"[FRONTEND] Loaded {len(self.users_data)} users, has_more={bool(self.next_cursor)}")
             self.refresh_table()
         except Exception as e:
             print(f"[FRONTEND ERROR] Failed to load users: {e}")
             import traceback
             traceback.print_exc()
 
+    def load_more(self):
+        """按游标追加下一页用户"""
+        if not self.next_cursor:
+            ui.notify("没有更多用户了", type="info")
+            return
+        users, self.next_cursor = api_client.get_users_page(
+            limit=self.page_size,
+            cursor=self.next_cursor,
+            search=self.search,
+            sort="username",
+            order="asc",
+        )
+        self.users_data.extend(users)
+        self.refresh_table()
+
+    def set_search(self, value: Optional[str]):
+        """更新搜索关键字并重新加载"""
+        self.search = (value or "").strip() or None
+        self.load_users()
+
     def refresh_table(self):
         """刷新表格数据"""
         if hasattr(self, 'table'):
             self.table.props('rows-per-page-options=[20,50,100]')
             self.table.rows = self.format_users_for_table()
             self.table.update()
+        if hasattr(self, 'count_label'):
+            suffix = '，还有更多' if self.next_cursor else ''
+            self.count_label.text = f'已加载 {len(self.users_data)} 个用户{suffix}'
 
     def format_users_for_table(self) -> List[Dict[str, Any]]:
         """格式化用户数据用于表格显示"""
@@ -292,8 +315,12 @@ def show_users_page():
                         ui.button(icon='refresh', on_click=users_page.load_users).props('flat').tooltip('刷新')
                         ui.button('➕ 创建用户', on_click=users_page.show_create_user_dialog).props('flat')
 
-                # 统计信息
-                ui.label(f'共 {len(users_page.users_data)} 个用户').classes('text-gray-600')
+                # 搜索与统计信息
+                with ui.row().classes('w-full items-center gap-4'):
+                    ui.input('搜索用户名/姓名/邮箱/电话',
+                             on_change=lambda e: users_page.set_search(e.value)) \
+                        .props('clearable debounce=400').classes('w-80')
+                    users_page.count_label = ui.label('').classes('text-gray-600')
 
                 # 用户列表表格
                 with ui.card().classes('w-full'):
@@ -398,6 +425,9 @@ def show_users_page():
                             ui.label(f'表格渲染错误: {str(e)}').classes('text-red-600')
 
                     render_table()
+                    ui.button('加载更多', on_click=users_page.load_more).props('flat')
+
+                users_page.refresh_table()
 
         except Exception as e:
             print(f"[FRONTEND ERROR] Page rendering failed: {e}")
@@ -3,17 +3,23 @@ API 客户端 - 封装与后端的通信
 """
 
 import requests
-from typing import Optional, Dict, List, Any
+from requests.adapters import HTTPAdapter
+from typing import Optional, Dict, List, Any, Iterator, Tuple
 from nicegui import ui
 
 
 class APIClient:
     """后端 API 客户端"""
 
-    def __init__(self, base_url: str = "http://localhost:8000"):
+    def __init__(self, base_url: str = "http://localhost:8000", pool_size: int = 10):
         self.base_url = base_url.rstrip("/")
         self.access_token: Optional[str] = None
         self.refresh_token: Optional[str] = None
+        # 复用 TCP 连接，避免每次请求重新握手
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
     def _get_headers(self) -> Dict[str, str]:
         """获取请求头（包含 Token）"""
@@ -58,7 +64,7 @@ class APIClient:
     def login(self, username: str, password: str) -> bool:
         """用户登录"""
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/api/v1/auth/login",
                 json={"username": username, "password": password},
                 timeout=10
@@ -87,7 +93,7 @@ class APIClient:
             return False
 
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/api/v1/auth/refresh",
                 json={"refresh_token": self.refresh_token},
                 timeout=10
@@ -106,7 +112,7 @@ class APIClient:
     def logout(self) -> bool:
         """用户登出"""
         try:
-            requests.post(
+            self.session.post(
                 f"{self.base_url}/api/v1/auth/logout",
                 json={"refresh_token": self.refresh_token},
                 headers=self._get_headers(),
@@ -122,7 +128,7 @@ class APIClient:
     def get_current_user(self) -> Optional[Dict[str, Any]]:
         """获取当前用户信息"""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/api/v1/auth/me",
                 headers=self._get_headers(),
                 timeout=10
@@ -137,7 +143,7 @@ class APIClient:
     def get_users(self, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
         """获取用户列表"""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/api/v1/auth/users",
                 headers=self._get_headers(),
                 params={"skip": skip, "limit": limit},
@@ -149,10 +155,61 @@ class APIClient:
             ui.notify(f"获取用户列表失败: {str(e)}", type="negative")
             return []
 
+    def get_users_page(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        search: Optional[str] = None,
+        sort: str = "created_at",
+        order: str = "desc",
+        **filters: Any
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        按游标获取一页用户
+
+        Args:
+            cursor: 上一页返回的游标，首页为 None
+            search: 搜索关键字（用户名/姓名/邮箱/电话）
+            filters: is_active / role_id
+
+        Returns:
+            (用户列表, 下一页游标)；没有更多数据时游标为 None
+        """
+        try:
+            params = {"limit": limit, "sort": sort, "order": order}
+            if cursor:
+                params["cursor"] = cursor
+            if search:
+                params["q"] = search
+            params.update({k: v for k, v in filters.items() if v is not None})
+
+            response = self.session.get(
+                f"{self.base_url}/api/v1/auth/users",
+                headers=self._get_headers(),
+                params=params,
+                timeout=10
+            )
+            data = self._handle_response(response)
+            if not isinstance(data, list):
+                return [], None
+            return data, response.headers.get("X-Next-Cursor")
+        except Exception as e:
+            ui.notify(f"获取用户列表失败: {str(e)}", type="negative")
+            return [], None
+
+    def iter_users(self, page_size: int = 100, **kwargs: Any) -> Iterator[Dict[str, Any]]:
+        """逐页惰性遍历用户，调用方停止迭代时不再请求后续页"""
+        cursor = None
+        while True:
+            users, cursor = self.get_users_page(limit=page_size, cursor=cursor, **kwargs)
+            yield from users
+            if not cursor:
+                return
+
     def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
         """获取用户详情"""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/api/v1/auth/users/{user_id}",
                 headers=self._get_headers(),
                 timeout=10
@@ -165,7 +222,7 @@ class APIClient:
     def create_user(self, user_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """创建用户"""
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/api/v1/auth/users",
                 json=user_data,
                 headers=self._get_headers(),
@@ -182,7 +239,7 @@ class APIClient:
     def update_user(self, user_id: str, user_data: Dict[str, Any]) -> bool:
         """更新用户"""
         try:
-            response = requests.put(
+            response = self.session.put(
                 f"{self.base_url}/api/v1/auth/users/{user_id}",
                 json=user_data,
                 headers=self._get_headers(),
@@ -200,7 +257,7 @@ class APIClient:
     def delete_user(self, user_id: str) -> bool:
         """删除用户"""
         try:
-            response = requests.delete(
+            response = self.session.delete(
                 f"{self.base_url}/api/v1/auth/users/{user_id}",
                 headers=self._get_headers(),
                 timeout=10
@@ -218,7 +275,7 @@ class APIClient:
     def reset_user_password(self, user_id: str, new_password: str) -> bool:
         """重置用户密码"""
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/api/v1/auth/users/{user_id}/reset-password",
                 json={"new_password": new_password},
                 headers=self._get_headers(),
@@ -238,7 +295,7 @@ class APIClient:
     def get_roles(self, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
         """获取角色列表"""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/api/v1/auth/roles",
                 headers=self._get_headers(),
                 params={"skip": skip, "limit": limit},
@@ -253,7 +310,7 @@ class APIClient:
     def get_role(self, role_id: str) -> Optional[Dict[str, Any]]:
         """获取角色详情"""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/api/v1/auth/roles/{role_id}",
                 headers=self._get_headers(),
                 timeout=10
@@ -266,7 +323,7 @@ class APIClient:
     def create_role(self, role_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """创建角色"""
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/api/v1/auth/roles",
                 json=role_data,
                 headers=self._get_headers(),
@@ -283,7 +340,7 @@ class APIClient:
     def update_role(self, role_id: str, role_data: Dict[str, Any]) -> bool:
         """更新角色"""
         try:
-            response = requests.put(
+            response = self.session.put(
                 f"{self.base_url}/api/v1/auth/roles/{role_id}",
                 json=role_data,
                 headers=self._get_headers(),
@@ -301,7 +358,7 @@ class APIClient:
     def delete_role(self, role_id: str) -> bool:
         """删除角色"""
         try:
-            response = requests.delete(
+            response = self.session.delete(
                 f"{self.base_url}/api/v1/auth/roles/{role_id}",
                 headers=self._get_headers(),
                 timeout=10
@@ -321,7 +378,7 @@ class APIClient:
     def get_permissions(self, skip: int = 0, limit: int = 1000) -> List[Dict[str, Any]]:
         """获取权限列表"""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/api/v1/auth/permissions",
                 headers=self._get_headers(),
                 params={"skip": skip, "limit": limit},
@@ -347,7 +404,7 @@ class APIClient:
             if user_id:
                 params["user_id"] = user_id
 
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/api/v1/auth/audit-logs",
                 headers=self._get_headers(),
                 params=params,
@@ -359,6 +416,42 @@ class APIClient:
             ui.notify(f"获取审计日志失败: {str(e)}", type="negative")
             return []
 
+    def get_audit_logs_page(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        **filters: Any
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        按游标获取一页审计日志
+
+        Args:
+            cursor: 上一页返回的游标，首页为 None
+            filters: user_id / action / resource_type / resource_id / start / end
+
+        Returns:
+            (日志列表, 下一页游标)；没有更多数据时游标为 None
+        """
+        try:
+            params = {"limit": limit}
+            if cursor:
+                params["cursor"] = cursor
+            params.update({k: v for k, v in filters.items() if v})
+
+            response = self.session.get(
+                f"{self.base_url}/api/v1/auth/audit-logs",
+                headers=self._get_headers(),
+                params=params,
+                timeout=10
+            )
+            data = self._handle_response(response)
+            if not isinstance(data, list):
+                return [], None
+            return data, response.headers.get("X-Next-Cursor")
+        except Exception as e:
+            ui.notify(f"获取审计日志失败: {str(e)}", type="negative")
+            return [], None
+
 
 # 全局 API 客户端实例
 api_client = APIClient()
@@ -10,16 +10,24 @@ from sqlalchemy.orm import Session
 from shared.config.settings import get_settings
 from shared.db.models_asset import Asset, AssetStructuredPayload, FileBlob
 from shared.db.models_project import Building, Zone, BuildingSystem, Device
-from shared.db.session import get_db
+from shared.db.session import get_db, get_read_db
 from ...schemas.asset import (
     AssetCreate,
     AssetRead,
+    AssetListRead,
     AssetDetailRead,
+    AnalysisQueueItemRead,
+    AnalysisQueueStatsRead,
     SceneIssueReportPayload,
     NameplateTablePayload,
     MeterReadingPayload,
 )
+from ...services.analysis_queue import get_scheduled_queue, queue_stats
 from ...services.image_pipeline import process_image_with_ocr, route_image_asset
+from ...responses import fast_list_response, parse_fields, parse_include, rows_to_dicts
+from ...services.asset_summary import load_latest_summaries
+from ...services.tree_closure import subtree_asset_filter
+from ...compression import no_compression
 
 
 router = APIRouter()
@@ -190,7 +198,7 @@ def _resolve_engineering_hierarchy(
     }
 
 
-@router.get("/", response_model=List[AssetRead], summary="List assets")
+@router.get("/", response_model=List[AssetListRead], summary="List assets")
 async def list_assets(
     project_id: Optional[uuid.UUID] = Query(default=None, description="Filter by project ID"),
     modality: Optional[str] = Query(default=None, description="Filter by modality, e.g. image, table"),
@@ -199,22 +207,41 @@ async def list_assets(
     zone_id: Optional[uuid.UUID] = Query(default=None, description="Filter by zone ID"),
     system_id: Optional[uuid.UUID] = Query(default=None, description="Filter by system ID"),
     device_id: Optional[uuid.UUID] = Query(default=None, description="Filter by device ID"),
+    subtree: bool = Query(
+        default=False,
+        description="With building/zone/system filters, also match assets attached to any descendant node",
+    ),
     updated_after: Optional[datetime] = Query(
         default=None,
         description="Return only assets with capture_time later than this UTC timestamp (incremental sync)",
     ),
-    db: Session = Depends(get_db),
-) -> List[AssetRead]:
+    fields: Optional[str] = Query(
+        default=None,
+        description="Comma-separated AssetRead fields to return (sparse fieldset); id is always included",
+    ),
+    include: Optional[str] = Query(
+        default=None,
+        description="Comma-separated extras: latest_summary (latest scene/meter/nameplate/OCR result summary)",
+    ),
+    db: Session = Depends(get_read_db),
+) -> List[AssetListRead]:
     """List assets with optional multi-dimensional and incremental-sync filters.
 
     Supports filtering by:
     - project
     - modality / content_role
-    - building / zone / system / device
+    - building / zone / system / device (``subtree=true``: the node and everything under it)
     - updated_after (for incremental sync based on capture_time)
+
+    Only the requested ``fields`` are selected from the database and serialised.
+    ``include=latest_summary`` attaches per-asset result summaries from one extra query.
     """
 
-    query = db.query(Asset)
+    selected = parse_fields(fields, AssetRead)
+    extras = parse_include(include, ("latest_summary",))
+    # 直接投影所需列，不加载 ORM 实例；engineer_path 在列表中一直为空
+    columns = [getattr(Asset, name) for name in selected if name != "engineer_path"]
+    query = db.query(*columns)
     if project_id is not None:
         query = query.filter(Asset.project_id == project_id)
     if modality is not None:
@@ -222,18 +249,69 @@ async def list_assets(
     if content_role is not None:
         query = query.filter(Asset.content_role == content_role)
     if building_id is not None:
-        query = query.filter(Asset.building_id == building_id)
+        query = query.filter(subtree_asset_filter(building_id) if subtree else Asset.building_id == building_id)
     if zone_id is not None:
-        query = query.filter(Asset.zone_id == zone_id)
+        query = query.filter(subtree_asset_filter(zone_id) if subtree else Asset.zone_id == zone_id)
     if system_id is not None:
-        query = query.filter(Asset.system_id == system_id)
+        query = query.filter(subtree_asset_filter(system_id) if subtree else Asset.system_id == system_id)
     if device_id is not None:
         query = query.filter(Asset.device_id == device_id)
     if updated_after is not None:
         query = query.filter(Asset.capture_time > updated_after)
 
-    assets = query.order_by(Asset.capture_time.desc().nullslast()).all()
-    return assets
+    items = rows_to_dicts(query.order_by(Asset.capture_time.desc().nullslast()))
+    if "engineer_path" in selected:
+        for item in items:
+            item["engineer_path"] = None
+    if "latest_summary" in extras:
+        summaries = load_latest_summaries(db, query.with_entities(Asset.id).statement)
+        for item in items:
+            item["latest_summary"] = summaries.get(item["id"])
+        return fast_list_response(items, AssetListRead, sparse=fields is not None)
+    return fast_list_response(items, AssetRead, sparse=fields is not None)
+
+
+@router.get(
+    "/analysis_queue",
+    response_model=List[AnalysisQueueItemRead],
+    summary="Pending image assets in scheduled analysis order",
+)
+async def get_analysis_queue(
+    project_id: Optional[uuid.UUID] = Query(default=None, description="Filter by project ID"),
+    limit: int = Query(default=50, ge=1, le=1000, description="Maximum number of assets to return"),
+    db: Session = Depends(get_db),
+) -> List[AnalysisQueueItemRead]:
+    """Return pending assets ordered by priority class, role, age and project fair share.
+
+    Workers should consume this endpoint instead of listing assets directly so that
+    a single project uploading thousands of photos cannot starve the others.
+    """
+
+    items: List[AnalysisQueueItemRead] = []
+    for entry in get_scheduled_queue(db, project_id, limit):
+        item = AnalysisQueueItemRead.model_validate(
+            {
+                **AssetRead.model_validate(entry.asset).model_dump(),
+                "priority_class": entry.priority_class,
+                "priority_score": round(entry.score, 4),
+                "expedite": entry.expedite,
+                "enqueued_at": entry.enqueued_at,
+            }
+        )
+        items.append(item)
+    return items
+
+
+@router.get(
+    "/analysis_queue/stats",
+    response_model=AnalysisQueueStatsRead,
+    summary="Analysis queue depth per priority class",
+)
+async def get_analysis_queue_stats(
+    project_id: Optional[uuid.UUID] = Query(default=None, description="Filter by project ID"),
+    db: Session = Depends(get_db),
+) -> AnalysisQueueStatsRead:
+    return queue_stats(db, project_id)
 
 
 @router.get(
@@ -243,7 +321,7 @@ async def list_assets(
 )
 async def get_asset(
     asset_id: uuid.UUID = Path(..., description="Asset ID"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ) -> AssetDetailRead:
     from shared.db.models_asset import FileBlob
 
@@ -269,9 +347,10 @@ async def get_asset(
     "/{asset_id}/download",
     summary="Download raw asset file by ID",
 )
+@no_compression
 async def download_asset_file(
     asset_id: uuid.UUID = Path(..., description="Asset ID"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """Serve the underlying file for an asset.
 
@@ -470,11 +549,15 @@ async def create_asset(
 )
 async def route_image_asset_endpoint(
     asset_id: uuid.UUID = Path(..., description="Asset ID"),
+    expedite: bool = Query(
+        default=False,
+        description="Interactive request; place the asset ahead of the analysis queue",
+    ),
     db: Session = Depends(get_db),
 ) -> AssetRead:
     try:
         # Pass UUID object through; route_image_asset handles UUID/str internally
-        asset = route_image_asset(db, asset_id)
+        asset = route_image_asset(db, asset_id, expedite=expedite)
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
     return asset
@@ -1,8 +1,9 @@
 """认证和用户管理 API 路由"""
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
 
 from shared.db.session import get_db
@@ -26,6 +27,7 @@ from ...schemas.auth import (
     AuditLogInfo
 )
 from ...services.auth_service import AuthService
+from ...services import audit_service
 
 router = APIRouter()
 settings = get_settings()
@@ -206,31 +208,47 @@ def change_password(
 
 @router.get("/users", response_model=List[UserDetail], summary="获取用户列表")
 def list_users(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="上一页响应头 X-Next-Cursor 的值"),
+    q: Optional[str] = Query(None, description="按用户名/姓名/邮箱/电话模糊搜索"),
+    sort: str = Query("created_at", description="排序字段：created_at / username"),
+    order: str = Query("desc", description="排序方向：asc / desc"),
+    is_active: Optional[bool] = None,
+    role_id: Optional[UUID] = None,
+    skip: int = Query(0, ge=0, description="兼容旧客户端的偏移量，建议改用 cursor"),
     current_user: User = Depends(get_current_superuser),
     db: Session = Depends(get_db)
 ):
     """
     获取用户列表（仅管理员）
 
-    - **skip**: 跳过的记录数
-    - **limit**: 返回的记录数
+    - **cursor**: 键集分页游标，下一页游标通过响应头 `X-Next-Cursor` 返回
+    - **q**: 搜索关键字
+    - **sort / order**: 排序
+    - **is_active / role_id**: 过滤条件
+    - **limit**: 每页条数
     """
-    print(f"[DEBUG] list_users called: skip={skip}, limit={limit}")
-    users = db.query(User).offset(skip).limit(limit).all()
-    print(f"[DEBUG] Found {len(users)} users")
+    try:
+        users, next_cursor = AuthService.list_users(
+            db,
+            limit=limit,
+            cursor=cursor,
+            search=q,
+            sort=sort,
+            order=order,
+            is_active=is_active,
+            role_id=role_id,
+            skip=skip,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-    result = []
-    for user in users:
-        # 查询角色
-        user_roles = db.query(Role).join(
-            UserRole
-        ).filter(
-            UserRole.user_id == user.id
-        ).all()
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
 
-        user_dict = {
+    return [
+        {
             "id": str(user.id),
             "username": user.username,
             "email": user.email,
@@ -247,13 +265,11 @@ def list_users(
                     "display_name": role.display_name,
                     "level": int(role.level)
                 }
-                for role in user_roles
+                for role in user.roles
             ]
         }
-        result.append(user_dict)
-
-    print(f"[DEBUG] Returning {len(result)} users")
-    return result
+        for user in users
+    ]
 
 
 @router.get("/users/{user_id}", response_model=UserDetail, summary="获取用户详情")
@@ -436,9 +452,9 @@ def get_role(
             detail="Role not found"
         )
 
-    # 查询权限
+    # 查询权限（单次 JOIN）
     permissions = db.query(Permission).join(
-        "role_permissions"
+        RolePermission, RolePermission.permission_id == Permission.id
     ).filter(
         RolePermission.role_id == role_id
     ).all()
@@ -486,45 +502,57 @@ def list_permissions(
 
 @router.get("/audit-logs", response_model=List[AuditLogInfo], summary="获取审计日志")
 def list_audit_logs(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    limit: int = Query(100, ge=1, le=audit_service.MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="上一页响应头 X-Next-Cursor 的值"),
+    user_id: Optional[UUID] = None,
+    action: Optional[str] = None,
+    resource_type: Optional[str] = None,
+    resource_id: Optional[str] = None,
+    start: Optional[datetime] = Query(None, description="起始时间（含）"),
+    end: Optional[datetime] = Query(None, description="结束时间（不含）"),
+    skip: int = Query(0, ge=0, description="兼容旧客户端的偏移量，建议改用 cursor"),
     current_user: User = Depends(get_current_superuser),
     db: Session = Depends(get_db)
 ):
     """
-    获取审计日志（仅管理员）
+    获取审计日志（仅管理员），最新在前
 
-    - **skip**: 跳过的记录数
-    - **limit**: 返回的记录数
+    - **cursor**: 键集分页游标，下一页游标通过响应头 `X-Next-Cursor` 返回
+    - **user_id / action / resource_type / resource_id**: 过滤条件
+    - **start / end**: 时间窗口
+    - **limit**: 每页条数
     """
-    print(f"[DEBUG] /audit-logs called: skip={skip}, limit={limit}")
-    logs = db.query(AuditLog).order_by(
-        AuditLog.created_at.desc()
-    ).offset(skip).limit(limit).all()
-    print(f"[DEBUG] Found {len(logs)} audit logs")
+    try:
+        items, next_cursor = audit_service.list_audit_logs(
+            db,
+            limit=limit,
+            cursor=cursor,
+            user_id=user_id,
+            action=action,
+            resource_type=resource_type,
+            resource_id=resource_id,
+            start=start,
+            end=end,
+            skip=skip,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-    # 添加用户名（方便查询）
-    result = []
-    for log in logs:
-        if log.user_id:
-            user = db.query(User).filter(User.id == log.user_id).first()
-            username = user.username if user else None
-        else:
-            username = None
-
-        log_dict = {
-            "id": str(log.id),
-            "user_id": str(log.user_id) if log.user_id else None,
-            "username": username,
-            "action": log.action,
-            "resource_type": log.resource_type,
-            "resource_id": log.resource_id,
-            "details": log.details,
-            "ip_address": log.ip_address,
-            "user_agent": log.user_agent,
-            "created_at": log.created_at.isoformat() if log.created_at else None
-        }
-        result.append(log_dict)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
 
-    print(f"[DEBUG] Returning {len(result)} audit logs")
-    return result
+
+@router.post("/audit-logs/archive", summary="归档过期审计日志")
+def archive_audit_logs(
+    retention_days: Optional[int] = Query(None, ge=1, description="默认取 BDC_AUDIT_RETENTION_DAYS"),
+    current_user: User = Depends(get_current_superuser),
+    db: Session = Depends(get_db)
+):
+    """
+    将超过保留期的审计日志搬迁至归档表，并按归档保留期清理归档表（仅管理员）
+    """
+    archived = audit_service.archive_audit_logs(db, retention_days=retention_days)
+    pruned = audit_service.prune_audit_archive(db)
+    return {"archived": archived, "pruned": pruned}
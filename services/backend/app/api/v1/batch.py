@@ -0,0 +1,136 @@
+"""
+批量请求：把多个只读 GET 子请求合并为一次往返
+
+子请求在进程内直接调用 ASGI 应用（经过完整的中间件与路由），并发执行，上限为
+BDC_BATCH_CONCURRENCY；单次子请求数上限为 BDC_BATCH_MAX_REQUESTS。
+外层请求的 Authorization / Cookie 等请求头原样传给每个子请求，认证结果由用户快照缓存复用；
+数据库连接取自同一连接池（Session 不能跨并发请求共享，每个子请求各用一个）。
+子请求的 JSON 响应体原样嵌入结果，不再反序列化。
+"""
+import asyncio
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlencode, urlsplit
+
+from fastapi import APIRouter, HTTPException, Request, Response, status
+
+from shared.config.settings import get_settings
+
+from ...responses import dumps
+from ...schemas.batch import BatchSubRequest, BatchSubResponse
+
+router = APIRouter()
+settings = get_settings()
+
+API_PREFIX = "/api/v1/"
+ALLOWED_METHODS = {"GET", "HEAD"}
+# 子请求结果中保留的响应头
+FORWARDED_RESPONSE_HEADERS = {"content-type", "etag", "last-modified", "x-next-cursor"}
+# 不传给子请求的请求头：子请求没有请求体，响应也不压缩
+_DROPPED_REQUEST_HEADERS = {b"content-length", b"content-type", b"accept-encoding", b"transfer-encoding", b"expect"}
+
+
+def _error(sub: BatchSubRequest, status_code: int, detail: str) -> bytes:
+    return dumps({"id": sub.id, "status": status_code, "headers": {}, "body": {"detail": detail}})
+
+
+async def _dispatch(request: Request, sub: BatchSubRequest) -> bytes:
+    """在进程内执行一个子请求，返回该子请求结果的 JSON 字节串"""
+    method = sub.method.upper()
+    if method not in ALLOWED_METHODS:
+        return _error(sub, status.HTTP_405_METHOD_NOT_ALLOWED, "Only GET sub-requests are supported")
+
+    parts = urlsplit(sub.path)
+    if not parts.path.startswith(API_PREFIX) or parts.path.rstrip("/") == "/api/v1/batch":
+        return _error(sub, status.HTTP_400_BAD_REQUEST, f"Sub-request path must start with {API_PREFIX}")
+
+    query_string = parts.query
+    if sub.query:
+        extra = urlencode(sub.query, doseq=True)
+        query_string = f"{query_string}&{extra}" if query_string else extra
+
+    parent = request.scope
+    scope: Dict[str, Any] = {
+        "type": "http",
+        "asgi": parent.get("asgi", {"version": "3.0"}),
+        "http_version": parent.get("http_version", "1.1"),
+        "method": method,
+        "scheme": parent.get("scheme", "http"),
+        "server": parent.get("server"),
+        "client": parent.get("client"),
+        "root_path": parent.get("root_path", ""),
+        "path": parts.path,
+        "raw_path": parts.path.encode("utf-8"),
+        "query_string": query_string.encode("latin-1"),
+        "headers": [(k, v) for k, v in parent.get("headers", []) if k not in _DROPPED_REQUEST_HEADERS],
+    }
+    if "state" in parent:
+        scope["state"] = dict(parent["state"])
+
+    finished = asyncio.Event()
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    status_code: Optional[int] = None
+    headers: Dict[str, str] = {}
+    chunks: List[bytes] = []
+
+    async def send(message):
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+            for key, value in message.get("headers", []):
+                name = key.decode("latin-1").lower()
+                if name in FORWARDED_RESPONSE_HEADERS:
+                    headers[name] = value.decode("latin-1")
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await request.app(scope, receive, send)
+    except Exception:
+        # 未处理异常：全局异常处理器已发送 500 响应体时沿用，否则补一个
+        if status_code is None:
+            return _error(sub, status.HTTP_500_INTERNAL_SERVER_ERROR, "Internal server error")
+    finally:
+        finished.set()
+
+    body = b"".join(chunks)
+    meta = dumps({"id": sub.id, "status": status_code, "headers": headers})
+    if not body:
+        embedded = b"null"
+    elif headers.get("content-type", "").startswith("application/json"):
+        embedded = body
+    else:
+        embedded = dumps(body.decode("utf-8", errors="replace"))
+    # {"id":..,"status":..,"headers":{..}} + "body"
+    return meta[:-1] + b',"body":' + embedded + b"}"
+
+
+@router.post(
+    "/",
+    response_model=List[BatchSubResponse],
+    summary="Execute several read-only API requests in one round-trip",
+)
+async def run_batch(requests: List[BatchSubRequest], request: Request) -> Response:
+    """Run GET sub-requests concurrently in-process and return their responses in order."""
+    if len(requests) > settings.batch_max_requests:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many sub-requests: {len(requests)} > {settings.batch_max_requests}",
+        )
+
+    semaphore = asyncio.Semaphore(max(1, settings.batch_concurrency))
+
+    async def _bounded(sub: BatchSubRequest) -> bytes:
+        async with semaphore:
+            return await _dispatch(request, sub)
+
+    results = await asyncio.gather(*(_bounded(sub) for sub in requests))
+    return Response(content=b"[" + b",".join(results) + b"]", media_type="application/json")
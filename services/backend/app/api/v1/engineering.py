@@ -1,15 +1,16 @@
 from typing import List, Optional
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from sqlalchemy.orm import Session
 
-from shared.db.session import get_db
+from shared.db.session import get_db, get_read_db
 from shared.db.models_project import Building, Zone, BuildingSystem, Device, Project
 from shared.db.models_asset import Asset
 from ...schemas.engineering import (
     BuildingCreate,
     BuildingRead,
+    BuildingRollupRead,
     ZoneCreate,
     ZoneRead,
     SystemCreate,
@@ -17,11 +18,13 @@ from ...schemas.engineering import (
     DeviceCreate,
     DeviceRead,
     DeviceFlatRead,
-    SystemSummary,
-    ZoneSummary,
 )
 from ...schemas.asset import AssetDetailRead
-from ...services.tree_service import EngineeringTreeService
+from ...services.tree_service import TREE_PARENT_TYPES, EngineeringTreeService
+from ...services.tree_cache import body_digest, etag_matches, get_tree_version, tree_cache, tree_etag
+from ...services.tree_changes import load_tree_changes, record_tree_change
+from ...services.tree_closure import building_rollup, subtree_asset_filter
+from ...responses import FastJSONResponse, dumps, fast_list_response, parse_fields, rows_to_dicts
 
 
 router = APIRouter()
@@ -37,9 +40,11 @@ async def list_buildings_for_project(
     usage_type: Optional[str] = Query(default=None),
     energy_grade: Optional[str] = Query(default=None),
     name_contains: Optional[str] = Query(default=None),
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(default=None, description="Comma-separated fields to return (sparse fieldset)"),
+    db: Session = Depends(get_read_db),
 ) -> List[BuildingRead]:
-    query = db.query(Building).filter(Building.project_id == project_id)
+    selected = parse_fields(fields, BuildingRead)
+    query = db.query(*(getattr(Building, name) for name in selected)).filter(Building.project_id == project_id)
     if usage_type is not None:
         query = query.filter(Building.usage_type == usage_type)
     if energy_grade is not None:
@@ -47,8 +52,21 @@ async def list_buildings_for_project(
     if name_contains:
         pattern = f"%{name_contains}%"
         query = query.filter(Building.name.ilike(pattern))
-    buildings = query.order_by(Building.name).all()
-    return buildings
+    rows = rows_to_dicts(query.order_by(Building.name))
+    return fast_list_response(rows, BuildingRead, sparse=fields is not None)
+
+
+@router.get(
+    "/projects/{project_id}/buildings/rollup",
+    response_model=List[BuildingRollupRead],
+    summary="Per-building roll-up of structure and asset counts",
+)
+async def get_building_rollup(
+    project_id: uuid.UUID,
+    db: Session = Depends(get_read_db),
+) -> List[BuildingRollupRead]:
+    """每个楼栋的分区 / 系统 / 设备数与资产汇总，经结构闭包表一条查询完成。"""
+    return fast_list_response(building_rollup(db, project_id), BuildingRollupRead)
 
 
 @router.post(
@@ -81,6 +99,7 @@ async def create_building_for_project(
 
     building = Building(project_id=project_id, **payload.model_dump())
     db.add(building)
+    record_tree_change(db, "insert", building)
     db.commit()
     db.refresh(building)
 
@@ -97,6 +116,7 @@ async def create_building_for_project(
         {"type": "energy_platform", "name": "能管平台"},
     ]
 
+    systems = []
     for tpl in default_systems:
         system = BuildingSystem(
             building_id=building.id,
@@ -104,7 +124,9 @@ async def create_building_for_project(
             name=tpl["name"],
         )
         db.add(system)
+        systems.append(system)
 
+    record_tree_change(db, "insert", *systems)
     db.commit()
 
     return building
@@ -117,7 +139,7 @@ async def create_building_for_project(
 )
 async def get_building(
     building_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ) -> BuildingRead:
     building = db.query(Building).filter(Building.id == building_id).one_or_none()
     if building is None:
@@ -141,6 +163,7 @@ async def update_building(
     update_data = payload.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(building, field, value)
+    record_tree_change(db, "update", building)
     db.commit()
     db.refresh(building)
     return building
@@ -158,6 +181,7 @@ async def delete_building(
     building = db.query(Building).filter(Building.id == building_id).one_or_none()
     if building is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Building not found")
+    record_tree_change(db, "delete", building)
     db.delete(building)
     db.commit()
     return None
@@ -172,16 +196,18 @@ async def list_zones_for_building(
     building_id: uuid.UUID,
     zone_type: Optional[str] = Query(default=None),
     name_contains: Optional[str] = Query(default=None),
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(default=None, description="Comma-separated fields to return (sparse fieldset)"),
+    db: Session = Depends(get_read_db),
 ) -> List[ZoneRead]:
-    query = db.query(Zone).filter(Zone.building_id == building_id)
+    selected = parse_fields(fields, ZoneRead)
+    query = db.query(*(getattr(Zone, name) for name in selected)).filter(Zone.building_id == building_id)
     if zone_type is not None:
         query = query.filter(Zone.type == zone_type)
     if name_contains:
         pattern = f"%{name_contains}%"
         query = query.filter(Zone.name.ilike(pattern))
-    zones = query.order_by(Zone.name).all()
-    return zones
+    rows = rows_to_dicts(query.order_by(Zone.name))
+    return fast_list_response(rows, ZoneRead, sparse=fields is not None)
 
 
 @router.post(
@@ -200,6 +226,7 @@ async def create_zone_for_building(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Building not found")
     zone = Zone(building_id=building_id, **payload.model_dump())
     db.add(zone)
+    record_tree_change(db, "insert", zone)
     db.commit()
     db.refresh(zone)
     return zone
@@ -212,7 +239,7 @@ async def create_zone_for_building(
 )
 async def get_zone(
     zone_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ) -> ZoneRead:
     zone = db.query(Zone).filter(Zone.id == zone_id).one_or_none()
     if zone is None:
@@ -236,6 +263,7 @@ async def update_zone(
     update_data = payload.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(zone, field, value)
+    record_tree_change(db, "update", zone)
     db.commit()
     db.refresh(zone)
     return zone
@@ -253,6 +281,7 @@ async def delete_zone(
     zone = db.query(Zone).filter(Zone.id == zone_id).one_or_none()
     if zone is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Zone not found")
+    record_tree_change(db, "delete", zone)
     db.delete(zone)
     db.commit()
     return None
@@ -267,16 +296,20 @@ async def list_systems_for_building(
     building_id: uuid.UUID,
     system_type: Optional[str] = Query(default=None),
     name_contains: Optional[str] = Query(default=None),
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(default=None, description="Comma-separated fields to return (sparse fieldset)"),
+    db: Session = Depends(get_read_db),
 ) -> List[SystemRead]:
-    query = db.query(BuildingSystem).filter(BuildingSystem.building_id == building_id)
+    selected = parse_fields(fields, SystemRead)
+    query = db.query(*(getattr(BuildingSystem, name) for name in selected)).filter(
+        BuildingSystem.building_id == building_id
+    )
     if system_type is not None:
         query = query.filter(BuildingSystem.type == system_type)
     if name_contains:
         pattern = f"%{name_contains}%"
         query = query.filter(BuildingSystem.name.ilike(pattern))
-    systems = query.order_by(BuildingSystem.name).all()
-    return systems
+    rows = rows_to_dicts(query.order_by(BuildingSystem.name))
+    return fast_list_response(rows, SystemRead, sparse=fields is not None)
 
 
 @router.post(
@@ -295,6 +328,7 @@ async def create_system_for_building(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Building not found")
     system = BuildingSystem(building_id=building_id, **payload.model_dump())
     db.add(system)
+    record_tree_change(db, "insert", system)
     db.commit()
     db.refresh(system)
     return system
@@ -307,7 +341,7 @@ async def create_system_for_building(
 )
 async def get_system(
     system_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ) -> SystemRead:
     system = db.query(BuildingSystem).filter(BuildingSystem.id == system_id).one_or_none()
     if system is None:
@@ -331,6 +365,7 @@ async def update_system(
     update_data = payload.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(system, field, value)
+    record_tree_change(db, "update", system)
     db.commit()
     db.refresh(system)
     return system
@@ -348,6 +383,7 @@ async def delete_system(
     system = db.query(BuildingSystem).filter(BuildingSystem.id == system_id).one_or_none()
     if system is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="System not found")
+    record_tree_change(db, "delete", system)
     db.delete(system)
     db.commit()
     return None
@@ -381,6 +417,7 @@ async def create_device_for_system(
 
     device = Device(system_id=system_id, **payload.model_dump())
     db.add(device)
+    record_tree_change(db, "insert", device)
     db.commit()
     db.refresh(device)
     return device
@@ -395,15 +432,37 @@ async def list_devices_for_system(
     system_id: uuid.UUID,
     device_type: Optional[str] = Query(default=None),
     zone_id: Optional[uuid.UUID] = Query(default=None),
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(default=None, description="Comma-separated fields to return (sparse fieldset)"),
+    db: Session = Depends(get_read_db),
 ) -> List[DeviceRead]:
-    query = db.query(Device).filter(Device.system_id == system_id)
+    selected = parse_fields(fields, DeviceRead)
+    query = db.query(*(getattr(Device, name) for name in selected)).filter(Device.system_id == system_id)
     if device_type is not None:
         query = query.filter(Device.device_type == device_type)
     if zone_id is not None:
         query = query.filter(Device.zone_id == zone_id)
-    devices = query.order_by(Device.model).all()
-    return devices
+    rows = rows_to_dicts(query.order_by(Device.model))
+    return fast_list_response(rows, DeviceRead, sparse=fields is not None)
+
+
+# devices/flat 每个输出字段依赖的列（组合字段需要关联表的列）
+_SYSTEM_NAME = BuildingSystem.name.label("system_name")
+_SYSTEM_TYPE = BuildingSystem.type.label("system_type")
+_FLAT_DEVICE_COLUMNS = {
+    "id": (Device.id,),
+    "system_id": (Device.system_id,),
+    "zone_id": (Device.zone_id,),
+    "device_type": (Device.device_type,),
+    "model": (Device.model,),
+    "rated_power": (Device.rated_power,),
+    "serial_no": (Device.serial_no,),
+    "tags": (Device.tags,),
+    "primary_system": (Device.system_id, _SYSTEM_NAME, _SYSTEM_TYPE),
+    "location": (Device.zone_id, Zone.name.label("zone_name")),
+    "engineer_path": (
+        Building.name.label("building_name"), _SYSTEM_NAME, _SYSTEM_TYPE, Device.model, Device.device_type,
+    ),
+}
 
 
 @router.get(
@@ -419,15 +478,23 @@ async def list_devices_flat_for_project(
     min_rated_power: Optional[float] = Query(default=None),
     tags: Optional[str] = Query(default=None, description="Comma-separated tags, AND semantics"),
     search: Optional[str] = Query(default=None, description="Search in model or serial_no"),
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(default=None, description="Comma-separated fields to return (sparse fieldset)"),
+    db: Session = Depends(get_read_db),
 ) -> List[DeviceFlatRead]:
+    selected = parse_fields(fields, DeviceFlatRead)
+    # 按列投影，只查询所选字段需要的列，不加载 Device/System/Zone 实例
+    columns = {}
+    for name in selected:
+        for column in _FLAT_DEVICE_COLUMNS[name]:
+            columns.setdefault(column.key, column)
     query = (
-        db.query(Device)
+        db.query(*columns.values())
         .join(BuildingSystem, Device.system_id == BuildingSystem.id)
         .join(Building, BuildingSystem.building_id == Building.id)
-        .options(joinedload(Device.system), joinedload(Device.zone))
         .filter(Building.project_id == project_id)
     )
+    if "location" in selected:
+        query = query.outerjoin(Zone, Device.zone_id == Zone.id)
 
     if system_id is not None:
         query = query.filter(Device.system_id == system_id)
@@ -445,44 +512,24 @@ async def list_devices_flat_for_project(
         pattern = f"%{search}%"
         query = query.filter((Device.model.ilike(pattern)) | (Device.serial_no.ilike(pattern)))
 
-    devices = query.order_by(Device.model).all()
-
-    results: List[DeviceFlatRead] = []
-    for dev in devices:
-        primary_system = None
-        if dev.system is not None:
-            primary_system = SystemSummary(id=dev.system.id, name=dev.system.name, type=dev.system.type)
-
-        location = None
-        if dev.zone is not None:
-            location = ZoneSummary(id=dev.zone.id, name=dev.zone.name)
-
-        engineer_parts = []
-        building = dev.system.building if dev.system is not None else None
-        if building is not None:
-            engineer_parts.append(building.name)
-        if dev.system is not None:
-            engineer_parts.append(dev.system.name or dev.system.type)
-        if dev.model or dev.device_type:
-            engineer_parts.append(dev.model or dev.device_type)
-        engineer_path = " / ".join(engineer_parts) if engineer_parts else None
-
-        flat = DeviceFlatRead(
-            id=dev.id,
-            system_id=dev.system_id,
-            zone_id=dev.zone_id,
-            device_type=dev.device_type,
-            model=dev.model,
-            rated_power=dev.rated_power,
-            serial_no=dev.serial_no,
-            tags=dev.tags,
-            primary_system=primary_system,
-            location=location,
-            engineer_path=engineer_path,
-        )
-        results.append(flat)
-
-    return results
+    results = []
+    for row in query.order_by(Device.model):
+        item = {}
+        for name in selected:
+            if name == "primary_system":
+                item[name] = {"id": row.system_id, "name": row.system_name, "type": row.system_type}
+            elif name == "location":
+                item[name] = {"id": row.zone_id, "name": row.zone_name} if row.zone_id is not None else None
+            elif name == "engineer_path":
+                engineer_parts = [row.building_name, row.system_name or row.system_type]
+                if row.model or row.device_type:
+                    engineer_parts.append(row.model or row.device_type)
+                item[name] = " / ".join(p for p in engineer_parts if p is not None)
+            else:
+                item[name] = getattr(row, name)
+        results.append(item)
+
+    return fast_list_response(results, DeviceFlatRead, sparse=fields is not None)
 
 
 @router.get(
@@ -491,13 +538,93 @@ async def list_devices_flat_for_project(
 )
 async def get_project_structure_tree(
     project_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    if_none_match: Optional[str] = Header(default=None),
+    db: Session = Depends(get_read_db),
 ) -> dict:
-    root = EngineeringTreeService.build_project_tree(project_id, db)
-    return {
+    """
+    结构树按 (项目, 树版本号) 缓存：结构写入递增版本号使条目失效，资产计数在条目超过
+    tree_counts_ttl 秒后重建时刷新；带 If-None-Match 且内容未变时返回 304。
+    """
+    version = get_tree_version(db, project_id)
+    if version is None:
+        return FastJSONResponse({
+            "project_id": str(project_id),
+            "tree": EngineeringTreeService.build_project_tree(project_id, db),
+        })
+
+    body = tree_cache.get(project_id, version)
+    if body is None:
+        body = dumps({
+            "project_id": str(project_id),
+            "seq": version,
+            "tree": EngineeringTreeService.build_project_tree(project_id, db),
+        })
+        tree_cache.put(project_id, version, body)
+    headers = {"ETag": tree_etag(project_id, version, digest=body_digest(body)), "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get(
+    "/projects/{project_id}/structure_tree/children",
+    summary="List one level of the engineering structure tree (lazy loading)",
+)
+async def list_structure_tree_children(
+    project_id: uuid.UUID,
+    parent_type: str = Query(default="project", description="project / building / system / zone / device"),
+    parent_id: Optional[uuid.UUID] = Query(default=None, description="Required unless parent_type=project"),
+    if_none_match: Optional[str] = Header(default=None),
+    db: Session = Depends(get_read_db),
+) -> dict:
+    """按层懒加载结构树：只返回一个父节点的直接子节点，附带 child_count / has_children 与资产计数。"""
+    if parent_type not in TREE_PARENT_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown parent_type: {parent_type}",
+        )
+    if parent_type != "project" and parent_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="parent_id is required unless parent_type=project",
+        )
+
+    version = get_tree_version(db, project_id)
+    if version is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+
+    children = EngineeringTreeService.list_children(project_id, parent_type, parent_id, db)
+    if children is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"{parent_type.capitalize()} not found")
+    body = dumps({
         "project_id": str(project_id),
-        "tree": EngineeringTreeService.tree_to_dict(root),
-    }
+        "parent_type": parent_type,
+        "parent_id": str(parent_id) if parent_id is not None else None,
+        "seq": version,
+        "children": children,
+    })
+    # 单层查询开销小，不缓存；按内容摘要比较，资产计数变化后客户端能拿到新值
+    scope = parent_type if parent_type == "project" else f"{parent_type}-{parent_id}"
+    headers = {"ETag": tree_etag(project_id, version, scope, body_digest(body)), "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get(
+    "/projects/{project_id}/structure_tree/changes",
+    summary="List engineering structure changes since a sequence number",
+)
+async def list_structure_tree_changes(
+    project_id: uuid.UUID,
+    since: int = Query(default=0, ge=0, description="Last seq the client has applied"),
+    db: Session = Depends(get_read_db),
+) -> dict:
+    """结构树增量同步：返回 seq > since 的楼栋 / 分区 / 系统 / 设备变更；reset=true 时客户端需整树重载。"""
+    result = load_tree_changes(db, project_id, since)
+    if result is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+    return FastJSONResponse(result)
 
 
 @router.get(
@@ -508,13 +635,15 @@ async def get_project_structure_tree(
 async def list_devices_for_zone(
     zone_id: uuid.UUID,
     device_type: Optional[str] = Query(default=None),
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(default=None, description="Comma-separated fields to return (sparse fieldset)"),
+    db: Session = Depends(get_read_db),
 ) -> List[DeviceRead]:
-    query = db.query(Device).filter(Device.zone_id == zone_id)
+    selected = parse_fields(fields, DeviceRead)
+    query = db.query(*(getattr(Device, name) for name in selected)).filter(Device.zone_id == zone_id)
     if device_type is not None:
         query = query.filter(Device.device_type == device_type)
-    devices = query.order_by(Device.model).all()
-    return devices
+    rows = rows_to_dicts(query.order_by(Device.model))
+    return fast_list_response(rows, DeviceRead, sparse=fields is not None)
 
 
 @router.get(
@@ -524,7 +653,7 @@ async def list_devices_for_zone(
 )
 async def get_device(
     device_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ) -> DeviceRead:
     device = db.query(Device).filter(Device.id == device_id).one_or_none()
     if device is None:
@@ -561,6 +690,7 @@ async def update_device(
 
     for field, value in update_data.items():
         setattr(device, field, value)
+    record_tree_change(db, "update", device)
     db.commit()
     db.refresh(device)
     return device
@@ -578,6 +708,7 @@ async def delete_device(
     device = db.query(Device).filter(Device.id == device_id).one_or_none()
     if device is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Device not found")
+    record_tree_change(db, "delete", device)
     db.delete(device)
     db.commit()
     return None
@@ -590,7 +721,7 @@ async def delete_device(
 )
 async def list_assets_for_device(
     device_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ) -> List[AssetDetailRead]:
     assets = (
         db.query(Asset)
@@ -608,11 +739,13 @@ async def list_assets_for_device(
 )
 async def list_assets_for_system(
     system_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    subtree: bool = Query(default=False, description="Include assets attached to any descendant node"),
+    db: Session = Depends(get_read_db),
 ) -> List[AssetDetailRead]:
+    criterion = subtree_asset_filter(system_id) if subtree else Asset.system_id == system_id
     assets = (
         db.query(Asset)
-        .filter(Asset.system_id == system_id)
+        .filter(criterion)
         .order_by(Asset.capture_time.desc().nullslast())
         .all()
     )
@@ -626,11 +759,13 @@ async def list_assets_for_system(
 )
 async def list_assets_for_zone(
     zone_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    subtree: bool = Query(default=False, description="Include assets attached to any descendant node"),
+    db: Session = Depends(get_read_db),
 ) -> List[AssetDetailRead]:
+    criterion = subtree_asset_filter(zone_id) if subtree else Asset.zone_id == zone_id
     assets = (
         db.query(Asset)
-        .filter(Asset.zone_id == zone_id)
+        .filter(criterion)
         .order_by(Asset.capture_time.desc().nullslast())
         .all()
     )
@@ -644,11 +779,13 @@ async def list_assets_for_zone(
 )
 async def list_assets_for_building(
     building_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    subtree: bool = Query(default=False, description="Include assets attached to any descendant node"),
+    db: Session = Depends(get_read_db),
 ) -> List[AssetDetailRead]:
+    criterion = subtree_asset_filter(building_id) if subtree else Asset.building_id == building_id
     assets = (
         db.query(Asset)
-        .filter(Asset.building_id == building_id)
+        .filter(criterion)
         .order_by(Asset.capture_time.desc().nullslast())
         .all()
     )
@@ -7,3 +7,31 @@ router = APIRouter()
 @router.get("/", summary="Health check")
 async def health_check() -> dict:
     return {"status": "ok"}
+
+
+@router.get("/startup", summary="Import and startup phase timings (seconds)")
+async def startup_phase_timings() -> dict:
+    from ...startup import startup_timings
+
+    return startup_timings.as_dict()
+
+
+@router.get("/audit", summary="Audit sink backpressure stats")
+async def audit_sink_stats() -> dict:
+    from ...services.audit_sink import audit_sink
+
+    return audit_sink.stats()
+
+
+@router.get("/db", summary="Database connection pool stats")
+async def db_pool_stats() -> dict:
+    from shared.db.pool import pool_status
+    from shared.db.session import engine, read_engine, replica_monitor
+
+    status = pool_status(engine)
+    if replica_monitor is not None:
+        status["replica"] = replica_monitor.stats()
+    if read_engine is not None:
+        # 只读副本的连接池单独统计，不与主库混算
+        status["replica_pool"] = pool_status(read_engine)
+    return status
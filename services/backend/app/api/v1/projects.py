@@ -9,7 +9,7 @@ import uuid
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
-from shared.db.session import get_db
+from shared.db.session import get_db, get_read_db
 from shared.db.models_project import Project
 from shared.db.models_auth import User
 from shared.security.dependencies import get_current_user
@@ -30,7 +30,7 @@ async def list_projects(
     client_contains: Optional[str] = Query(default=None, description="Filter by client name (partial match)"),
     name_contains: Optional[str] = Query(default=None, description="Filter by project name (partial match)"),
     include_deleted: bool = Query(default=False, description="Include soft-deleted projects"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ) -> List[ProjectRead]:
     """List all projects with optional filters.
@@ -76,7 +76,7 @@ async def list_projects(
 )
 async def get_project(
     project_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ) -> ProjectRead:
     """Get a specific project by ID."""
@@ -0,0 +1,220 @@
+"""
+响应压缩中间件
+
+按 Accept-Encoding 协商 br / zstd / gzip（brotli、zstandard 为可选依赖，未安装时只提供 gzip）：
+- 小于 minimum_size 的响应不压缩；
+- 已带 Content-Encoding、图片/音视频/压缩包等内容类型、206/204/304 响应不压缩；
+- 用 @no_compression 标记的接口（如原图下载）直接透传；
+- 流式响应逐块压缩，大块数据在线程池中压缩，避免阻塞事件循环。
+"""
+import zlib
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import anyio.to_thread
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None  # type: ignore[assignment]
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None  # type: ignore[assignment]
+
+# 服务端偏好顺序（客户端 q 值相同时）
+PREFERRED_ENCODINGS = ("br", "zstd", "gzip")
+
+EXCLUDED_CONTENT_TYPES = (
+    "image/",
+    "video/",
+    "audio/",
+    "font/woff",
+    "application/zip",
+    "application/gzip",
+    "application/x-gzip",
+    "application/pdf",
+    "text/event-stream",
+)
+
+_NO_COMPRESSION_ATTR = "__bdc_no_compression__"
+# 超过该大小的数据块在线程池中压缩
+_THREAD_MIN_SIZE = 256 * 1024
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """当前环境可用的编码（按偏好顺序）"""
+    return tuple(
+        name for name in PREFERRED_ENCODINGS
+        if name == "gzip" or (name == "br" and brotli is not None) or (name == "zstd" and zstandard is not None)
+    )
+
+
+def no_compression(endpoint: Callable) -> Callable:
+    """接口装饰器：响应不压缩（放在 @router.get 之下）"""
+    setattr(endpoint, _NO_COMPRESSION_ATTR, True)
+    return endpoint
+
+
+def negotiate(accept_encoding: str, encodings: Iterable[str]) -> Optional[str]:
+    """
+    按 Accept-Encoding 选择编码
+
+    q 值最高者优先，相同时按 encodings 的顺序；q=0 表示拒绝，"*" 匹配未列出的编码。
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip()] = q
+
+    best, best_q = None, 0.0
+    for name in encodings:
+        q = weights.get(name, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+class _Encoder:
+    """流式压缩器：compress() 处理数据块，finish() 结束压缩流"""
+
+    def __init__(self, encoding: str, levels: Dict[str, int]):
+        if encoding == "br":
+            self._obj = brotli.Compressor(quality=levels["br"])
+            self._compress, self._finish = self._obj.process, self._obj.finish
+        elif encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=levels["zstd"]).compressobj()
+            self._compress, self._finish = self._obj.compress, self._obj.flush
+        else:
+            self._obj = zlib.compressobj(levels["gzip"], zlib.DEFLATED, 31)
+            self._compress, self._finish = self._obj.compress, self._obj.flush
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._compress(data) if data else b""
+        if final:
+            out += self._finish()
+        return out
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: Callable,
+        minimum_size: int = 1024,
+        encodings: Optional[Iterable[str]] = None,
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+        zstd_level: int = 3,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        usable = available_encodings()
+        requested = tuple(encodings) if encodings is not None else usable
+        self.encodings = tuple(name for name in requested if name in usable)
+        self.levels = {"gzip": gzip_level, "br": brotli_quality, "zstd": zstd_level}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = ""
+        for key, value in scope.get("headers", []):
+            if key == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = negotiate(accept, self.encodings) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        await _CompressingSender(self, scope, encoding, send).run(receive)
+
+
+class _CompressingSender:
+    """单个请求的压缩状态"""
+
+    def __init__(self, middleware: CompressionMiddleware, scope: Dict[str, Any], encoding: str, send: Callable):
+        self.middleware = middleware
+        self.scope = scope
+        self.encoding = encoding
+        self.send = send
+        self.start_message: Optional[Dict[str, Any]] = None
+        self.passthrough = False
+        self.encoder: Optional[_Encoder] = None
+
+    async def run(self, receive) -> None:
+        await self.middleware.app(self.scope, receive, self._send)
+
+    def _should_skip(self, message: Dict[str, Any]) -> bool:
+        if message["status"] in (204, 206, 304) or message["status"] < 200:
+            return True
+        if getattr(self.scope.get("endpoint"), _NO_COMPRESSION_ATTR, False):
+            return True
+        for key, value in message.get("headers", []):
+            key = key.lower()
+            if key == b"content-encoding":
+                return True
+            if key == b"content-type" and value.decode("latin-1").lower().startswith(EXCLUDED_CONTENT_TYPES):
+                return True
+        return False
+
+    async def _send(self, message: Dict[str, Any]) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            self.start_message = message
+            self.passthrough = self._should_skip(message)
+            if self.passthrough:
+                await self.send(message)
+            return
+        if self.passthrough:
+            await self.send(message)
+            return
+        if message_type != "http.response.body":
+            if self.encoder is None:
+                # 例如 http.response.pathsend：尚未开始压缩时原样发送
+                self.passthrough = True
+                await self.send(self.start_message)
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is None:
+            headers = [(k, v) for k, v in self.start_message.get("headers", []) if k.lower() != b"vary"]
+            vary = [v for k, v in self.start_message.get("headers", []) if k.lower() == b"vary"]
+            vary_value = b", ".join(vary + [b"Accept-Encoding"])
+            if not more_body and len(body) < self.middleware.minimum_size:
+                self.start_message["headers"] = headers + [(b"vary", vary_value)]
+                self.passthrough = True
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+
+            self.encoder = _Encoder(self.encoding, self.middleware.levels)
+            headers = [(k, v) for k, v in headers if k.lower() != b"content-length"]
+            headers += [(b"content-encoding", self.encoding.encode("ascii")), (b"vary", vary_value)]
+            compressed = await self._compress(body, final=not more_body)
+            if not more_body:
+                headers.append((b"content-length", str(len(compressed)).encode("ascii")))
+            self.start_message["headers"] = headers
+            await self.send(self.start_message)
+        else:
+            compressed = await self._compress(body, final=not more_body)
+
+        await self.send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+    async def _compress(self, body: bytes, final: bool) -> bytes:
+        if len(body) >= _THREAD_MIN_SIZE:
+            return await anyio.to_thread.run_sync(self.encoder.compress, body, final)
+        return self.encoder.compress(body, final)
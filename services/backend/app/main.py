@@ -1,20 +1,35 @@
 import os
+import time
 from pathlib import Path
 import logging
 
+_IMPORT_STARTED = time.perf_counter()
+
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import inspect
 
+from shared.config.settings import get_settings
 from shared.db.base import Base
+from shared.db.instrumentation import query_stats_middleware
+from shared.db.replica import make_read_your_writes_middleware
+from shared.db.schema_version import check_schema_version, stamp_schema_version
 from shared.db.session import engine
 from shared.db import models_project, models_asset, models_auth  # noqa: F401
 
-from .api.v1 import health, assets, engineering, projects, auth
+from .api.v1 import health, assets, batch, engineering, projects, auth
+from .compression import CompressionMiddleware
+from .metrics import HTTPMetricsMiddleware, metrics_response
+from .services.audit_sink import audit_sink
+from .startup import startup_timings
+
+startup_timings.record("imports", time.perf_counter() - _IMPORT_STARTED)
 
 
 logger = logging.getLogger("bdc_ai")
+settings = get_settings()
 
 app = FastAPI(title="BDC-AI Backend", version="0.1.0")
 
@@ -32,10 +47,54 @@ app.add_middleware(
 )
 
 
+# SQL 埋点：每个请求的查询次数与数据库耗时
+if settings.query_stats_enabled:
+    app.middleware("http")(query_stats_middleware)
+
+# 写后读一致性：配置只读副本时，写请求成功后短时间内该客户端的读请求走主库
+if settings.read_database_url:
+    app.middleware("http")(make_read_your_writes_middleware(settings.read_your_writes_seconds))
+
+
+# 响应压缩：远程（Tailscale）客户端带宽受限，大列表与结构树压缩后传输
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_min_size,
+        encodings=settings.compression_encodings,
+    )
+
+
+# HTTP 指标：最后注册，位于最外层，覆盖其他中间件的耗时
+if settings.http_metrics_enabled:
+    app.add_middleware(HTTPMetricsMiddleware)
+
+
 @app.on_event("startup")
 def on_startup() -> None:
-    """Ensure database tables are created on startup."""
-    Base.metadata.create_all(bind=engine)
+    """Check (fast start) or create database tables, then start background workers."""
+    with startup_timings.phase("schema"):
+        if settings.fast_start:
+            # 生产环境：表结构由迁移脚本维护，这里只做一次版本查询
+            version = check_schema_version(engine)
+            logger.info("快速启动: 数据库结构版本 %s", version)
+        else:
+            # 只有 create_all 从空库建出全部表时才标记为当前版本；已有表的旧库版本
+            # 仍以迁移脚本为准，不能因补建缺失的表就被标记为已迁移
+            existing = set(inspect(engine).get_table_names()) & set(Base.metadata.tables)
+            Base.metadata.create_all(bind=engine)
+            if not existing:
+                stamp_schema_version(engine, description="create_all")
+    if settings.audit_async_enabled:
+        with startup_timings.phase("audit_sink"):
+            audit_sink.start()
+    startup_timings.log_summary()
+
+
+@app.on_event("shutdown")
+def on_shutdown() -> None:
+    """Flush buffered audit records before the process exits."""
+    audit_sink.stop()
 
 
 @app.exception_handler(Exception)
@@ -70,8 +129,15 @@ app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
 app.include_router(projects.router, prefix="/api/v1/projects", tags=["projects"])
 app.include_router(assets.router, prefix="/api/v1/assets", tags=["assets"])
 app.include_router(engineering.router, prefix="/api/v1", tags=["engineering"])
+app.include_router(batch.router, prefix="/api/v1/batch", tags=["batch"])
 
 
 @app.get("/")
 async def read_root() -> dict:
     return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint."""
+    return metrics_response()
@@ -0,0 +1,185 @@
+"""
+后端可观测性：HTTP 指标中间件与 Prometheus /metrics 端点
+
+- bdc_http_requests_total{method,route,status}            请求数（吞吐、错误率）
+- bdc_http_request_duration_seconds{method,route}         请求耗时直方图
+- bdc_http_response_size_bytes{method,route}              响应体大小直方图
+- bdc_http_requests_in_flight                             进行中的请求数
+- bdc_db_pool_*{pool}                                     主库 primary / 只读副本 replica 各自的连接池状态与获取连接等待
+- bdc_cache_*{cache}                                      权限 / 用户快照 / 结构树缓存命中统计
+- bdc_audit_sink_*                                        审计写入队列深度与溢出
+- bdc_startup_phase_seconds{phase}                        导入与启动各阶段耗时
+
+route 标签使用路由模板（如 /api/v1/assets/{asset_id}），未匹配的路径统一记为 <unmatched>，
+避免标签基数随 URL 增长。中间件为纯 ASGI 实现，每个请求只做少量字符串替换与计数。
+"""
+import time
+from typing import Any, Callable, Dict, Iterable
+
+from fastapi import Response
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+REGISTRY = CollectorRegistry()
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+REQUESTS_TOTAL = Counter(
+    "bdc_http_requests_total",
+    "HTTP requests by method, route template and status code",
+    ["method", "route", "status"],
+    registry=REGISTRY,
+)
+REQUEST_SECONDS = Histogram(
+    "bdc_http_request_duration_seconds",
+    "HTTP request latency by method and route template",
+    ["method", "route"],
+    buckets=_LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+RESPONSE_BYTES = Histogram(
+    "bdc_http_response_size_bytes",
+    "HTTP response body size by method and route template",
+    ["method", "route"],
+    buckets=_SIZE_BUCKETS,
+    registry=REGISTRY,
+)
+IN_FLIGHT = Gauge(
+    "bdc_http_requests_in_flight",
+    "HTTP requests currently being served",
+    registry=REGISTRY,
+)
+
+
+def _route_template(scope: Dict[str, Any]) -> str:
+    """
+    还原路由模板：把路径中的路径参数值替换回 {name}
+
+    不依赖 scope["route"]，因为嵌套 APIRouter 时其中只有相对路径。
+    """
+    if scope.get("endpoint") is None and scope.get("route") is None:
+        return UNMATCHED_ROUTE
+    path = scope.get("path", "")
+    for name, value in (scope.get("path_params") or {}).items():
+        path = path.replace(f"/{value}", f"/{{{name}}}", 1)
+    return path
+
+
+class HTTPMetricsMiddleware:
+    """记录每个 HTTP 请求的耗时、状态码与响应大小的 ASGI 中间件"""
+
+    def __init__(self, app: Callable):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        body_bytes = 0
+
+        async def _send(message):
+            nonlocal status_code, body_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                body_bytes += len(message.get("body", b""))
+            await send(message)
+
+        IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            elapsed = time.perf_counter() - started
+            IN_FLIGHT.dec()
+            method = scope.get("method", "")
+            route = _route_template(scope)
+            REQUESTS_TOTAL.labels(method=method, route=route, status=str(status_code)).inc()
+            REQUEST_SECONDS.labels(method=method, route=route).observe(elapsed)
+            RESPONSE_BYTES.labels(method=method, route=route).observe(body_bytes)
+
+
+class RuntimeStatsCollector:
+    """抓取时读取连接池、缓存与审计队列的当前状态"""
+
+    def collect(self) -> Iterable:
+        from shared.db.pool import pool_status
+        from shared.db.session import engine, read_engine, replica_monitor
+        from shared.security.jwt import _decode_token_cached
+        from shared.security.permission_cache import permission_cache
+        from shared.security.principal_cache import principal_cache
+        from .services.audit_sink import audit_sink
+        from .services.tree_cache import tree_cache
+        from .startup import startup_timings
+
+        # 主库与只读副本各自一个连接池，按 pool 标签区分
+        pools = [("primary", pool_status(engine))]
+        if read_engine is not None:
+            pools.append(("replica", pool_status(read_engine)))
+        for key in ("size", "in_use", "checked_in", "overflow"):
+            gauge = GaugeMetricFamily(f"bdc_db_pool_{key}", f"Database pool {key.replace('_', ' ')}",
+                                      labels=["pool"])
+            for name, pool in pools:
+                if key in pool:
+                    gauge.add_metric([name], pool[key])
+            if gauge.samples:
+                yield gauge
+        for key, stat, documentation in (
+            ("checkouts", "checkouts", "Connections checked out of the pool"),
+            ("timeouts", "timeouts", "Pool checkouts that timed out"),
+            ("wait_seconds", "wait_seconds_total", "Total time spent waiting for a connection"),
+        ):
+            counter = CounterMetricFamily(f"bdc_db_pool_{key}", documentation, labels=["pool"])
+            for name, pool in pools:
+                counter.add_metric([name], pool[stat])
+            yield counter
+        if replica_monitor is not None:
+            replica = replica_monitor.stats()
+            yield GaugeMetricFamily("bdc_db_replica_healthy", "Whether reads are routed to the replica",
+                                    value=1 if replica["healthy"] else 0)
+            if replica["lag_seconds"] is not None:
+                yield GaugeMetricFamily("bdc_db_replica_lag_seconds", "Last measured replica replay lag",
+                                        value=replica["lag_seconds"])
+
+        hits = CounterMetricFamily("bdc_cache_hits", "In-process cache hits", labels=["cache"])
+        misses = CounterMetricFamily("bdc_cache_misses", "In-process cache misses", labels=["cache"])
+        entries = GaugeMetricFamily("bdc_cache_entries", "In-process cache entries", labels=["cache"])
+        for name, cache in (("permission", permission_cache), ("principal", principal_cache),
+                            ("structure_tree", tree_cache)):
+            stats = cache.stats()
+            hits.add_metric([name], stats["hits"])
+            misses.add_metric([name], stats["misses"])
+            entries.add_metric([name], stats["entries"])
+        token_cache = _decode_token_cached.cache_info()
+        hits.add_metric(["token_decode"], token_cache.hits)
+        misses.add_metric(["token_decode"], token_cache.misses)
+        entries.add_metric(["token_decode"], token_cache.currsize)
+        yield hits
+        yield misses
+        yield entries
+
+        sink = audit_sink.stats()
+        yield GaugeMetricFamily("bdc_audit_sink_queue_depth", "Audit records waiting to be written",
+                                value=sink["queue_depth"])
+        for key in ("written", "spilled", "failed_batches"):
+            yield CounterMetricFamily(f"bdc_audit_sink_{key}", f"Audit sink {key.replace('_', ' ')}",
+                                      value=sink[key])
+
+        phases = GaugeMetricFamily("bdc_startup_phase_seconds", "Import and startup phase durations",
+                                   labels=["phase"])
+        for name, seconds in startup_timings.phases.items():
+            phases.add_metric([name], seconds)
+        yield phases
+
+
+REGISTRY.register(RuntimeStatsCollector())
+
+
+def metrics_response() -> Response:
+    """Prometheus 文本格式的指标响应"""
+    return Response(content=generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
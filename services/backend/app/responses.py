@@ -0,0 +1,113 @@
+"""
+大列表 / 结构树接口的快速 JSON 输出
+
+热点列表接口直接把 SQL 行投影为 dict，跳过逐行构造 Pydantic 模型，再用 orjson 序列化：
+- FastJSONResponse：orjson 原生处理 UUID / datetime，未安装 orjson 时回落标准库 json；
+- rows_to_dicts：把 Query(*columns) 返回的 Row 转为 dict；
+- fast_list_response：调试模式（BDC_DEBUG）下先按 response schema 校验，生产环境不校验；
+- parse_fields：解析列表接口的 fields= 参数（稀疏字段集），只投影、只输出所需字段；
+- parse_include：解析 include= 参数（附加的关联数据）。
+
+接口仍保留 response_model 以生成 OpenAPI 文档；直接返回 Response 时 FastAPI 不再重复序列化。
+"""
+import json
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Type
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+from shared.config.settings import get_settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore[assignment]
+
+settings = get_settings()
+
+
+def dumps(content: Any) -> bytes:
+    """序列化为 JSON 字节串"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """基于 orjson 的 JSON 响应"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def rows_to_dicts(rows: Iterable[Any]) -> List[Dict[str, Any]]:
+    """把 SQLAlchemy Row 转为 dict（键为列标签）"""
+    return [row._asdict() for row in rows]
+
+
+def parse_fields(
+    fields: Optional[str], schema: Type[BaseModel], always: Sequence[str] = ("id",)
+) -> List[str]:
+    """
+    解析逗号分隔的 fields= 参数，按 schema 字段顺序返回；未指定时返回全部字段
+
+    always 中的字段（默认 id，供客户端作为行键）总是包含在内。
+
+    Raises:
+        HTTPException: 400 包含 schema 中不存在的字段
+    """
+    names = list(schema.model_fields)
+    if not fields:
+        return names
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(names)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}; allowed: {', '.join(names)}",
+        )
+    requested.update(always)
+    return [name for name in names if name in requested]
+
+
+def parse_include(include: Optional[str], allowed: Sequence[str]) -> List[str]:
+    """
+    解析逗号分隔的 include= 参数
+
+    Raises:
+        HTTPException: 400 包含不支持的选项
+    """
+    if not include:
+        return []
+    requested = [name.strip() for name in include.split(",") if name.strip()]
+    unknown = set(requested) - set(allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown include: {', '.join(sorted(unknown))}; allowed: {', '.join(allowed)}",
+        )
+    return requested
+
+
+_adapters: Dict[Type[BaseModel], TypeAdapter] = {}
+
+
+def fast_list_response(
+    items: List[Dict[str, Any]], schema: Type[BaseModel], sparse: bool = False
+) -> FastJSONResponse:
+    """
+    返回列表响应；调试模式下按 schema 校验每一项（稀疏字段集缺少必填字段，不校验）
+
+    Raises:
+        pydantic.ValidationError: 调试模式下投影字段与 schema 不一致
+    """
+    if settings.debug and not sparse:
+        adapter = _adapters.get(schema)
+        if adapter is None:
+            adapter = _adapters[schema] = TypeAdapter(List[schema])
+        items = adapter.dump_python(adapter.validate_python(items), mode="json")
+    return FastJSONResponse(items)
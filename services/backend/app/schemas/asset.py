@@ -48,6 +48,43 @@ class AssetRead(AssetBase):
     engineer_path: Optional[str] = None
 
 
+class AssetLatestSummary(BaseModel):
+    """Compact summary of the latest structured results of an asset."""
+
+    scene_severity: Optional[str] = None
+    scene_category: Optional[str] = None
+    meter_reading: Optional[float] = None
+    meter_unit: Optional[str] = None
+    nameplate_equipment_type: Optional[str] = None
+    ocr_avg_confidence: Optional[float] = None
+
+
+class AssetListRead(AssetRead):
+    """Asset list row; latest_summary is only filled with include=latest_summary."""
+
+    latest_summary: Optional[AssetLatestSummary] = None
+
+
+class AnalysisQueueItemRead(AssetRead):
+    """Pending image asset as scheduled by the analysis queue."""
+
+    priority_class: str
+    priority_score: float
+    expedite: bool = False
+    enqueued_at: Optional[datetime] = None
+
+
+class AnalysisQueueClassStats(BaseModel):
+    depth: int
+    oldest_wait_seconds: Optional[float] = None
+
+
+class AnalysisQueueStatsRead(BaseModel):
+    total: int
+    by_priority_class: Dict[str, AnalysisQueueClassStats]
+    by_project: Dict[str, int]
+
+
 class AssetStructuredPayloadRead(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
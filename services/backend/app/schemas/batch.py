@@ -0,0 +1,21 @@
+from typing import Any, Dict, List, Optional, Union
+
+from pydantic import BaseModel
+
+
+class BatchSubRequest(BaseModel):
+    """One sub-request of POST /api/v1/batch."""
+
+    # Client-side correlation id, echoed back in the result
+    id: Optional[str] = None
+    method: str = "GET"
+    # Absolute API path, e.g. "/api/v1/assets/"
+    path: str
+    query: Optional[Dict[str, Union[str, int, float, bool, List[Union[str, int, float, bool]]]]] = None
+
+
+class BatchSubResponse(BaseModel):
+    id: Optional[str] = None
+    status: int
+    headers: Dict[str, str] = {}
+    body: Any = None
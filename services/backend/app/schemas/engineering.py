@@ -1,4 +1,5 @@
 import uuid
+from datetime import datetime
 from typing import List, Optional
 
 from pydantic import BaseModel, ConfigDict
@@ -24,6 +25,17 @@ class BuildingRead(BuildingBase):
     project_id: uuid.UUID
 
 
+class BuildingRollupRead(BaseModel):
+    building_id: uuid.UUID
+    name: str
+    zone_count: int
+    system_count: int
+    device_count: int
+    asset_count: int
+    pending_count: int
+    latest_capture_time: Optional[datetime] = None
+
+
 class ZoneBase(BaseModel):
     name: str
     type: Optional[str] = None
@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import heapq
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, case, false, func
+from sqlalchemy.orm import Session, aliased
+
+from shared.config.settings import get_settings
+from shared.db.models_asset import Asset, AssetStructuredPayload
+
+
+settings = get_settings()
+
+# 待 LLM 分析的资产状态（由 route_image_asset 设置）
+PENDING_STATUS = "pending_scene_llm"
+
+# content_role 基础优先级：仪表读数 > 铭牌 > 现场问题/其他
+ROLE_PRIORITY: Dict[str, float] = {
+    "meter": 3.0,
+    "nameplate": 2.0,
+    "scene_issue": 1.0,
+}
+DEFAULT_ROLE_PRIORITY = 1.0
+
+# 优先级类别（由高到低）；expedite 来自 PC 端交互式提交，始终排在最前
+PRIORITY_CLASSES = ("expedite", "high", "normal", "low")
+_ROLE_CLASS = {"meter": "high", "nameplate": "normal"}
+
+
+@dataclass
+class QueueEntry:
+    """分析队列中的一条待处理资产及其调度属性。"""
+
+    asset: Asset
+    project_id: str
+    content_role: str
+    enqueued_at: Optional[datetime]
+    expedite: bool = False
+    priority_class: str = "low"
+    score: float = 0.0
+
+
+def priority_class_for(role: str, expedite: bool = False) -> str:
+    if expedite:
+        return "expedite"
+    return _ROLE_CLASS.get(role, "low")
+
+
+def priority_score(role: str, enqueued_at: Optional[datetime], now: datetime,
+                   aging_per_hour: float) -> float:
+    """基础角色优先级 + 排队时长老化加分。"""
+
+    score = ROLE_PRIORITY.get(role, DEFAULT_ROLE_PRIORITY)
+    if enqueued_at is not None and aging_per_hour > 0:
+        age_hours = max((now - enqueued_at).total_seconds(), 0.0) / 3600.0
+        score += age_hours * aging_per_hour
+    return score
+
+
+def schedule(entries: Iterable[QueueEntry], project_weights: Dict[str, float],
+             limit: Optional[int] = None) -> List[QueueEntry]:
+    """按优先级与项目公平份额排出处理顺序。
+
+    - expedite 条目按入队时间先后排在最前；
+    - 其余条目先在项目内按 score 降序排列，再在项目间做加权公平调度：
+      每次选取 已出队数 / 项目权重 最小的项目，避免单个项目独占 Worker。
+    """
+
+    expedited: List[QueueEntry] = []
+    per_project: Dict[str, List[QueueEntry]] = {}
+    for entry in entries:
+        if entry.expedite:
+            expedited.append(entry)
+        else:
+            per_project.setdefault(entry.project_id, []).append(entry)
+
+    expedited.sort(key=lambda e: (e.enqueued_at or datetime.min, str(e.asset.id)))
+    ordered: List[QueueEntry] = list(expedited)
+
+    heap = []
+    for project_id, items in per_project.items():
+        items.sort(key=lambda e: (-e.score, e.enqueued_at or datetime.min, str(e.asset.id)))
+        items.reverse()  # 以列表尾部作为队首，pop() 为 O(1)
+        heap.append((0.0, -items[-1].score, project_id))
+    heapq.heapify(heap)
+    served: Dict[str, int] = {}
+
+    while heap and (limit is None or len(ordered) < limit):
+        _, _, project_id = heapq.heappop(heap)
+        items = per_project[project_id]
+        ordered.append(items.pop())
+        served[project_id] = served.get(project_id, 0) + 1
+        if items:
+            weight = project_weights.get(project_id, 1.0)
+            heapq.heappush(heap, (served[project_id] / weight, -items[-1].score, project_id))
+
+    return ordered if limit is None else ordered[:limit]
+
+
+ROUTE_DECISION_SCHEMA = "image_route_decision_v1"
+
+
+def _pending_filter(project_id: Optional[uuid.UUID]) -> list:
+    conditions = [Asset.status == PENDING_STATUS, Asset.modality == "image"]
+    if project_id is not None:
+        conditions.append(Asset.project_id == project_id)
+    return conditions
+
+
+def _scheduling_columns(db: Session, project_id: Optional[uuid.UUID]):
+    """
+    待分析资产的调度列子查询：id、项目、角色、入队时间、expedite
+
+    入队时间与 expedite 取自最近一次路由决策（无决策时入队时间取 capture_time），
+    只读取这几列，不加载资产与决策 payload 全文。
+    """
+
+    conditions = _pending_filter(project_id)
+    latest = (
+        db.query(AssetStructuredPayload.asset_id, func.max(AssetStructuredPayload.version).label("version"))
+        .join(Asset, Asset.id == AssetStructuredPayload.asset_id)
+        .filter(AssetStructuredPayload.schema_type == ROUTE_DECISION_SCHEMA, *conditions)
+        .group_by(AssetStructuredPayload.asset_id)
+        .subquery()
+    )
+    decision = aliased(AssetStructuredPayload)
+    return (
+        db.query(
+            Asset.id.label("id"),
+            Asset.project_id.label("project_id"),
+            func.lower(func.coalesce(Asset.content_role, "")).label("content_role"),
+            func.coalesce(decision.created_at, Asset.capture_time).label("enqueued_at"),
+            func.coalesce(decision.payload["expedite"].as_boolean(), false()).label("expedite"),
+        )
+        .outerjoin(latest, latest.c.asset_id == Asset.id)
+        .outerjoin(
+            decision,
+            and_(
+                decision.asset_id == latest.c.asset_id,
+                decision.version == latest.c.version,
+                decision.schema_type == ROUTE_DECISION_SCHEMA,
+            ),
+        )
+        .filter(*conditions)
+        .subquery()
+    )
+
+
+def _epoch_seconds(db: Session, column):
+    if db.get_bind().dialect.name == "sqlite":
+        return (func.julianday(column) - 2440587.5) * 86400.0
+    return func.extract("epoch", column)
+
+
+def _priority_order(db: Session, columns) -> list:
+    """
+    项目内出队顺序：expedite 按入队先后排最前，其余按 priority_score 降序
+
+    priority_score = 角色优先级 + 排队小时数 × aging，对固定的 now 而言与
+    角色优先级 × 3600 / aging − 入队时刻（秒）同序，因此不依赖 now，可直接在 SQL 中排序。
+    """
+
+    role_priority = case(
+        *[(columns.c.content_role == role, value) for role, value in ROLE_PRIORITY.items()],
+        else_=DEFAULT_ROLE_PRIORITY,
+    )
+    aging = settings.analysis_queue_aging_per_hour
+    enqueued = _epoch_seconds(db, columns.c.enqueued_at)
+    if aging > 0:
+        score_order = [(role_priority * (3600.0 / aging) - func.coalesce(enqueued, 0.0)).desc()]
+    else:
+        score_order = [role_priority.desc(), columns.c.enqueued_at.asc()]
+    expedite_first = case((columns.c.expedite, 0), else_=1)
+    expedite_age = case((columns.c.expedite, enqueued), else_=None)
+    return [expedite_first, expedite_age.asc(), *score_order, columns.c.id]
+
+
+def load_queue_entries(db: Session, project_id: Optional[uuid.UUID] = None,
+                       now: Optional[datetime] = None,
+                       per_project_limit: Optional[int] = None) -> List[QueueEntry]:
+    """
+    读取待分析图片资产的调度属性
+
+    per_project_limit 给定时每个项目只取出队顺序最靠前的若干条：任意 limit 条的调度结果
+    在单个项目内最多取 limit 条，因此按 limit 截断不改变 schedule 的结果。
+    返回条目的 asset 只带 id，需要完整资产时由调用方按 id 加载。
+    """
+
+    now = now or datetime.utcnow()
+    columns = _scheduling_columns(db, project_id)
+    order = _priority_order(db, columns)
+    query = db.query(columns)
+    if per_project_limit is not None:
+        ranked = db.query(
+            columns,
+            func.row_number().over(partition_by=columns.c.project_id, order_by=order).label("rank"),
+        ).subquery()
+        query = db.query(*[ranked.c[c.name] for c in columns.c]).filter(ranked.c.rank <= per_project_limit)
+    aging = settings.analysis_queue_aging_per_hour
+
+    entries: List[QueueEntry] = []
+    for row in query.all():
+        role = row.content_role or ""
+        expedite = bool(row.expedite)
+        entries.append(
+            QueueEntry(
+                asset=SimpleNamespace(id=row.id),
+                project_id=str(row.project_id),
+                content_role=role,
+                enqueued_at=row.enqueued_at,
+                expedite=expedite,
+                priority_class=priority_class_for(role, expedite),
+                score=priority_score(role, row.enqueued_at, now, aging),
+            )
+        )
+    return entries
+
+
+def get_scheduled_queue(db: Session, project_id: Optional[uuid.UUID] = None,
+                        limit: Optional[int] = None) -> List[QueueEntry]:
+    """按调度顺序返回待分析资产，仅为最终出队的条目加载完整 Asset"""
+
+    entries = load_queue_entries(db, project_id, per_project_limit=limit)
+    ordered = schedule(entries, settings.analysis_queue_project_weights, limit)
+    assets = {
+        asset.id: asset
+        for asset in db.query(Asset).filter(Asset.id.in_([e.asset.id for e in ordered]))
+    } if ordered else {}
+    for entry in ordered:
+        entry.asset = assets[entry.asset.id]
+    return ordered
+
+
+def queue_stats(db: Session, project_id: Optional[uuid.UUID] = None,
+                now: Optional[datetime] = None) -> Dict[str, Any]:
+    """按优先级类别/项目统计队列深度及最长等待时间（秒），由一条聚合查询完成。"""
+
+    now = now or datetime.utcnow()
+    columns = _scheduling_columns(db, project_id)
+    rows = (
+        db.query(
+            columns.c.project_id,
+            columns.c.content_role,
+            columns.c.expedite,
+            func.count(),
+            func.min(columns.c.enqueued_at),
+        )
+        .group_by(columns.c.project_id, columns.c.content_role, columns.c.expedite)
+        .all()
+    )
+
+    by_class: Dict[str, Dict[str, Any]] = {
+        name: {"depth": 0, "oldest_wait_seconds": None} for name in PRIORITY_CLASSES
+    }
+    by_project: Dict[str, int] = {}
+    total = 0
+    for project, role, expedite, count, oldest in rows:
+        total += count
+        bucket = by_class[priority_class_for(role or "", bool(expedite))]
+        bucket["depth"] += count
+        if oldest is not None:
+            wait = max((now - oldest).total_seconds(), 0.0)
+            if bucket["oldest_wait_seconds"] is None or wait > bucket["oldest_wait_seconds"]:
+                bucket["oldest_wait_seconds"] = wait
+        by_project[str(project)] = by_project.get(str(project), 0) + count
+    return {"total": total, "by_priority_class": by_class, "by_project": by_project}
@@ -0,0 +1,83 @@
+"""
+资产列表的最新解析结果摘要（include=latest_summary）
+
+一条集合查询取每个资产每种结果类型的最新一条（ROW_NUMBER 窗口函数，PostgreSQL / SQLite 通用），
+并在 SQL 中只提取摘要字段，不传输完整 payload（OCR 结果含大量 bbox 数组）。
+"""
+from typing import Any, Dict
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from shared.db.models_asset import AssetStructuredPayload
+
+SCENE_ISSUE = "scene_issue_report_v1"
+METER_READING = "meter_reading_v1"
+NAMEPLATE = "nameplate_table_v1"
+OCR = "image_annotation"
+
+SUMMARY_SCHEMA_TYPES = (SCENE_ISSUE, METER_READING, NAMEPLATE, OCR)
+
+
+def _empty_summary() -> Dict[str, Any]:
+    return {
+        "scene_severity": None,
+        "scene_category": None,
+        "meter_reading": None,
+        "meter_unit": None,
+        "nameplate_equipment_type": None,
+        "ocr_avg_confidence": None,
+    }
+
+
+def load_latest_summaries(db: Session, asset_ids: Select) -> Dict[Any, Dict[str, Any]]:
+    """
+    按资产返回最新结果摘要
+
+    Args:
+        db: 数据库会话
+        asset_ids: 返回资产 ID 的子查询（与列表接口使用相同过滤条件）
+
+    Returns:
+        {asset_id: summary}；没有任何解析结果的资产不在其中
+    """
+    payload = AssetStructuredPayload.payload
+    ranked = (
+        select(
+            AssetStructuredPayload.asset_id,
+            AssetStructuredPayload.schema_type,
+            payload["severity"].as_string().label("severity"),
+            payload["issue_category"].as_string().label("category"),
+            payload["reading"].as_float().label("reading"),
+            payload["unit"].as_string().label("unit"),
+            payload["equipment_type"].as_string().label("equipment_type"),
+            payload[("stats", "avg_confidence")].as_float().label("avg_confidence"),
+            func.row_number().over(
+                partition_by=(AssetStructuredPayload.asset_id, AssetStructuredPayload.schema_type),
+                order_by=(AssetStructuredPayload.created_at.desc(), AssetStructuredPayload.version.desc()),
+            ).label("rn"),
+        )
+        .where(
+            AssetStructuredPayload.schema_type.in_(SUMMARY_SCHEMA_TYPES),
+            AssetStructuredPayload.asset_id.in_(asset_ids),
+        )
+        .subquery()
+    )
+
+    summaries: Dict[Any, Dict[str, Any]] = {}
+    for row in db.execute(select(ranked).where(ranked.c.rn == 1)):
+        summary = summaries.get(row.asset_id)
+        if summary is None:
+            summary = summaries[row.asset_id] = _empty_summary()
+        if row.schema_type == SCENE_ISSUE:
+            summary["scene_severity"] = row.severity
+            summary["scene_category"] = row.category
+        elif row.schema_type == METER_READING:
+            summary["meter_reading"] = row.reading
+            summary["meter_unit"] = row.unit
+        elif row.schema_type == NAMEPLATE:
+            summary["nameplate_equipment_type"] = row.equipment_type
+        elif row.schema_type == OCR:
+            summary["ocr_avg_confidence"] = row.avg_confidence
+    return summaries
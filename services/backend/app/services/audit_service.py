@@ -0,0 +1,197 @@
+"""
+审计日志查询与归档
+
+- 列表查询按 (created_at, id) 倒序做键集分页，用户名通过一次 LEFT JOIN 取得；
+- 超过保留期的记录分批搬迁至 audit_logs_archive，主表规模与保留期成正比而非无限增长。
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import delete, insert, literal, select, tuple_
+from sqlalchemy.orm import Session
+
+from shared.config.settings import get_settings
+from shared.db.models_auth import AuditLog, AuditLogArchive, User
+from shared.utils import pagination
+
+settings = get_settings()
+
+# 单页最大条数
+MAX_PAGE_SIZE = 500
+
+_ARCHIVE_COLUMNS = (
+    "id", "user_id", "action", "resource_type", "resource_id",
+    "details", "ip_address", "user_agent", "created_at",
+)
+
+
+def encode_cursor(created_at: datetime, log_id: UUID) -> str:
+    """将 (created_at, id) 编码为不透明的分页游标"""
+    return pagination.encode_cursor(created_at, log_id)
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """
+    解析分页游标
+
+    Raises:
+        ValueError: 游标格式无效
+    """
+    created_at, log_id = pagination.decode_cursor(cursor, 2)
+    try:
+        return datetime.fromisoformat(created_at), UUID(log_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError("无效的分页游标") from e
+
+
+def list_audit_logs(
+    db: Session,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    user_id: Optional[UUID] = None,
+    action: Optional[str] = None,
+    resource_type: Optional[str] = None,
+    resource_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    skip: int = 0,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    查询审计日志（最新在前）
+
+    Args:
+        cursor: 上一页返回的游标；提供时忽略 skip
+        start / end: 时间窗口，左闭右开
+        skip: 兼容旧客户端的偏移量，大偏移量性能较差
+
+    Returns:
+        (日志字典列表, 下一页游标)；没有更多数据时游标为 None
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    query = db.query(AuditLog, User.username).outerjoin(User, User.id == AuditLog.user_id)
+    if user_id is not None:
+        query = query.filter(AuditLog.user_id == user_id)
+    if action:
+        query = query.filter(AuditLog.action == action)
+    if resource_type:
+        query = query.filter(AuditLog.resource_type == resource_type)
+    if resource_id:
+        query = query.filter(AuditLog.resource_id == resource_id)
+    if start is not None:
+        query = query.filter(AuditLog.created_at >= start)
+    if end is not None:
+        query = query.filter(AuditLog.created_at < end)
+
+    if cursor:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(AuditLog.created_at, AuditLog.id) < tuple_(
+                literal(cursor_created_at, AuditLog.created_at.type),
+                literal(cursor_id, AuditLog.id.type),
+            )
+        )
+    elif skip:
+        query = query.offset(skip)
+
+    rows = query.order_by(
+        AuditLog.created_at.desc(), AuditLog.id.desc()
+    ).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    items = [
+        {
+            "id": str(log.id),
+            "user_id": str(log.user_id) if log.user_id else None,
+            "username": username,
+            "action": log.action,
+            "resource_type": log.resource_type,
+            "resource_id": log.resource_id,
+            "details": log.details,
+            "ip_address": log.ip_address,
+            "user_agent": log.user_agent,
+            "created_at": log.created_at.isoformat() if log.created_at else None,
+        }
+        for log, username in rows
+    ]
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1][0]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return items, next_cursor
+
+
+def archive_audit_logs(
+    db: Session,
+    retention_days: Optional[int] = None,
+    batch_size: int = 5000,
+    now: Optional[datetime] = None,
+) -> int:
+    """
+    将超过保留期的审计日志搬迁至归档表
+
+    每批按时间顺序取 batch_size 条，INSERT ... SELECT 后删除并提交，
+    避免长事务与大范围锁。
+
+    Returns:
+        int: 归档的记录数
+    """
+    if retention_days is None:
+        retention_days = settings.audit_retention_days
+    if retention_days <= 0:
+        return 0
+
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=retention_days)
+    archived = 0
+
+    while True:
+        ids = db.execute(
+            select(AuditLog.id)
+            .where(AuditLog.created_at < cutoff)
+            .order_by(AuditLog.created_at, AuditLog.id)
+            .limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+
+        source = select(
+            *(getattr(AuditLog, name) for name in _ARCHIVE_COLUMNS),
+            literal(now, AuditLogArchive.archived_at.type),
+        ).where(AuditLog.id.in_(ids))
+        db.execute(
+            insert(AuditLogArchive).from_select([*_ARCHIVE_COLUMNS, "archived_at"], source)
+        )
+        db.execute(delete(AuditLog).where(AuditLog.id.in_(ids)).execution_options(synchronize_session=False))
+        db.commit()
+
+        archived += len(ids)
+        if len(ids) < batch_size:
+            break
+
+    return archived
+
+
+def prune_audit_archive(
+    db: Session,
+    retention_days: Optional[int] = None,
+    now: Optional[datetime] = None,
+) -> int:
+    """删除归档表中超过归档保留期的记录；保留期为 0 表示永久保留"""
+    if retention_days is None:
+        retention_days = settings.audit_archive_retention_days
+    if retention_days <= 0:
+        return 0
+
+    cutoff = (now or datetime.utcnow()) - timedelta(days=retention_days)
+    result = db.execute(
+        delete(AuditLogArchive)
+        .where(AuditLogArchive.created_at < cutoff)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount or 0
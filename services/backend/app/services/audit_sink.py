@@ -0,0 +1,345 @@
+"""
+审计日志异步写入器
+
+请求线程只负责把审计记录放入有界内存队列，后台线程按“满 N 条或满 T 毫秒”
+批量执行多行 INSERT，审计写入不再占用请求的事务与延迟。
+
+- 队列已满或数据库不可用时，记录追加写入本地 JSONL 兜底文件，不丢失；
+- 启动时先回灌兜底文件中的记录（按 id 去重，可重复执行）；无法写入的单条记录移入隔离文件，
+  数据库仍不可用时只保留尚未写入的记录；
+- 关闭时停止接收并把队列中剩余记录全部落库；
+- stats() 提供队列深度、溢出、失败批次等背压指标。
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.orm import Session
+
+from shared.config.settings import get_settings
+from shared.db.models_auth import AuditLog
+
+settings = get_settings()
+logger = logging.getLogger("bdc_ai.audit")
+
+# 队列中用于唤醒后台线程立即落库的标记
+_FLUSH = object()
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _record_from_json(data: Dict[str, Any]) -> Dict[str, Any]:
+    """兜底文件中的一行还原为可插入的记录"""
+    record = dict(data)
+    for key in ("id", "user_id"):
+        if record.get(key):
+            record[key] = uuid.UUID(record[key])
+    if record.get("created_at"):
+        record["created_at"] = datetime.fromisoformat(record["created_at"])
+    return record
+
+
+class AuditSink:
+    """有界队列 + 后台批量写入的审计日志接收器"""
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        max_queue: int = 10000,
+        batch_size: int = 200,
+        flush_interval_ms: int = 500,
+        fallback_path: Optional[str] = None,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(flush_interval_ms, 1) / 1000.0
+        self.fallback_path = Path(fallback_path) if fallback_path else None
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, max_queue))
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._file_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "batches": 0,
+            "failed_batches": 0,
+            "spilled": 0,
+            "replayed": 0,
+            "quarantined": 0,
+            "max_depth": 0,
+            "last_flush_ms": 0.0,
+        }
+
+    # ===== 生命周期 =====
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self) -> None:
+        if self._running:
+            return
+        if self.session_factory is None:
+            from shared.db.session import SessionLocal
+
+            self.session_factory = SessionLocal
+        self.replay_fallback()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="audit-sink", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """停止接收新记录，并把队列中剩余记录全部落库"""
+        if not self._running:
+            return
+        self._running = False
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """等待当前已入队的记录全部写入（主要用于测试与关闭流程）"""
+        if not self._running:
+            return
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        done.wait(timeout)
+
+    # ===== 写入 =====
+
+    def submit(self, record: Dict[str, Any]) -> bool:
+        """
+        提交一条审计记录，不阻塞请求
+
+        Returns:
+            bool: 进入队列返回 True；队列已满时写入兜底文件并返回 False
+        """
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self._spill([record])
+            return False
+
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            self._stats["enqueued"] += 1
+            if depth > self._stats["max_depth"]:
+                self._stats["max_depth"] = depth
+        return True
+
+    def _run(self) -> None:
+        batch: List[Dict[str, Any]] = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            timeout = max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = ...
+
+            if item is None:
+                self._write_batch(batch + self._drain())
+                return
+            if isinstance(item, tuple) and item and item[0] is _FLUSH:
+                self._write_batch(batch + self._drain())
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+                item[1].set()
+                continue
+            if item is not ...:
+                batch.append(item)
+
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._write_batch(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        """取出队列中剩余的全部记录（忽略控制标记）"""
+        items = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return items
+            if isinstance(item, dict):
+                items.append(item)
+            elif isinstance(item, tuple) and item and item[0] is _FLUSH:
+                item[1].set()
+
+    def _write_batch(self, records: List[Dict[str, Any]]) -> None:
+        if not records:
+            return
+        started = time.perf_counter()
+        for start in range(0, len(records), self.batch_size):
+            chunk = records[start:start + self.batch_size]
+            if self._insert(chunk):
+                with self._stats_lock:
+                    self._stats["written"] += len(chunk)
+                    self._stats["batches"] += 1
+            else:
+                with self._stats_lock:
+                    self._stats["failed_batches"] += 1
+                self._spill(chunk)
+        with self._stats_lock:
+            self._stats["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+    def _insert(self, records: List[Dict[str, Any]]) -> bool:
+        """一次多行 INSERT；失败返回 False"""
+        error = self._execute_insert(records)
+        if error is not None:
+            logger.error("审计日志批量写入失败，%d 条记录转存兜底文件: %s", len(records), error)
+            return False
+        return True
+
+    def _execute_insert(self, records: List[Dict[str, Any]], skip_existing: bool = False) -> Optional[Exception]:
+        """
+        执行多行 INSERT，成功返回 None，失败返回异常
+
+        skip_existing 时按主键 id 忽略已存在的行（ON CONFLICT DO NOTHING），用于回灌。
+        """
+        db = self.session_factory()
+        try:
+            stmt = insert(AuditLog)
+            if skip_existing:
+                dialect = db.get_bind().dialect.name
+                if dialect == "postgresql":
+                    stmt = postgresql.insert(AuditLog).on_conflict_do_nothing(index_elements=["id"])
+                elif dialect == "sqlite":
+                    stmt = sqlite.insert(AuditLog).on_conflict_do_nothing(index_elements=["id"])
+            db.execute(stmt, records)
+            db.commit()
+            return None
+        except Exception as exc:  # noqa: BLE001
+            db.rollback()
+            return exc
+        finally:
+            db.close()
+
+    @staticmethod
+    def _is_unavailable(error: Exception) -> bool:
+        """连接类错误视为数据库不可用（整体重试），其余视为记录本身有问题（隔离）"""
+        if isinstance(error, DBAPIError) and error.connection_invalidated:
+            return True
+        return isinstance(error, (OperationalError, InterfaceError))
+
+    # ===== 兜底文件 =====
+
+    def _spill(self, records: List[Dict[str, Any]]) -> None:
+        with self._stats_lock:
+            self._stats["spilled"] += len(records)
+        if self.fallback_path is None:
+            logger.error("审计日志兜底文件未配置，丢弃 %d 条记录", len(records))
+            return
+        with self._file_lock:
+            self.fallback_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.fallback_path.open("a", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False, default=_json_default) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    @property
+    def quarantine_path(self) -> Optional[Path]:
+        """无法写入的兜底记录移入的隔离文件（与兜底文件同目录）"""
+        if self.fallback_path is None:
+            return None
+        return self.fallback_path.with_name(f"{self.fallback_path.stem}.quarantine{self.fallback_path.suffix}")
+
+    def replay_fallback(self) -> int:
+        """
+        把兜底文件中的记录写回数据库，返回本次回灌条数（含库中已存在而跳过的）
+
+        - 按 id 忽略已存在的记录，重复回灌不会主键冲突；
+        - 整批失败时逐条重试，违反约束或无法解析的记录移入隔离文件，不阻塞其余记录；
+        - 数据库不可用时停止，兜底文件只保留尚未写入的记录，下次启动再试；全部处理完删除兜底文件。
+        """
+        if self.fallback_path is None or not self.fallback_path.exists():
+            return 0
+        with self._file_lock:
+            entries = []
+            quarantined: List[str] = []
+            with self.fallback_path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entries.append((line, _record_from_json(json.loads(line))))
+                    except (ValueError, TypeError):
+                        logger.warning("无法解析的审计兜底记录移入隔离文件: %s", line[:200])
+                        quarantined.append(line)
+
+            written = 0
+            pending: List[str] = []
+            for start in range(0, len(entries), self.batch_size):
+                chunk = entries[start:start + self.batch_size]
+                error = self._execute_insert([record for _, record in chunk], skip_existing=True)
+                if error is None:
+                    written += len(chunk)
+                    continue
+                if self._is_unavailable(error):
+                    logger.error("审计兜底记录回灌中断，数据库不可用: %s", error)
+                    pending = [line for line, _ in entries[start:]]
+                    break
+                for index, (line, record) in enumerate(chunk):
+                    error = self._execute_insert([record], skip_existing=True)
+                    if error is None:
+                        written += 1
+                    elif self._is_unavailable(error):
+                        logger.error("审计兜底记录回灌中断，数据库不可用: %s", error)
+                        pending = [entry[0] for entry in chunk[index:] + entries[start + len(chunk):]]
+                        break
+                    else:
+                        logger.warning("无法写入的审计兜底记录移入隔离文件: %s", error)
+                        quarantined.append(line)
+                if pending:
+                    break
+
+            if quarantined:
+                with self.quarantine_path.open("a", encoding="utf-8") as f:
+                    f.write("\n".join(quarantined) + "\n")
+            if pending:
+                tmp_path = self.fallback_path.with_name(self.fallback_path.name + ".tmp")
+                tmp_path.write_text("\n".join(pending) + "\n", encoding="utf-8")
+                os.replace(tmp_path, self.fallback_path)
+            else:
+                self.fallback_path.unlink()
+        with self._stats_lock:
+            self._stats["replayed"] += written
+            self._stats["quarantined"] += len(quarantined)
+        return written
+
+    # ===== 指标 =====
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            data = dict(self._stats)
+        data["queue_depth"] = self._queue.qsize()
+        data["queue_capacity"] = self._queue.maxsize
+        data["running"] = self._running
+        return data
+
+
+audit_sink = AuditSink(
+    max_queue=settings.audit_queue_size,
+    batch_size=settings.audit_batch_size,
+    flush_interval_ms=settings.audit_flush_interval_ms,
+    fallback_path=settings.audit_fallback_path,
+)
@@ -1,17 +1,27 @@
 """认证和权限业务逻辑"""
+import uuid
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from uuid import UUID
 
-from sqlalchemy.orm import Session
+from sqlalchemy import literal, or_, tuple_
+from sqlalchemy.orm import Session, selectinload
 
 from shared.db.models_auth import User, Role, Permission, UserRole, RolePermission, AuditLog
 from shared.security.password import verify_password, get_password_hash
 from shared.security.jwt import create_access_token, create_refresh_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from shared.security.permission_cache import permission_cache, load_permission_codes
 from shared.config.settings import get_settings
+from shared.utils.pagination import decode_cursor, encode_cursor
+from .audit_sink import audit_sink
 
 settings = get_settings()
 
+# 用户列表可用的排序字段（均为非空列，保证键集分页稳定）
+USER_SORT_FIELDS = ("created_at", "username")
+# 用户列表单页最大条数
+USER_PAGE_MAX = 500
+
 
 class AuthService:
     """认证服务"""
@@ -229,6 +239,8 @@ class AuthService:
 
         user.updated_at = datetime.utcnow()
         db.commit()
+        # 角色的批量删除不经过 ORM flush 事件，这里显式失效该用户的权限缓存
+        permission_cache.invalidate_user(user_id)
 
         # 记录审计日志
         AuthService.create_audit_log(
@@ -261,6 +273,7 @@ class AuthService:
 
         db.delete(user)
         db.commit()
+        permission_cache.invalidate_user(user_id)
 
         # 记录审计日志
         AuthService.create_audit_log(
@@ -314,6 +327,94 @@ class AuthService:
 
         return True
 
+    @staticmethod
+    def list_users(
+        db: Session,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        search: Optional[str] = None,
+        sort: str = "created_at",
+        order: str = "desc",
+        is_active: Optional[bool] = None,
+        role_id: Optional[UUID] = None,
+        skip: int = 0,
+    ) -> Tuple[List[User], Optional[str]]:
+        """
+        查询用户列表（角色通过 selectinload 批量加载）
+
+        Args:
+            db: 数据库会话
+            limit: 每页条数
+            cursor: 上一页返回的游标；提供时忽略 skip
+            search: 按用户名/姓名/邮箱/电话模糊搜索
+            sort: 排序字段，见 USER_SORT_FIELDS
+            order: asc 或 desc
+            is_active: 按启用状态过滤
+            role_id: 只返回拥有该角色的用户
+            skip: 兼容旧客户端的偏移量
+
+        Returns:
+            (用户列表, 下一页游标)；没有更多数据时游标为 None
+
+        Raises:
+            ValueError: 排序字段或游标无效
+        """
+        if sort not in USER_SORT_FIELDS:
+            raise ValueError(f"不支持的排序字段: {sort}")
+        if order not in ("asc", "desc"):
+            raise ValueError(f"不支持的排序方向: {order}")
+        limit = max(1, min(limit, USER_PAGE_MAX))
+
+        sort_column = getattr(User, sort)
+        query = db.query(User).options(selectinload(User.roles))
+
+        if search:
+            pattern = f"%{search.strip()}%"
+            query = query.filter(or_(
+                User.username.ilike(pattern),
+                User.full_name.ilike(pattern),
+                User.email.ilike(pattern),
+                User.phone.ilike(pattern),
+            ))
+        if is_active is not None:
+            query = query.filter(User.is_active == is_active)
+        if role_id is not None:
+            query = query.filter(
+                User.user_roles.any(UserRole.role_id == role_id)
+            )
+
+        if cursor:
+            cursor_sort, cursor_value, cursor_id = decode_cursor(cursor, 3)
+            if cursor_sort != f"{sort}:{order}":
+                raise ValueError("分页游标与排序条件不一致")
+            if sort == "created_at":
+                try:
+                    cursor_value = datetime.fromisoformat(cursor_value)
+                except ValueError as e:
+                    raise ValueError("无效的分页游标") from e
+            try:
+                cursor_id = UUID(cursor_id)
+            except ValueError as e:
+                raise ValueError("无效的分页游标") from e
+            key = tuple_(sort_column, User.id)
+            bound = tuple_(literal(cursor_value, sort_column.type), literal(cursor_id, User.id.type))
+            query = query.filter(key < bound if order == "desc" else key > bound)
+        elif skip:
+            query = query.offset(skip)
+
+        if order == "desc":
+            query = query.order_by(sort_column.desc(), User.id.desc())
+        else:
+            query = query.order_by(sort_column.asc(), User.id.asc())
+
+        users = query.limit(limit + 1).all()
+        next_cursor = None
+        if len(users) > limit:
+            users = users[:limit]
+            last = users[-1]
+            next_cursor = encode_cursor(f"{sort}:{order}", getattr(last, sort), last.id)
+        return users, next_cursor
+
     @staticmethod
     def get_user_permissions(db: Session, user_id: UUID) -> List[str]:
         """
@@ -337,17 +438,7 @@ class AuthService:
             return [perm.code for perm in all_permissions]
 
         # 查询用户的角色权限
-        permissions = db.query(Permission).join(
-            "role_permissions"
-        ).join(
-            Role, Role.id == RolePermission.role_id
-        ).join(
-            UserRole, UserRole.role_id == Role.id
-        ).filter(
-            UserRole.user_id == user_id
-        ).distinct().all()
-
-        return [perm.code for perm in permissions]
+        return sorted(load_permission_codes(db, user_id))
 
     @staticmethod
     def create_audit_log(
@@ -374,18 +465,26 @@ class AuthService:
             user_agent: 用户代理
 
         Returns:
-            AuditLog: 审计日志对象
+            AuditLog: 审计日志对象（异步写入时为尚未落库的临时对象）
         """
-        audit_log = AuditLog(
-            user_id=user_id,
-            action=action,
-            resource_type=resource_type,
-            resource_id=resource_id,
-            details=details,
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
+        record = {
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "action": action,
+            "resource_type": resource_type,
+            "resource_id": resource_id,
+            "details": details,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+            "created_at": datetime.utcnow(),
+        }
+
+        # 后台写入器运行中：入队后立即返回，不占用请求事务
+        if audit_sink.running:
+            audit_sink.submit(record)
+            return AuditLog(**record)
 
+        audit_log = AuditLog(**record)
         db.add(audit_log)
         db.commit()
 
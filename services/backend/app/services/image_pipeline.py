@@ -3,21 +3,22 @@ from __future__ import annotations
 import os
 import uuid
 from dataclasses import dataclass
-from typing import Any, Dict, List, Tuple
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
 
 from sqlalchemy.orm import Session
 
 from shared.config.settings import get_settings
 from shared.db.models_asset import Asset, AssetStructuredPayload, FileBlob
 
-try:
+from .analysis_queue import priority_class_for
+
+if TYPE_CHECKING:  # pragma: no cover
     from paddleocr import PaddleOCR
-except ImportError:  # pragma: no cover - optional dependency
-    PaddleOCR = None  # type: ignore[assignment]
 
 
 settings = get_settings()
-_ocr_client: PaddleOCR | None = None  # type: ignore[name-defined]
+# PaddleOCR 及其依赖导入耗时数秒，首次执行 OCR 时再加载，不拖慢后端启动
+_ocr_client: PaddleOCR | None = None
 
 
 @dataclass
@@ -28,13 +29,14 @@ class OcrLine:
 
 
 def _get_ocr_client() -> PaddleOCR:
-    if PaddleOCR is None:
-        raise RuntimeError(
-            "PaddleOCR is not installed. Please install 'paddleocr' and its dependencies."
-        )
-
     global _ocr_client
     if _ocr_client is None:
+        try:
+            from paddleocr import PaddleOCR
+        except ImportError:  # pragma: no cover - optional dependency
+            raise RuntimeError(
+                "PaddleOCR is not installed. Please install 'paddleocr' and its dependencies."
+            )
         _ocr_client = PaddleOCR(use_angle_cls=True, lang="ch")  # type: ignore[call-arg]
     return _ocr_client
 
@@ -171,7 +173,7 @@ def process_image_with_ocr(db: Session, asset_or_id) -> AssetStructuredPayload:
     return structured
 
 
-def route_image_asset(db: Session, asset_or_id) -> Asset:
+def route_image_asset(db: Session, asset_or_id, expedite: bool = False) -> Asset:
     """Route an image asset to the appropriate pipeline based on content_role.
 
     - meter/nameplate: run OCR pipeline immediately
@@ -180,6 +182,7 @@ def route_image_asset(db: Session, asset_or_id) -> Asset:
     Args:
         db: Database session
         asset_or_id: Asset instance, UUID object, or UUID string
+        expedite: Interactive request (e.g. from the PC UI); jumps the analysis queue
     """
 
     print(f"[DEBUG] route_image_asset called with asset_or_id={asset_or_id}")
@@ -217,6 +220,9 @@ def route_image_asset(db: Session, asset_or_id) -> Asset:
         "route": "scene_llm_pipeline",
         "reason": "content_role is not meter/nameplate; delegate to scene understanding pipeline",
         "content_role": asset.content_role,
+        # 调度属性：由 analysis_queue 读取，决定在待分析队列中的位置
+        "expedite": bool(expedite),
+        "priority_class": priority_class_for(role, expedite),
     }
 
     decision = AssetStructuredPayload(
@@ -0,0 +1,150 @@
+"""
+项目结构树缓存
+
+缓存条目按 (项目, tree_version) 存放，两种情况下失效：
+- 结构变化：楼栋 / 分区 / 系统 / 设备写入时 tree_version 递增，旧版本号的条目不再被读取并在写入新条目时淘汰；
+  递增由 tree_changes.record_tree_change 调用本模块的 bump_tree_version 完成（同时作为变更日志 seq）；
+- 计数到期：树节点上的资产数 / 待分析数不参与版本号（资产写入不递增、不争用项目行锁），
+  条目写入超过 tree_counts_ttl 秒即视为过期并重建，计数最多滞后这么久。
+
+结构树接口先读版本号（一条主键查询），命中未过期条目时直接返回序列化字节；ETag 由项目、版本号与
+响应内容摘要组成，客户端带 If-None-Match 且结构与计数都未变时返回 304。
+先读版本号、后构建树，条目里的结构不会比其版本号旧；计数则以构建时刻为准，由 TTL 限定滞后。
+"""
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from shared.config.settings import get_settings
+from shared.db.models_project import Building, BuildingSystem, Project
+
+settings = get_settings()
+
+
+def bump_tree_version(
+    db: Session,
+    *,
+    project_id: Optional[uuid.UUID] = None,
+    building_id: Optional[uuid.UUID] = None,
+    system_id: Optional[uuid.UUID] = None,
+) -> Optional[Tuple[uuid.UUID, int]]:
+    """
+    递增项目结构树版本号，须在写操作 commit 之前调用，与变更处于同一事务
+
+    只知道楼栋或系统时通过子查询定位项目，不额外加载对象；三者都为空（如未挂系统的设备）时不处理。
+    返回 (项目 id, 新版本号)；更新语句持有项目行锁，同一项目的写入按提交顺序得到递增的版本号。
+    """
+    if project_id is not None:
+        target = project_id
+    elif building_id is not None:
+        target = select(Building.project_id).where(Building.id == building_id).scalar_subquery()
+    elif system_id is not None:
+        target = (
+            select(Building.project_id)
+            .join(BuildingSystem, BuildingSystem.building_id == Building.id)
+            .where(BuildingSystem.id == system_id)
+            .scalar_subquery()
+        )
+    else:
+        return None
+    row = db.execute(
+        update(Project)
+        .where(Project.id == target)
+        .values(tree_version=Project.tree_version + 1)
+        .returning(Project.id, Project.tree_version)
+        .execution_options(synchronize_session=False)
+    ).first()
+    return (row[0], row[1]) if row is not None else None
+
+
+def get_tree_version(db: Session, project_id: uuid.UUID) -> Optional[int]:
+    """读取项目结构树版本号，项目不存在时返回 None"""
+    return db.query(Project.tree_version).filter(Project.id == project_id).scalar()
+
+
+def body_digest(body: bytes) -> str:
+    """响应内容摘要，区分同一版本号下资产计数不同的结构树"""
+    return hashlib.blake2b(body, digest_size=8).hexdigest()
+
+
+def tree_etag(project_id: uuid.UUID, version: int, scope: Optional[str] = None,
+              digest: Optional[str] = None) -> str:
+    """强 ETag：结构由版本号标识、资产计数由内容摘要标识；scope 区分按层懒加载的各个父节点"""
+    parts = [f"tree-{project_id}-{version}"]
+    if scope:
+        parts.append(scope)
+    if digest:
+        parts.append(digest)
+    return '"' + "-".join(parts) + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 比较（弱比较，支持逗号分隔列表与 *）"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class TreeCache:
+    """按 (项目, 树版本号) 缓存序列化结构树的进程内 LRU，条目超过 ttl 秒视为过期（资产计数需刷新）"""
+
+    def __init__(self, max_entries: int, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[bytes, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, project_id: uuid.UUID, version: int) -> Optional[bytes]:
+        key = (str(project_id), version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[1] >= self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            body = entry[0]
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, project_id: uuid.UUID, version: int, body: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        key = (str(project_id), version)
+        with self._lock:
+            # 同一项目的旧版本不会再被读取，直接淘汰
+            for stale in [k for k in self._entries if k[0] == key[0] and k[1] < version]:
+                del self._entries[stale]
+            self._entries[key] = (body, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+tree_cache = TreeCache(settings.tree_cache_size, settings.tree_counts_ttl)
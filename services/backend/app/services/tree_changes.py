@@ -0,0 +1,137 @@
+"""
+工程结构变更日志：结构树增量同步
+
+楼栋 / 分区 / 系统 / 设备的每次增删改在同一事务内：
+- 递增 projects.tree_version（项目行锁保证同一项目按提交顺序递增；版本号只在这里递增，每个版本号对应一次结构变更）；
+- 以新版本号为 seq 写入 engineering_changes，附带变更后的节点快照；删除分区时 ORM 级联删除的设备
+  （在结构树中挂在系统下，不随分区节点一起消失）同 seq 各记一条 delete；
+- 维护结构闭包表 engineering_closure（见 tree_closure）。
+
+客户端记住上次同步到的 seq，调用 structure_tree/changes?since=<seq> 取回之后的变更在本地树上原地回放，
+不再整树重载。日志按版本号窗口保留，客户端落后超出窗口时返回 reset，由其整树重载。
+"""
+import uuid
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from shared.config.settings import get_settings
+from shared.db.models_project import Building, BuildingSystem, Device, EngineeringChange, Zone
+
+from .tree_cache import bump_tree_version, get_tree_version
+from .tree_closure import maintain_closure
+from .tree_service import EngineeringTreeService
+
+settings = get_settings()
+
+CHANGE_OPS = ("insert", "update", "delete")
+
+
+def _locate(obj) -> Dict[str, Any]:
+    """返回节点类型、父节点以及定位所属项目的参数"""
+    if isinstance(obj, Building):
+        return {"node_type": "building", "parent_type": "project", "parent_id": None,
+                "locator": {"project_id": obj.project_id}}
+    if isinstance(obj, (Zone, BuildingSystem)):
+        node_type = "zone" if isinstance(obj, Zone) else "system"
+        return {"node_type": node_type, "parent_type": "building", "parent_id": obj.building_id,
+                "locator": {"building_id": obj.building_id}}
+    if isinstance(obj, Device):
+        return {"node_type": "device", "parent_type": "system", "parent_id": obj.system_id,
+                "locator": {"system_id": obj.system_id}}
+    raise TypeError(f"Not an engineering structure object: {type(obj).__name__}")
+
+
+def _cascaded_device_deletes(db: Session, objs) -> List[Dict[str, Any]]:
+    """删除分区时随之级联删除的设备：结构树中挂在系统下，需单独记录删除"""
+    zone_ids = [obj.id for obj in objs if isinstance(obj, Zone)]
+    if not zone_ids:
+        return []
+    rows = db.query(Device.id, Device.system_id).filter(Device.zone_id.in_(zone_ids)).order_by(Device.id)
+    return [
+        {"node_type": "device", "node_id": row.id, "parent_type": "system", "parent_id": row.system_id}
+        for row in rows
+    ]
+
+
+def record_tree_change(db: Session, op: str, *objs) -> Optional[int]:
+    """
+    记录一次工程结构变更，须在 commit 之前调用（delete 须在 db.delete 之前调用）
+
+    同一次调用的多个对象须属于同一项目（如新建楼栋时的一批默认系统），共用一个 seq。
+    返回该次变更的 seq；对象不属于任何项目（如未挂系统的设备）时不记录，返回 None。
+    """
+    if op not in CHANGE_OPS:
+        raise ValueError(f"Unknown change op: {op}")
+    if not objs:
+        return None
+    # 新建对象在 flush 后才有 id
+    db.flush()
+    bumped = bump_tree_version(db, **_locate(objs[0])["locator"])
+    if bumped is None:
+        return None
+    project_id, seq = bumped
+    maintain_closure(db, op, objs, project_id)
+
+    if op == "delete":
+        # 级联删除的设备先于其分区回放，与数据库删除顺序一致
+        for cascaded in _cascaded_device_deletes(db, objs):
+            db.add(EngineeringChange(project_id=project_id, seq=seq, op=op, node=None, **cascaded))
+    for obj in objs:
+        located = _locate(obj)
+        db.add(EngineeringChange(
+            project_id=project_id,
+            seq=seq,
+            op=op,
+            node_type=located["node_type"],
+            node_id=obj.id,
+            parent_type=located["parent_type"],
+            parent_id=located["parent_id"],
+            node=None if op == "delete" else EngineeringTreeService.node_snapshot(obj, db),
+        ))
+
+    if settings.tree_changes_retention > 0:
+        db.query(EngineeringChange).filter(
+            EngineeringChange.project_id == project_id,
+            EngineeringChange.seq <= seq - settings.tree_changes_retention,
+        ).delete(synchronize_session=False)
+    return seq
+
+
+def load_tree_changes(db: Session, project_id: uuid.UUID, since: int) -> Optional[Dict[str, Any]]:
+    """
+    读取 seq > since 的变更；项目不存在时返回 None
+
+    只返回不超过当前版本号的变更，客户端以返回的 seq 作为下次的 since。
+    since 早于保留窗口或晚于当前版本（如数据库已重建）时返回 reset=True 且不带变更。
+    """
+    version = get_tree_version(db, project_id)
+    if version is None:
+        return None
+    retention = settings.tree_changes_retention
+    reset = since > version or (retention > 0 and since < version - retention)
+
+    changes = []
+    if not reset and since < version:
+        rows = (
+            db.query(EngineeringChange)
+            .filter(
+                EngineeringChange.project_id == project_id,
+                EngineeringChange.seq > since,
+                EngineeringChange.seq <= version,
+            )
+            .order_by(EngineeringChange.seq, EngineeringChange.id)
+        )
+        changes = [
+            {
+                "seq": row.seq,
+                "op": row.op,
+                "node_type": row.node_type,
+                "node_id": str(row.node_id),
+                "parent_type": row.parent_type,
+                "parent_id": str(row.parent_id) if row.parent_id is not None else None,
+                "node": row.node,
+            }
+            for row in rows
+        ]
+    return {"project_id": str(project_id), "since": since, "seq": version, "reset": reset, "changes": changes}
@@ -0,0 +1,181 @@
+"""
+工程结构闭包表：子树资产查询与楼栋汇总
+
+engineering_closure 保存 楼栋 → 分区 / 系统 → 设备 的每一对（祖先, 后代），含 depth=0 的自身行；
+设备同时挂在系统与分区下。楼栋 / 分区 / 系统 / 设备的增删改经 record_tree_change 在同一事务内维护：
+- insert：写入自身行与各级祖先行；
+- update：重写该节点的祖先行（设备可改挂分区）；
+- delete：删除该节点子树内全部后代的行（ORM 级联会一并删除其下的分区 / 系统 / 设备）。
+
+「节点 X 下的全部资产」即 building_id / zone_id / system_id / device_id 任一落在 X 的后代集合内，
+每列各有索引；楼栋汇总按资产挂接的最具体节点与闭包表连接，一条查询完成。
+"""
+import uuid
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import case, delete, distinct, func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from shared.db.models_asset import Asset
+from shared.db.models_project import Building, BuildingSystem, Device, EngineeringClosure, Zone
+
+from .analysis_queue import PENDING_STATUS
+
+
+def asset_anchor():
+    """资产挂接的最具体结构节点，与 assets 上的 ix_assets_structure_anchor 表达式索引一致"""
+    return func.coalesce(Asset.device_id, Asset.system_id, Asset.zone_id, Asset.building_id)
+
+
+def _closure_rows(project_id, node_type: str, node_id, ancestors: List[Tuple[Any, str, int]]) -> List[Dict[str, Any]]:
+    """节点自身行加各级祖先行"""
+    rows = [{"ancestor_id": node_id, "ancestor_type": node_type, "depth": 0}]
+    rows += [{"ancestor_id": a_id, "ancestor_type": a_type, "depth": depth} for a_id, a_type, depth in ancestors]
+    return [
+        {**row, "descendant_id": node_id, "descendant_type": node_type, "project_id": project_id}
+        for row in rows
+    ]
+
+
+def _device_ancestors(system_id, system_building_id, zone_id, zone_building_id) -> List[Tuple[Any, str, int]]:
+    ancestors = []
+    if system_id is not None:
+        ancestors.append((system_id, "system", 1))
+    if zone_id is not None:
+        ancestors.append((zone_id, "zone", 1))
+    building_id = system_building_id or zone_building_id
+    if building_id is not None:
+        ancestors.append((building_id, "building", 2))
+    return ancestors
+
+
+def _ancestors(db: Session, obj) -> Tuple[str, List[Tuple[Any, str, int]]]:
+    """返回节点类型与其各级祖先 (id, 类型, 深度)"""
+    if isinstance(obj, Building):
+        return "building", []
+    if isinstance(obj, (Zone, BuildingSystem)):
+        return ("zone" if isinstance(obj, Zone) else "system"), [(obj.building_id, "building", 1)]
+    system_building_id = zone_building_id = None
+    if obj.system_id is not None:
+        system_building_id = (
+            db.query(BuildingSystem.building_id).filter(BuildingSystem.id == obj.system_id).scalar()
+        )
+    if system_building_id is None and obj.zone_id is not None:
+        zone_building_id = db.query(Zone.building_id).filter(Zone.id == obj.zone_id).scalar()
+    return "device", _device_ancestors(obj.system_id, system_building_id, obj.zone_id, zone_building_id)
+
+
+def maintain_closure(db: Session, op: str, objs, project_id: uuid.UUID) -> None:
+    """按一次结构变更（同一项目的一批节点）更新闭包表，须在 flush 之后、db.delete 之前调用"""
+    table = EngineeringClosure.__table__
+    node_ids = [obj.id for obj in objs]
+    if op == "delete":
+        subtree = select(EngineeringClosure.descendant_id).where(EngineeringClosure.ancestor_id.in_(node_ids))
+        db.execute(delete(table).where(table.c.descendant_id.in_(subtree)))
+        return
+
+    if op == "update":
+        db.execute(delete(table).where(table.c.descendant_id.in_(node_ids), table.c.depth > 0))
+    rows: List[Dict[str, Any]] = []
+    for obj in objs:
+        node_type, ancestors = _ancestors(db, obj)
+        node_rows = _closure_rows(project_id, node_type, obj.id, ancestors)
+        # update 时自身行已存在
+        rows += node_rows[1:] if op == "update" else node_rows
+    if rows:
+        db.execute(insert(table), rows)
+
+
+def rebuild_project_closure(db: Session, project_id: uuid.UUID) -> int:
+    """按当前结构表重建一个项目的闭包表（修复或导入数据后使用），返回写入行数"""
+    buildings = db.query(Building.id).filter(Building.project_id == project_id).all()
+    zones = (
+        db.query(Zone.id, Zone.building_id)
+        .join(Building, Building.id == Zone.building_id)
+        .filter(Building.project_id == project_id)
+        .all()
+    )
+    systems = (
+        db.query(BuildingSystem.id, BuildingSystem.building_id)
+        .join(Building, Building.id == BuildingSystem.building_id)
+        .filter(Building.project_id == project_id)
+        .all()
+    )
+    system_buildings = {s.id: s.building_id for s in systems}
+    zone_buildings = {z.id: z.building_id for z in zones}
+    devices = (
+        db.query(Device.id, Device.system_id, Device.zone_id)
+        .filter(or_(Device.system_id.in_(list(system_buildings)), Device.zone_id.in_(list(zone_buildings))))
+        .all()
+    )
+
+    rows: List[Dict[str, Any]] = []
+    for b in buildings:
+        rows += _closure_rows(project_id, "building", b.id, [])
+    for z in zones:
+        rows += _closure_rows(project_id, "zone", z.id, [(z.building_id, "building", 1)])
+    for s in systems:
+        rows += _closure_rows(project_id, "system", s.id, [(s.building_id, "building", 1)])
+    for d in devices:
+        ancestors = _device_ancestors(d.system_id, system_buildings.get(d.system_id),
+                                      d.zone_id, zone_buildings.get(d.zone_id))
+        rows += _closure_rows(project_id, "device", d.id, ancestors)
+
+    table = EngineeringClosure.__table__
+    db.execute(delete(table).where(table.c.project_id == project_id))
+    if rows:
+        db.execute(insert(table), rows)
+    return len(rows)
+
+
+def subtree_asset_filter(node_id: uuid.UUID):
+    """资产挂在节点 node_id 或其任一后代上的过滤条件"""
+    descendants = select(EngineeringClosure.descendant_id).where(EngineeringClosure.ancestor_id == node_id)
+    return or_(
+        Asset.building_id.in_(descendants),
+        Asset.zone_id.in_(descendants),
+        Asset.system_id.in_(descendants),
+        Asset.device_id.in_(descendants),
+    )
+
+
+def building_rollup(db: Session, project_id: uuid.UUID) -> List[Dict[str, Any]]:
+    """
+    楼栋汇总：分区 / 系统 / 设备数与资产数、待分析数、最近采集时间，一条查询
+
+    资产按其挂接的最具体节点（设备 > 系统 > 分区 > 楼栋）归入所属楼栋，每个资产只计一次。
+    """
+    closure = EngineeringClosure
+
+    def count_of(node_type: str):
+        return func.count(distinct(case((closure.descendant_type == node_type, closure.descendant_id))))
+
+    query = (
+        db.query(
+            Building.id,
+            Building.name,
+            count_of("zone"),
+            count_of("system"),
+            count_of("device"),
+            func.count(distinct(Asset.id)),
+            func.count(distinct(case((Asset.status == PENDING_STATUS, Asset.id)))),
+            func.max(Asset.capture_time),
+        )
+        .outerjoin(closure, closure.ancestor_id == Building.id)
+        .outerjoin(Asset, asset_anchor() == closure.descendant_id)
+        .filter(Building.project_id == project_id)
+    )
+    rows = query.group_by(Building.id, Building.name).order_by(Building.name)
+    return [
+        {
+            "building_id": b_id,
+            "name": name,
+            "zone_count": zones,
+            "system_count": systems,
+            "device_count": devices,
+            "asset_count": assets,
+            "pending_count": pending,
+            "latest_capture_time": latest,
+        }
+        for b_id, name, zones, systems, devices, assets, pending, latest in rows
+    ]
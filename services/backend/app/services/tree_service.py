@@ -1,76 +1,297 @@
-from typing import List
+"""
+工程结构树：项目 → 楼栋 → 系统 → 设备，楼栋下另列分区
 
-from bigtree import Node
-from sqlalchemy.orm import Session, joinedload
+每一层一条只取所需列的查询（楼栋 / 系统 / 分区 / 设备），再加两条分组计数：
+- 分区设备数：devices 按 zone_id 分组；
+- 资产与待分析数：assets 按 (building_id, zone_id, system_id, device_id) 分组，
+  每组计入其所挂的每一级节点，与 /assets?xxx_id= 的筛选口径一致。
 
-from shared.db.models_project import Building, Zone, BuildingSystem, Device
+不再使用多级 joinedload（楼栋 × 分区 × 系统 × 设备 的笛卡尔积行），也不再经由 bigtree 节点中转，
+按 id 建立字典后 O(n) 组装为可直接序列化的 dict。
+
+超大项目（园区多楼栋）改用 list_children 按层懒加载：每次只取一个父节点的直接子节点，
+附带子节点数 / has_children 与该层的资产计数，首屏耗时只与楼栋数有关。
+"""
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from shared.db.models_asset import Asset
+from shared.db.models_project import Building, BuildingSystem, Device, Zone
+
+from .analysis_queue import PENDING_STATUS
+
+# 懒加载接口支持的父节点类型；zone / device 在结构树中没有子节点
+TREE_PARENT_TYPES = ("project", "building", "system", "zone", "device")
+
+
+def _building_node(row) -> Dict[str, Any]:
+    return {"id": str(row.id), "name": row.name, "type": "building", "usage_type": row.usage_type}
+
+
+def _system_node(row) -> Dict[str, Any]:
+    return {"id": str(row.id), "name": row.name or row.type, "type": "system", "system_type": row.type}
+
+
+def _zone_node(row, device_count: int) -> Dict[str, Any]:
+    return {"id": str(row.id), "name": row.name, "type": "zone", "zone_type": row.type,
+            "device_count": device_count}
+
+
+def _device_node(row, zone: Optional[Dict[str, str]]) -> Dict[str, Any]:
+    return {"id": str(row.id), "name": row.model or (row.device_type or "device"), "type": "device",
+            "device_type": row.device_type, "zone": zone}
 
 
 class EngineeringTreeService:
     """工程结构树服务 - 基于 Building/Zone/System/Device 构建项目工程树。"""
 
     @staticmethod
-    def build_project_tree(project_id, db: Session) -> Node:
-        """构建项目的工程结构树，并返回 bigtree 的根节点。"""
-        buildings: List[Building] = (
-            db.query(Building)
-            .options(
-                joinedload(Building.zones),
-                joinedload(Building.systems).joinedload(BuildingSystem.devices).joinedload(Device.zone),
-            )
+    def _asset_counts(project_id, db: Session) -> Dict[str, List[int]]:
+        """按节点 id 汇总 [资产数, 待分析数]"""
+        pending = func.sum(case((Asset.status == PENDING_STATUS, 1), else_=0))
+        rows = (
+            db.query(Asset.building_id, Asset.zone_id, Asset.system_id, Asset.device_id, func.count(), pending)
+            .filter(Asset.project_id == project_id)
+            .group_by(Asset.building_id, Asset.zone_id, Asset.system_id, Asset.device_id)
+        )
+        counts: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+        for building_id, zone_id, system_id, device_id, total, pending_total in rows:
+            for node_id in (building_id, zone_id, system_id, device_id):
+                if node_id is not None:
+                    entry = counts[str(node_id)]
+                    entry[0] += total
+                    entry[1] += pending_total or 0
+        return counts
+
+    @staticmethod
+    def build_project_tree(project_id, db: Session) -> Dict[str, Any]:
+        """构建项目的工程结构树，返回可直接序列化的嵌套 dict。"""
+        buildings = (
+            db.query(Building.id, Building.name, Building.usage_type)
+            .filter(Building.project_id == project_id)
+            .order_by(Building.name)
+            .all()
+        )
+        systems = (
+            db.query(BuildingSystem.id, BuildingSystem.building_id, BuildingSystem.name, BuildingSystem.type)
+            .join(Building, Building.id == BuildingSystem.building_id)
+            .filter(Building.project_id == project_id)
+            .order_by(BuildingSystem.name, BuildingSystem.type)
+            .all()
+        )
+        zones = (
+            db.query(Zone.id, Zone.building_id, Zone.name, Zone.type)
+            .join(Building, Building.id == Zone.building_id)
+            .filter(Building.project_id == project_id)
+            .order_by(Zone.name)
+            .all()
+        )
+        devices = (
+            db.query(Device.id, Device.system_id, Device.zone_id, Device.model, Device.device_type)
+            .join(BuildingSystem, BuildingSystem.id == Device.system_id)
+            .join(Building, Building.id == BuildingSystem.building_id)
+            .filter(Building.project_id == project_id)
+            .order_by(Device.model, Device.device_type)
+            .all()
+        )
+        zone_device_counts = dict(
+            db.query(Device.zone_id, func.count())
+            .join(Zone, Zone.id == Device.zone_id)
+            .join(Building, Building.id == Zone.building_id)
             .filter(Building.project_id == project_id)
+            .group_by(Device.zone_id)
             .all()
         )
+        asset_counts = EngineeringTreeService._asset_counts(project_id, db)
 
-        # 根节点
-        root = Node("项目根")
-        root.id = "project-root"
-        root.type = "project_root"
-
-        # Building -> System -> Device 以及 Building 下的 Zones
-        for building in buildings:
-            b_node = Node(building.name, parent=root)
-            b_node.id = str(building.id)
-            b_node.type = "building"
-            b_node.usage_type = building.usage_type
-
-            # Systems 及其 Devices
-            for system in building.systems:
-                s_node = Node(system.name or system.type, parent=b_node)
-                s_node.id = str(system.id)
-                s_node.type = "system"
-                s_node.system_type = system.type
-
-                for device in system.devices:
-                    d_node = Node(device.model or (device.device_type or "device"), parent=s_node)
-                    d_node.id = str(device.id)
-                    d_node.type = "device"
-                    d_node.device_type = device.device_type
-                    if device.zone is not None:
-                        d_node.zone = {
-                            "id": str(device.zone.id),
-                            "name": device.zone.name,
-                        }
-
-            # Zones 列表（不含设备）
-            for zone in building.zones:
-                z_node = Node(zone.name, parent=b_node)
-                z_node.id = str(zone.id)
-                z_node.type = "zone"
-                z_node.zone_type = zone.type
-                z_node.device_count = len(zone.devices)
-
-        return root
+        def counted(node: Dict[str, Any]) -> Dict[str, Any]:
+            total, pending = asset_counts.get(node["id"], (0, 0))
+            node["asset_count"] = total
+            node["pending_count"] = pending
+            return node
+
+        building_nodes: Dict[Any, Dict[str, Any]] = {}
+        root_children: List[Dict[str, Any]] = []
+        for b in buildings:
+            node = counted({**_building_node(b), "children": []})
+            building_nodes[b.id] = node
+            root_children.append(node)
+
+        system_nodes: Dict[Any, Dict[str, Any]] = {}
+        for s in systems:
+            node = counted({**_system_node(s), "children": []})
+            system_nodes[s.id] = node
+            building_nodes[s.building_id]["children"].append(node)
+
+        zone_refs: Dict[Any, Dict[str, str]] = {}
+        zone_nodes: List[tuple] = []
+        for z in zones:
+            zone_refs[z.id] = {"id": str(z.id), "name": z.name}
+            zone_nodes.append((z.building_id, counted(_zone_node(z, zone_device_counts.get(z.id, 0)))))
+
+        for d in devices:
+            system_nodes[d.system_id]["children"].append(counted(_device_node(d, zone_refs.get(d.zone_id))))
+
+        # 分区列在楼栋下的系统之后（不含设备）
+        for building_id, node in zone_nodes:
+            building_nodes[building_id]["children"].append(node)
+
+        return {"id": "project-root", "name": "项目根", "type": "project_root", "children": root_children}
+
+    @staticmethod
+    def node_snapshot(obj, db: Session) -> Dict[str, Any]:
+        """单个楼栋 / 系统 / 分区 / 设备对象对应的结构树节点（不含资产计数），供变更日志使用"""
+        if isinstance(obj, Building):
+            return _building_node(obj)
+        if isinstance(obj, BuildingSystem):
+            return _system_node(obj)
+        if isinstance(obj, Zone):
+            device_count = db.query(func.count(Device.id)).filter(Device.zone_id == obj.id).scalar()
+            return _zone_node(obj, device_count or 0)
+        zone = None
+        if obj.zone_id is not None:
+            row = db.query(Zone.id, Zone.name).filter(Zone.id == obj.zone_id).first()
+            if row is not None:
+                zone = {"id": str(row.id), "name": row.name}
+        return _device_node(obj, zone)
+
+    # ===== 按层懒加载 =====
+
+    @staticmethod
+    def _level_asset_counts(db: Session, group_column, *criteria) -> Dict[Any, List[int]]:
+        """单层资产计数：按子节点列分组，criteria 限定在父节点范围内"""
+        pending = func.sum(case((Asset.status == PENDING_STATUS, 1), else_=0))
+        rows = db.query(group_column, func.count(), pending).filter(*criteria).group_by(group_column)
+        return {node_id: [total, pending_total or 0] for node_id, total, pending_total in rows}
 
     @staticmethod
-    def tree_to_dict(node: Node) -> dict:
-        """将 bigtree Node 转换为可序列化的字典。"""
-        if node.is_leaf:
-            return {k: v for k, v in vars(node).items() if not k.startswith("_")}
-
-        return {
-            "id": getattr(node, "id", None),
-            "name": node.node_name,
-            "type": getattr(node, "type", None),
-            "children": [EngineeringTreeService.tree_to_dict(child) for child in node.children],
-        }
+    def _with_counts(node: Dict[str, Any], asset_counts: Dict[Any, List[int]], key, child_count: int) -> Dict[str, Any]:
+        total, pending = asset_counts.get(key, (0, 0))
+        node.update(asset_count=total, pending_count=pending, child_count=child_count,
+                    has_children=child_count > 0)
+        return node
+
+    @staticmethod
+    def list_children(project_id, parent_type: str, parent_id, db: Session) -> Optional[List[Dict[str, Any]]]:
+        """
+        返回结构树中一个父节点的直接子节点（节点格式与 build_project_tree 一致，另带 child_count / has_children）
+
+        parent_type 为 project 时返回楼栋；building 返回其系统与分区；system 返回其设备；
+        zone / device 没有子节点（父节点存在时返回空列表）。父节点不存在或不属于该项目时返回 None。
+        """
+        with_counts = EngineeringTreeService._with_counts
+        level_counts = EngineeringTreeService._level_asset_counts
+
+        if parent_type == "project":
+            buildings = (
+                db.query(Building.id, Building.name, Building.usage_type)
+                .filter(Building.project_id == project_id)
+                .order_by(Building.name)
+                .all()
+            )
+            child_counts: Dict[Any, int] = defaultdict(int)
+            for model in (BuildingSystem, Zone):
+                rows = (
+                    db.query(model.building_id, func.count())
+                    .join(Building, Building.id == model.building_id)
+                    .filter(Building.project_id == project_id)
+                    .group_by(model.building_id)
+                )
+                for building_id, total in rows:
+                    child_counts[building_id] += total
+            assets = level_counts(db, Asset.building_id, Asset.project_id == project_id,
+                                  Asset.building_id.isnot(None))
+            return [with_counts(_building_node(b), assets, b.id, child_counts[b.id]) for b in buildings]
+
+        if parent_type == "building":
+            building_exists = (
+                db.query(Building.id)
+                .filter(Building.id == parent_id, Building.project_id == project_id)
+                .first()
+            )
+            if building_exists is None:
+                return None
+            systems = (
+                db.query(BuildingSystem.id, BuildingSystem.name, BuildingSystem.type)
+                .filter(BuildingSystem.building_id == parent_id)
+                .order_by(BuildingSystem.name, BuildingSystem.type)
+                .all()
+            )
+            zones = (
+                db.query(Zone.id, Zone.name, Zone.type)
+                .filter(Zone.building_id == parent_id)
+                .order_by(Zone.name)
+                .all()
+            )
+            system_devices = dict(
+                db.query(Device.system_id, func.count())
+                .join(BuildingSystem, BuildingSystem.id == Device.system_id)
+                .filter(BuildingSystem.building_id == parent_id)
+                .group_by(Device.system_id)
+                .all()
+            )
+            zone_devices = dict(
+                db.query(Device.zone_id, func.count())
+                .join(Zone, Zone.id == Device.zone_id)
+                .filter(Zone.building_id == parent_id)
+                .group_by(Device.zone_id)
+                .all()
+            )
+            system_assets = level_counts(db, Asset.system_id, Asset.building_id == parent_id,
+                                         Asset.system_id.isnot(None))
+            zone_assets = level_counts(db, Asset.zone_id, Asset.building_id == parent_id,
+                                       Asset.zone_id.isnot(None))
+            # 分区在结构树中不展开设备，只给出 device_count
+            return [
+                with_counts(_system_node(s), system_assets, s.id, system_devices.get(s.id, 0))
+                for s in systems
+            ] + [
+                with_counts(_zone_node(z, zone_devices.get(z.id, 0)), zone_assets, z.id, 0)
+                for z in zones
+            ]
+
+        if parent_type == "system":
+            system_exists = (
+                db.query(BuildingSystem.id)
+                .join(Building, Building.id == BuildingSystem.building_id)
+                .filter(BuildingSystem.id == parent_id, Building.project_id == project_id)
+                .first()
+            )
+            if system_exists is None:
+                return None
+            devices = (
+                db.query(Device.id, Device.model, Device.device_type, Zone.id.label("zone_id"),
+                         Zone.name.label("zone_name"))
+                .outerjoin(Zone, Zone.id == Device.zone_id)
+                .filter(Device.system_id == parent_id)
+                .order_by(Device.model, Device.device_type)
+                .all()
+            )
+            assets = level_counts(db, Asset.device_id, Asset.system_id == parent_id, Asset.device_id.isnot(None))
+            return [
+                with_counts(
+                    _device_node(d, {"id": str(d.zone_id), "name": d.zone_name} if d.zone_id is not None else None),
+                    assets, d.id, 0,
+                )
+                for d in devices
+            ]
+
+        if parent_type == "zone":
+            parent_exists = (
+                db.query(Zone.id)
+                .join(Building, Building.id == Zone.building_id)
+                .filter(Zone.id == parent_id, Building.project_id == project_id)
+                .first()
+            )
+        else:
+            parent_exists = (
+                db.query(Device.id)
+                .join(BuildingSystem, BuildingSystem.id == Device.system_id)
+                .join(Building, Building.id == BuildingSystem.building_id)
+                .filter(Device.id == parent_id, Building.project_id == project_id)
+                .first()
+            )
+        return None if parent_exists is None else []
@@ -0,0 +1,38 @@
+"""
+启动阶段耗时
+
+记录模块导入与 startup 事件各阶段耗时，启动完成后写一行汇总日志，
+并通过 /api/v1/health/startup 与 /metrics 暴露，便于评估滚动重启与扩容速度。
+"""
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+logger = logging.getLogger("bdc_ai")
+
+
+class StartupTimings:
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        self.phases[name] = seconds
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {name: round(seconds, 4) for name, seconds in self.phases.items()}
+
+    def log_summary(self) -> None:
+        detail = ", ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in self.phases.items())
+        logger.info("启动完成: %s", detail)
+
+
+startup_timings = StartupTimings()
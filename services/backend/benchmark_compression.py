@@ -0,0 +1,125 @@
+"""
+响应压缩基准：典型 JSON 响应在各编码下的压缩率、压缩耗时与远程链路传输时间估算
+
+负载为合成数据，形态与线上一致：
+- assets：资产列表（含 OCR 结构化结果的 bbox 数组）
+- tree：项目工程结构树（楼栋 / 系统 / 设备）
+
+传输时间 = RTT + 字节数 / 带宽，带宽与 RTT 可按 Tailscale 中继链路实测值调整。
+
+用法示例：
+    python services/backend/benchmark_compression.py
+    python services/backend/benchmark_compression.py --rows 5000 --bandwidth-mbps 2 --rtt-ms 120
+"""
+
+import argparse
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from services.backend.app.compression import _Encoder, available_encodings  # noqa: E402
+from services.backend.app.responses import dumps  # noqa: E402
+
+LEVELS = {"gzip": 6, "br": 5, "zstd": 3}
+
+
+def asset_payload(n: int) -> List[Dict]:
+    base = datetime(2024, 1, 1)
+    project_id = uuid.uuid4()
+    return [
+        {
+            "id": uuid.uuid4(),
+            "project_id": project_id,
+            "modality": "image",
+            "source": "mobile",
+            "content_role": "meter",
+            "title": f"电表读数 {i}",
+            "capture_time": base + timedelta(minutes=i),
+            "tags": ["电表", "冷站"],
+            "status": "parsed_ocr_ok",
+            "structured": {
+                "lines": [
+                    {
+                        "text": f"{1000 + i * 7 + k}.{k}",
+                        "bbox": [[12.0 + k, 40.5], [188.0 + k, 40.5], [188.0 + k, 72.25], [12.0 + k, 72.25]],
+                        "confidence": 0.97,
+                    }
+                    for k in range(6)
+                ]
+            },
+        }
+        for i in range(n)
+    ]
+
+
+def tree_payload(n_devices: int) -> Dict:
+    buildings = []
+    per_system = 50
+    for b in range(max(1, n_devices // 1000)):
+        systems = []
+        for s in range(max(1, min(n_devices, 1000) // per_system)):
+            systems.append({
+                "id": str(uuid.uuid4()),
+                "name": f"系统 {s}",
+                "type": "system",
+                "children": [
+                    {"id": str(uuid.uuid4()), "name": f"AHU-{s}-{d}", "type": "device", "device_type": "AHU"}
+                    for d in range(per_system)
+                ],
+            })
+        buildings.append({"id": str(uuid.uuid4()), "name": f"{b + 1} 号楼", "type": "building", "children": systems})
+    return {"project_id": str(uuid.uuid4()), "tree": {"id": "project-root", "children": buildings}}
+
+
+def compress_once(encoding: str, body: bytes) -> bytes:
+    return _Encoder(encoding, LEVELS).compress(body, final=True)
+
+
+def timed(fn: Callable[[], bytes], repeat: int):
+    durations, out = [], b""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        out = fn()
+        durations.append(time.perf_counter() - started)
+    return out, statistics.median(durations) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="响应压缩基准")
+    parser.add_argument("--rows", type=int, default=2000, help="资产条数")
+    parser.add_argument("--devices", type=int, default=10000, help="结构树设备数")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--bandwidth-mbps", type=float, default=5.0, help="链路带宽（Mbit/s）")
+    parser.add_argument("--rtt-ms", type=float, default=80.0, help="往返时延（毫秒）")
+    args = parser.parse_args()
+
+    bytes_per_ms = args.bandwidth_mbps * 1_000_000 / 8 / 1000
+    payloads = {
+        "assets": dumps(asset_payload(args.rows)),
+        "tree": dumps(tree_payload(args.devices)),
+    }
+    encodings = available_encodings()
+    print(f"encodings: {', '.join(encodings)}  link: {args.bandwidth_mbps} Mbit/s, RTT {args.rtt_ms} ms")
+
+    for name, body in payloads.items():
+        raw_transfer = args.rtt_ms + len(body) / bytes_per_ms
+        print(f"\n{name}: {len(body) / 1024:.0f} KiB raw, transfer {raw_transfer:.0f} ms")
+        for encoding in encodings:
+            compressed, cpu_ms = timed(lambda: compress_once(encoding, body), args.repeat)
+            total = args.rtt_ms + cpu_ms + len(compressed) / bytes_per_ms
+            print(
+                f"  {encoding:<5} {len(compressed) / 1024:8.0f} KiB  ratio {len(body) / len(compressed):5.1f}x  "
+                f"compress {cpu_ms:6.1f} ms  transfer {total:7.0f} ms  speedup x{raw_transfer / total:.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+列表接口序列化微基准：Pydantic 逐行建模 + 标准库 json  vs  列投影 dict + orjson
+
+离线模式（默认）合成 N 条资产记录，分别计时：
+- pydantic：ORM 实例 -> TypeAdapter(List[AssetRead]) 校验 -> JSON 模式导出 -> json.dumps
+  （即 response_model + JSONResponse 的原路径）
+- fast：dict 行 -> orjson（生产环境路径）
+- fast+debug：dict 行 -> Pydantic 校验 -> orjson（BDC_DEBUG=true 时的路径）
+
+指定 --project-id 时改为从 BDC_DATABASE_URL 读取该项目的真实资产，计时包含查询与 ORM 实例化。
+
+用法示例：
+    python services/backend/benchmark_json.py --rows 20000 --repeat 5
+    python services/backend/benchmark_json.py --project-id <uuid> --repeat 10
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from pydantic import TypeAdapter  # noqa: E402
+
+from shared.db.models_asset import Asset  # noqa: E402
+from services.backend.app import responses  # noqa: E402
+from services.backend.app.schemas.asset import AssetRead  # noqa: E402
+
+ASSET_FIELDS = [name for name in AssetRead.model_fields if name != "engineer_path"]
+
+
+def synthetic_assets(n: int) -> List[Asset]:
+    project_id = uuid.uuid4()
+    base = datetime(2024, 1, 1)
+    return [
+        Asset(
+            id=uuid.uuid4(),
+            project_id=project_id,
+            building_id=uuid.uuid4(),
+            system_id=uuid.uuid4(),
+            modality="image",
+            source="mobile",
+            content_role="meter",
+            title=f"电表读数 {i}",
+            description="B1 冷站 1# 冷机电表",
+            file_id=uuid.uuid4(),
+            capture_time=base + timedelta(seconds=i),
+            location_meta={"floor": "B1", "room": "冷站"},
+            tags=["电表", "冷站"],
+            quality_score=0.92,
+            status="parsed_ocr_ok",
+        )
+        for i in range(n)
+    ]
+
+
+def as_rows(assets: List[Asset]) -> List[Dict]:
+    rows = []
+    for asset in assets:
+        row = {name: getattr(asset, name) for name in ASSET_FIELDS}
+        row["engineer_path"] = None
+        rows.append(row)
+    return rows
+
+
+def timed(fn: Callable[[], bytes], repeat: int) -> Dict[str, float]:
+    durations = []
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = len(fn())
+        durations.append(time.perf_counter() - started)
+    return {"median_ms": statistics.median(durations) * 1000, "min_ms": min(durations) * 1000, "bytes": size}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="列表接口 JSON 序列化微基准")
+    parser.add_argument("--rows", type=int, default=10000, help="离线模式合成的记录数")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--project-id", help="从数据库读取该项目的资产（计时包含查询）")
+    parser.add_argument("--json", dest="json_path", help="结果另存为 JSON 文件")
+    args = parser.parse_args()
+
+    adapter = TypeAdapter(List[AssetRead])
+
+    if args.project_id:
+        from shared.db.session import SessionLocal
+
+        project_id = uuid.UUID(args.project_id)
+        columns = [getattr(Asset, name) for name in ASSET_FIELDS]
+
+        def load_objects():
+            with SessionLocal() as db:
+                return db.query(Asset).filter(Asset.project_id == project_id).all()
+
+        def load_rows():
+            with SessionLocal() as db:
+                rows = responses.rows_to_dicts(db.query(*columns).filter(Asset.project_id == project_id))
+            for row in rows:
+                row["engineer_path"] = None
+            return rows
+    else:
+        assets = synthetic_assets(args.rows)
+        rows = as_rows(assets)
+
+        def load_objects():
+            return assets
+
+        def load_rows():
+            return rows
+
+    def pydantic_path() -> bytes:
+        data = adapter.dump_python(adapter.validate_python(load_objects(), from_attributes=True), mode="json")
+        return json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+    def fast_path() -> bytes:
+        return responses.dumps(load_rows())
+
+    def fast_debug_path() -> bytes:
+        return responses.dumps(adapter.dump_python(adapter.validate_python(load_rows()), mode="json"))
+
+    results = {
+        "pydantic": timed(pydantic_path, args.repeat),
+        "fast": timed(fast_path, args.repeat),
+        "fast+debug": timed(fast_debug_path, args.repeat),
+    }
+    baseline = results["pydantic"]["median_ms"]
+    rows_label = args.project_id or f"{args.rows} synthetic"
+    print(f"rows: {rows_label}, repeat: {args.repeat}, orjson: {responses.orjson is not None}")
+    for name, result in results.items():
+        speedup = baseline / result["median_ms"] if result["median_ms"] else float("inf")
+        print(
+            f"  {name:<11} median {result['median_ms']:8.1f} ms  min {result['min_ms']:8.1f} ms  "
+            f"{result['bytes'] / 1024:8.0f} KiB  x{speedup:.1f}"
+        )
+
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+工程结构树构建基准：joinedload + bigtree（原实现） vs 逐层列查询 + 分组计数（现实现）
+
+默认在临时 SQLite 库中合成一个项目：buildings × systems × devices_per_system 台设备
+（默认 10 × 10 × 100 = 10k），每个楼栋 20 个分区，每台设备挂 assets_per_device 个资产。
+两条路径均计时「查询 + 组装 + 序列化为 JSON 字节」，并统计执行的 SQL 条数。
+
+- legacy：多级 joinedload 一次取回 ORM 对象（楼栋 × 分区 × 系统 × 设备 的笛卡尔积行），
+  分区设备数逐个懒加载，再经 bigtree Node 与递归 tree_to_dict 转换；
+- flat：EngineeringTreeService.build_project_tree，额外包含资产数 / 待分析数的分组计数。
+
+指定 --project-id 时改为对 BDC_DATABASE_URL 中已有项目计时。
+
+用法示例：
+    python services/backend/benchmark_tree.py
+    python services/backend/benchmark_tree.py --devices-per-system 200 --repeat 3
+    python services/backend/benchmark_tree.py --project-id <uuid>
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from sqlalchemy import JSON, Uuid, create_engine  # noqa: E402
+from sqlalchemy.dialects.postgresql import JSONB, UUID  # noqa: E402
+from sqlalchemy.orm import Session, joinedload, sessionmaker  # noqa: E402
+
+from shared.db.base import Base  # noqa: E402
+from shared.db.instrumentation import track_queries  # noqa: E402
+from shared.db.models_asset import Asset, FileBlob  # noqa: E402
+from shared.db.models_project import Building, BuildingSystem, Device, Project, Zone  # noqa: E402
+from services.backend.app import responses  # noqa: E402
+from services.backend.app.services.tree_service import EngineeringTreeService  # noqa: E402
+
+
+def legacy_build_project_tree(project_id, db: Session):
+    """原 build_project_tree 实现（bigtree）"""
+    from bigtree import Node
+
+    buildings = (
+        db.query(Building)
+        .options(
+            joinedload(Building.zones),
+            joinedload(Building.systems).joinedload(BuildingSystem.devices).joinedload(Device.zone),
+        )
+        .filter(Building.project_id == project_id)
+        .all()
+    )
+    root = Node("项目根")
+    root.id = "project-root"
+    root.type = "project_root"
+    for building in buildings:
+        b_node = Node(building.name, parent=root)
+        b_node.id = str(building.id)
+        b_node.type = "building"
+        b_node.usage_type = building.usage_type
+        for system in building.systems:
+            s_node = Node(system.name or system.type, parent=b_node)
+            s_node.id = str(system.id)
+            s_node.type = "system"
+            s_node.system_type = system.type
+            for device in system.devices:
+                d_node = Node(device.model or (device.device_type or "device"), parent=s_node)
+                d_node.id = str(device.id)
+                d_node.type = "device"
+                d_node.device_type = device.device_type
+                if device.zone is not None:
+                    d_node.zone = {"id": str(device.zone.id), "name": device.zone.name}
+        for zone in building.zones:
+            z_node = Node(zone.name, parent=b_node)
+            z_node.id = str(zone.id)
+            z_node.type = "zone"
+            z_node.zone_type = zone.type
+            z_node.device_count = len(zone.devices)
+    return root
+
+
+def legacy_tree_to_dict(node) -> dict:
+    if node.is_leaf:
+        return {k: v for k, v in vars(node).items() if not k.startswith("_")}
+    return {
+        "id": getattr(node, "id", None),
+        "name": node.node_name,
+        "type": getattr(node, "type", None),
+        "children": [legacy_tree_to_dict(child) for child in node.children],
+    }
+
+
+def sqlite_session_factory() -> sessionmaker:
+    """临时 SQLite 库：PostgreSQL 专有类型换成通用类型后建表"""
+    for table in Base.metadata.tables.values():
+        for column in table.columns:
+            if isinstance(column.type, UUID):
+                column.type = Uuid(as_uuid=True)
+            elif isinstance(column.type, JSONB):
+                column.type = JSON()
+    path = tempfile.mktemp(suffix=".db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)
+
+
+def seed_project(db: Session, buildings: int, systems: int, devices_per_system: int,
+                 zones: int, assets_per_device: int) -> uuid.UUID:
+    project = Project(id=uuid.uuid4(), name="benchmark")
+    blob = FileBlob(id=uuid.uuid4(), storage_type="local", bucket="assets", path="x.jpg", file_name="x.jpg")
+    db.add_all([project, blob])
+    for b in range(buildings):
+        building = Building(id=uuid.uuid4(), project_id=project.id, name=f"{b + 1}号楼", usage_type="office")
+        zone_rows = [Zone(id=uuid.uuid4(), building_id=building.id, name=f"{z + 1}F", type="floor")
+                     for z in range(zones)]
+        db.add(building)
+        db.add_all(zone_rows)
+        for s in range(systems):
+            system = BuildingSystem(id=uuid.uuid4(), building_id=building.id, type="HVAC", name=f"系统 {s + 1}")
+            db.add(system)
+            for d in range(devices_per_system):
+                zone = zone_rows[d % zones] if zones else None
+                device = Device(id=uuid.uuid4(), system_id=system.id, zone_id=zone.id if zone else None,
+                                device_type="fcu", model=f"FCU-{s + 1}-{d + 1}")
+                db.add(device)
+                for a in range(assets_per_device):
+                    db.add(Asset(project_id=project.id, building_id=building.id, system_id=system.id,
+                                 zone_id=device.zone_id, device_id=device.id, modality="image",
+                                 source="mobile", file_id=blob.id,
+                                 status="pending_scene_llm" if a == 0 and d % 10 == 0 else "parsed_scene_llm"))
+        db.flush()
+    db.commit()
+    return project.id
+
+
+def timed(fn: Callable[[], bytes], repeat: int) -> Dict[str, float]:
+    durations = []
+    size = 0
+    queries = 0
+    for _ in range(repeat):
+        with track_queries() as stats:
+            started = time.perf_counter()
+            size = len(fn())
+            durations.append(time.perf_counter() - started)
+        queries = stats.count
+    return {"median_ms": statistics.median(durations) * 1000, "min_ms": min(durations) * 1000,
+            "bytes": size, "queries": queries}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="工程结构树构建基准")
+    parser.add_argument("--buildings", type=int, default=10)
+    parser.add_argument("--systems", type=int, default=10, help="每个楼栋的系统数")
+    parser.add_argument("--devices-per-system", type=int, default=100)
+    parser.add_argument("--zones", type=int, default=20, help="每个楼栋的分区数")
+    parser.add_argument("--assets-per-device", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--project-id", help="对 BDC_DATABASE_URL 中已有项目计时")
+    parser.add_argument("--json", dest="json_path", help="结果另存为 JSON 文件")
+    args = parser.parse_args()
+
+    if args.project_id:
+        from shared.db.session import SessionLocal
+
+        session_factory = SessionLocal
+        project_id = uuid.UUID(args.project_id)
+        label = args.project_id
+    else:
+        session_factory = sqlite_session_factory()
+        with session_factory() as db:
+            project_id = seed_project(db, args.buildings, args.systems, args.devices_per_system,
+                                      args.zones, args.assets_per_device)
+        devices = args.buildings * args.systems * args.devices_per_system
+        label = f"{devices} synthetic devices (sqlite)"
+
+    def legacy_path() -> bytes:
+        with session_factory() as db:
+            return responses.dumps(legacy_tree_to_dict(legacy_build_project_tree(project_id, db)))
+
+    def flat_path() -> bytes:
+        with session_factory() as db:
+            return responses.dumps(EngineeringTreeService.build_project_tree(project_id, db))
+
+    results = {
+        "legacy": timed(legacy_path, args.repeat),
+        "flat": timed(flat_path, args.repeat),
+    }
+    baseline = results["legacy"]["median_ms"]
+    print(f"project: {label}, repeat: {args.repeat}")
+    for name, result in results.items():
+        speedup = baseline / result["median_ms"] if result["median_ms"] else float("inf")
+        print(
+            f"  {name:<7} median {result['median_ms']:8.1f} ms  min {result['min_ms']:8.1f} ms  "
+            f"{result['queries']:5d} queries  {result['bytes'] / 1024:8.0f} KiB  x{speedup:.1f}"
+        )
+
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,407 @@
+"""
+GLM 批量推理回填（Batch API）
+
+用于整项目历史图片重跑：不再像 rerun_project_images.py 那样逐张同步调用视觉模型，
+而是把待处理资产及其 build_*_prompt 请求序列化为 JSONL 批量文件，提交到支持
+Batch 的端点，轮询完成后按在线 Worker 相同的回写路径（post_result_for_role）入库。
+批量任务走独立的配额，不与交互式分析抢占同一个速率限制。
+
+用法示例：
+    python batch_backfill.py --project-id <PROJECT_UUID>
+    python batch_backfill.py --project-id <PROJECT_UUID> --status any --roles meter,nameplate
+    python batch_backfill.py --local   # 使用本地替身后端（逐条调用在线接口，便于联调）
+"""
+
+import argparse
+import json
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    from . import scene_issue_glm_worker as worker
+except ImportError:  # 作为脚本直接运行
+    import scene_issue_glm_worker as worker
+
+
+# ================= 配置区域 =================
+# 批量文件输出目录（相对路径基于项目根目录）
+BATCH_OUTPUT_DIR = os.getenv("BDC_BATCH_OUTPUT_DIR", "data/batch")
+if not os.path.isabs(BATCH_OUTPUT_DIR):
+    BATCH_OUTPUT_DIR = str(Path(__file__).resolve().parent.parent.parent / BATCH_OUTPUT_DIR)
+
+# 单个 JSONL 文件的请求条数 / 字节上限（图片以 base64 内嵌，文件体积增长很快）
+BATCH_MAX_REQUESTS_PER_FILE = int(os.getenv("BDC_BATCH_MAX_REQUESTS_PER_FILE", "500"))
+BATCH_MAX_BYTES_PER_FILE = int(os.getenv("BDC_BATCH_MAX_BYTES_PER_FILE", str(90 * 1024 * 1024)))
+
+# Batch 端点及轮询配置
+BATCH_ENDPOINT = os.getenv("GLM_BATCH_ENDPOINT", "/v4/chat/completions")
+BATCH_COMPLETION_WINDOW = os.getenv("GLM_BATCH_COMPLETION_WINDOW", "24h")
+BATCH_POLL_INTERVAL = int(os.getenv("BDC_BATCH_POLL_INTERVAL", "60"))
+BATCH_TIMEOUT = int(os.getenv("BDC_BATCH_TIMEOUT", str(24 * 3600)))
+
+# 批量任务终态
+_DONE_STATES = {"completed"}
+_FAILED_STATES = {"failed", "expired", "cancelled"}
+
+
+@dataclass
+class BatchItem:
+    """一条批量请求及回写所需的上下文。"""
+
+    custom_id: str
+    role: str
+    note: str
+    body: Dict[str, Any]
+
+    def to_jsonl(self) -> str:
+        line = {
+            "custom_id": self.custom_id,
+            "method": "POST",
+            "url": BATCH_ENDPOINT,
+            "body": self.body,
+        }
+        return json.dumps(line, ensure_ascii=False)
+
+
+@dataclass
+class BatchFile:
+    """已写出的批量文件及其 manifest（custom_id -> role/note）。"""
+
+    path: Path
+    manifest: Dict[str, Dict[str, str]] = field(default_factory=dict)
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.path.with_suffix(".manifest.json")
+
+
+# ================= 序列化 =================
+
+def build_batch_item(asset: Dict[str, Any]) -> Optional[BatchItem]:
+    """拉取资产详情并构造批量请求；图片缺失等情况返回 None（与在线流程一致跳过）。"""
+
+    asset_id = asset.get("id")
+    if not asset_id:
+        return None
+
+    try:
+        detail = worker.get_asset_detail(str(asset_id))
+    except Exception as exc:  # noqa: BLE001
+        print(f"[WARN] Failed to fetch asset detail {asset_id}: {exc}")
+        return None
+
+    image_content = worker.get_image_content_from_detail(detail)
+    if not image_content:
+        return None
+
+    role, note, prompt = worker.build_prompt_for_detail(detail)
+    return BatchItem(
+        custom_id=str(asset_id),
+        role=role,
+        note=note,
+        body=worker.build_vision_request_body(image_content, prompt),
+    )
+
+
+def write_batch_files(
+    items: Iterable[BatchItem],
+    output_dir: str,
+    max_requests: int = BATCH_MAX_REQUESTS_PER_FILE,
+    max_bytes: int = BATCH_MAX_BYTES_PER_FILE,
+) -> List[BatchFile]:
+    """将批量请求按条数/字节上限切分写入 JSONL 文件，并为每个文件写出 manifest。"""
+
+    out_dir = Path(output_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    run_id = time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6]
+
+    files: List[BatchFile] = []
+    current: Optional[BatchFile] = None
+    handle = None
+    count = 0
+    size = 0
+
+    def _close() -> None:
+        if handle is not None:
+            handle.close()
+        if current is not None:
+            current.manifest_path.write_text(
+                json.dumps(current.manifest, ensure_ascii=False, indent=2), encoding="utf-8"
+            )
+
+    try:
+        for item in items:
+            line = item.to_jsonl() + "\n"
+            line_size = len(line.encode("utf-8"))
+            if current is None or count >= max_requests or (count and size + line_size > max_bytes):
+                _close()
+                current = BatchFile(path=out_dir / f"backfill-{run_id}-{len(files):03d}.jsonl")
+                files.append(current)
+                handle = current.path.open("w", encoding="utf-8")
+                count = 0
+                size = 0
+            handle.write(line)
+            current.manifest[item.custom_id] = {"role": item.role, "note": item.note}
+            count += 1
+            size += line_size
+    finally:
+        _close()
+
+    return files
+
+
+def load_manifest(batch_file: BatchFile) -> Dict[str, Dict[str, str]]:
+    if batch_file.manifest:
+        return batch_file.manifest
+    return json.loads(batch_file.manifest_path.read_text(encoding="utf-8"))
+
+
+# ================= Batch 后端 =================
+
+class OpenAIBatchBackend:
+    """基于 OpenAI 兼容 Batch API（GLM 开放平台同样支持）的批量后端。"""
+
+    def __init__(self, client=None) -> None:
+        self.client = client or worker.client
+
+    def submit(self, path: Path) -> str:
+        with path.open("rb") as fh:
+            uploaded = self.client.files.create(file=fh, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=BATCH_COMPLETION_WINDOW,
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def results(self, batch_id: str) -> List[Dict[str, Any]]:
+        batch = self.client.batches.retrieve(batch_id)
+        lines: List[Dict[str, Any]] = []
+        for file_id in (batch.output_file_id, getattr(batch, "error_file_id", None)):
+            if not file_id:
+                continue
+            text = self.client.files.content(file_id).text
+            lines.extend(json.loads(raw) for raw in text.splitlines() if raw.strip())
+        return lines
+
+
+class LocalBatchBackend:
+    """本地替身：提交时逐条执行请求并生成与远端一致的输出行，供测试与联调使用。
+
+    handler 接收一条请求体（chat.completions 参数），返回 message.content；
+    默认直接调用在线接口，测试中可替换为假实现。
+    """
+
+    def __init__(self, handler: Optional[Callable[[Dict[str, Any]], Any]] = None) -> None:
+        self.handler = handler or self._call_online
+        self._outputs: Dict[str, List[Dict[str, Any]]] = {}
+
+    @staticmethod
+    def _call_online(body: Dict[str, Any]) -> Any:
+        response = worker.client.chat.completions.create(**body)
+        return response.choices[0].message.content
+
+    def submit(self, path: Path) -> str:
+        batch_id = f"local-{uuid.uuid4().hex[:12]}"
+        outputs: List[Dict[str, Any]] = []
+        with path.open("r", encoding="utf-8") as fh:
+            for raw in fh:
+                if not raw.strip():
+                    continue
+                request = json.loads(raw)
+                try:
+                    content = self.handler(request["body"])
+                    outputs.append({
+                        "custom_id": request["custom_id"],
+                        "response": {
+                            "status_code": 200,
+                            "body": {"choices": [{"message": {"role": "assistant", "content": content}}]},
+                        },
+                        "error": None,
+                    })
+                except Exception as exc:  # noqa: BLE001
+                    outputs.append({
+                        "custom_id": request["custom_id"],
+                        "response": None,
+                        "error": {"message": str(exc)},
+                    })
+        self._outputs[batch_id] = outputs
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        return "completed" if batch_id in self._outputs else "failed"
+
+    def results(self, batch_id: str) -> List[Dict[str, Any]]:
+        return list(self._outputs.get(batch_id, []))
+
+
+# ================= 结果解析与回写 =================
+
+def parse_result_line(line: Dict[str, Any]) -> Tuple[str, Optional[Dict[str, Any]], Optional[str]]:
+    """解析一行批量输出，返回 (custom_id, 解析后的 JSON 结果, 错误信息)。"""
+
+    custom_id = str(line.get("custom_id") or "")
+    error = line.get("error")
+    if error:
+        return custom_id, None, str(error.get("message") if isinstance(error, dict) else error)
+
+    response = line.get("response") or {}
+    status_code = response.get("status_code")
+    if status_code not in (None, 200):
+        return custom_id, None, f"HTTP {status_code}"
+
+    try:
+        content = response["body"]["choices"][0]["message"]["content"]
+        result = worker.parse_vision_content(content)
+    except (KeyError, IndexError, TypeError, ValueError) as exc:
+        return custom_id, None, f"invalid response: {exc}"
+
+    if not result:
+        return custom_id, None, "empty result"
+    return custom_id, result, None
+
+
+def ingest_results(
+    lines: Iterable[Dict[str, Any]],
+    manifest: Dict[str, Dict[str, str]],
+) -> Tuple[int, int]:
+    """按在线 Worker 相同的路径回写结果，返回 (成功数, 失败数)。"""
+
+    ok = 0
+    failed = 0
+    for line in lines:
+        custom_id, result, error = parse_result_line(line)
+        meta = manifest.get(custom_id)
+        if meta is None:
+            print(f"[WARN] Batch result for unknown custom_id={custom_id!r}, skipped")
+            failed += 1
+            continue
+        if error or result is None:
+            print(f"[WARN] Batch request failed for asset {custom_id}: {error}")
+            failed += 1
+            continue
+        if worker.post_result_for_role(custom_id, meta.get("role") or "", result, meta.get("note")):
+            ok += 1
+        else:
+            failed += 1
+    return ok, failed
+
+
+def iter_finished_batches(backend, batch_ids: Iterable[str], poll_interval: int = BATCH_POLL_INTERVAL,
+                          timeout: int = BATCH_TIMEOUT) -> Iterator[Tuple[str, str]]:
+    """同时轮询多个批量任务，任务一到终态即产出 (batch_id, 状态)；超时未完成的产出 timeout。"""
+
+    pending = list(batch_ids)
+    deadline = time.monotonic() + timeout
+    while pending:
+        still_running = []
+        for batch_id in pending:
+            state = backend.status(batch_id)
+            if state in _DONE_STATES or state in _FAILED_STATES:
+                yield batch_id, state
+            else:
+                still_running.append(batch_id)
+        pending = still_running
+        if not pending:
+            return
+        if time.monotonic() >= deadline:
+            for batch_id in pending:
+                yield batch_id, "timeout"
+            return
+        print(f"[INFO] {len(pending)} batches still running, next poll in {poll_interval}s")
+        time.sleep(poll_interval)
+
+
+def wait_for_batch(backend, batch_id: str, poll_interval: int = BATCH_POLL_INTERVAL,
+                   timeout: int = BATCH_TIMEOUT) -> str:
+    """轮询单个批量任务直到终态，返回最终状态。"""
+
+    for _, state in iter_finished_batches(backend, [batch_id], poll_interval, timeout):
+        return state
+    return "timeout"
+
+
+def run_backfill(
+    backend,
+    assets: List[Dict[str, Any]],
+    output_dir: str = BATCH_OUTPUT_DIR,
+    poll_interval: int = BATCH_POLL_INTERVAL,
+    timeout: int = BATCH_TIMEOUT,
+    max_requests: int = BATCH_MAX_REQUESTS_PER_FILE,
+) -> Dict[str, int]:
+    """序列化 -> 提交 -> 轮询 -> 回写 的完整流程，返回统计信息。
+
+    请求逐条构造并直接写入 JSONL（内存中不保留整项目的 base64 图片）；
+    全部文件先提交，再统一轮询，任一批次完成即回写。
+    """
+
+    stats = {"assets": len(assets), "requests": 0, "files": 0, "ok": 0, "failed": 0}
+
+    def items() -> Iterator[BatchItem]:
+        for asset in assets:
+            item = build_batch_item(asset)
+            if item is not None:
+                stats["requests"] += 1
+                yield item
+
+    batch_files = write_batch_files(items(), output_dir, max_requests=max_requests)
+    stats["files"] = len(batch_files)
+    if not batch_files:
+        print("No assets to backfill.")
+        return stats
+
+    submitted: Dict[str, BatchFile] = {}
+    for batch_file in batch_files:
+        batch_id = backend.submit(batch_file.path)
+        submitted[batch_id] = batch_file
+        print(f"[INFO] Submitted {batch_file.path.name} as batch {batch_id}")
+
+    for batch_id, state in iter_finished_batches(backend, list(submitted), poll_interval, timeout):
+        manifest = load_manifest(submitted[batch_id])
+        if state not in _DONE_STATES:
+            print(f"[WARN] Batch {batch_id} ended with status={state}")
+            stats["failed"] += len(manifest)
+            continue
+        ok, failed = ingest_results(backend.results(batch_id), manifest)
+        # 未出现在输出中的请求同样计为失败
+        missing = max(len(manifest) - ok - failed, 0)
+        stats["ok"] += ok
+        stats["failed"] += failed + missing
+        print(f"[OK] Batch {batch_id}: {ok} ingested, {failed + missing} failed")
+
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="GLM 批量推理回填")
+    parser.add_argument("--project-id", default=worker.PROJECT_ID_FILTER, help="仅回填指定项目")
+    parser.add_argument("--roles", default=",".join(worker.LLM_ROLES), help="逗号分隔的 content_role")
+    parser.add_argument(
+        "--status",
+        default="pending_scene_llm",
+        help="逗号分隔的资产状态过滤；any 表示不过滤（历史重跑）",
+    )
+    parser.add_argument("--output-dir", default=BATCH_OUTPUT_DIR)
+    parser.add_argument("--poll-interval", type=int, default=BATCH_POLL_INTERVAL)
+    parser.add_argument("--local", action="store_true", help="使用本地替身后端（逐条在线调用）")
+    args = parser.parse_args()
+
+    roles = [r.strip() for r in args.roles.split(",") if r.strip()]
+    statuses = None if args.status == "any" else [s.strip() for s in args.status.split(",") if s.strip()]
+    assets = worker.fetch_image_assets(roles, args.project_id, statuses)
+    print(f"[INFO] {len(assets)} assets selected for batch backfill")
+
+    backend = LocalBatchBackend() if args.local else OpenAIBatchBackend()
+    stats = run_backfill(backend, assets, output_dir=args.output_dir, poll_interval=args.poll_interval)
+    print(f"[SUMMARY] {json.dumps(stats, ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""
+Worker 端到端吞吐基准测试（完全离线）
+
+启动本地 GLM 模拟服务（mock_glm_server），向数据库直接写入 N 张合成图片资产并完成路由，
+然后用真实的 Worker 处理循环（process_once）消费分析队列，统计：
+
+- 端到端吞吐（assets/sec）
+- 单资产处理延迟 p50 / p99（拉取详情 -> 结果回写）
+- 入队到完成的延迟 p50 / p99
+- 后端数据库负载（PostgreSQL pg_stat_database 的事务数/读写行数/块读取增量）
+
+前置条件：后端服务已启动（BDC_BACKEND_BASE_URL），且与本脚本使用同一数据库
+（BDC_DATABASE_URL）和本地存储目录（BDC_LOCAL_STORAGE_DIR）。
+
+用法示例：
+    python benchmark_worker.py --assets 200 --latency-median 0.5 --rate-429 0.02
+    python benchmark_worker.py --assets 500 --roles meter:2,scene_issue:1 --json result.json
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from PIL import Image, ImageDraw
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+try:
+    from . import mock_glm_server
+except ImportError:  # 作为脚本直接运行
+    import mock_glm_server
+
+
+# pg_stat_database 中用于衡量数据库负载的计数器
+_DB_COUNTERS = (
+    "xact_commit",
+    "xact_rollback",
+    "tup_returned",
+    "tup_fetched",
+    "tup_inserted",
+    "tup_updated",
+    "blks_read",
+    "blks_hit",
+)
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """最近秩法百分位数。"""
+
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100.0 * len(ordered)), 1)
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def parse_role_mix(raw: str) -> List[Tuple[str, float]]:
+    mix: List[Tuple[str, float]] = []
+    for item in raw.split(","):
+        role, _, weight = item.strip().partition(":")
+        if role:
+            mix.append((role, float(weight or 1)))
+    return mix
+
+
+def synthetic_image(rng: random.Random, size: Tuple[int, int]) -> Image.Image:
+    """生成带"文字区域"的合成照片：噪声背景 + 一块高对比条纹区域（模拟表盘/铭牌）。"""
+
+    width, height = size
+    img = Image.new("RGB", size, tuple(rng.randint(90, 160) for _ in range(3)))
+    draw = ImageDraw.Draw(img)
+    for _ in range(20):
+        x0, y0 = rng.randint(0, width - 1), rng.randint(0, height - 1)
+        x1, y1 = min(x0 + rng.randint(20, 200), width), min(y0 + rng.randint(20, 200), height)
+        draw.rectangle([x0, y0, x1, y1], fill=tuple(rng.randint(60, 190) for _ in range(3)))
+
+    pw, ph = width // 4, height // 6
+    px, py = rng.randint(0, width - pw), rng.randint(0, height - ph)
+    for i in range(0, pw, 6):
+        draw.rectangle([px + i, py, px + i + 2, py + ph], fill=(0, 0, 0))
+    return img
+
+
+def seed_assets(count: int, role_mix: List[Tuple[str, float]], image_size: Tuple[int, int],
+                seed: int) -> Tuple[str, Dict[str, float]]:
+    """创建基准项目并写入 count 张已路由（pending_scene_llm）的合成图片资产。
+
+    返回 (project_id, {asset_id: 入队时间戳})。
+    """
+
+    from shared.config.settings import get_settings
+    from shared.db.models_asset import Asset, FileBlob
+    from shared.db.models_project import Project
+    from shared.db.session import SessionLocal
+    from services.backend.app.services.image_pipeline import route_image_asset
+
+    settings = get_settings()
+    rng = random.Random(seed)
+    roles = [r for r, _ in role_mix]
+    weights = [w for _, w in role_mix]
+
+    db = SessionLocal()
+    enqueued: Dict[str, float] = {}
+    try:
+        project = Project(name=f"worker-benchmark-{time.strftime('%Y%m%d-%H%M%S')}", status="benchmark")
+        db.add(project)
+        db.commit()
+
+        storage_dir = Path(settings.local_storage_dir) / str(project.id)
+        storage_dir.mkdir(parents=True, exist_ok=True)
+
+        for i in range(count):
+            role = rng.choices(roles, weights)[0]
+            file_name = f"{uuid.uuid4()}.jpg"
+            abs_path = storage_dir / file_name
+            synthetic_image(rng, image_size).save(abs_path, format="JPEG", quality=85)
+
+            blob = FileBlob(
+                storage_type="local",
+                bucket="assets",
+                path=f"{project.id}/{file_name}",
+                file_name=file_name,
+                content_type="image/jpeg",
+                size=float(abs_path.stat().st_size),
+            )
+            db.add(blob)
+            db.flush()
+            asset = Asset(
+                project_id=project.id,
+                modality="image",
+                source="benchmark",
+                content_role=role,
+                title=f"benchmark-{i:05d}",
+                file_id=blob.id,
+            )
+            db.add(asset)
+            db.flush()
+            route_image_asset(db, asset)
+            enqueued[str(asset.id)] = time.perf_counter()
+        return str(project.id), enqueued
+    finally:
+        db.close()
+
+
+def cleanup_project(project_id: str) -> None:
+    """删除基准项目及其资产、文件记录和本地图片。"""
+
+    import shutil
+
+    from shared.config.settings import get_settings
+    from shared.db.models_asset import Asset, FileBlob
+    from shared.db.models_project import Project
+    from shared.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        project_uuid = uuid.UUID(project_id)
+        assets = db.query(Asset).filter(Asset.project_id == project_uuid).all()
+        file_ids = [a.file_id for a in assets]
+        for asset in assets:
+            db.delete(asset)
+        db.flush()
+        if file_ids:
+            db.query(FileBlob).filter(FileBlob.id.in_(file_ids)).delete(synchronize_session=False)
+        db.query(Project).filter(Project.id == project_uuid).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+    shutil.rmtree(Path(get_settings().local_storage_dir) / project_id, ignore_errors=True)
+
+
+def db_load_snapshot() -> Optional[Dict[str, int]]:
+    """读取当前数据库的 pg_stat_database 计数器；非 PostgreSQL 时返回 None。"""
+
+    from sqlalchemy import text
+
+    from shared.db.session import engine
+
+    if engine.dialect.name != "postgresql":
+        return None
+    columns = ", ".join(_DB_COUNTERS)
+    with engine.connect() as conn:
+        row = conn.execute(
+            text(f"SELECT {columns} FROM pg_stat_database WHERE datname = current_database()")
+        ).mappings().one()
+    return {key: int(row[key] or 0) for key in _DB_COUNTERS}
+
+
+def run_worker_until_drained(worker, pending: Dict[str, float], timeout: float) -> Dict[str, Any]:
+    """循环调用 worker.process_once，直到所有基准资产完成或超时。"""
+
+    started: Dict[str, float] = {}
+    finished: Dict[str, float] = {}
+    failures = 0
+
+    original_detail = worker.get_asset_detail
+    original_post = worker.post_result_for_role
+
+    def timed_detail(asset_id: str) -> Dict[str, Any]:
+        started.setdefault(str(asset_id), time.perf_counter())
+        return original_detail(asset_id)
+
+    def timed_post(asset_id: str, role: str, raw_result: Dict[str, Any], note: Optional[str]) -> bool:
+        nonlocal failures
+        ok = original_post(asset_id, role, raw_result, note)
+        if ok:
+            finished[str(asset_id)] = time.perf_counter()
+        else:
+            failures += 1
+        return ok
+
+    worker.get_asset_detail = timed_detail
+    worker.post_result_for_role = timed_post
+    begin = time.perf_counter()
+    rounds = 0
+    try:
+        while len(finished) < len(pending) and time.perf_counter() - begin < timeout:
+            rounds += 1
+            worker.process_once()
+    finally:
+        worker.get_asset_detail = original_detail
+        worker.post_result_for_role = original_post
+    elapsed = time.perf_counter() - begin
+
+    processing = [finished[a] - started[a] for a in finished if a in started]
+    end_to_end = [finished[a] - pending[a] for a in finished if a in pending]
+    return {
+        "completed": len(finished),
+        "post_failures": failures,
+        "rounds": rounds,
+        "elapsed_seconds": round(elapsed, 3),
+        "assets_per_second": round(len(finished) / elapsed, 3) if elapsed > 0 else None,
+        "processing_p50": percentile(processing, 50),
+        "processing_p99": percentile(processing, 99),
+        "end_to_end_p50": percentile(end_to_end, 50),
+        "end_to_end_p99": percentile(end_to_end, 99),
+    }
+
+
+def import_worker(mock_base_url: str, project_id: str, batch_size: int):
+    """将 Worker 指向模拟服务后导入（GLM 客户端在导入时创建）。"""
+
+    os.environ["GLM_BASE_URL"] = mock_base_url
+    os.environ["GLM_API_KEY"] = "mock"
+    os.environ["BDC_SCENE_PROJECT_ID"] = project_id
+    os.environ["BDC_SCENE_WORKER_BATCH_SIZE"] = str(batch_size)
+    try:
+        from . import scene_issue_glm_worker as worker
+    except ImportError:
+        import scene_issue_glm_worker as worker
+    worker.PROJECT_ID_FILTER = project_id
+    worker.QUEUE_BATCH_SIZE = batch_size
+    return worker
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Worker 端到端吞吐基准测试（离线）")
+    parser.add_argument("--assets", type=int, default=200, help="合成资产数量")
+    parser.add_argument("--roles", default="meter:1,nameplate:1,scene_issue:2", help="角色配比 role:weight")
+    parser.add_argument("--image-size", default="1600x1200", help="合成图片尺寸 WxH")
+    parser.add_argument("--batch-size", type=int, default=50, help="Worker 每轮领取数")
+    parser.add_argument("--timeout", type=float, default=1800, help="最长运行时间（秒）")
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--latency-median", type=float, default=0.5)
+    parser.add_argument("--latency-spread", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep", action="store_true", help="保留基准项目数据（默认结束后清理）")
+    parser.add_argument("--json", dest="json_path", default=None, help="将结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    width, _, height = args.image_size.lower().partition("x")
+    mock = mock_glm_server.serve(config=mock_glm_server.MockConfig(
+        latency=args.latency,
+        latency_median=args.latency_median,
+        latency_spread=args.latency_spread,
+        error_rate=args.error_rate,
+        rate_429=args.rate_429,
+        retry_after=0.2,
+        seed=args.seed,
+    ))
+    print(f"[INFO] Mock GLM server: {mock.base_url}")
+
+    print(f"[INFO] Seeding {args.assets} synthetic assets ...")
+    project_id, pending = seed_assets(args.assets, parse_role_mix(args.roles), (int(width), int(height)), args.seed)
+    print(f"[INFO] Benchmark project: {project_id}")
+
+    worker = import_worker(mock.base_url, project_id, args.batch_size)
+    db_before = db_load_snapshot()
+    try:
+        result = run_worker_until_drained(worker, pending, args.timeout)
+    finally:
+        db_after = db_load_snapshot()
+        mock.shutdown()
+        if not args.keep:
+            cleanup_project(project_id)
+
+    result["assets"] = args.assets
+    result["mock"] = mock.stats.to_dict()
+    if db_before is not None and db_after is not None:
+        delta = {key: db_after[key] - db_before[key] for key in _DB_COUNTERS}
+        completed = max(result["completed"], 1)
+        result["db_load"] = delta
+        result["db_load_per_asset"] = {key: round(value / completed, 2) for key, value in delta.items()}
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
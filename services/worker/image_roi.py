@@ -0,0 +1,200 @@
+"""
+图片感兴趣区域（ROI）裁剪
+
+meter / nameplate 图片中表盘或铭牌往往只占画面一小部分，整图发送给 GLM-4V 会浪费
+图片 token 和上传带宽。本模块在发送前定位文字区域并裁剪放大：
+
+1. 优先使用后端 image_annotation 载荷中已有的 OCR 文本框（annotations.ocr_lines[].bbox）；
+2. 没有 OCR 结果时，使用基于 NumPy 的文字密度启发式（梯度能量的分块统计）；
+3. 可选附带一张缩小的全景图，为模型保留上下文。
+"""
+
+import base64
+import io
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+
+# ================= 配置区域 =================
+ROI_ENABLED = os.getenv("BDC_ROI_ENABLED", "1").lower() not in ("0", "false", "no")
+ROI_ROLES = [r.strip() for r in os.getenv("BDC_ROI_ROLES", "meter,nameplate").split(",") if r.strip()]
+# 是否附带缩小的全景上下文图
+ROI_CONTEXT = os.getenv("BDC_ROI_CONTEXT", "0").lower() in ("1", "true", "yes")
+# 裁剪区域放大后的长边上限 / 全景缩略图长边
+ROI_MAX_SIDE = int(os.getenv("BDC_ROI_MAX_SIDE", "1024"))
+ROI_CONTEXT_SIDE = int(os.getenv("BDC_ROI_CONTEXT_SIDE", "512"))
+# 参与 ROI 计算的 OCR 行最低置信度
+ROI_MIN_CONFIDENCE = float(os.getenv("BDC_ROI_MIN_CONFIDENCE", "0.5"))
+# 文本框外扩比例（相对 ROI 宽高）
+ROI_PAD_RATIO = float(os.getenv("BDC_ROI_PAD_RATIO", "0.15"))
+# ROI 面积超过整图该比例时视为无裁剪收益，直接发送整图
+ROI_MAX_AREA_RATIO = float(os.getenv("BDC_ROI_MAX_AREA_RATIO", "0.8"))
+
+JPEG_QUALITY = 90
+
+Box = Tuple[int, int, int, int]  # (left, top, right, bottom)
+
+
+def ocr_boxes_from_detail(detail: Dict[str, Any], min_confidence: float = ROI_MIN_CONFIDENCE) -> List[Box]:
+    """从 AssetDetail 最新的 image_annotation 载荷中提取 OCR 文本框（轴对齐矩形）。"""
+
+    payloads = [
+        p for p in (detail.get("structured_payloads") or [])
+        if p.get("schema_type") == "image_annotation"
+    ]
+    if not payloads:
+        return []
+    latest = max(payloads, key=lambda p: p.get("version") or 0)
+    annotations = (latest.get("payload") or {}).get("annotations") or {}
+
+    boxes: List[Box] = []
+    for line in annotations.get("ocr_lines") or []:
+        confidence = line.get("confidence")
+        if confidence is not None and float(confidence) < min_confidence:
+            continue
+        points = line.get("bbox") or []
+        try:
+            xs = [float(p[0]) for p in points]
+            ys = [float(p[1]) for p in points]
+        except (TypeError, ValueError, IndexError):
+            continue
+        if xs and ys:
+            boxes.append((int(min(xs)), int(min(ys)), int(max(xs)) + 1, int(max(ys)) + 1))
+    return boxes
+
+
+def union_box(boxes: Sequence[Box]) -> Optional[Box]:
+    if not boxes:
+        return None
+    return (
+        min(b[0] for b in boxes),
+        min(b[1] for b in boxes),
+        max(b[2] for b in boxes),
+        max(b[3] for b in boxes),
+    )
+
+
+def text_density_box(img: Image.Image, grid: int = 16, analysis_side: int = 256) -> Optional[Box]:
+    """文字密度启发式：在缩略灰度图上统计分块梯度能量，返回高密度块的外接矩形。
+
+    文字、刻度和数码管区域边缘密集，梯度能量明显高于背景；阈值取各块能量的
+    均值 + 1 倍标准差。未找到明显高密度区域时返回 None。
+    """
+
+    width, height = img.size
+    scale = analysis_side / float(max(width, height))
+    small = img.convert("L")
+    if scale < 1:
+        small = small.resize((max(int(width * scale), grid), max(int(height * scale), grid)))
+    arr = np.asarray(small, dtype=np.float32)
+
+    grad = np.zeros_like(arr)
+    grad[:, 1:] += np.abs(np.diff(arr, axis=1))
+    grad[1:, :] += np.abs(np.diff(arr, axis=0))
+
+    rows = np.array_split(np.arange(arr.shape[0]), grid)
+    cols = np.array_split(np.arange(arr.shape[1]), grid)
+    energy = np.array([[grad[np.ix_(r, c)].mean() for c in cols] for r in rows])
+
+    threshold = energy.mean() + energy.std()
+    if energy.std() < 1e-3:
+        return None
+    hot_rows, hot_cols = np.nonzero(energy > threshold)
+    if hot_rows.size == 0:
+        return None
+
+    sx = width / float(arr.shape[1])
+    sy = height / float(arr.shape[0])
+    top = rows[hot_rows.min()][0]
+    bottom = rows[hot_rows.max()][-1] + 1
+    left = cols[hot_cols.min()][0]
+    right = cols[hot_cols.max()][-1] + 1
+    return (int(left * sx), int(top * sy), int(np.ceil(right * sx)), int(np.ceil(bottom * sy)))
+
+
+def pad_box(box: Box, size: Tuple[int, int], pad_ratio: float = ROI_PAD_RATIO) -> Box:
+    """按比例外扩并裁剪到图片范围内。"""
+
+    left, top, right, bottom = box
+    width, height = size
+    pad_x = int((right - left) * pad_ratio)
+    pad_y = int((bottom - top) * pad_ratio)
+    return (
+        max(left - pad_x, 0),
+        max(top - pad_y, 0),
+        min(right + pad_x, width),
+        min(bottom + pad_y, height),
+    )
+
+
+def resize_to_side(img: Image.Image, side: int, allow_upscale: bool = False) -> Image.Image:
+    """等比缩放到长边为 side（默认只缩小不放大）。"""
+
+    longest = max(img.size)
+    if longest == side or (longest < side and not allow_upscale):
+        return img
+    ratio = side / float(longest)
+    new_size = (max(int(img.size[0] * ratio), 1), max(int(img.size[1] * ratio), 1))
+    return img.resize(new_size, Image.LANCZOS)
+
+
+def encode_image_content(img: Image.Image) -> Dict[str, Any]:
+    """编码为 GLM-4V 的 image_url 内容块（JPEG base64）。"""
+
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    buffered = io.BytesIO()
+    img.save(buffered, format="JPEG", quality=JPEG_QUALITY)
+    img_str = base64.b64encode(buffered.getvalue()).decode()
+    return {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{img_str}"}}
+
+
+def find_roi(img: Image.Image, detail: Dict[str, Any]) -> Tuple[Optional[Box], str]:
+    """定位 ROI：OCR 文本框优先，其次文字密度启发式。
+
+    返回 (box, source)，source 为 ocr / density / none；裁剪收益不足时 box 为 None。
+    """
+
+    box = union_box(ocr_boxes_from_detail(detail))
+    source = "ocr"
+    if box is None:
+        box = text_density_box(img)
+        source = "density"
+    if box is None:
+        return None, "none"
+
+    box = pad_box(box, img.size)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    if area <= 0 or area > ROI_MAX_AREA_RATIO * img.size[0] * img.size[1]:
+        return None, "none"
+    return box, source
+
+
+def crop_roi_contents(
+    img: Image.Image,
+    box: Box,
+    include_context: bool = ROI_CONTEXT,
+) -> List[Dict[str, Any]]:
+    """返回 [ROI 放大图, (可选) 全景缩略图] 内容块。"""
+
+    crop = resize_to_side(img.crop(box), ROI_MAX_SIDE, allow_upscale=True)
+    contents = [encode_image_content(crop)]
+    if include_context:
+        contents.append(encode_image_content(resize_to_side(img, ROI_CONTEXT_SIDE)))
+    return contents
+
+
+def build_roi_image_contents(
+    img: Image.Image,
+    detail: Dict[str, Any],
+    include_context: bool = ROI_CONTEXT,
+) -> Optional[List[Dict[str, Any]]]:
+    """定位并裁剪 ROI；未找到有效 ROI 时返回 None。"""
+
+    box, _ = find_roi(img, detail)
+    if box is None:
+        return None
+    return crop_roi_contents(img, box, include_context)
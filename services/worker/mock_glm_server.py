@@ -0,0 +1,291 @@
+"""
+OpenAI 兼容的 GLM-4V 本地模拟服务
+
+用于离线压测分析管线，不调用真实 GLM API：
+
+- POST .../chat/completions   按 Prompt 判断 meter / nameplate / scene_issue，返回对应 JSON
+- GET  /stats                 请求计数（总数、429、5xx、按角色）
+
+可配置响应延迟分布（fixed / uniform / lognormal）、5xx 错误率和 429 限流注入比例。
+
+用法示例：
+    python mock_glm_server.py --port 18080 --latency lognormal --latency-median 1.5 --rate-429 0.05
+    # Worker 侧：
+    $env:GLM_BASE_URL = "http://127.0.0.1:18080/v1/"
+    $env:GLM_API_KEY = "mock"
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# 估算 token：中文按字计，图片按 base64 长度折算
+_CHARS_PER_IMAGE_TOKEN = 1000
+
+
+@dataclass
+class MockConfig:
+    latency: str = "lognormal"  # fixed | uniform | lognormal
+    latency_median: float = 1.0  # 秒；fixed 时为固定值，uniform 时为区间中点
+    latency_spread: float = 0.5  # uniform 的半宽 / lognormal 的 sigma
+    error_rate: float = 0.0  # 返回 500 的比例
+    rate_429: float = 0.0  # 返回 429 的比例
+    retry_after: float = 1.0  # 429 响应的 Retry-After（秒）
+    seed: Optional[int] = None
+
+    def sample_latency(self, rng: random.Random) -> float:
+        if self.latency == "fixed":
+            return max(self.latency_median, 0.0)
+        if self.latency == "uniform":
+            return max(rng.uniform(self.latency_median - self.latency_spread,
+                                   self.latency_median + self.latency_spread), 0.0)
+        if self.latency_median <= 0:
+            return 0.0
+        return rng.lognormvariate(math.log(self.latency_median), self.latency_spread)
+
+
+@dataclass
+class MockStats:
+    requests: int = 0
+    ok: int = 0
+    rate_limited: int = 0
+    errors: int = 0
+    by_role: Dict[str, int] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "ok": self.ok,
+                "rate_limited": self.rate_limited,
+                "errors": self.errors,
+                "by_role": dict(self.by_role),
+            }
+
+
+def detect_role(messages: List[Dict[str, Any]]) -> Tuple[str, int, int]:
+    """根据 Prompt 判断请求角色，并返回 (role, 文本字符数, 图片 base64 字符数)。"""
+
+    text_parts: List[str] = []
+    image_chars = 0
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            text_parts.append(content)
+            continue
+        for block in content or []:
+            if block.get("type") == "text":
+                text_parts.append(block.get("text") or "")
+            elif block.get("type") == "image_url":
+                image_chars += len((block.get("image_url") or {}).get("url") or "")
+
+    text = "\n".join(text_parts)
+    if "铭牌识别" in text:
+        role = "nameplate"
+    elif "仪表读数" in text:
+        role = "meter"
+    else:
+        role = "scene_issue"
+    return role, len(text), image_chars
+
+
+def fake_result(role: str, rng: random.Random) -> Dict[str, Any]:
+    """生成符合各 payload schema 的模拟识别结果。"""
+
+    confidence = round(rng.uniform(0.6, 0.95), 2)
+    if role == "meter":
+        reading = round(rng.uniform(10, 90), 1)
+        return {
+            "pre_reading": None,
+            "reading": reading,
+            "unit": "℃",
+            "status": "confirmed_from_image",
+            "summary": f"模拟读数 {reading}℃",
+            "confidence": confidence,
+            "tags": ["仪表", "mock"],
+        }
+    if role == "nameplate":
+        return {
+            "equipment_type": "pump",
+            "fields": [
+                {"key": "rated_power_kw", "label": "额定功率(kW)", "value": 45.0, "unit": "kW",
+                 "confidence": confidence},
+            ],
+        }
+    return {
+        "title": "",
+        "issue_category": "",
+        "severity": "low",
+        "summary": "设备运行状态正常，未发现异常（模拟结果）",
+        "suspected_causes": [],
+        "recommended_actions": [],
+        "confidence": confidence,
+        "tags": ["mock"],
+    }
+
+
+def build_completion(model: str, content: str, prompt_tokens: int, completion_tokens: int) -> Dict[str, Any]:
+    return {
+        "id": f"chatcmpl-mock-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+class MockGLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], config: MockConfig) -> None:
+        super().__init__(address, _Handler)
+        self.config = config
+        self.stats = MockStats()
+        self.rng = random.Random(config.seed)
+        self.rng_lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1/"
+
+    def start_background(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, name="mock-glm", daemon=True)
+        thread.start()
+        return thread
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: MockGLMServer
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - 静默访问日志
+        return
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path.rstrip("/") == "/stats":
+            self._send_json(200, self.server.stats.to_dict())
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self) -> None:  # noqa: N802
+        if not self.path.rstrip("/").endswith("chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "invalid JSON body"}})
+            return
+
+        config = self.server.config
+        stats = self.server.stats
+        with self.server.rng_lock:
+            roll = self.server.rng.random()
+            latency = config.sample_latency(self.server.rng)
+            result_rng = random.Random(self.server.rng.random())
+
+        role, text_chars, image_chars = detect_role(body.get("messages") or [])
+        with stats.lock:
+            stats.requests += 1
+            stats.by_role[role] = stats.by_role.get(role, 0) + 1
+
+        # 429 立即返回（模拟网关限流），其余请求按延迟分布等待
+        if roll < config.rate_429:
+            with stats.lock:
+                stats.rate_limited += 1
+            self._send_json(
+                429,
+                {"error": {"code": "1302", "message": "mock rate limit"}},
+                {"Retry-After": str(config.retry_after)},
+            )
+            return
+
+        time.sleep(latency)
+
+        if roll < config.rate_429 + config.error_rate:
+            with stats.lock:
+                stats.errors += 1
+            self._send_json(500, {"error": {"message": "mock internal error"}})
+            return
+
+        content = json.dumps(fake_result(role, result_rng), ensure_ascii=False)
+        prompt_tokens = text_chars + image_chars // _CHARS_PER_IMAGE_TOKEN
+        with stats.lock:
+            stats.ok += 1
+        self._send_json(200, build_completion(body.get("model") or "mock", content, prompt_tokens, len(content)))
+
+
+def serve(host: str = "127.0.0.1", port: int = 0, config: Optional[MockConfig] = None) -> MockGLMServer:
+    """创建并在后台线程启动模拟服务；port=0 时自动分配端口。"""
+
+    server = MockGLMServer((host, port), config or MockConfig())
+    server.start_background()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="OpenAI 兼容的 GLM-4V 模拟服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--latency-median", type=float, default=1.0, help="延迟中位数（秒）")
+    parser.add_argument("--latency-spread", type=float, default=0.5, help="uniform 半宽 / lognormal sigma")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回 500 的比例")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="返回 429 的比例")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency=args.latency,
+        latency_median=args.latency_median,
+        latency_spread=args.latency_spread,
+        error_rate=args.error_rate,
+        rate_429=args.rate_429,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    server = MockGLMServer((args.host, args.port), config)
+    print(f"Mock GLM server listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
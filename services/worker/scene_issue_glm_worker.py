@@ -3,18 +3,26 @@ import time
 import base64
 import json
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple, Union
 from difflib import SequenceMatcher
 
 import requests
 from openai import OpenAI
-from PIL import Image
+from PIL import Image, ImageOps
 import io
 from dotenv import load_dotenv
 
 # 加载 .env 文件
 load_dotenv()
 
+# ROI / 指标模块在加载 .env 之后导入，以便读取其中的 BDC_ROI_* / BDC_WORKER_* 配置
+try:
+    from . import image_roi
+    from . import worker_metrics as metrics
+except ImportError:  # 作为脚本直接运行
+    import image_roi
+    import worker_metrics as metrics
+
 # ================= 配置区域 =================
 # 后端服务地址（FastAPI）
 BACKEND_BASE_URL = os.getenv("BDC_BACKEND_BASE_URL", "http://127.0.0.1:8000").rstrip("/")
@@ -39,18 +47,27 @@ VISION_MODEL = os.getenv("GLM_VISION_MODEL", "glm-4v")
 # Worker 轮询间隔 (秒)
 POLL_INTERVAL = int(os.getenv("BDC_SCENE_WORKER_POLL_INTERVAL", "600"))
 
+# 每轮从分析队列领取的资产数量（队列已按优先级与项目公平份额排序）
+QUEUE_BATCH_SIZE = int(os.getenv("BDC_SCENE_WORKER_BATCH_SIZE", "50"))
+
 if not GLM_API_KEY:
     raise RuntimeError("GLM_API_KEY is not set in environment variables")
 
 client = OpenAI(api_key=GLM_API_KEY, base_url=GLM_BASE_URL)
 
+# 交由 LLM 解析的图片 content_role
+LLM_ROLES = ["scene_issue", "meter", "nameplate"]
+
 
 # ================= 辅助函数 =================
 
-def get_pending_scene_assets() -> List[Dict[str, Any]]:
-    """从后端获取待 LLM 处理的图片资产列表（scene_issue / meter / nameplate）。"""
+def fetch_image_assets(
+    roles: List[str],
+    project_id: Optional[str] = None,
+    statuses: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    """按 content_role 从后端拉取图片资产，可选按项目和状态过滤（statuses 为空表示不过滤状态）。"""
 
-    roles = ["scene_issue", "meter", "nameplate"]
     collected: Dict[str, Dict[str, Any]] = {}
 
     for role in roles:
@@ -58,8 +75,8 @@ def get_pending_scene_assets() -> List[Dict[str, Any]]:
             "modality": "image",
             "content_role": role,
         }
-        if PROJECT_ID_FILTER:
-            params["project_id"] = PROJECT_ID_FILTER
+        if project_id:
+            params["project_id"] = project_id
 
         resp = requests.get(f"{BACKEND_BASE_URL}/api/v1/assets", params=params, timeout=30)
         if resp.status_code != 200:
@@ -72,14 +89,59 @@ def get_pending_scene_assets() -> List[Dict[str, Any]]:
             continue
 
         for a in assets:
-            if a.get("status") == "pending_scene_llm":
-                asset_id = a.get("id")
-                if asset_id:
-                    collected[str(asset_id)] = a
+            if statuses and a.get("status") not in statuses:
+                continue
+            asset_id = a.get("id")
+            if asset_id:
+                collected[str(asset_id)] = a
 
     return list(collected.values())
 
 
+def get_pending_scene_assets() -> List[Dict[str, Any]]:
+    """从后端分析队列获取待 LLM 处理的图片资产列表（scene_issue / meter / nameplate）。
+
+    分析队列按 expedite、content_role 优先级、排队时长及项目公平份额排序；
+    旧版后端没有队列接口时退回按角色逐一拉取。
+    """
+
+    params: Dict[str, Any] = {"limit": QUEUE_BATCH_SIZE}
+    if PROJECT_ID_FILTER:
+        params["project_id"] = PROJECT_ID_FILTER
+
+    with metrics.stage_timer("fetch_queue"):
+        resp = requests.get(f"{BACKEND_BASE_URL}/api/v1/assets/analysis_queue", params=params, timeout=30)
+    if resp.status_code in (404, 422):  # 旧版后端会把 analysis_queue 当作 asset_id 解析
+        return fetch_image_assets(LLM_ROLES, PROJECT_ID_FILTER, ["pending_scene_llm"])
+    if resp.status_code != 200:
+        print(f"[WARN] Failed to fetch analysis queue: HTTP {resp.status_code} {resp.text}")
+        return []
+
+    assets = resp.json()
+    if not isinstance(assets, list):
+        print("[WARN] Unexpected analysis queue response shape (expected list)")
+        return []
+    return [a for a in assets if (a.get("content_role") or "").lower() in LLM_ROLES]
+
+
+def refresh_queue_depth() -> None:
+    """拉取后端分析队列各优先级类别的深度，更新 queue_depth 指标。"""
+
+    params: Dict[str, Any] = {}
+    if PROJECT_ID_FILTER:
+        params["project_id"] = PROJECT_ID_FILTER
+    try:
+        with metrics.stage_timer("fetch_queue_stats"):
+            resp = requests.get(
+                f"{BACKEND_BASE_URL}/api/v1/assets/analysis_queue/stats", params=params, timeout=30
+            )
+    except Exception as exc:  # noqa: BLE001
+        print(f"[WARN] Failed to fetch analysis queue stats: {exc}")
+        return
+    if resp.status_code == 200:
+        metrics.set_queue_depth(resp.json())
+
+
 def get_asset_detail(asset_id: str) -> Dict[str, Any]:
     resp = requests.get(f"{BACKEND_BASE_URL}/api/v1/assets/{asset_id}", timeout=30)
     resp.raise_for_status()
@@ -87,7 +149,11 @@ def get_asset_detail(asset_id: str) -> Dict[str, Any]:
 
 
 def get_image_content_from_detail(detail: Dict[str, Any]):
-    """根据 AssetDetail 返回的 file_path 构造本地图片内容。"""
+    """根据 AssetDetail 返回的 file_path 构造本地图片内容。
+
+    meter / nameplate 角色启用 ROI 时返回内容块列表（ROI 放大图 + 可选全景缩略图），
+    否则返回单个整图内容块。
+    """
 
     file_path = detail.get("file_path")
     if not file_path:
@@ -102,10 +168,20 @@ def get_image_content_from_detail(detail: Dict[str, Any]):
         print(f"[WARN] Local image file not found: {full_path}")
         return None
 
+    role = (detail.get("content_role") or "").lower()
     try:
         with Image.open(full_path) as img:
+            # 手机照片按 EXIF 方向摆正，与 OCR（cv2 读取时已应用 EXIF 方向）的文本框坐标一致
+            img = ImageOps.exif_transpose(img)
             if img.mode in ("RGBA", "P"):
                 img = img.convert("RGB")
+
+            if image_roi.ROI_ENABLED and role in image_roi.ROI_ROLES:
+                box, source = image_roi.find_roi(img, detail)
+                metrics.ROI_TOTAL.labels(source=source).inc()
+                if box is not None:
+                    return image_roi.crop_roi_contents(img, box)
+
             buffered = io.BytesIO()
             img.save(buffered, format="JPEG")
             img_str = base64.b64encode(buffered.getvalue()).decode()
@@ -280,35 +356,75 @@ JSON 结构必须严格为：
     return base
 
 
-def call_glm_vision(image_content: Dict[str, Any], text_prompt: str) -> Optional[Dict[str, Any]]:
+ImageContent = Union[Dict[str, Any], List[Dict[str, Any]]]
+
+# ROI 裁剪时附带全景缩略图的说明，追加在 Prompt 末尾
+ROI_CONTEXT_HINT = "\n\n说明：第一张图片为目标区域的局部放大图，第二张为缩小的全景图，仅供理解上下文。"
+
+
+def build_vision_messages(image_content: ImageContent, text_prompt: str) -> List[Dict[str, Any]]:
+    """构造 GLM-4V chat.completions 的 messages（在线调用与批量文件共用）。
+
+    image_content 可以是单个图片内容块，也可以是 ROI 阶段返回的内容块列表。
+    """
+
+    images = image_content if isinstance(image_content, list) else [image_content]
+    if len(images) > 1:
+        text_prompt = text_prompt + ROI_CONTEXT_HINT
+    return [
+        {
+            "role": "user",
+            "content": [
+                *images,
+                {"type": "text", "text": text_prompt},
+            ],
+        }
+    ]
+
+
+def build_vision_request_body(image_content: ImageContent, text_prompt: str) -> Dict[str, Any]:
+    """构造 chat.completions 请求体，与 call_glm_vision 的参数保持一致。"""
+
+    return {
+        "model": VISION_MODEL,
+        "messages": build_vision_messages(image_content, text_prompt),
+        "response_format": {"type": "json_object"},
+        "temperature": 0.1,
+    }
+
+
+def parse_vision_content(content: Any) -> Optional[Dict[str, Any]]:
+    """将模型返回的 message.content 解析为 JSON 对象。"""
+
+    if isinstance(content, str):
+        return json.loads(content)
+    if isinstance(content, dict):
+        return content
+    print(f"[WARN] Unexpected GLM content type: {type(content)}")
+    return None
+
+
+def call_glm_vision(image_content: ImageContent, text_prompt: str, role: str = "") -> Optional[Dict[str, Any]]:
     """调用 GLM-4V，期望返回符合 SceneIssueReportPayload 的 JSON 对象。"""
 
     try:
-        response = client.chat.completions.create(
-            model=VISION_MODEL,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        image_content,
-                        {"type": "text", "text": text_prompt},
-                    ],
-                }
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.1,
-        )
-        content = response.choices[0].message.content
-        if isinstance(content, str):
-            return json.loads(content)
-        if isinstance(content, dict):
-            return content
-        print(f"[WARN] Unexpected GLM content type: {type(content)}")
-        return None
+        with metrics.stage_timer("llm_call", role):
+            response = client.chat.completions.create(**build_vision_request_body(image_content, text_prompt))
     except Exception as exc:  # noqa: BLE001
+        # 异常已由 stage_timer 按类型计数，不再计为 empty_result
         print(f"[ERROR] GLM API Error: {exc}")
         return None
 
+    metrics.record_usage(role, getattr(response, "usage", None))
+    try:
+        result = parse_vision_content(response.choices[0].message.content)
+    except Exception as exc:  # noqa: BLE001
+        print(f"[ERROR] GLM response parse error: {exc}")
+        result = None
+    if not result:
+        metrics.record_error("llm_call", "empty_result")
+    return result
+
 
 def normalise_scene_payload(raw: Dict[str, Any], note: Optional[str] = None) -> Dict[str, Any]:
     """将 GLM 返回结果规范化为 SceneIssueReportPayload 结构。
@@ -403,11 +519,47 @@ def post_meter_reading(asset_id: str, payload: Dict[str, Any]) -> bool:
         return False
 
 
+def build_prompt_for_detail(detail: Dict[str, Any]) -> Tuple[str, str, str]:
+    """根据 AssetDetail 选择 Prompt，返回 (role, note, prompt)。"""
+
+    note = detail.get("description") or ""
+    meta = detail.get("location_meta") or {}
+    pre_reading = None
+    if isinstance(meta, dict):
+        pre_reading = meta.get("meter_pre_reading")
+
+    # 根据 content_role 选择不同的 Prompt 和后端端点：
+    role = (detail.get("content_role") or "").lower()
+    if role == "nameplate":
+        prompt = build_nameplate_prompt(note)
+    elif role == "meter":
+        prompt = build_meter_prompt(pre_reading, note)
+    else:
+        prompt = build_scene_prompt(note)
+    return role, note, prompt
+
+
+def post_result_for_role(asset_id: str, role: str, raw_result: Dict[str, Any], note: Optional[str]) -> bool:
+    """按 content_role 将 GLM 结果回写到对应的后端端点（在线与批量回填共用）。"""
+
+    if role == "nameplate":
+        return post_nameplate_table(asset_id, raw_result)
+    if role == "meter":
+        return post_meter_reading(asset_id, raw_result)
+    payload = normalise_scene_payload(raw_result, note)
+    return post_scene_issue_report(asset_id, payload)
+
+
 # ================= 主循环 =================
 
 def process_once() -> None:
     print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Checking for pending scene_issue/meter/nameplate assets...")
-    assets = get_pending_scene_assets()
+    refresh_queue_depth()
+    try:
+        assets = get_pending_scene_assets()
+    except Exception as exc:  # noqa: BLE001
+        metrics.log_event("error", "fetch_queue_failed", error=str(exc))
+        return
     if not assets:
         print("No pending assets found.")
         return
@@ -418,50 +570,51 @@ def process_once() -> None:
             continue
 
         role = (asset.get("content_role") or "").lower()
-        print(f"Processing asset {asset_id} (role={role}) ...")
+        metrics.log_event("info", "processing", asset_id, role=role)
         try:
-            detail = get_asset_detail(asset_id)
+            with metrics.stage_timer("fetch_detail", role):
+                detail = get_asset_detail(asset_id)
         except Exception as exc:  # noqa: BLE001
-            print(f"[WARN] Failed to fetch asset detail {asset_id}: {exc}")
+            metrics.log_event("warn", "fetch_detail_failed", asset_id, role=role, error=str(exc))
+            metrics.record_asset(role, "failed")
             continue
 
-        image_content = get_image_content_from_detail(detail)
+        with metrics.stage_timer("encode_image", role):
+            image_content = get_image_content_from_detail(detail)
         if not image_content:
+            metrics.record_error("encode_image", "image_unavailable")
+            metrics.record_asset(role, "skipped")
             continue
 
-        note = detail.get("description") or ""
-        meta = detail.get("location_meta") or {}
-        pre_reading = None
-        if isinstance(meta, dict):
-            pre_reading = meta.get("meter_pre_reading")
-
-        # 根据 content_role 选择不同的 Prompt 和后端端点：
-        role = (detail.get("content_role") or "").lower()
-        if role == "nameplate":
-            prompt = build_nameplate_prompt(note)
-        elif role == "meter":
-            prompt = build_meter_prompt(pre_reading, note)
-        else:
-            prompt = build_scene_prompt(note)
-
-        raw_result = call_glm_vision(image_content, prompt)
+        role, note, prompt = build_prompt_for_detail(detail)
+
+        start = time.perf_counter()
+        raw_result = call_glm_vision(image_content, prompt, role)
         if not raw_result:
-            print(f"[WARN] GLM returned empty/invalid result for asset {asset_id}")
+            metrics.log_event("warn", "llm_empty_result", asset_id, role=role)
+            metrics.record_asset(role, "failed")
             continue
-
-        if role == "nameplate":
-            post_nameplate_table(asset_id, raw_result)
-        elif role == "meter":
-            post_meter_reading(asset_id, raw_result)
-        else:
-            payload = normalise_scene_payload(raw_result, note)
-            post_scene_issue_report(asset_id, payload)
+        llm_seconds = time.perf_counter() - start
+
+        with metrics.stage_timer("post_result", role):
+            posted = post_result_for_role(asset_id, role, raw_result, note)
+        if not posted:
+            metrics.record_error("post_result", "rejected")
+        metrics.record_asset(role, "ok" if posted else "failed")
+        metrics.log_event(
+            "info" if posted else "warn",
+            "processed" if posted else "post_failed",
+            asset_id,
+            role=role,
+            llm_seconds=round(llm_seconds, 3),
+        )
 
 
 def main() -> None:
     print("Starting GLM-4V scene_issue worker...")
     print(f"Backend: {BACKEND_BASE_URL}")
     print(f"Local storage dir: {LOCAL_STORAGE_DIR}")
+    metrics.start_metrics_server()
     while True:
         process_once()
         time.sleep(POLL_INTERVAL)
@@ -0,0 +1,179 @@
+"""
+Worker 可观测性：Prometheus 指标与结构化日志
+
+指标通过内嵌 HTTP 端点以 Prometheus 文本格式暴露（BDC_WORKER_METRICS_PORT，0 表示关闭）：
+
+- bdc_worker_stage_seconds{stage,role}            各阶段耗时直方图（拉取队列/详情、图片编码、GLM 调用、结果回写）
+- bdc_worker_assets_total{role,outcome}           按角色统计的处理结果（吞吐）
+- bdc_worker_errors_total{stage,error_type}       按阶段与异常类型统计的错误数
+- bdc_worker_queue_depth{priority_class}          后端分析队列深度
+- bdc_worker_inflight_requests{target}            进行中的 GLM / 后端请求数
+- bdc_worker_llm_tokens_total{role,kind}          token 用量（prompt / completion / cached）
+- bdc_worker_llm_cache_hit_ratio                  最近一次调用的 prompt 缓存命中率
+- bdc_worker_roi_total{source}                    ROI 定位来源（ocr / density / none）
+
+BDC_WORKER_LOG_FORMAT=json 时，log_event 输出带 asset_id 的单行 JSON 日志。
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, start_http_server
+
+
+METRICS_PORT = int(os.getenv("BDC_WORKER_METRICS_PORT", "9108"))
+METRICS_ADDR = os.getenv("BDC_WORKER_METRICS_ADDR", "0.0.0.0")
+LOG_FORMAT = os.getenv("BDC_WORKER_LOG_FORMAT", "text").lower()
+
+# GLM 调用通常为秒级，后端请求为毫秒级，桶覆盖两者
+_LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80, 160)
+
+REGISTRY = CollectorRegistry()
+
+STAGE_SECONDS = Histogram(
+    "bdc_worker_stage_seconds",
+    "Latency of each worker processing stage",
+    ["stage", "role"],
+    buckets=_LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+ASSETS_TOTAL = Counter(
+    "bdc_worker_assets_total",
+    "Assets handled by the worker, by role and outcome",
+    ["role", "outcome"],
+    registry=REGISTRY,
+)
+ERRORS_TOTAL = Counter(
+    "bdc_worker_errors_total",
+    "Worker errors by stage and error type",
+    ["stage", "error_type"],
+    registry=REGISTRY,
+)
+QUEUE_DEPTH = Gauge(
+    "bdc_worker_queue_depth",
+    "Backend analysis queue depth per priority class",
+    ["priority_class"],
+    registry=REGISTRY,
+)
+INFLIGHT = Gauge(
+    "bdc_worker_inflight_requests",
+    "Requests currently in flight",
+    ["target"],
+    registry=REGISTRY,
+)
+LLM_TOKENS = Counter(
+    "bdc_worker_llm_tokens_total",
+    "GLM token usage by role and kind (prompt/completion/cached)",
+    ["role", "kind"],
+    registry=REGISTRY,
+)
+LLM_CACHE_HIT_RATIO = Gauge(
+    "bdc_worker_llm_cache_hit_ratio",
+    "Share of prompt tokens served from the provider cache in the latest call",
+    registry=REGISTRY,
+)
+ROI_TOTAL = Counter(
+    "bdc_worker_roi_total",
+    "ROI localisation outcome for cropped roles",
+    ["source"],
+    registry=REGISTRY,
+)
+
+# 各阶段访问的目标，用于 in-flight 统计
+_STAGE_TARGET = {
+    "fetch_queue": "backend",
+    "fetch_queue_stats": "backend",
+    "fetch_detail": "backend",
+    "post_result": "backend",
+    "llm_call": "llm",
+}
+
+
+def start_metrics_server(port: int = METRICS_PORT, addr: str = METRICS_ADDR) -> bool:
+    """启动内嵌指标端点；端口为 0 或被占用（同机多实例）时跳过。"""
+
+    if port <= 0:
+        return False
+    try:
+        start_http_server(port, addr=addr, registry=REGISTRY)
+    except OSError as exc:
+        print(f"[WARN] Metrics endpoint not started on {addr}:{port}: {exc}")
+        return False
+    print(f"[INFO] Metrics endpoint listening on http://{addr}:{port}/metrics")
+    return True
+
+
+def record_error(stage: str, error_type: str) -> None:
+    ERRORS_TOTAL.labels(stage=stage, error_type=error_type).inc()
+
+
+@contextmanager
+def stage_timer(stage: str, role: str = "") -> Iterator[None]:
+    """记录阶段耗时；异常按类型计数后继续抛出。"""
+
+    target = _STAGE_TARGET.get(stage)
+    if target:
+        INFLIGHT.labels(target=target).inc()
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as exc:
+        record_error(stage, type(exc).__name__)
+        raise
+    finally:
+        STAGE_SECONDS.labels(stage=stage, role=role or "unknown").observe(time.perf_counter() - start)
+        if target:
+            INFLIGHT.labels(target=target).dec()
+
+
+def record_asset(role: str, outcome: str) -> None:
+    ASSETS_TOTAL.labels(role=role or "unknown", outcome=outcome).inc()
+
+
+def record_usage(role: str, usage: Any) -> None:
+    """记录 OpenAI 兼容响应中的 usage（含 prompt 缓存命中 token，如果服务端返回）。"""
+
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+    completion_tokens = getattr(usage, "completion_tokens", None) or 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = (getattr(details, "cached_tokens", None) or 0) if details is not None else 0
+
+    role = role or "unknown"
+    LLM_TOKENS.labels(role=role, kind="prompt").inc(prompt_tokens)
+    LLM_TOKENS.labels(role=role, kind="completion").inc(completion_tokens)
+    LLM_TOKENS.labels(role=role, kind="cached").inc(cached_tokens)
+    if prompt_tokens:
+        LLM_CACHE_HIT_RATIO.set(cached_tokens / float(prompt_tokens))
+
+
+def set_queue_depth(stats: Dict[str, Any]) -> None:
+    """根据后端 /assets/analysis_queue/stats 的返回更新队列深度。"""
+
+    for priority_class, bucket in (stats.get("by_priority_class") or {}).items():
+        depth = bucket.get("depth") if isinstance(bucket, dict) else bucket
+        QUEUE_DEPTH.labels(priority_class=priority_class).set(depth or 0)
+
+
+def log_event(level: str, event: str, asset_id: Optional[str] = None, **fields: Any) -> None:
+    """输出一条日志：json 模式为单行 JSON，否则保持原有的 [LEVEL] 文本风格。"""
+
+    if LOG_FORMAT == "json":
+        record: Dict[str, Any] = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "level": level.lower(),
+            "event": event,
+        }
+        if asset_id is not None:
+            record["asset_id"] = str(asset_id)
+        record.update(fields)
+        print(json.dumps(record, ensure_ascii=False, default=str), flush=True)
+        return
+
+    extras = " ".join(f"{k}={v}" for k, v in fields.items())
+    target = f" asset={asset_id}" if asset_id is not None else ""
+    print(f"[{level.upper()}] {event}{target}" + (f" {extras}" if extras else ""))
@@ -0,0 +1,173 @@
+"""
+SQL 查询埋点
+
+基于 SQLAlchemy 引擎事件统计每个请求的查询次数、数据库耗时与最慢语句：
+- 中间件在响应中写入 Server-Timing 与 X-DB-Queries 头；
+- 超过阈值的慢查询连同参数形态（类型而非取值）写入日志；
+- 同一请求内相同语句形态重复执行达到阈值时记为疑似 N+1；
+- query_budget() / assert_response_query_budget() 供测试断言查询次数上限。
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, List, Optional, Tuple
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from shared.config.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger("bdc_ai.sql")
+
+# 每个请求保留的最慢语句条数
+SLOWEST_KEEP = 3
+
+_WHITESPACE = re.compile(r"\s+")
+_IN_LIST = re.compile(r"IN \((?:[^()]*?)\)", re.IGNORECASE)
+
+
+def statement_shape(statement: str) -> str:
+    """归一化语句文本：压缩空白，并把 IN (...) 列表折叠为 IN (...)"""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    return _IN_LIST.sub("IN (...)", shape)
+
+
+def parameter_shape(parameters: Any) -> Any:
+    """参数形态：只保留类型名，避免把用户数据写进日志"""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return [parameter_shape(parameters[0]), f"x{len(parameters)}"]
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+class QueryStats:
+    """单个请求（或测试代码块）内的查询统计"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.shapes: Counter = Counter()
+        self.slowest: List[Tuple[float, str]] = []
+
+    def record(self, shape: str, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        self.shapes[shape] += 1
+        self.slowest.append((seconds, shape))
+        self.slowest.sort(key=lambda item: item[0], reverse=True)
+        del self.slowest[SLOWEST_KEEP:]
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """重复次数达到阈值的语句形态（疑似 N+1）"""
+        if threshold <= 0:
+            return []
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+    def server_timing(self) -> str:
+        timing = f'db;dur={self.total_seconds * 1000:.1f};desc="{self.count} queries"'
+        if self.slowest:
+            timing += f", db-slowest;dur={self.slowest[0][0] * 1000:.1f}"
+        return timing
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("bdc_query_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _current.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = _current.get()
+    if stats is None:
+        return
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    shape = statement_shape(statement)
+    stats.record(shape, elapsed)
+
+    if settings.slow_query_ms > 0 and elapsed * 1000 >= settings.slow_query_ms:
+        logger.warning(
+            "慢查询 %.1fms: %s | params=%s", elapsed * 1000, shape, parameter_shape(parameters)
+        )
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """在代码块内统计查询（可嵌套，内层统计独立）"""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def query_budget(max_queries: int) -> Iterator[QueryStats]:
+    """
+    测试辅助：断言代码块内的查询次数不超过 max_queries
+
+    Raises:
+        AssertionError: 超出预算时列出各语句形态及次数
+    """
+    with track_queries() as stats:
+        yield stats
+    if stats.count > max_queries:
+        detail = "\n".join(f"  {n} x {shape}" for shape, n in stats.shapes.most_common())
+        raise AssertionError(f"执行了 {stats.count} 条查询，超出预算 {max_queries}:\n{detail}")
+
+
+def assert_response_query_budget(response, max_queries: int) -> int:
+    """
+    测试辅助：按 X-DB-Queries 响应头断言接口的查询次数上限
+
+    TestClient 在独立线程中运行应用，上下文变量不会回传到测试线程，
+    因此接口级预算以中间件写入的响应头为准。
+
+    Returns:
+        int: 实际查询次数
+    """
+    count = int(response.headers["X-DB-Queries"])
+    if count > max_queries:
+        raise AssertionError(
+            f"{response.request.method} {response.request.url.path} 执行了 {count} 条查询，超出预算 {max_queries}"
+        )
+    return count
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+async def query_stats_middleware(request: Request, call_next):
+    """为每个请求统计查询并写入 Server-Timing / X-DB-Queries 响应头"""
+    with track_queries() as stats:
+        response = await call_next(request)
+
+    response.headers["X-DB-Queries"] = str(stats.count)
+    timing = stats.server_timing()
+    existing = response.headers.get("Server-Timing")
+    response.headers["Server-Timing"] = f"{existing}, {timing}" if existing else timing
+
+    suspects = stats.repeated(settings.n_plus_one_threshold)
+    if suspects:
+        shape, n = suspects[0]
+        response.headers["X-DB-N-Plus-One"] = str(n)
+        logger.warning(
+            "疑似 N+1: %s %s 重复执行 %d 次: %s", request.method, request.url.path, n, shape
+        )
+    return response
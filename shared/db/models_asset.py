@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Float, ForeignKey, String, JSON
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, String, JSON, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -28,10 +28,10 @@ class Asset(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id"), nullable=False)
-    building_id = Column(UUID(as_uuid=True), ForeignKey("buildings.id"), nullable=True)
-    zone_id = Column(UUID(as_uuid=True), ForeignKey("zones.id"), nullable=True)
-    system_id = Column(UUID(as_uuid=True), ForeignKey("systems.id"), nullable=True)
-    device_id = Column(UUID(as_uuid=True), ForeignKey("devices.id"), nullable=True)
+    building_id = Column(UUID(as_uuid=True), ForeignKey("buildings.id"), nullable=True, index=True)
+    zone_id = Column(UUID(as_uuid=True), ForeignKey("zones.id"), nullable=True, index=True)
+    system_id = Column(UUID(as_uuid=True), ForeignKey("systems.id"), nullable=True, index=True)
+    device_id = Column(UUID(as_uuid=True), ForeignKey("devices.id"), nullable=True, index=True)
 
     modality = Column(String(50), nullable=False)
     source = Column(String(50), nullable=False)
@@ -56,6 +56,11 @@ class Asset(Base):
     )
     features = relationship("AssetFeature", back_populates="asset", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # 资产挂接的最具体结构节点（设备 > 系统 > 分区 > 楼栋），与闭包表连接做楼栋汇总
+        Index("ix_assets_structure_anchor", func.coalesce(device_id, system_id, zone_id, building_id)),
+    )
+
 
 class AssetStructuredPayload(Base):
     __tablename__ = "asset_structured_payloads"
@@ -69,6 +74,11 @@ class AssetStructuredPayload(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     asset = relationship("Asset", back_populates="structured_payloads")
 
+    __table_args__ = (
+        # 列表摘要：按资产、结果类型取最新一条
+        Index("ix_asset_payloads_asset_schema_created", "asset_id", "schema_type", "created_at"),
+    )
+
 
 class AssetFeature(Base):
     __tablename__ = "asset_features"
@@ -3,7 +3,7 @@ import uuid
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Column, DateTime, ForeignKey, String, Boolean, Text, Integer, UniqueConstraint
+from sqlalchemy import Column, DateTime, ForeignKey, String, Boolean, Text, Integer, UniqueConstraint, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 
@@ -32,6 +32,8 @@ class User(Base):
 
     # 关系
     user_roles = relationship("UserRole", back_populates="user", cascade="all, delete-orphan")
+    # 只读的角色集合，列表接口用 selectinload 一次批量加载
+    roles = relationship("Role", secondary="user_roles", viewonly=True, order_by="Role.level.desc()")
     project_members = relationship("ProjectMember", back_populates="user", cascade="all, delete-orphan",
                                   foreign_keys="ProjectMember.user_id")
     audit_logs = relationship("AuditLog", back_populates="user", cascade="all, delete-orphan")
@@ -165,5 +167,41 @@ class AuditLog(Base):
     # 关系
     user = relationship("User", back_populates="audit_logs")
 
+    # 键集分页按 (created_at, id) 倒序；常用过滤条件各带时间列，便于范围扫描
+    __table_args__ = (
+        Index("ix_audit_logs_created_at_id", "created_at", "id"),
+        Index("ix_audit_logs_user_created", "user_id", "created_at"),
+        Index("ix_audit_logs_action_created", "action", "created_at"),
+        Index("ix_audit_logs_resource_created", "resource_type", "resource_id", "created_at"),
+    )
+
     def __repr__(self):
         return f"<AuditLog(id={self.id}, action={self.action}, user_id={self.user_id})>"
+
+
+class AuditLogArchive(Base):
+    """
+    审计日志归档表
+
+    超过保留期的 audit_logs 记录按批次搬迁至此，主表保持较小规模；
+    user_id 不设外键，用户删除后归档记录仍完整保留。
+    """
+    __tablename__ = "audit_logs_archive"
+
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    user_id = Column(UUID(as_uuid=True), nullable=True)
+    action = Column(String(100), nullable=False)
+    resource_type = Column(String(50), nullable=True)
+    resource_id = Column(String(100), nullable=True)
+    details = Column(JSONB, nullable=True)
+    ip_address = Column(String(50), nullable=True)
+    user_agent = Column(String(500), nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    archived_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_audit_logs_archive_created_at_id", "created_at", "id"),
+    )
+
+    def __repr__(self):
+        return f"<AuditLogArchive(id={self.id}, action={self.action}, created_at={self.created_at})>"
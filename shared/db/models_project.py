@@ -1,7 +1,7 @@
 import uuid
 from datetime import date, datetime
 
-from sqlalchemy import Column, Date, DateTime, Float, ForeignKey, String, Boolean
+from sqlalchemy import Column, Date, DateTime, Float, ForeignKey, Index, Integer, String, Boolean
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 
@@ -24,6 +24,8 @@ class Project(Base):
     deleted_at = Column(DateTime, nullable=True)
     deleted_by = Column(String(100), nullable=True)
     deletion_reason = Column(String(500), nullable=True)
+    # 结构树版本号：楼栋/分区/系统/设备每次增删改递增，用于结构树缓存与 ETag
+    tree_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     buildings = relationship("Building", back_populates="project", cascade="all, delete-orphan")
 
@@ -87,3 +89,50 @@ class Device(Base):
 
     system = relationship("BuildingSystem", back_populates="devices")
     zone = relationship("Zone", back_populates="devices")
+
+
+class EngineeringChange(Base):
+    """工程结构变更日志：楼栋 / 分区 / 系统 / 设备的增删改，供结构树增量同步"""
+
+    __tablename__ = "engineering_changes"
+
+    # 自增主键保证同一 seq 内的变更按写入顺序回放（如先楼栋、后其默认系统）
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    # 变更提交时的项目结构树版本号（projects.tree_version），按项目单调递增
+    seq = Column(Integer, nullable=False)
+    op = Column(String(10), nullable=False)  # insert / update / delete
+    node_type = Column(String(20), nullable=False)  # building / zone / system / device
+    node_id = Column(UUID(as_uuid=True), nullable=False)
+    parent_type = Column(String(20), nullable=False)  # project / building / system
+    parent_id = Column(UUID(as_uuid=True), nullable=True)
+    # 变更后的节点快照（与 structure_tree 节点格式一致，不含计数）；delete 时为空
+    node = Column(JSONB, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_engineering_changes_project_seq", "project_id", "seq"),
+    )
+
+
+class EngineeringClosure(Base):
+    """
+    工程结构闭包表：楼栋 → 分区 / 系统 → 设备 的每一对（祖先, 后代），含 depth=0 的自身行
+
+    设备同时挂在系统与分区下，两条路径各有一行。用于「某节点下的全部资产」与楼栋汇总，
+    由结构变更的写入路径维护（见 services/backend/app/services/tree_closure.py）。
+    """
+
+    __tablename__ = "engineering_closure"
+
+    ancestor_id = Column(UUID(as_uuid=True), primary_key=True)
+    descendant_id = Column(UUID(as_uuid=True), primary_key=True)
+    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    ancestor_type = Column(String(20), nullable=False)  # building / zone / system / device
+    descendant_type = Column(String(20), nullable=False)
+    depth = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_engineering_closure_descendant", "descendant_id"),
+        Index("ix_engineering_closure_project_ancestor_type", "project_id", "ancestor_type"),
+    )
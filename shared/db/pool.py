@@ -0,0 +1,152 @@
+"""数据库连接池配置与遥测"""
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import NullPool, QueuePool
+
+# 获取连接等待时间的直方图分桶（秒）
+CHECKOUT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class PoolStats:
+    """单个连接池的连接获取延迟与超时计数（进程内累计）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.bucket_counts = [0] * (len(CHECKOUT_BUCKETS) + 1)
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += seconds
+            if seconds > self.wait_seconds_max:
+                self.wait_seconds_max = seconds
+            for i, bound in enumerate(CHECKOUT_BUCKETS):
+                if seconds <= bound:
+                    self.bucket_counts[i] += 1
+                    break
+            else:
+                self.bucket_counts[-1] += 1
+
+    def observe_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+                "wait_seconds_buckets": dict(zip(
+                    [str(b) for b in CHECKOUT_BUCKETS] + ["+Inf"], self.bucket_counts
+                )),
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    记录每次从池中获取连接的等待时间与超时次数的 QueuePool
+
+    统计挂在池对象上（主库与只读副本各自一份），engine.dispose() 重建池时沿用原统计。
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.observe_timeout()
+            raise
+        self.stats.observe(time.perf_counter() - started)
+        return conn
+
+
+def build_engine_kwargs(settings, url: str) -> Dict[str, Any]:
+    """
+    根据 Settings 生成 create_engine 参数
+
+    - db_pool_size 为 0 时使用 NullPool，由外部 PgBouncer 负责复用连接；
+    - PgBouncer 事务池模式下不能使用启动参数 options，语句超时改为每个事务 SET LOCAL；
+    - SQLite 只保留默认参数。
+    """
+    kwargs: Dict[str, Any] = {"future": True}
+    if url.startswith("sqlite"):
+        return kwargs
+
+    kwargs["pool_pre_ping"] = settings.db_pool_pre_ping
+    if settings.db_pool_size <= 0:
+        kwargs["poolclass"] = NullPool
+    else:
+        kwargs.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+        )
+
+    connect_args: Dict[str, Any] = {}
+    if settings.db_connect_timeout > 0:
+        connect_args["connect_timeout"] = settings.db_connect_timeout
+    if settings.db_statement_timeout_ms > 0 and not settings.db_pgbouncer:
+        connect_args["options"] = f"-c statement_timeout={settings.db_statement_timeout_ms}"
+    if settings.db_application_name:
+        connect_args["application_name"] = settings.db_application_name
+    if connect_args:
+        kwargs["connect_args"] = connect_args
+    return kwargs
+
+
+def install_statement_timeout(engine: Engine, timeout_ms: int) -> None:
+    """PgBouncer 事务池模式：每个事务开始时设置 SET LOCAL statement_timeout"""
+    if timeout_ms <= 0:
+        return
+
+    statement = f"SET LOCAL statement_timeout = {int(timeout_ms)}"
+
+    @event.listens_for(engine, "begin")
+    def _set_local_timeout(conn) -> None:
+        # begin 事件中事务对象尚未就绪，直接使用 DBAPI 游标，避免重入 autobegin
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(statement)
+        finally:
+            cursor.close()
+
+
+def pool_status(engine: Engine) -> Dict[str, Any]:
+    """一个 engine 的连接池当前状态 + 该池的累计获取延迟统计（未埋点的池计数为 0）"""
+    pool = engine.pool
+    status: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            in_use=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+        )
+    status.update((getattr(pool, "stats", None) or PoolStats()).snapshot())
+    return status
@@ -0,0 +1,123 @@
+"""
+只读副本路由
+
+- 配置 BDC_READ_DATABASE_URL 后，GET 接口通过 get_read_db 读取副本；
+- 副本延迟超过阈值或探测失败时自动回落到主库；
+- 写请求成功后下发粘滞 Cookie（或由客户端回传 X-BDC-Read-Primary-Until 头），
+  窗口期内该客户端的读请求仍走主库，保证读到自己的写入。
+"""
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+from fastapi import Request
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("bdc_ai.db")
+
+# 粘滞窗口的 Cookie / 请求头名称，值为 Unix 时间戳（秒）
+STICKY_COOKIE = "bdc_read_primary_until"
+STICKY_HEADER = "X-BDC-Read-Primary-Until"
+# 客户端显式要求读主库
+FORCE_PRIMARY_HEADER = "X-BDC-Read-Primary"
+
+_WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+def postgres_lag_probe(engine: Engine) -> Callable[[], float]:
+    """返回测量 PostgreSQL 流复制副本回放延迟（秒）的探测函数"""
+
+    def _probe() -> float:
+        with engine.connect() as conn:
+            lag = conn.execute(text(
+                "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+            )).scalar()
+        return float(lag or 0.0)
+
+    return _probe
+
+
+class ReplicaMonitor:
+    """
+    副本可用性判断：按间隔缓存延迟探测结果
+
+    探测异常视为不可用，直到下一次探测成功。
+    """
+
+    def __init__(self, probe: Callable[[], float], max_lag_seconds: float, check_interval: float):
+        self.probe = probe
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._healthy = False
+        self.lag_seconds: Optional[float] = None
+        self.fallbacks = 0
+        self.replica_reads = 0
+
+    def is_usable(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at >= self.check_interval:
+                self._checked_at = now
+                try:
+                    self.lag_seconds = self.probe()
+                    self._healthy = self.lag_seconds <= self.max_lag_seconds
+                except Exception:
+                    logger.warning("只读副本探测失败，暂时回落主库", exc_info=True)
+                    self.lag_seconds = None
+                    self._healthy = False
+            if self._healthy:
+                self.replica_reads += 1
+            else:
+                self.fallbacks += 1
+            return self._healthy
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "healthy": self._healthy,
+                "lag_seconds": self.lag_seconds,
+                "max_lag_seconds": self.max_lag_seconds,
+                "replica_reads": self.replica_reads,
+                "fallbacks": self.fallbacks,
+            }
+
+
+def sticky_until(request: Request) -> float:
+    """读取请求携带的粘滞截止时间（Cookie 或请求头），无则返回 0"""
+    raw = request.headers.get(STICKY_HEADER) or request.cookies.get(STICKY_COOKIE)
+    try:
+        return float(raw) if raw else 0.0
+    except ValueError:
+        return 0.0
+
+
+def wants_primary(request: Request) -> bool:
+    """该读请求是否必须走主库"""
+    if request.headers.get(FORCE_PRIMARY_HEADER, "").lower() in ("1", "true", "yes"):
+        return True
+    return sticky_until(request) > time.time()
+
+
+def make_read_your_writes_middleware(window_seconds: float):
+    """
+    写请求成功后下发粘滞窗口
+
+    响应同时带 Cookie 与同名响应头，方便不保存 Cookie 的客户端自行回传。
+    """
+
+    async def _middleware(request: Request, call_next):
+        response = await call_next(request)
+        if window_seconds > 0 and request.method in _WRITE_METHODS and response.status_code < 400:
+            until = f"{time.time() + window_seconds:.3f}"
+            response.headers[STICKY_HEADER] = until
+            response.set_cookie(
+                STICKY_COOKIE, until, max_age=int(window_seconds) + 1, httponly=True, samesite="lax"
+            )
+        return response
+
+    return _middleware
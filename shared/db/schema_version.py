@@ -0,0 +1,91 @@
+"""
+数据库结构版本
+
+每个迁移脚本在末尾写入 schema_version 一行；SCHEMA_VERSION 为当前代码期望的版本，脚本执行顺序见 migrations/README.md。
+快速启动模式下后端只执行一条 SELECT 校验 1..SCHEMA_VERSION 各版本都已写入（跳过某个迁移不会因更高版本而通过），
+不再 create_all 反射全部表。
+
+    python -m shared.db.schema_version          查看当前版本
+    python -m shared.db.schema_version --stamp  标记为当前版本（create_all 建好的新库）
+"""
+import argparse
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Column, DateTime, Integer, String, func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+
+from .base import Base
+
+# 当前代码期望的结构版本，新增迁移脚本时同步递增
+SCHEMA_VERSION = 5
+
+
+class SchemaVersionError(RuntimeError):
+    """数据库结构版本落后于代码"""
+
+
+class SchemaVersion(Base):
+    __tablename__ = "schema_version"
+
+    version = Column(Integer, primary_key=True)
+    description = Column(String(200), nullable=True)
+    applied_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+def current_schema_version(engine: Engine) -> Optional[int]:
+    """读取数据库中的结构版本；表不存在或为空时返回 None"""
+    try:
+        with engine.connect() as conn:
+            return conn.execute(select(func.max(SchemaVersion.version))).scalar()
+    except DBAPIError:
+        return None
+
+
+def check_schema_version(engine: Engine, expected: int = SCHEMA_VERSION) -> int:
+    """
+    校验 1..expected 的每个版本都已写入，返回数据库中的最高版本
+
+    Raises:
+        SchemaVersionError: 未执行迁移、版本落后或跳过了中间的迁移
+    """
+    try:
+        with engine.connect() as conn:
+            applied = set(conn.execute(select(SchemaVersion.version)).scalars())
+    except DBAPIError:
+        applied = set()
+    missing = sorted(set(range(1, expected + 1)) - applied)
+    if missing:
+        version = max(applied) if applied else None
+        raise SchemaVersionError(
+            f"数据库结构版本为 {version}，需要 {expected}，缺少版本 {missing}；"
+            f"请按 migrations/README.md 的顺序执行迁移脚本"
+        )
+    return max(applied)
+
+
+def stamp_schema_version(engine: Engine, description: str = "stamp") -> None:
+    """把数据库标记为当前版本：补写 1..SCHEMA_VERSION 中缺少的各版本（已写入的不重复写入）"""
+    with engine.begin() as conn:
+        applied = set(conn.execute(select(SchemaVersion.version)).scalars())
+        missing = [v for v in range(1, SCHEMA_VERSION + 1) if v not in applied]
+        if missing:
+            now = datetime.utcnow()
+            conn.execute(
+                SchemaVersion.__table__.insert(),
+                [{"version": v, "description": description, "applied_at": now} for v in missing],
+            )
+
+
+if __name__ == "__main__":
+    from .session import engine
+
+    parser = argparse.ArgumentParser(description="查看或标记数据库结构版本")
+    parser.add_argument("--stamp", action="store_true", help="建表并标记为当前版本")
+    args = parser.parse_args()
+
+    if args.stamp:
+        SchemaVersion.__table__.create(bind=engine, checkfirst=True)
+        stamp_schema_version(engine)
+    print(f"数据库版本: {current_schema_version(engine)}，代码期望: {SCHEMA_VERSION}")
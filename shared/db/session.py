@@ -1,14 +1,20 @@
-from typing import Generator
+from typing import Generator, Optional
 
+from fastapi import Depends, Request
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 from shared.config.settings import get_settings
+from shared.db.pool import build_engine_kwargs, install_statement_timeout
+from shared.db.replica import ReplicaMonitor, postgres_lag_probe, wants_primary
 
 
 settings = get_settings()
 
-engine = create_engine(settings.database_url, future=True)
+engine = create_engine(settings.database_url, **build_engine_kwargs(settings, settings.database_url))
+if settings.db_pgbouncer and not settings.database_url.startswith("sqlite"):
+    install_statement_timeout(engine, settings.db_statement_timeout_ms)
+
 SessionLocal = sessionmaker(
     bind=engine,
     autocommit=False,
@@ -16,6 +22,28 @@ SessionLocal = sessionmaker(
     future=True,
 )
 
+# 只读副本（可选）
+read_engine = None
+ReadSessionLocal: Optional[sessionmaker] = None
+replica_monitor: Optional[ReplicaMonitor] = None
+if settings.read_database_url:
+    read_engine = create_engine(
+        settings.read_database_url, **build_engine_kwargs(settings, settings.read_database_url)
+    )
+    if settings.db_pgbouncer and not settings.read_database_url.startswith("sqlite"):
+        install_statement_timeout(read_engine, settings.db_statement_timeout_ms)
+    ReadSessionLocal = sessionmaker(
+        bind=read_engine,
+        autocommit=False,
+        autoflush=False,
+        future=True,
+    )
+    replica_monitor = ReplicaMonitor(
+        postgres_lag_probe(read_engine),
+        max_lag_seconds=settings.replica_max_lag_seconds,
+        check_interval=settings.replica_check_interval,
+    )
+
 
 def get_db() -> Generator:
     db = SessionLocal()
@@ -23,3 +51,21 @@ def get_db() -> Generator:
         yield db
     finally:
         db.close()
+
+
+def get_read_db(request: Request, primary: Session = Depends(get_db)) -> Generator:
+    """
+    只读接口使用的会话
+
+    未配置副本、客户端处于写后粘滞窗口或副本延迟过大时返回主库会话。
+    主库会话在首次查询前不会占用连接，因此走副本时不产生额外开销。
+    """
+    if ReadSessionLocal is None or wants_primary(request) or not replica_monitor.is_usable():
+        yield primary
+        return
+
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -6,8 +6,10 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
 from shared.db.session import get_db
-from shared.db.models_auth import User, Role, Permission
-from shared.security.jwt import verify_token
+from shared.db.models_auth import User
+from shared.security.jwt import verify_token_payload
+from shared.security.permission_cache import get_permission_codes
+from shared.security.principal_cache import Principal, principal_cache
 
 # HTTP Bearer 认证方案
 security = HTTPBearer()
@@ -16,7 +18,7 @@ security = HTTPBearer()
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
-) -> User:
+) -> Principal:
     """
     获取当前登录用户
 
@@ -25,15 +27,16 @@ def get_current_user(
         db: 数据库会话
 
     Returns:
-        User: 当前用户对象
+        Principal: 当前用户的只读快照（按用户ID与 Token iat 短期缓存）
 
     Raises:
         HTTPException: 认证失败时抛出 401 错误
     """
     token = credentials.credentials
 
-    # 验证 Token
-    user_id = verify_token(token, token_type="access")
+    # 验证 Token（签名校验结果由 jwt 模块 LRU 缓存）
+    payload = verify_token_payload(token, token_type="access")
+    user_id = payload.get("sub") if payload else None
     if user_id is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -41,7 +44,13 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    iat = payload.get("iat")
+    principal = principal_cache.get(user_id, iat)
+    if principal is not None:
+        return principal
+
     # 查询用户
+    version = principal_cache.version
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
         raise HTTPException(
@@ -57,7 +66,9 @@ def get_current_user(
             detail="User account is inactive"
         )
 
-    return user
+    principal = Principal.from_user(user)
+    principal_cache.set(principal, iat, version)
+    return principal
 
 
 def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
@@ -142,24 +153,10 @@ class PermissionChecker:
         if current_user.is_superuser:
             return True
 
-        # 查询用户的所有角色
-        user_roles = db.query(Role).join(
-            "user_roles"
-        ).filter(
-            User.id == current_user.id
-        ).all()
-
-        # 查询这些角色的所有权限
-        permissions = db.query(Permission).join(
-            "role_permissions"
-        ).join(
-            Role
-        ).filter(
-            Role.id.in_([role.id for role in user_roles])
-        ).all()
+        # 权限集合按用户缓存，角色/权限变更后自动失效
+        permission_codes = get_permission_codes(db, current_user.id)
 
         # 检查是否拥有所需权限
-        permission_codes = {perm.code for perm in permissions}
         if self.required_permission not in permission_codes:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -186,22 +183,8 @@ def require_permissions(*permissions: str):
         if current_user.is_superuser:
             return True
 
-        # 查询用户的所有权限
-        user_roles = db.query(Role).join(
-            "user_roles"
-        ).filter(
-            User.id == current_user.id
-        ).all()
-
-        user_permissions = db.query(Permission).join(
-            "role_permissions"
-        ).join(
-            Role
-        ).filter(
-            Role.id.in_([role.id for role in user_roles])
-        ).all()
-
-        permission_codes = {perm.code for perm in user_permissions}
+        # 查询用户的所有权限（按用户缓存）
+        permission_codes = get_permission_codes(db, current_user.id)
 
         # 检查是否拥有所需权限中的任意一个
         if not any(perm in permission_codes for perm in permissions):
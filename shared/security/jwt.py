@@ -1,5 +1,6 @@
 """JWT Token 工具"""
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional, Dict, Any
 
 from jose import JWTError, jwt
@@ -15,6 +16,7 @@ SECRET_KEY = getattr(settings, "jwt_secret_key", "your-secret-key-change-in-prod
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = getattr(settings, "access_token_expire_minutes", 30)  # 30分钟
 REFRESH_TOKEN_EXPIRE_DAYS = getattr(settings, "refresh_token_expire_days", 7)  # 7天
+TOKEN_DECODE_CACHE_SIZE = getattr(settings, "token_decode_cache_size", 1024)
 
 
 def create_access_token(subject: str, additional_claims: Optional[Dict[str, Any]] = None) -> str:
@@ -68,6 +70,15 @@ def create_refresh_token(subject: str) -> str:
     return encoded_jwt
 
 
+@lru_cache(maxsize=TOKEN_DECODE_CACHE_SIZE)
+def _decode_token_cached(token: str) -> Optional[Dict[str, Any]]:
+    # 同一 Bearer Token 在有效期内被反复使用，缓存签名校验结果；过期由 verify_token 单独检查
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+
+
 def decode_token(token: str) -> Optional[Dict[str, Any]]:
     """
     解码并验证 Token
@@ -78,23 +89,20 @@ def decode_token(token: str) -> Optional[Dict[str, Any]]:
     Returns:
         Optional[Dict]: 解码后的 Token 数据，验证失败返回 None
     """
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
-    except JWTError:
-        return None
+    payload = _decode_token_cached(token)
+    return dict(payload) if payload is not None else None
 
 
-def verify_token(token: str, token_type: str = "access") -> Optional[str]:
+def verify_token_payload(token: str, token_type: str = "access") -> Optional[Dict[str, Any]]:
     """
-    验证 Token 并返回用户ID
+    验证 Token 类型与有效期，返回完整的 Token 数据
 
     Args:
         token: JWT Token
         token_type: Token 类型（access 或 refresh）
 
     Returns:
-        Optional[str]: 用户ID，验证失败返回 None
+        Optional[Dict]: Token 数据，验证失败返回 None
     """
     payload = decode_token(token)
     if payload is None:
@@ -109,4 +117,21 @@ def verify_token(token: str, token_type: str = "access") -> Optional[str]:
     if exp is None or datetime.fromtimestamp(exp) < datetime.utcnow():
         return None
 
+    return payload
+
+
+def verify_token(token: str, token_type: str = "access") -> Optional[str]:
+    """
+    验证 Token 并返回用户ID
+
+    Args:
+        token: JWT Token
+        token_type: Token 类型（access 或 refresh）
+
+    Returns:
+        Optional[str]: 用户ID，验证失败返回 None
+    """
+    payload = verify_token_payload(token, token_type)
+    if payload is None:
+        return None
     return payload.get("sub")
@@ -0,0 +1,129 @@
+"""权限解析缓存：按用户缓存编译后的权限代码集合"""
+import threading
+import time
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from shared.config.settings import get_settings
+from shared.db.models_auth import Permission, Role, RolePermission, User, UserRole
+
+settings = get_settings()
+
+# 这些模型的增删改会影响权限解析结果
+_PERMISSION_MODELS = (UserRole, RolePermission, Role, Permission)
+
+
+class PermissionCache:
+    """
+    进程内权限缓存
+
+    - 每个用户缓存一个 frozenset 权限代码集合，带短 TTL；
+    - 全局版本号在角色/角色权限变更提交后递增，旧版本条目自动失效；
+    - 多进程部署时，其他进程的陈旧条目由 TTL 兜底。
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[FrozenSet[str], float, int]] = {}
+        self._version = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def get(self, user_id) -> Optional[FrozenSet[str]]:
+        key = str(user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                codes, expires_at, version = entry
+                if version == self._version and expires_at > time.monotonic():
+                    self.hits += 1
+                    return codes
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, user_id, codes: FrozenSet[str], version: int) -> None:
+        """写入缓存；version 为加载前读取的版本号，加载期间发生变更时不会写入陈旧结果。"""
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            if version != self._version:
+                return
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[str(user_id)] = (codes, time.monotonic() + self.ttl_seconds, version)
+
+    def invalidate_user(self, user_id) -> None:
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def invalidate_all(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                    "version": self._version}
+
+
+permission_cache = PermissionCache(settings.permission_cache_ttl_seconds)
+
+
+def load_permission_codes(db: Session, user_id) -> FrozenSet[str]:
+    """从数据库解析用户经由角色获得的全部权限代码（单次查询）"""
+    rows = db.query(Permission.code).join(
+        RolePermission, RolePermission.permission_id == Permission.id
+    ).join(
+        UserRole, UserRole.role_id == RolePermission.role_id
+    ).filter(
+        UserRole.user_id == user_id
+    ).distinct().all()
+    return frozenset(code for (code,) in rows)
+
+
+def get_permission_codes(db: Session, user_id) -> FrozenSet[str]:
+    """获取用户权限代码集合（优先读缓存）"""
+    codes = permission_cache.get(user_id)
+    if codes is not None:
+        return codes
+
+    version = permission_cache.version
+    codes = load_permission_codes(db, user_id)
+    permission_cache.set(user_id, codes, version)
+    return codes
+
+
+# ===== 变更检测：角色/权限相关对象提交后使缓存失效 =====
+
+@event.listens_for(Session, "after_flush")
+def _mark_permission_changes(session: Session, flush_context) -> None:
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, _PERMISSION_MODELS):
+            session.info["permission_cache_dirty"] = True
+        elif isinstance(obj, User):
+            # 用户被禁用/删除等，只影响该用户自身
+            session.info.setdefault("permission_cache_users", set()).add(str(obj.id))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_permission_invalidation(session: Session) -> None:
+    if session.info.pop("permission_cache_dirty", False):
+        permission_cache.invalidate_all()
+    for user_id in session.info.pop("permission_cache_users", ()):
+        permission_cache.invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_permission_changes(session: Session, previous_transaction) -> None:
+    session.info.pop("permission_cache_dirty", None)
+    session.info.pop("permission_cache_users", None)
@@ -0,0 +1,138 @@
+"""已认证用户快照缓存：避免每个请求都查询 users 表"""
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from shared.config.settings import get_settings
+from shared.db.models_auth import User
+
+settings = get_settings()
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """
+    当前用户的只读快照
+
+    字段与 User 的标量列一致，接口层按 current_user.xxx 访问时无需区分 ORM 对象与快照。
+    """
+
+    id: UUID
+    username: str
+    email: Optional[str]
+    full_name: Optional[str]
+    phone: Optional[str]
+    is_active: bool
+    is_superuser: bool
+    created_at: Optional[datetime]
+    last_login_at: Optional[datetime]
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            full_name=user.full_name,
+            phone=user.phone,
+            is_active=bool(user.is_active),
+            is_superuser=bool(user.is_superuser),
+            created_at=user.created_at,
+            last_login_at=user.last_login_at,
+        )
+
+
+class PrincipalCache:
+    """
+    按 (用户ID, Token 签发时间 iat) 缓存 Principal，带短 TTL
+
+    用户被禁用、删除或修改密码时按用户整体失效；版本号防止并发加载写回陈旧快照。
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[str, Dict[Optional[int], Tuple[Principal, float]]] = {}
+        self._version = 0
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def get(self, user_id, iat: Optional[int]) -> Optional[Principal]:
+        with self._lock:
+            per_user = self._entries.get(str(user_id))
+            entry = per_user.get(iat) if per_user else None
+            if entry is not None:
+                principal, expires_at = entry
+                if expires_at > time.monotonic():
+                    self.hits += 1
+                    return principal
+                del per_user[iat]
+                self._size -= 1
+            self.misses += 1
+            return None
+
+    def set(self, principal: Principal, iat: Optional[int], version: int) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            if version != self._version:
+                return
+            if self._size >= self.max_entries:
+                self._entries.clear()
+                self._size = 0
+            per_user = self._entries.setdefault(str(principal.id), {})
+            if iat not in per_user:
+                self._size += 1
+            per_user[iat] = (principal, time.monotonic() + self.ttl_seconds)
+
+    def invalidate_user(self, user_id) -> None:
+        with self._lock:
+            self._version += 1
+            per_user = self._entries.pop(str(user_id), None)
+            if per_user:
+                self._size -= len(per_user)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": self._size, "hits": self.hits, "misses": self.misses}
+
+
+principal_cache = PrincipalCache(settings.principal_cache_ttl_seconds)
+
+
+# ===== 变更检测：用户被修改或删除并提交后失效其快照 =====
+
+@event.listens_for(Session, "after_flush")
+def _mark_user_changes(session: Session, flush_context) -> None:
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            session.info.setdefault("principal_cache_users", set()).add(str(obj.id))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_user_invalidation(session: Session) -> None:
+    for user_id in session.info.pop("principal_cache_users", ()):
+        principal_cache.invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_user_changes(session: Session, previous_transaction) -> None:
+    session.info.pop("principal_cache_users", None)
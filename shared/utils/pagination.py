@@ -0,0 +1,41 @@
+"""键集分页游标工具"""
+import base64
+import binascii
+import json
+from typing import Any, List
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    将排序键编码为不透明的分页游标
+
+    Args:
+        values: 上一页最后一行的排序键（datetime/UUID 等按 str 序列化）
+
+    Returns:
+        str: URL 安全的游标字符串
+    """
+    raw = json.dumps([v.isoformat() if hasattr(v, "isoformat") else str(v) for v in values],
+                     separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[str]:
+    """
+    解析分页游标
+
+    Args:
+        cursor: encode_cursor 生成的游标
+        size: 期望的排序键个数
+
+    Raises:
+        ValueError: 游标格式无效
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded).decode("utf-8"))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError("无效的分页游标") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("无效的分页游标")
+    return values
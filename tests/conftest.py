@@ -82,6 +82,8 @@ def _replace_postgresql_types_once():
         models_project.Zone,
         models_project.BuildingSystem,
         models_project.Device,
+        models_project.EngineeringChange,
+        models_project.EngineeringClosure,
         # Auth 模型
         models_auth.User,
         models_auth.Role,
@@ -90,6 +92,7 @@ def _replace_postgresql_types_once():
         models_auth.RolePermission,
         models_auth.ProjectMember,
         models_auth.AuditLog,
+        models_auth.AuditLogArchive,
     ]
 
     for model in models:
@@ -0,0 +1,153 @@
+"""
+分析队列调度单元测试
+
+运行测试: pytest tests/test_analysis_queue.py -v
+"""
+
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from shared.db.instrumentation import assert_response_query_budget
+from shared.db.models_asset import Asset, FileBlob
+from shared.db.models_project import Project
+from services.backend.app.services import analysis_queue
+from services.backend.app.services.analysis_queue import QueueEntry, schedule
+from services.backend.app.services.image_pipeline import route_image_asset
+
+
+NOW = datetime(2025, 1, 1, 12, 0, 0)
+
+
+def _entry(project_id, role, minutes_ago=0, expedite=False):
+    enqueued_at = NOW - timedelta(minutes=minutes_ago)
+    return QueueEntry(
+        asset=SimpleNamespace(id=uuid.uuid4()),
+        project_id=project_id,
+        content_role=role,
+        enqueued_at=enqueued_at,
+        expedite=expedite,
+        priority_class=analysis_queue.priority_class_for(role, expedite),
+        score=analysis_queue.priority_score(role, enqueued_at, NOW, 0.5),
+    )
+
+
+def _make_image_asset(db, project_id, role):
+    blob = FileBlob(storage_type="local", bucket="assets", path="x.jpg", file_name="x.jpg")
+    db.add(blob)
+    db.flush()
+    asset = Asset(
+        project_id=project_id,
+        modality="image",
+        source="test",
+        content_role=role,
+        file_id=blob.id,
+        capture_time=datetime.utcnow(),
+    )
+    db.add(asset)
+    db.commit()
+    return asset
+
+
+# ==================== 调度算法 ====================
+
+def test_schedule_interleaves_projects_fairly():
+    """大项目积压时，小项目的资产不会被排到最后"""
+    big = [_entry("big", "scene_issue", minutes_ago=10) for _ in range(20)]
+    small = [_entry("small", "scene_issue", minutes_ago=1) for _ in range(2)]
+
+    ordered = schedule(big + small, {}, limit=4)
+
+    assert [e.project_id for e in ordered].count("small") == 2
+
+
+def test_schedule_respects_project_weight():
+    """权重为 2 的项目获得约两倍的处理份额"""
+    a = [_entry("a", "scene_issue") for _ in range(10)]
+    b = [_entry("b", "scene_issue") for _ in range(10)]
+
+    ordered = schedule(a + b, {"a": 2.0}, limit=9)
+
+    assert [e.project_id for e in ordered].count("a") == 6
+
+
+def test_schedule_role_priority_and_expedite():
+    """项目内 meter 优先于 scene_issue；expedite 始终排在最前"""
+    scene = _entry("p", "scene_issue")
+    meter = _entry("p", "meter")
+    urgent = _entry("q", "scene_issue", expedite=True)
+
+    ordered = schedule([scene, meter, urgent], {})
+
+    assert ordered == [urgent, meter, scene]
+    assert urgent.priority_class == "expedite"
+
+
+def test_aging_lets_old_low_priority_asset_overtake():
+    """排队足够久的 scene_issue 超过新入队的 meter"""
+    old_scene = _entry("p", "scene_issue", minutes_ago=6 * 60)
+    new_meter = _entry("p", "meter")
+
+    assert schedule([new_meter, old_scene], {})[0] is old_scene
+
+
+# ==================== API ====================
+
+def test_route_image_expedite_and_queue_endpoints(client, db_session):
+    """expedite 路由的资产出现在队列最前，stats 按优先级类别统计深度"""
+    project = Project(name="队列测试")
+    db_session.add(project)
+    db_session.commit()
+
+    meter = _make_image_asset(db_session, project.id, "meter")
+    scene = _make_image_asset(db_session, project.id, "scene_issue")
+    route_image_asset(db_session, meter)
+    resp = client.post(f"/api/v1/assets/{scene.id}/route_image", params={"expedite": "true"})
+    assert resp.status_code == 200
+
+    resp = client.get("/api/v1/assets/analysis_queue", params={"project_id": str(project.id)})
+    assert resp.status_code == 200
+    items = resp.json()
+    assert [i["id"] for i in items] == [str(scene.id), str(meter.id)]
+    assert items[0]["priority_class"] == "expedite"
+    assert items[1]["priority_class"] == "high"
+
+    resp = client.get("/api/v1/assets/analysis_queue/stats")
+    assert resp.status_code == 200
+    stats = resp.json()
+    assert stats["total"] == 2
+    assert stats["by_priority_class"]["expedite"]["depth"] == 1
+    assert stats["by_priority_class"]["high"]["depth"] == 1
+    assert stats["by_priority_class"]["low"]["depth"] == 0
+
+
+def test_queue_limit_matches_full_schedule_and_stats_aggregate(client, db_session):
+    """SQL 端按项目截断后的调度结果与全量调度一致；stats 用聚合查询统计"""
+    big = Project(name="大项目")
+    small = Project(name="小项目")
+    db_session.add_all([big, small])
+    db_session.commit()
+
+    for i in range(8):
+        asset = _make_image_asset(db_session, big.id, "meter" if i % 3 == 0 else "scene_issue")
+        route_image_asset(db_session, asset, expedite=(i == 5))
+    for role in ("nameplate", "scene_issue"):
+        route_image_asset(db_session, _make_image_asset(db_session, small.id, role))
+
+    full = analysis_queue.schedule(
+        analysis_queue.load_queue_entries(db_session), analysis_queue.settings.analysis_queue_project_weights, 4
+    )
+    resp = client.get("/api/v1/assets/analysis_queue", params={"limit": 4})
+    assert resp.status_code == 200
+    assert [i["id"] for i in resp.json()] == [str(e.asset.id) for e in full]
+    assert resp.json()[0]["expedite"] is True
+
+    resp = client.get("/api/v1/assets/analysis_queue/stats")
+    assert_response_query_budget(resp, 1)
+    stats = resp.json()
+    assert stats["total"] == 10
+    assert stats["by_project"] == {str(big.id): 8, str(small.id): 2}
+    assert stats["by_priority_class"]["expedite"]["depth"] == 1
+    assert stats["by_priority_class"]["high"]["depth"] == 3
+    assert stats["by_priority_class"]["normal"]["depth"] == 1
+    assert stats["by_priority_class"]["low"]["depth"] == 5
@@ -0,0 +1,83 @@
+"""
+资产列表最新结果摘要（include=latest_summary）单元测试
+
+运行测试: pytest tests/test_asset_summary.py -v
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from shared.db.instrumentation import assert_response_query_budget
+from shared.db.models_asset import Asset, AssetStructuredPayload, FileBlob
+
+
+def _asset(db, project, blob, title):
+    asset = Asset(project_id=project.id, modality="image", source="mobile", title=title, file_id=blob.id)
+    db.add(asset)
+    db.flush()
+    return asset
+
+
+def _payload(db, asset, schema_type, payload, minutes):
+    db.add(AssetStructuredPayload(
+        asset_id=asset.id, schema_type=schema_type, payload=payload,
+        created_at=datetime(2024, 1, 1) + timedelta(minutes=minutes),
+    ))
+
+
+@pytest.fixture
+def assets_with_results(db_session, test_project):
+    blob = FileBlob(storage_type="local", bucket="assets", path="x.jpg", file_name="x.jpg")
+    db_session.add(blob)
+    db_session.flush()
+
+    scene = _asset(db_session, test_project, blob, "scene")
+    _payload(db_session, scene, "scene_issue_report_v1",
+             {"summary": "旧", "severity": "low", "issue_category": "设备维护"}, 1)
+    _payload(db_session, scene, "scene_issue_report_v1",
+             {"summary": "新", "severity": "high", "issue_category": "冷源效率"}, 2)
+    _payload(db_session, scene, "image_annotation",
+             {"annotations": {"ocr_lines": [{"bbox": [[0, 0]] * 4}]}, "stats": {"avg_confidence": 0.91}}, 0)
+
+    meter = _asset(db_session, test_project, blob, "meter")
+    _payload(db_session, meter, "meter_reading_v1", {"summary": "s", "reading": 1234.5, "unit": "kWh"}, 1)
+    _payload(db_session, meter, "image_route_decision_v1", {"content_role": "meter"}, 3)
+
+    plate = _asset(db_session, test_project, blob, "plate")
+    _payload(db_session, plate, "nameplate_table_v1", {"equipment_type": "冷水机组", "fields": []}, 1)
+
+    _asset(db_session, test_project, blob, "bare")
+    db_session.commit()
+    return test_project
+
+
+def test_latest_summary_in_one_query(client, assets_with_results):
+    params = {"project_id": str(assets_with_results.id), "include": "latest_summary"}
+    response = client.get("/api/v1/assets/", params=params)
+
+    assert response.status_code == 200
+    assert_response_query_budget(response, 2)
+    by_title = {a["title"]: a["latest_summary"] for a in response.json()}
+
+    assert by_title["scene"]["scene_severity"] == "high"
+    assert by_title["scene"]["scene_category"] == "冷源效率"
+    assert by_title["scene"]["ocr_avg_confidence"] == pytest.approx(0.91)
+    assert by_title["meter"]["meter_reading"] == 1234.5
+    assert by_title["meter"]["meter_unit"] == "kWh"
+    assert by_title["plate"]["nameplate_equipment_type"] == "冷水机组"
+    assert by_title["bare"] is None
+
+
+def test_latest_summary_respects_filters_and_fields(client, assets_with_results):
+    params = {"project_id": str(assets_with_results.id), "include": "latest_summary", "fields": "title"}
+    rows = client.get("/api/v1/assets/", params=params).json()
+    assert set(rows[0]) == {"id", "title", "latest_summary"}
+
+    response = client.get("/api/v1/assets/", params={"project_id": str(assets_with_results.id)})
+    assert "latest_summary" not in response.json()[0]
+
+
+def test_unknown_include_rejected(client):
+    response = client.get("/api/v1/assets/", params={"include": "payloads"})
+    assert response.status_code == 400
@@ -0,0 +1,109 @@
+"""
+审计日志键集分页与归档单元测试
+
+运行测试: pytest tests/test_audit_logs_query.py -v
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from shared.db.models_auth import AuditLog, AuditLogArchive, User
+from services.backend.app.services import audit_service
+
+
+NOW = datetime(2026, 6, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def audit_rows(db_session):
+    """两名用户共 25 条日志，每 5 条共享同一时间戳以覆盖 id 决胜"""
+    alice = User(username="alice", hashed_password="x")
+    bob = User(username="bob", hashed_password="x")
+    db_session.add_all([alice, bob])
+    db_session.flush()
+
+    for i in range(25):
+        db_session.add(AuditLog(
+            user_id=alice.id if i % 2 == 0 else bob.id,
+            action="login" if i % 3 == 0 else "update_user",
+            resource_type="user",
+            resource_id=str(i),
+            created_at=NOW - timedelta(days=i // 5),
+        ))
+    db_session.add(AuditLog(user_id=None, action="system", created_at=NOW - timedelta(days=400)))
+    db_session.commit()
+    return alice, bob
+
+
+@pytest.fixture
+def query_counter(db_session):
+    counter = {"count": 0}
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        counter["count"] += 1
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", _count)
+    yield counter
+    event.remove(engine, "before_cursor_execute", _count)
+
+
+def test_keyset_pages_cover_all_rows_once(db_session, audit_rows, query_counter):
+    """逐页翻完所有记录，无重复无遗漏，每页只执行一次查询"""
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        before = query_counter["count"]
+        items, cursor = audit_service.list_audit_logs(db_session, limit=7, cursor=cursor)
+        assert query_counter["count"] - before == 1
+        seen.extend(items)
+        pages += 1
+        if cursor is None:
+            break
+
+    assert pages == 4
+    assert len(seen) == 26
+    assert len({item["id"] for item in seen}) == 26
+    keys = [(item["created_at"], item["id"]) for item in seen]
+    assert keys == sorted(keys, reverse=True)
+    assert {item["username"] for item in seen} == {"alice", "bob", None}
+
+
+def test_filters_and_time_window(db_session, audit_rows):
+    alice, _ = audit_rows
+
+    items, _ = audit_service.list_audit_logs(db_session, user_id=alice.id)
+    assert len(items) == 13
+    assert {item["username"] for item in items} == {"alice"}
+
+    items, _ = audit_service.list_audit_logs(db_session, action="login", resource_type="user")
+    assert len(items) == 9
+
+    items, _ = audit_service.list_audit_logs(
+        db_session, start=NOW - timedelta(days=1), end=NOW
+    )
+    assert len(items) == 5
+    assert all(item["created_at"] == (NOW - timedelta(days=1)).isoformat() for item in items)
+
+
+def test_invalid_cursor_rejected(db_session):
+    with pytest.raises(ValueError):
+        audit_service.list_audit_logs(db_session, cursor="not-a-cursor")
+
+
+def test_archive_moves_expired_rows(db_session, audit_rows):
+    """超过保留期的记录搬迁到归档表，并可按归档保留期清理"""
+    archived = audit_service.archive_audit_logs(db_session, retention_days=3, batch_size=4, now=NOW)
+
+    # 第 4 天的 5 条与 400 天前的 1 条；恰好等于截止时间的第 3 天保留
+    assert archived == 6
+    assert db_session.query(AuditLog).count() == 20
+    assert db_session.query(AuditLogArchive).count() == 6
+    assert db_session.query(AuditLogArchive).filter(AuditLogArchive.action == "system").one()
+
+    pruned = audit_service.prune_audit_archive(db_session, retention_days=365, now=NOW)
+    assert pruned == 1
+    assert db_session.query(AuditLogArchive).count() == 5
@@ -0,0 +1,211 @@
+"""
+审计日志异步写入器单元测试
+
+运行测试: pytest tests/test_audit_sink.py -v
+"""
+
+import time
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from shared.db.models_auth import AuditLog
+from services.backend.app.services.audit_sink import AuditSink
+from services.backend.app.services.auth_service import AuthService
+
+
+def _record(action="login"):
+    return {
+        "id": uuid.uuid4(),
+        "user_id": None,
+        "action": action,
+        "resource_type": None,
+        "resource_id": None,
+        "details": {"k": "v"},
+        "ip_address": "127.0.0.1",
+        "user_agent": "pytest",
+        "created_at": datetime.utcnow(),
+    }
+
+
+def _wait_for(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def session_factory(db_session):
+    return sessionmaker(bind=db_session.get_bind(), autoflush=False)
+
+
+@pytest.fixture
+def make_sink(session_factory, tmp_path):
+    sinks = []
+
+    def _make(**kwargs):
+        kwargs.setdefault("session_factory", session_factory)
+        kwargs.setdefault("fallback_path", str(tmp_path / "audit_fallback.jsonl"))
+        sink = AuditSink(**kwargs)
+        sinks.append(sink)
+        return sink
+
+    yield _make
+    for sink in sinks:
+        sink.stop()
+
+
+def test_flushes_when_batch_is_full(db_session, make_sink):
+    """满 N 条立即批量写入，不等待定时器"""
+    sink = make_sink(batch_size=3, flush_interval_ms=60000)
+    sink.start()
+
+    for _ in range(3):
+        assert sink.submit(_record()) is True
+
+    assert _wait_for(lambda: sink.stats()["written"] == 3)
+    assert sink.stats()["batches"] == 1
+    assert db_session.query(AuditLog).count() == 3
+
+
+def test_flushes_on_interval(db_session, make_sink):
+    """不足 N 条时由 T 毫秒定时器触发写入"""
+    sink = make_sink(batch_size=100, flush_interval_ms=50)
+    sink.start()
+
+    sink.submit(_record("logout"))
+
+    assert _wait_for(lambda: sink.stats()["written"] == 1)
+    assert db_session.query(AuditLog).one().action == "logout"
+
+
+def test_stop_drains_queue(db_session, make_sink):
+    """关闭时剩余记录全部落库"""
+    sink = make_sink(batch_size=4, flush_interval_ms=60000)
+    sink.start()
+    for _ in range(10):
+        sink.submit(_record())
+
+    sink.stop()
+
+    assert db_session.query(AuditLog).count() == 10
+    assert sink.stats()["queue_depth"] == 0
+
+
+def test_database_failure_spills_and_replays(db_session, session_factory, make_sink, tmp_path):
+    """数据库不可用时写入兜底文件，下次启动回灌"""
+    def broken_factory():
+        session = session_factory()
+
+        def fail(*args, **kwargs):
+            raise OperationalError("INSERT", {}, Exception("db down"))
+
+        session.execute = fail
+        return session
+
+    sink = make_sink(session_factory=broken_factory, batch_size=2, flush_interval_ms=60000)
+    sink.start()
+    sink.submit(_record())
+    sink.submit(_record())
+    sink.flush()
+
+    fallback = tmp_path / "audit_fallback.jsonl"
+    assert sink.stats()["failed_batches"] == 1
+    assert sink.stats()["spilled"] == 2
+    assert len(fallback.read_text(encoding="utf-8").splitlines()) == 2
+    assert db_session.query(AuditLog).count() == 0
+
+    recovered = make_sink()
+    recovered.start()
+    assert recovered.stats()["replayed"] == 2
+    assert not fallback.exists()
+    assert db_session.query(AuditLog).count() == 2
+
+
+def test_replay_skips_written_and_quarantines_bad_records(db_session, make_sink, tmp_path):
+    """回灌部分失败：已写入的记录不重复写，无法写入的记录移入隔离文件"""
+    existing, bad, good = _record(), _record(action=None), _record()
+    db_session.add(AuditLog(**existing))
+    db_session.commit()
+
+    fallback = tmp_path / "audit_fallback.jsonl"
+    make_sink()._spill([existing, bad, good])
+    with fallback.open("a", encoding="utf-8") as f:
+        f.write("not json\n")
+
+    sink = make_sink(batch_size=2)
+    sink.start()
+
+    assert sink.stats()["replayed"] == 2
+    assert sink.stats()["quarantined"] == 2
+    assert not fallback.exists()
+    assert {row.id for row in db_session.query(AuditLog.id)} == {existing["id"], good["id"]}
+    quarantined = sink.quarantine_path.read_text(encoding="utf-8").splitlines()
+    assert len(quarantined) == 2
+    assert str(bad["id"]) in quarantined[1] and quarantined[0] == "not json"
+
+
+def test_replay_keeps_only_unwritten_records_when_database_drops(db_session, session_factory, make_sink, tmp_path):
+    """回灌中途数据库不可用：兜底文件只保留尚未写入的记录，下次回灌不重复"""
+    calls = []
+
+    def flaky_factory():
+        session = session_factory()
+        calls.append(session)
+        if len(calls) > 1:
+            def fail(*args, **kwargs):
+                raise OperationalError("INSERT", {}, Exception("db down"))
+
+            session.execute = fail
+        return session
+
+    records = [_record() for _ in range(3)]
+    fallback = tmp_path / "audit_fallback.jsonl"
+    make_sink()._spill(records)
+
+    assert make_sink(session_factory=flaky_factory, batch_size=1).replay_fallback() == 1
+    remaining = fallback.read_text(encoding="utf-8").splitlines()
+    assert [line for line in remaining if str(records[0]["id"]) in line] == []
+    assert len(remaining) == 2
+
+    assert make_sink(batch_size=1).replay_fallback() == 2
+    assert not fallback.exists()
+    assert db_session.query(AuditLog).count() == 3
+
+
+def test_full_queue_applies_backpressure(make_sink, tmp_path):
+    """队列已满时不阻塞请求，记录转存兜底文件"""
+    sink = make_sink(max_queue=1)
+
+    assert sink.submit(_record()) is True
+    assert sink.submit(_record()) is False
+
+    stats = sink.stats()
+    assert stats["queue_depth"] == 1
+    assert stats["max_depth"] == 1
+    assert stats["spilled"] == 1
+    assert (tmp_path / "audit_fallback.jsonl").exists()
+
+
+def test_create_audit_log_enqueues_when_sink_running(db_session, make_sink, monkeypatch):
+    """写入器运行时 create_audit_log 不再在请求会话中提交"""
+    sink = make_sink(batch_size=100, flush_interval_ms=60000)
+    sink.start()
+    monkeypatch.setattr("services.backend.app.services.auth_service.audit_sink", sink)
+
+    log = AuthService.create_audit_log(db=db_session, user_id=None, action="export", details={"n": 1})
+
+    assert log.action == "export"
+    assert log not in db_session
+    assert db_session.query(AuditLog).count() == 0
+
+    sink.flush()
+    row = db_session.query(AuditLog).one()
+    assert row.id == log.id
+    assert row.details == {"n": 1}
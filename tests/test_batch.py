@@ -0,0 +1,83 @@
+"""
+批量请求接口单元测试
+
+运行测试: pytest tests/test_batch.py -v
+"""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI, Header
+from fastapi.testclient import TestClient
+
+from services.backend.app.api.v1 import batch
+
+
+def test_batch_runs_subrequests_in_order(client, test_project):
+    project_id = str(test_project.id)
+    response = client.post("/api/v1/batch/", json=[
+        {"id": "tree", "path": f"/api/v1/projects/{project_id}/structure_tree"},
+        {"id": "assets", "path": "/api/v1/assets/", "query": {"project_id": project_id, "fields": "title"}},
+        {"id": "missing", "path": "/api/v1/assets/00000000-0000-0000-0000-000000000000"},
+        {"id": "write", "method": "DELETE", "path": "/api/v1/assets/x"},
+        {"id": "outside", "path": "/metrics"},
+        {"id": "nested", "path": "/api/v1/batch/"},
+    ])
+
+    assert response.status_code == 200
+    results = response.json()
+    assert [r["id"] for r in results] == ["tree", "assets", "missing", "write", "outside", "nested"]
+    assert [r["status"] for r in results] == [200, 200, 404, 405, 400, 400]
+    assert results[0]["body"]["project_id"] == project_id
+    assert results[0]["headers"]["content-type"].startswith("application/json")
+    assert results[1]["body"] == []
+    assert results[2]["body"] == {"detail": "Asset not found"}
+
+
+def test_fan_out_cap(client, monkeypatch):
+    monkeypatch.setattr(batch.settings, "batch_max_requests", 2)
+    response = client.post("/api/v1/batch/", json=[{"path": "/api/v1/health/"}] * 3)
+    assert response.status_code == 400
+    assert "Too many" in response.json()["detail"]
+
+
+@pytest.fixture
+def mini_client(monkeypatch):
+    monkeypatch.setattr(batch.settings, "batch_concurrency", 2)
+    app = FastAPI()
+    app.include_router(batch.router, prefix="/api/v1/batch")
+    state = {"active": 0, "peak": 0}
+
+    @app.get("/api/v1/whoami")
+    async def whoami(authorization: str = Header(default="")):
+        return {"authorization": authorization}
+
+    @app.get("/api/v1/slow")
+    async def slow():
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.05)
+        state["active"] -= 1
+        return {"ok": True}
+
+    @app.get("/api/v1/text")
+    async def text():
+        from fastapi.responses import PlainTextResponse
+        return PlainTextResponse("hello")
+
+    return TestClient(app), state
+
+
+def test_auth_forwarded_and_concurrency_bounded(mini_client):
+    client, state = mini_client
+    response = client.post(
+        "/api/v1/batch/",
+        json=[{"path": "/api/v1/whoami"}, {"path": "/api/v1/text"}] + [{"path": "/api/v1/slow"}] * 6,
+        headers={"Authorization": "Bearer abc"},
+    )
+
+    results = response.json()
+    assert results[0]["body"] == {"authorization": "Bearer abc"}
+    assert results[1]["body"] == "hello"
+    assert all(r["status"] == 200 for r in results)
+    assert state["peak"] == 2
@@ -0,0 +1,113 @@
+"""
+响应压缩中间件单元测试
+
+运行测试: pytest tests/test_compression.py -v
+"""
+
+import gzip
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from services.backend.app.compression import CompressionMiddleware, negotiate, no_compression
+from services.backend.app.api.v1 import assets
+
+PAYLOAD = {"items": [{"id": i, "bbox": [[1.0, 2.0], [3.0, 4.0]], "text": "电表读数"} for i in range(200)]}
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500, encodings=["br", "zstd", "gzip"])
+
+    @app.get("/big")
+    def big():
+        return JSONResponse(PAYLOAD)
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/image")
+    def image():
+        return Response(b"\xff\xd8" + b"0" * 4000, media_type="image/jpeg")
+
+    @app.get("/raw")
+    @no_compression
+    def raw():
+        return JSONResponse(PAYLOAD)
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((f"line {i}\n".encode() for i in range(2000)), media_type="text/plain")
+
+    return TestClient(app)
+
+
+def _raw_get(client, path, accept):
+    """不自动解压，检查线上字节"""
+    with client.stream("GET", path, headers={"Accept-Encoding": accept}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+def test_negotiate():
+    assert negotiate("gzip, deflate", ["br", "gzip"]) == "gzip"
+    assert negotiate("gzip, br", ["br", "gzip"]) == "br"
+    assert negotiate("br;q=0.5, gzip", ["br", "gzip"]) == "gzip"
+    assert negotiate("gzip;q=0, identity", ["gzip"]) is None
+    assert negotiate("*", ["br", "gzip"]) == "br"
+    assert negotiate("deflate", ["gzip"]) is None
+
+
+def test_large_json_is_gzipped(client):
+    response, raw = _raw_get(client, "/big", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) == len(raw)
+    assert json.loads(gzip.decompress(raw)) == PAYLOAD
+    assert len(raw) * 5 < len(json.dumps(PAYLOAD))
+
+
+def test_skips_small_excluded_and_opted_out(client):
+    response, _ = _raw_get(client, "/small", "gzip")
+    assert "content-encoding" not in response.headers
+    assert "Accept-Encoding" in response.headers["vary"]
+
+    response, raw = _raw_get(client, "/image", "gzip")
+    assert "content-encoding" not in response.headers
+    assert raw.startswith(b"\xff\xd8")
+
+    response, raw = _raw_get(client, "/raw", "gzip")
+    assert "content-encoding" not in response.headers
+    assert json.loads(raw) == PAYLOAD
+
+    response, raw = _raw_get(client, "/big", "identity")
+    assert "content-encoding" not in response.headers
+
+
+def test_streaming_response(client):
+    response, raw = _raw_get(client, "/stream", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert gzip.decompress(raw).decode().splitlines()[-1] == "line 1999"
+
+
+def test_brotli_preferred_when_installed(client):
+    brotli = pytest.importorskip("brotli")
+    response, raw = _raw_get(client, "/big", "gzip, br")
+    assert response.headers["content-encoding"] == "br"
+    assert json.loads(brotli.decompress(raw)) == PAYLOAD
+
+
+def test_zstd_when_installed(client):
+    zstandard = pytest.importorskip("zstandard")
+    response, raw = _raw_get(client, "/big", "zstd")
+    assert response.headers["content-encoding"] == "zstd"
+    assert json.loads(zstandard.ZstdDecompressor().decompressobj().decompress(raw)) == PAYLOAD
+
+
+def test_asset_download_opts_out():
+    assert getattr(assets.download_asset_file, "__bdc_no_compression__", False)
@@ -0,0 +1,114 @@
+"""
+快速 JSON 序列化路径单元测试
+
+运行测试: pytest tests/test_fast_json.py -v
+"""
+
+import json
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
+import pytest
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from shared.db.models_asset import Asset, FileBlob
+from shared.db.models_project import Building, BuildingSystem, Device, Zone
+from services.backend.app import responses
+from services.backend.app.responses import FastJSONResponse, fast_list_response
+from services.backend.app.schemas.asset import AssetRead
+from services.backend.app.schemas.engineering import DeviceFlatRead
+
+
+@pytest.fixture
+def engineering_data(db_session, test_project):
+    building = Building(project_id=test_project.id, name="A座")
+    db_session.add(building)
+    db_session.flush()
+    zone = Zone(building_id=building.id, name="B1 机房")
+    system = BuildingSystem(building_id=building.id, type="HVAC", name="冷站")
+    db_session.add_all([zone, system])
+    db_session.flush()
+    db_session.add_all([
+        Device(system_id=system.id, zone_id=zone.id, device_type="chiller", model="CH-1",
+               rated_power=500.0, tags=["主机"]),
+        Device(system_id=system.id, device_type="pump", serial_no="P-001"),
+    ])
+
+    blob = FileBlob(storage_type="local", bucket="assets", path="x.jpg", file_name="x.jpg")
+    db_session.add(blob)
+    db_session.flush()
+    db_session.add_all([
+        Asset(project_id=test_project.id, building_id=building.id, modality="image", source="mobile",
+              content_role="meter", file_id=blob.id, capture_time=datetime(2024, 5, 1, 8, 30, 15, 123456),
+              tags=["电表"], location_meta={"floor": 1}, quality_score=0.9),
+        Asset(project_id=test_project.id, modality="table", source="upload", file_id=blob.id),
+    ])
+    db_session.commit()
+    return test_project
+
+
+def _pydantic_json(schema, objects) -> list:
+    """原路径：逐行构造 Pydantic 模型再按 JSON 模式导出"""
+    adapter = TypeAdapter(List[schema])
+    return json.loads(adapter.dump_json(adapter.validate_python(objects, from_attributes=True)))
+
+
+def test_asset_list_matches_pydantic_path(client, db_session, engineering_data):
+    response = client.get("/api/v1/assets/", params={"project_id": str(engineering_data.id)})
+    assert response.status_code == 200
+
+    assets = (
+        db_session.query(Asset)
+        .filter(Asset.project_id == engineering_data.id)
+        .order_by(Asset.capture_time.desc().nullslast())
+        .all()
+    )
+    assert response.json() == _pydantic_json(AssetRead, assets)
+    meter = next(a for a in response.json() if a["content_role"] == "meter")
+    assert meter["capture_time"] == "2024-05-01T08:30:15.123456"
+    assert meter["location_meta"] == {"floor": 1}
+
+
+def test_devices_flat_matches_previous_shape(client, engineering_data):
+    response = client.get(f"/api/v1/projects/{engineering_data.id}/devices/flat")
+    assert response.status_code == 200
+    devices = {d["model"] or d["device_type"]: d for d in response.json()}
+
+    chiller = devices["CH-1"]
+    assert chiller["engineer_path"] == "A座 / 冷站 / CH-1"
+    assert chiller["location"]["name"] == "B1 机房"
+    assert chiller["primary_system"] == {"id": chiller["system_id"], "name": "冷站", "type": "HVAC"}
+    assert chiller["tags"] == ["主机"]
+    assert devices["pump"]["location"] is None
+    assert devices["pump"]["engineer_path"] == "A座 / 冷站 / pump"
+    TypeAdapter(List[DeviceFlatRead]).validate_python(response.json())
+
+
+def test_structure_tree_uses_fast_response(client, engineering_data):
+    response = client.get(f"/api/v1/projects/{engineering_data.id}/structure_tree")
+    assert response.status_code == 200
+    tree = response.json()["tree"]
+    assert [b["name"] for b in tree["children"]] == ["A座"]
+
+
+class _Item(BaseModel):
+    id: uuid.UUID
+    name: Optional[str] = None
+
+
+def test_debug_mode_validates_projection(monkeypatch):
+    rows = [{"id": uuid.uuid4(), "name": "x"}]
+    monkeypatch.setattr(responses.settings, "debug", False)
+    assert json.loads(fast_list_response([{"id": "not-a-uuid"}], _Item).body) == [{"id": "not-a-uuid"}]
+
+    monkeypatch.setattr(responses.settings, "debug", True)
+    assert json.loads(fast_list_response(rows, _Item).body) == [{"id": str(rows[0]["id"]), "name": "x"}]
+    with pytest.raises(ValidationError):
+        fast_list_response([{"id": "not-a-uuid"}], _Item)
+
+
+def test_fast_response_encodes_like_pydantic():
+    value = {"id": uuid.uuid4(), "at": datetime(2024, 1, 2, 3, 4, 5), "n": 1.5, "s": "中文"}
+    body = json.loads(FastJSONResponse(value).body)
+    assert body == {"id": str(value["id"]), "at": "2024-01-02T03:04:05", "n": 1.5, "s": "中文"}
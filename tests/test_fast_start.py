@@ -0,0 +1,127 @@
+"""
+快速启动模式单元测试
+
+运行测试: pytest tests/test_fast_start.py -v
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+
+from shared.db.instrumentation import track_queries
+from shared.db.schema_version import (
+    SCHEMA_VERSION,
+    SchemaVersion,
+    SchemaVersionError,
+    check_schema_version,
+    current_schema_version,
+    stamp_schema_version,
+)
+from services.backend.app import main
+from services.backend.app.startup import startup_timings
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'schema.db'}")
+    yield engine
+    engine.dispose()
+
+
+def test_check_requires_migrated_schema(engine):
+    assert current_schema_version(engine) is None
+    with pytest.raises(SchemaVersionError, match="迁移"):
+        check_schema_version(engine)
+
+    SchemaVersion.__table__.create(bind=engine)
+    with pytest.raises(SchemaVersionError):
+        check_schema_version(engine)
+
+    stamp_schema_version(engine)
+    stamp_schema_version(engine)
+    with track_queries() as stats:
+        assert check_schema_version(engine) == SCHEMA_VERSION
+    assert stats.count == 1
+    with pytest.raises(SchemaVersionError):
+        check_schema_version(engine, expected=SCHEMA_VERSION + 1)
+
+
+def test_check_rejects_skipped_migration(engine):
+    SchemaVersion.__table__.create(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(SchemaVersion.__table__.insert(), [
+            {"version": v, "description": "migration"} for v in range(1, SCHEMA_VERSION + 1) if v != 2
+        ])
+    assert current_schema_version(engine) == SCHEMA_VERSION
+    with pytest.raises(SchemaVersionError, match=r"缺少版本 \[2\]"):
+        check_schema_version(engine)
+
+    stamp_schema_version(engine)
+    assert check_schema_version(engine) == SCHEMA_VERSION
+
+
+def test_fast_start_skips_create_all(engine, monkeypatch):
+    SchemaVersion.__table__.create(bind=engine)
+    stamp_schema_version(engine)
+    monkeypatch.setattr(main, "engine", engine)
+    monkeypatch.setattr(main.settings, "fast_start", True)
+    monkeypatch.setattr(main.settings, "audit_async_enabled", False)
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("快速启动不应执行 create_all")
+
+    monkeypatch.setattr(main.Base.metadata, "create_all", _fail)
+    main.on_startup()
+
+    assert "imports" in startup_timings.phases
+    assert "schema" in startup_timings.phases
+
+
+def test_fast_start_refuses_unmigrated_database(engine, monkeypatch):
+    monkeypatch.setattr(main, "engine", engine)
+    monkeypatch.setattr(main.settings, "fast_start", True)
+
+    with pytest.raises(SchemaVersionError):
+        main.on_startup()
+
+
+def test_create_all_stamps_only_fresh_database(engine, monkeypatch):
+    monkeypatch.setattr(main, "engine", engine)
+    monkeypatch.setattr(main.settings, "fast_start", False)
+    monkeypatch.setattr(main.settings, "audit_async_enabled", False)
+
+    main.on_startup()
+    assert current_schema_version(engine) == SCHEMA_VERSION
+
+
+def test_create_all_leaves_existing_database_version_alone(engine, monkeypatch):
+    # 未执行新迁移的旧库：已有业务表、没有版本记录
+    main.Base.metadata.tables["projects"].create(bind=engine)
+    monkeypatch.setattr(main, "engine", engine)
+    monkeypatch.setattr(main.settings, "fast_start", False)
+    monkeypatch.setattr(main.settings, "audit_async_enabled", False)
+
+    main.on_startup()
+    assert current_schema_version(engine) is None
+
+
+def test_heavy_optional_modules_are_not_imported_at_boot():
+    code = (
+        "import sys, services.backend.app.main; "
+        "print(sorted(m for m in ('bigtree', 'paddleocr') if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test_startup_timings_endpoint(client):
+    response = client.get("/api/v1/health/startup")
+    assert response.status_code == 200
+    assert "imports" in response.json()
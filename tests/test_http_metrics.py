@@ -0,0 +1,51 @@
+"""
+HTTP 指标中间件与 /metrics 端点单元测试
+
+运行测试: pytest tests/test_http_metrics.py -v
+"""
+
+import uuid
+
+from services.backend.app.metrics import REGISTRY, UNMATCHED_ROUTE
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_requests_recorded_by_route_template(client, test_project):
+    route = "/api/v1/assets/{asset_id}"
+    before_404 = _sample("bdc_http_requests_total", method="GET", route=route, status="404")
+    before_count = _sample("bdc_http_request_duration_seconds_count", method="GET", route=route)
+
+    for _ in range(2):
+        response = client.get(f"/api/v1/assets/{uuid.uuid4()}")
+        assert response.status_code == 404
+
+    assert _sample("bdc_http_requests_total", method="GET", route=route, status="404") == before_404 + 2
+    assert _sample("bdc_http_request_duration_seconds_count", method="GET", route=route) == before_count + 2
+    assert _sample("bdc_http_response_size_bytes_sum", method="GET", route=route) > 0
+    assert _sample("bdc_http_requests_in_flight") == 0
+
+
+def test_unmatched_paths_share_one_label(client):
+    before = _sample("bdc_http_requests_total", method="GET", route=UNMATCHED_ROUTE, status="404")
+
+    client.get("/no/such/path/1")
+    client.get("/no/such/path/2")
+
+    assert _sample("bdc_http_requests_total", method="GET", route=UNMATCHED_ROUTE, status="404") == before + 2
+
+
+def test_metrics_endpoint_exposes_runtime_stats(client):
+    client.get("/")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'bdc_http_requests_total{method="GET",route="/",status="200"}' in body
+    assert 'bdc_db_pool_checkouts_total{pool="primary"}' in body
+    assert 'bdc_cache_hits_total{cache="permission"}' in body
+    assert 'bdc_cache_hits_total{cache="token_decode"}' in body
+    assert "bdc_audit_sink_queue_depth" in body
@@ -0,0 +1,92 @@
+"""
+GLM 模拟服务与基准测试工具单元测试
+
+运行测试: pytest tests/test_mock_glm_server.py -v
+"""
+
+import json
+import os
+
+import openai
+import pytest
+
+os.environ.setdefault("GLM_API_KEY", "test-key")
+
+from services.worker import benchmark_worker  # noqa: E402
+from services.worker import mock_glm_server  # noqa: E402
+from services.worker import scene_issue_glm_worker as worker  # noqa: E402
+
+
+@pytest.fixture
+def mock_server():
+    servers = []
+
+    def _start(**kwargs):
+        config = mock_glm_server.MockConfig(latency="fixed", latency_median=0.0, seed=1, **kwargs)
+        server = mock_glm_server.serve(config=config)
+        servers.append(server)
+        return server
+
+    yield _start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _client(server):
+    return openai.OpenAI(base_url=server.base_url, api_key="mock", max_retries=0)
+
+
+def test_mock_server_answers_per_role(mock_server):
+    """按 Prompt 返回对应角色的 JSON，并附带 usage"""
+    server = mock_server()
+    image = {"type": "image_url", "image_url": {"url": "data:image/jpeg;base64," + "A" * 5000}}
+    body = worker.build_vision_request_body(image, worker.build_meter_prompt(65.0, None))
+
+    response = _client(server).chat.completions.create(**body)
+    result = json.loads(response.choices[0].message.content)
+
+    assert "reading" in result
+    assert response.usage.prompt_tokens > 0
+    assert server.stats.to_dict()["by_role"] == {"meter": 1}
+
+    role, _, _ = mock_glm_server.detect_role(
+        worker.build_vision_messages(image, worker.build_nameplate_prompt(None))
+    )
+    assert role == "nameplate"
+
+
+def test_mock_server_injects_429_and_errors(mock_server):
+    """按配置比例注入 429（带 Retry-After）和 5xx"""
+    limited = mock_server(rate_429=1.0)
+    with pytest.raises(openai.RateLimitError):
+        _client(limited).chat.completions.create(model="m", messages=[{"role": "user", "content": "hi"}])
+
+    failing = mock_server(error_rate=1.0)
+    with pytest.raises(openai.InternalServerError):
+        _client(failing).chat.completions.create(model="m", messages=[{"role": "user", "content": "hi"}])
+
+    assert limited.stats.to_dict()["rate_limited"] == 1
+    assert failing.stats.to_dict()["errors"] == 1
+
+
+def test_latency_distributions():
+    """延迟分布采样在预期范围内"""
+    import random
+
+    rng = random.Random(0)
+    uniform = mock_glm_server.MockConfig(latency="uniform", latency_median=1.0, latency_spread=0.5)
+    samples = [uniform.sample_latency(rng) for _ in range(200)]
+    assert 0.5 <= min(samples) and max(samples) <= 1.5
+
+    lognormal = mock_glm_server.MockConfig(latency="lognormal", latency_median=2.0, latency_spread=0.3)
+    samples = sorted(lognormal.sample_latency(rng) for _ in range(1001))
+    assert 1.6 < samples[500] < 2.4
+
+
+def test_percentile_and_role_mix():
+    values = [float(i) for i in range(1, 101)]
+    assert benchmark_worker.percentile(values, 50) == 50.0
+    assert benchmark_worker.percentile(values, 99) == 99.0
+    assert benchmark_worker.percentile([], 50) is None
+    assert benchmark_worker.parse_role_mix("meter:2,scene_issue") == [("meter", 2.0), ("scene_issue", 1.0)]
@@ -0,0 +1,90 @@
+"""
+权限解析缓存单元测试
+
+运行测试: pytest tests/test_permission_cache.py -v
+"""
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from shared.db.models_auth import Permission, Role, RolePermission, User, UserRole
+from shared.security.dependencies import PermissionChecker, require_permissions
+from shared.security.permission_cache import permission_cache
+from services.backend.app.services.auth_service import AuthService
+
+
+@pytest.fixture
+def engineer(db_session):
+    """普通用户，经由 engineer 角色拥有 projects.read 权限"""
+    permission_cache.invalidate_all()
+    user = User(username="engineer", hashed_password="x")
+    role = Role(name="engineer", display_name="工程师")
+    read = Permission(code="projects.read", name="查看项目", resource="projects", action="read")
+    db_session.add_all([user, role, read])
+    db_session.flush()
+    db_session.add_all([
+        UserRole(user_id=user.id, role_id=role.id),
+        RolePermission(role_id=role.id, permission_id=read.id),
+    ])
+    db_session.commit()
+    return user
+
+
+@pytest.fixture
+def query_counter(db_session):
+    counter = {"count": 0}
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        counter["count"] += 1
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", _count)
+    yield counter
+    event.remove(engine, "before_cursor_execute", _count)
+
+
+def test_permission_checker_uses_cache(db_session, engineer, query_counter):
+    """同一用户重复鉴权只在首次访问数据库"""
+    checker = PermissionChecker("projects.read")
+
+    assert checker(current_user=engineer, db=db_session) is True
+    first = query_counter["count"]
+    assert first >= 1
+
+    for _ in range(5):
+        assert checker(current_user=engineer, db=db_session) is True
+        assert require_permissions("projects.read", "projects.admin")(current_user=engineer, db=db_session)
+    assert query_counter["count"] == first
+
+    with pytest.raises(HTTPException) as exc_info:
+        PermissionChecker("projects.delete")(current_user=engineer, db=db_session)
+    assert exc_info.value.status_code == 403
+
+
+def test_role_permission_change_invalidates_cache(db_session, engineer):
+    """角色新增权限提交后，缓存立即失效"""
+    checker = PermissionChecker("projects.delete")
+    with pytest.raises(HTTPException):
+        checker(current_user=engineer, db=db_session)
+
+    role = db_session.query(Role).filter(Role.name == "engineer").one()
+    delete = Permission(code="projects.delete", name="删除项目", resource="projects", action="delete")
+    db_session.add(delete)
+    db_session.flush()
+    db_session.add(RolePermission(role_id=role.id, permission_id=delete.id))
+    db_session.commit()
+
+    assert checker(current_user=engineer, db=db_session) is True
+
+
+def test_update_user_roles_invalidates_cache(db_session, engineer):
+    """AuthService.update_user 清空角色后，权限随之收回"""
+    checker = PermissionChecker("projects.read")
+    assert checker(current_user=engineer, db=db_session) is True
+
+    AuthService.update_user(db_session, engineer.id, {"role_ids": []}, updater_id=engineer.id)
+
+    with pytest.raises(HTTPException):
+        checker(current_user=engineer, db=db_session)
+    assert AuthService.get_user_permissions(db_session, engineer.id) == []
@@ -0,0 +1,94 @@
+"""
+已认证用户快照缓存单元测试
+
+运行测试: pytest tests/test_principal_cache.py -v
+"""
+
+import dataclasses
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import event
+
+from shared.db.models_auth import User
+from shared.security import jwt as jwt_utils
+from shared.security.dependencies import get_current_user
+from shared.security.password import get_password_hash
+from shared.security.principal_cache import Principal, principal_cache
+from services.backend.app.services.auth_service import AuthService
+
+
+@pytest.fixture
+def user(db_session):
+    principal_cache.clear()
+    user = User(username="reader", hashed_password=get_password_hash("secret1"), full_name="读者")
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+@pytest.fixture
+def credentials(user):
+    token = jwt_utils.create_access_token(subject=str(user.id))
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+@pytest.fixture
+def query_counter(db_session):
+    counter = {"count": 0}
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        counter["count"] += 1
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", _count)
+    yield counter
+    event.remove(engine, "before_cursor_execute", _count)
+
+
+def test_repeated_requests_skip_user_lookup(db_session, user, credentials, query_counter):
+    """同一 Token 的后续请求不再查询 users 表，也不重复校验签名"""
+    first = get_current_user(credentials=credentials, db=db_session)
+    queries = query_counter["count"]
+    decode_hits = jwt_utils._decode_token_cached.cache_info().hits
+
+    second = get_current_user(credentials=credentials, db=db_session)
+
+    assert isinstance(first, Principal)
+    assert second is first
+    assert first.username == "reader"
+    assert query_counter["count"] == queries
+    assert jwt_utils._decode_token_cached.cache_info().hits == decode_hits + 1
+
+
+def test_principal_is_immutable_snapshot(db_session, credentials):
+    principal = get_current_user(credentials=credentials, db=db_session)
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        principal.is_superuser = True
+    assert not hasattr(principal, "__dict__")
+
+
+def test_deactivate_invalidates_principal(db_session, user, credentials):
+    """禁用用户后缓存立即失效，返回 403"""
+    get_current_user(credentials=credentials, db=db_session)
+
+    AuthService.update_user(db_session, user.id, {"is_active": False}, updater_id=user.id)
+
+    with pytest.raises(HTTPException) as exc_info:
+        get_current_user(credentials=credentials, db=db_session)
+    assert exc_info.value.status_code == 403
+
+
+def test_password_change_and_delete_invalidate_principal(db_session, user, credentials):
+    """修改密码后重新加载快照；删除用户后返回 401"""
+    first = get_current_user(credentials=credentials, db=db_session)
+
+    AuthService.change_password(db_session, user.id, "secret1", "secret2")
+    second = get_current_user(credentials=credentials, db=db_session)
+    assert second is not first
+
+    AuthService.delete_user(db_session, user.id, deleter_id=None)
+    with pytest.raises(HTTPException) as exc_info:
+        get_current_user(credentials=credentials, db=db_session)
+    assert exc_info.value.status_code == 401
@@ -0,0 +1,111 @@
+"""
+SQL 查询埋点与查询预算单元测试
+
+运行测试: pytest tests/test_query_instrumentation.py -v
+"""
+
+import logging
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from shared.db import instrumentation
+from shared.db.instrumentation import (
+    assert_response_query_budget,
+    parameter_shape,
+    query_budget,
+    query_stats_middleware,
+    statement_shape,
+)
+from shared.db.models_auth import AuditLog, Role, User, UserRole
+from shared.db.session import get_db
+from shared.security.dependencies import get_current_superuser
+from services.backend.app.main import app
+
+
+def test_statement_and_parameter_shapes():
+    assert statement_shape("SELECT *\n  FROM t WHERE id IN (?, ?, ?)") == "SELECT * FROM t WHERE id IN (...)"
+    assert parameter_shape({"id": 1, "name": "secret"}) == {"id": "int", "name": "str"}
+    assert parameter_shape([{"a": 1}, {"a": 2}]) == [{"a": "int"}, "x2"]
+
+
+def test_query_budget(db_session):
+    with query_budget(2) as stats:
+        db_session.execute(text("SELECT 1"))
+        db_session.execute(text("SELECT 2"))
+    assert stats.count == 2
+
+    with pytest.raises(AssertionError, match="超出预算 1"):
+        with query_budget(1):
+            db_session.execute(text("SELECT 1"))
+            db_session.execute(text("SELECT 1"))
+
+
+def test_response_headers(client, test_project):
+    response = client.get("/api/v1/assets/", params={"project_id": str(test_project.id)})
+
+    assert response.status_code == 200
+    assert int(response.headers["X-DB-Queries"]) >= 1
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+    with pytest.raises(AssertionError, match="超出预算 0"):
+        assert_response_query_budget(response, 0)
+
+
+def test_n_plus_one_and_slow_query_logging(db_session, monkeypatch, caplog):
+    monkeypatch.setattr(instrumentation.settings, "n_plus_one_threshold", 3)
+    monkeypatch.setattr(instrumentation.settings, "slow_query_ms", 0.0001)
+
+    mini = FastAPI()
+    mini.middleware("http")(query_stats_middleware)
+    mini.dependency_overrides[get_db] = lambda: db_session
+
+    @mini.get("/loop")
+    def loop(db: Session = Depends(get_db)):
+        for i in range(4):
+            db.execute(text("SELECT :name"), {"name": f"secret-{i}"})
+        return {}
+
+    with caplog.at_level(logging.WARNING, logger="bdc_ai.sql"):
+        response = TestClient(mini).get("/loop")
+
+    assert response.headers["X-DB-Queries"] == "4"
+    assert response.headers["X-DB-N-Plus-One"] == "4"
+    messages = [record.getMessage() for record in caplog.records]
+    assert any("疑似 N+1" in m and "/loop" in m for m in messages)
+    slow = [m for m in messages if m.startswith("慢查询")]
+    assert slow and "str" in slow[0]
+    assert not any("secret" in m for m in messages)
+
+
+@pytest.fixture
+def superuser_override():
+    app.dependency_overrides[get_current_superuser] = lambda: None
+    yield
+    app.dependency_overrides.pop(get_current_superuser, None)
+
+
+@pytest.mark.parametrize("n_users", [3, 30])
+def test_user_listing_query_budget(client, db_session, superuser_override, n_users):
+    """用户列表的查询次数与用户数量无关"""
+    role = Role(name="viewer", display_name="访客")
+    db_session.add(role)
+    db_session.flush()
+    for i in range(n_users):
+        user = User(username=f"u{i}", hashed_password="x")
+        db_session.add(user)
+        db_session.flush()
+        db_session.add(UserRole(user_id=user.id, role_id=role.id))
+        db_session.add(AuditLog(user_id=user.id, action="login"))
+    db_session.commit()
+    db_session.expire_all()
+
+    response = client.get("/api/v1/auth/users")
+    assert len(response.json()) == n_users
+    assert assert_response_query_budget(response, 2) == 2
+
+    response = client.get("/api/v1/auth/audit-logs")
+    assert len(response.json()) == n_users
+    assert assert_response_query_budget(response, 1) == 1
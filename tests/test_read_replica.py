@@ -0,0 +1,131 @@
+"""
+只读副本路由单元测试
+
+运行测试: pytest tests/test_read_replica.py -v
+"""
+
+import time
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from shared.db import replica, session as db_session_module
+from shared.db.replica import (
+    FORCE_PRIMARY_HEADER,
+    STICKY_COOKIE,
+    STICKY_HEADER,
+    ReplicaMonitor,
+    make_read_your_writes_middleware,
+)
+from shared.db.session import get_db, get_read_db
+
+
+class FakeProbe:
+    def __init__(self, lag=0.0):
+        self.lag = lag
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if isinstance(self.lag, Exception):
+            raise self.lag
+        return self.lag
+
+
+def test_monitor_falls_back_on_lag_and_errors():
+    probe = FakeProbe(lag=0.5)
+    monitor = ReplicaMonitor(probe, max_lag_seconds=2, check_interval=0)
+
+    assert monitor.is_usable() is True
+    probe.lag = 10.0
+    assert monitor.is_usable() is False
+    probe.lag = RuntimeError("replica down")
+    assert monitor.is_usable() is False
+    assert monitor.stats()["lag_seconds"] is None
+    probe.lag = 0.0
+    assert monitor.is_usable() is True
+    assert monitor.stats()["fallbacks"] == 2
+
+
+def test_monitor_caches_probe_between_intervals():
+    probe = FakeProbe(lag=0.0)
+    monitor = ReplicaMonitor(probe, max_lag_seconds=2, check_interval=60)
+
+    for _ in range(5):
+        assert monitor.is_usable()
+    assert probe.calls == 1
+
+
+@pytest.fixture
+def routed_app(tmp_path, monkeypatch):
+    """主库与副本各一个 SQLite 文件；接口返回实际使用的库"""
+    primary_engine = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    replica_engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    probe = FakeProbe(lag=0.0)
+
+    monkeypatch.setattr(db_session_module, "ReadSessionLocal", sessionmaker(bind=replica_engine))
+    monkeypatch.setattr(
+        db_session_module, "replica_monitor", ReplicaMonitor(probe, max_lag_seconds=1, check_interval=0)
+    )
+
+    app = FastAPI()
+    app.middleware("http")(make_read_your_writes_middleware(30))
+
+    def override_get_db():
+        db = sessionmaker(bind=primary_engine)()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+
+    @app.get("/which")
+    def which(db: Session = Depends(get_read_db)):
+        return {"db": "replica" if db.get_bind() is replica_engine else "primary"}
+
+    @app.post("/write")
+    def write(db: Session = Depends(get_db)):
+        return {"ok": True}
+
+    return TestClient(app), probe
+
+
+def test_reads_use_replica_until_lagging(routed_app):
+    client, probe = routed_app
+
+    assert client.get("/which").json()["db"] == "replica"
+    probe.lag = 5.0
+    assert client.get("/which").json()["db"] == "primary"
+
+
+def test_read_your_writes_stickiness(routed_app):
+    client, _ = routed_app
+
+    response = client.post("/write")
+    assert STICKY_HEADER in response.headers
+    assert STICKY_COOKIE in response.cookies
+
+    # Cookie 由 TestClient 自动回传
+    assert client.get("/which").json()["db"] == "primary"
+
+    client.cookies.clear()
+    assert client.get("/which").json()["db"] == "replica"
+
+    # 不保存 Cookie 的客户端可回传请求头；过期的截止时间无效
+    until = str(time.time() + 30)
+    assert client.get("/which", headers={STICKY_HEADER: until}).json()["db"] == "primary"
+    expired = str(time.time() - 1)
+    assert client.get("/which", headers={STICKY_HEADER: expired}).json()["db"] == "replica"
+    assert client.get("/which", headers={FORCE_PRIMARY_HEADER: "1"}).json()["db"] == "primary"
+
+
+def test_read_db_defaults_to_primary_without_replica(client, test_project):
+    """未配置副本时 get_read_db 复用 get_db（测试中为覆盖后的会话）"""
+    assert db_session_module.ReadSessionLocal is None
+    response = client.get("/api/v1/assets/", params={"project_id": str(test_project.id)})
+    assert response.status_code == 200
+    assert replica.STICKY_HEADER not in response.headers
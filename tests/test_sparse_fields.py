@@ -0,0 +1,97 @@
+"""
+列表接口稀疏字段集（fields=）单元测试
+
+运行测试: pytest tests/test_sparse_fields.py -v
+"""
+
+import pytest
+from sqlalchemy import event
+
+from shared.db.models_asset import Asset, FileBlob
+from shared.db.models_project import Building, BuildingSystem, Device, Zone
+
+
+@pytest.fixture
+def project_data(db_session, test_project):
+    building = Building(project_id=test_project.id, name="A座", usage_type="office", tags=["重点"])
+    db_session.add(building)
+    db_session.flush()
+    zone = Zone(building_id=building.id, name="B1 机房", type="plant")
+    system = BuildingSystem(building_id=building.id, type="HVAC", name="冷站", description="冷源")
+    db_session.add_all([zone, system])
+    db_session.flush()
+    db_session.add(Device(system_id=system.id, zone_id=zone.id, device_type="chiller", model="CH-1",
+                          serial_no="S-1", tags=["主机"]))
+    blob = FileBlob(storage_type="local", bucket="assets", path="x.jpg", file_name="x.jpg")
+    db_session.add(blob)
+    db_session.flush()
+    db_session.add(Asset(project_id=test_project.id, modality="image", source="mobile", title="电表",
+                         description="很长的描述" * 20, location_meta={"zone_label": "B1"}, file_id=blob.id))
+    db_session.commit()
+    return {"project": test_project, "building": building, "zone": zone, "system": system}
+
+
+@pytest.fixture
+def captured_sql(db_session):
+    statements = []
+    engine = db_session.get_bind()
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _capture)
+    yield statements
+    event.remove(engine, "before_cursor_execute", _capture)
+
+
+def test_asset_fields_limit_projection_and_output(client, project_data, captured_sql):
+    params = {"project_id": str(project_data["project"].id), "fields": "title,modality"}
+    response = client.get("/api/v1/assets/", params=params)
+
+    assert response.status_code == 200
+    assert response.json() == [{"id": response.json()[0]["id"], "modality": "image", "title": "电表"}]
+    select = next(s for s in captured_sql if "FROM assets" in s)
+    assert "description" not in select and "location_meta" not in select
+
+    full = client.get("/api/v1/assets/", params={"project_id": str(project_data["project"].id)}).json()
+    assert "description" in full[0] and "engineer_path" in full[0]
+
+
+def test_unknown_field_is_rejected(client, project_data):
+    response = client.get("/api/v1/assets/", params={"fields": "title,hashed_password"})
+    assert response.status_code == 400
+    assert "hashed_password" in response.json()["detail"]
+
+
+def test_devices_flat_fields(client, project_data, captured_sql):
+    url = f"/api/v1/projects/{project_data['project'].id}/devices/flat"
+
+    response = client.get(url, params={"fields": "model"})
+    assert response.json() == [{"id": response.json()[0]["id"], "model": "CH-1"}]
+    select = next(s for s in captured_sql if "FROM devices" in s)
+    assert "zones" not in select
+
+    row = client.get(url, params={"fields": "engineer_path,location"}).json()[0]
+    assert set(row) == {"id", "engineer_path", "location"}
+    assert row["engineer_path"] == "A座 / 冷站 / CH-1"
+    assert row["location"]["name"] == "B1 机房"
+
+
+@pytest.mark.parametrize("path, key, fields, expected", [
+    ("/api/v1/projects/{project}/buildings", "project", "name", {"name": "A座"}),
+    ("/api/v1/buildings/{building}/zones", "building", "name,type", {"name": "B1 机房", "type": "plant"}),
+    ("/api/v1/buildings/{building}/systems", "building", "type", {"type": "HVAC"}),
+    ("/api/v1/systems/{system}/devices", "system", "serial_no", {"serial_no": "S-1"}),
+    ("/api/v1/zones/{zone}/devices", "zone", "model", {"model": "CH-1"}),
+])
+def test_engineering_list_fields(client, project_data, path, key, fields, expected):
+    url = path.format(**{k: v.id for k, v in project_data.items()})
+
+    sparse = client.get(url, params={"fields": fields})
+    assert sparse.status_code == 200
+    row = sparse.json()[0]
+    assert row.pop("id")
+    assert row == expected
+
+    full = client.get(url).json()[0]
+    assert set(expected) < set(full)
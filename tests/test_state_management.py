@@ -153,6 +153,61 @@ def test_tree_state_toggle_expanded():
     assert "node-1" not in state.expanded_node_ids
 
 
+def _make_tree_node(node):
+    return {"id": f"{node['type']}:{node['id']}", "label": node["name"],
+            "asset_count": node.get("asset_count"), "children": []}
+
+
+def test_tree_state_apply_changes():
+    """测试增量变更原地应用"""
+    state = TreeState()
+    state.set_nodes([{
+        "id": "project_root:project-root",
+        "children": [
+            {"id": "building:b1", "label": "1号楼", "asset_count": 3, "children": [
+                {"id": "system_group:b1", "label": "系统", "children": [
+                    {"id": "system:s1", "label": "空调", "children": [
+                        {"id": "device:d1", "label": "FCU-1", "children": []},
+                    ]},
+                ]},
+            ]},
+            {"id": "building:b2", "label": "2号楼", "children": [{"id": "loading:building:b2"}]},
+        ],
+    }])
+
+    applied = state.apply_changes({"seq": 7, "reset": False, "changes": [
+        {"seq": 5, "op": "update", "node_type": "building", "node_id": "b1", "parent_type": "project",
+         "parent_id": None, "node": {"id": "b1", "name": "1号楼（改）", "type": "building"}},
+        {"seq": 6, "op": "insert", "node_type": "zone", "node_id": "z1", "parent_type": "building",
+         "parent_id": "b1", "node": {"id": "z1", "name": "1F", "type": "zone"}},
+        {"seq": 6, "op": "insert", "node_type": "system", "node_id": "s2", "parent_type": "building",
+         "parent_id": "b2", "node": {"id": "s2", "name": "给排水", "type": "system"}},
+        {"seq": 7, "op": "delete", "node_type": "device", "node_id": "d1", "parent_type": "system",
+         "parent_id": "s1", "node": None},
+    ]}, _make_tree_node)
+    assert applied is True
+    assert state.change_seq == 7
+
+    b1 = state.all_nodes[0]["children"][0]
+    # 更新保留子节点与资产计数
+    assert (b1["label"], b1["asset_count"]) == ("1号楼（改）", 3)
+    assert [c["id"] for c in b1["children"]] == ["system_group:b1", "zone_group:b1"]
+    assert b1["children"][1]["children"][0]["label"] == "1F"
+    assert b1["children"][0]["children"][0]["children"] == []
+    # 未展开的楼栋不插入，展开时再取回
+    assert state.all_nodes[0]["children"][1]["children"] == [{"id": "loading:building:b2"}]
+
+    # 删除最后一个系统后空分组一并移除
+    state.apply_changes({"seq": 8, "changes": [
+        {"seq": 8, "op": "delete", "node_type": "system", "node_id": "s1", "parent_type": "building",
+         "parent_id": "b1", "node": None},
+    ]}, _make_tree_node)
+    assert [c["id"] for c in b1["children"]] == ["zone_group:b1"]
+
+    assert state.apply_changes({"seq": 9, "reset": True, "changes": []}, _make_tree_node) is False
+    assert state.change_seq == 8
+
+
 # ==================== AssetState 测试 ====================
 
 def test_asset_state_initialization():
@@ -0,0 +1,176 @@
+"""
+项目结构树缓存（树版本号、ETag / 304、写入失效）单元测试
+
+运行测试: pytest tests/test_tree_cache.py -v
+"""
+
+import time
+import uuid
+
+import pytest
+
+from shared.db.models_asset import Asset, FileBlob
+from shared.db.models_project import Project
+from services.backend.app.services import tree_cache as tree_cache_module
+from services.backend.app.services.tree_cache import TreeCache, body_digest, etag_matches, tree_etag
+
+
+@pytest.fixture(autouse=True)
+def clear_tree_cache():
+    tree_cache_module.tree_cache.clear()
+    yield
+    tree_cache_module.tree_cache.clear()
+
+
+def _version(db_session, project_id) -> int:
+    db_session.expire_all()
+    return db_session.query(Project.tree_version).filter(Project.id == project_id).scalar()
+
+
+def _tree_url(project) -> str:
+    return f"/api/v1/projects/{project.id}/structure_tree"
+
+
+def test_structure_tree_etag_and_not_modified(client, test_project):
+    first = client.get(_tree_url(test_project))
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert etag == tree_etag(test_project.id, 0, digest=body_digest(first.content))
+
+    second = client.get(_tree_url(test_project), headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["etag"] == etag
+
+    other = client.get(_tree_url(test_project), headers={"If-None-Match": '"tree-other-1"'})
+    assert other.status_code == 200
+    assert other.json() == first.json()
+
+
+def test_structure_tree_served_from_cache(client, test_project):
+    before = tree_cache_module.tree_cache.stats()
+    client.get(_tree_url(test_project))
+    stats = tree_cache_module.tree_cache.stats()
+    assert stats["entries"] == 1 and stats["misses"] == before["misses"] + 1
+
+    client.get(_tree_url(test_project))
+    assert tree_cache_module.tree_cache.stats()["hits"] == before["hits"] + 1
+
+
+def test_engineering_mutations_bump_tree_version(client, db_session, test_project):
+    seen = [_version(db_session, test_project.id)]
+
+    def bumped():
+        version = _version(db_session, test_project.id)
+        assert version > seen[-1]
+        seen.append(version)
+
+    building = client.post(f"/api/v1/projects/{test_project.id}/buildings", json={"name": "A座"}).json()
+    bumped()
+    client.patch(f"/api/v1/buildings/{building['id']}", json={"name": "A座（主楼）"})
+    bumped()
+
+    zone = client.post(f"/api/v1/buildings/{building['id']}/zones", json={"name": "B1"}).json()
+    bumped()
+    client.patch(f"/api/v1/zones/{zone['id']}", json={"name": "B1 机房"})
+    bumped()
+
+    system = client.post(f"/api/v1/buildings/{building['id']}/systems",
+                         json={"type": "HVAC", "name": "冷站"}).json()
+    bumped()
+    client.patch(f"/api/v1/systems/{system['id']}", json={"type": "HVAC", "name": "冷站 1"})
+    bumped()
+
+    device = client.post(f"/api/v1/systems/{system['id']}/devices",
+                         json={"name": "冷机 1", "zone_id": zone["id"]}).json()
+    bumped()
+    client.patch(f"/api/v1/devices/{device['id']}", json={"name": "冷机 1#"})
+    bumped()
+
+    assert client.delete(f"/api/v1/devices/{device['id']}").status_code == 204
+    bumped()
+    assert client.delete(f"/api/v1/systems/{system['id']}").status_code == 204
+    bumped()
+    assert client.delete(f"/api/v1/zones/{zone['id']}").status_code == 204
+    bumped()
+    assert client.delete(f"/api/v1/buildings/{building['id']}").status_code == 204
+    bumped()
+
+
+def test_mutation_invalidates_cached_tree(client, test_project):
+    first = client.get(_tree_url(test_project))
+    etag = first.headers["etag"]
+    assert not first.json()["tree"].get("children")
+
+    client.post(f"/api/v1/projects/{test_project.id}/buildings", json={"name": "A座"})
+
+    refreshed = client.get(_tree_url(test_project), headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["etag"] != etag
+    assert [b["name"] for b in refreshed.json()["tree"]["children"]] == ["A座"]
+
+
+def test_asset_counts_refresh_after_ttl(client, db_session, test_project, monkeypatch):
+    building = client.post(f"/api/v1/projects/{test_project.id}/buildings", json={"name": "A座"}).json()
+    first = client.get(_tree_url(test_project))
+    assert first.json()["tree"]["children"][0]["asset_count"] == 0
+    version = _version(db_session, test_project.id)
+
+    blob = FileBlob(storage_type="local", bucket="assets", path="x.jpg", file_name="x.jpg")
+    db_session.add(blob)
+    db_session.flush()
+    db_session.add(Asset(project_id=test_project.id, building_id=uuid.UUID(building["id"]),
+                         modality="image", source="mobile", file_id=blob.id))
+    db_session.commit()
+    assert _version(db_session, test_project.id) == version
+
+    # 缓存未到期：计数可滞后，仍命中 304
+    cached = client.get(_tree_url(test_project), headers={"If-None-Match": first.headers["etag"]})
+    assert cached.status_code == 304
+
+    monkeypatch.setattr(tree_cache_module.tree_cache, "ttl", 0)
+    refreshed = client.get(_tree_url(test_project), headers={"If-None-Match": first.headers["etag"]})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["etag"] != first.headers["etag"]
+    assert refreshed.json()["tree"]["children"][0]["asset_count"] == 1
+
+
+def test_missing_project_is_not_cached(client):
+    response = client.get(f"/api/v1/projects/{uuid.uuid4()}/structure_tree")
+    assert response.status_code == 200
+    assert "etag" not in response.headers
+    assert tree_cache_module.tree_cache.stats()["entries"] == 0
+
+
+def test_tree_cache_lru_eviction_and_stale_versions():
+    cache = TreeCache(max_entries=2)
+    a, b, c = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    cache.put(a, 1, b"a1")
+    cache.put(b, 1, b"b1")
+    assert cache.get(a, 1) == b"a1"  # a 变为最近使用
+    cache.put(c, 1, b"c1")
+    assert cache.get(b, 1) is None
+    assert cache.get(a, 1) == b"a1"
+
+    cache.put(a, 2, b"a2")
+    assert cache.get(a, 1) is None
+    assert cache.get(a, 2) == b"a2"
+
+    expiring = TreeCache(max_entries=2, ttl=0.05)
+    expiring.put(a, 1, b"a1")
+    assert expiring.get(a, 1) == b"a1"
+    time.sleep(0.06)
+    assert expiring.get(a, 1) is None
+
+    disabled = TreeCache(max_entries=0)
+    disabled.put(a, 1, b"a1")
+    assert disabled.get(a, 1) is None
+
+
+def test_etag_matches():
+    etag = '"tree-x-3"'
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"tree-x-2", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('"tree-x-2"', etag)
@@ -0,0 +1,134 @@
+"""
+工程结构变更日志与结构树增量接口（/structure_tree/changes）单元测试
+
+运行测试: pytest tests/test_tree_changes.py -v
+"""
+
+import uuid
+
+from shared.db.models_project import Building, BuildingSystem, EngineeringChange
+from services.backend.app.services import tree_changes
+
+
+def _changes(client, project_id, since=0):
+    return client.get(f"/api/v1/projects/{project_id}/structure_tree/changes", params={"since": since})
+
+
+def _seq(client, project_id):
+    return _changes(client, project_id).json()["seq"]
+
+
+def test_mutations_recorded_in_order(client, db_session, test_project):
+    project_id = test_project.id
+    building = Building(project_id=project_id, name="1号楼")
+    db_session.add(building)
+    db_session.flush()
+    system = BuildingSystem(building_id=building.id, type="HVAC", name="空调")
+    db_session.add(system)
+    db_session.commit()
+    building_id, system_id = building.id, system.id
+    since = _seq(client, project_id)
+
+    zone = client.post(f"/api/v1/buildings/{building_id}/zones", json={"name": "1F"}).json()
+    device = client.post(f"/api/v1/systems/{system_id}/devices",
+                         json={"device_type": "fcu", "model": "FCU-1", "zone_id": zone["id"]}).json()
+    client.patch(f"/api/v1/buildings/{building_id}", json={"name": "1号楼A"})
+    client.delete(f"/api/v1/devices/{device['id']}")
+
+    body = _changes(client, project_id, since).json()
+    assert body["reset"] is False and body["since"] == since
+    assert body["seq"] == body["changes"][-1]["seq"]
+    assert [c["seq"] for c in body["changes"]] == sorted(c["seq"] for c in body["changes"])
+    assert [(c["op"], c["node_type"]) for c in body["changes"]] == [
+        ("insert", "zone"), ("insert", "device"), ("update", "building"), ("delete", "device"),
+    ]
+
+    zone_change, device_change, building_change, delete_change = body["changes"]
+    assert (zone_change["parent_type"], zone_change["parent_id"]) == ("building", str(building_id))
+    assert zone_change["node"] == {"id": zone["id"], "name": "1F", "type": "zone", "zone_type": None,
+                                   "device_count": 0}
+    assert device_change["parent_id"] == str(system_id)
+    assert device_change["node"]["zone"] == {"id": zone["id"], "name": "1F"}
+    assert building_change["node"]["name"] == "1号楼A"
+    assert delete_change["node"] is None and delete_change["node_id"] == device["id"]
+
+    # 客户端以返回的 seq 作为下次的 since
+    assert _changes(client, project_id, body["changes"][1]["seq"]).json()["changes"] == body["changes"][2:]
+    assert _changes(client, project_id, body["seq"]).json()["changes"] == []
+
+
+def test_create_building_records_default_systems(client, test_project):
+    project_id = test_project.id
+    since = _seq(client, project_id)
+    building = client.post(f"/api/v1/projects/{project_id}/buildings", json={"name": "2号楼"}).json()
+
+    changes = _changes(client, project_id, since).json()["changes"]
+    assert (changes[0]["node_type"], changes[0]["node_id"]) == ("building", building["id"])
+    systems = changes[1:]
+    assert len(systems) == 9
+    assert {c["node_type"] for c in systems} == {"system"}
+    assert {c["parent_id"] for c in systems} == {building["id"]}
+    # 同一批默认系统共用一个 seq
+    assert len({c["seq"] for c in systems}) == 1
+
+
+def test_zone_delete_records_cascaded_devices(client, db_session, test_project):
+    project_id = test_project.id
+    building = client.post(f"/api/v1/projects/{project_id}/buildings", json={"name": "1号楼"}).json()
+    zone = client.post(f"/api/v1/buildings/{building['id']}/zones", json={"name": "1F"}).json()
+    system = client.post(f"/api/v1/buildings/{building['id']}/systems", json={"type": "hvac", "name": "空调"}).json()
+    devices = [
+        client.post(f"/api/v1/systems/{system['id']}/devices",
+                    json={"device_type": "fcu", "model": f"FCU-{i}", "zone_id": zone["id"]}).json()
+        for i in range(2)
+    ]
+    other = client.post(f"/api/v1/systems/{system['id']}/devices", json={"device_type": "fcu", "model": "FCU-X"}).json()
+    since = _seq(client, project_id)
+
+    assert client.delete(f"/api/v1/zones/{zone['id']}").status_code == 204
+    changes = _changes(client, project_id, since).json()["changes"]
+
+    # 分区级联删除的设备在结构树中挂在系统下，同 seq 各有一条删除
+    assert len({c["seq"] for c in changes}) == 1
+    assert [(c["op"], c["node_type"]) for c in changes] == [
+        ("delete", "device"), ("delete", "device"), ("delete", "zone")]
+    assert {c["node_id"] for c in changes[:2]} == {d["id"] for d in devices}
+    assert {c["parent_id"] for c in changes[:2]} == {system["id"]}
+    remaining = client.get(f"/api/v1/projects/{project_id}/structure_tree/children",
+                           params={"parent_type": "system", "parent_id": system["id"]}).json()["children"]
+    assert [c["id"] for c in remaining] == [other["id"]]
+
+
+def test_seq_matches_tree_version(client, test_project):
+    project_id = test_project.id
+    client.post(f"/api/v1/projects/{project_id}/buildings", json={"name": "1号楼"})
+    seq = _seq(client, project_id)
+    tree = client.get(f"/api/v1/projects/{project_id}/structure_tree").json()
+    children = client.get(f"/api/v1/projects/{project_id}/structure_tree/children").json()
+    assert tree["seq"] == seq
+    assert children["seq"] == seq
+
+
+def test_reset_when_out_of_window(client, db_session, test_project, monkeypatch):
+    monkeypatch.setattr(tree_changes.settings, "tree_changes_retention", 2)
+    project_id = test_project.id
+    building = client.post(f"/api/v1/projects/{project_id}/buildings", json={"name": "1号楼"}).json()
+    for i in range(3):
+        client.patch(f"/api/v1/buildings/{building['id']}", json={"name": f"1号楼-{i}"})
+    seq = _seq(client, project_id)
+
+    # 超出保留窗口的旧变更已被清理
+    db_session.expire_all()
+    oldest = db_session.query(EngineeringChange.seq).filter(EngineeringChange.project_id == project_id)
+    assert min(row.seq for row in oldest) > seq - 2
+
+    stale = _changes(client, project_id, seq - 3).json()
+    assert stale["reset"] is True and stale["changes"] == []
+    assert _changes(client, project_id, seq - 2).json()["reset"] is False
+    # 客户端 seq 超前于服务端（如数据库重建）
+    assert _changes(client, project_id, seq + 1).json()["reset"] is True
+
+
+def test_changes_errors(client, test_project):
+    assert _changes(client, uuid.uuid4()).status_code == 404
+    assert _changes(client, test_project.id, -1).status_code == 422
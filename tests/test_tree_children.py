@@ -0,0 +1,122 @@
+"""
+结构树按层懒加载接口（/structure_tree/children）单元测试
+
+运行测试: pytest tests/test_tree_children.py -v
+"""
+
+import uuid
+
+import pytest
+
+from shared.db.instrumentation import assert_response_query_budget
+from shared.db.models_asset import Asset, FileBlob
+from shared.db.models_project import Building, BuildingSystem, Device, Zone
+
+
+@pytest.fixture
+def campus(db_session, test_project):
+    buildings = []
+    for b_name in ("2号楼", "1号楼"):
+        building = Building(project_id=test_project.id, name=b_name)
+        db_session.add(building)
+        db_session.flush()
+        zone = Zone(building_id=building.id, name="1F")
+        system = BuildingSystem(building_id=building.id, type="HVAC", name="空调")
+        db_session.add_all([zone, system])
+        db_session.flush()
+        devices = [
+            Device(system_id=system.id, zone_id=zone.id if i == 0 else None, device_type="fcu", model=f"FCU-{i}")
+            for i in range(3)
+        ]
+        db_session.add_all(devices)
+        db_session.flush()
+        buildings.append((building, zone, system, devices))
+    empty = Building(project_id=test_project.id, name="3号楼")
+    db_session.add(empty)
+
+    blob = FileBlob(storage_type="local", bucket="assets", path="x.jpg", file_name="x.jpg")
+    db_session.add(blob)
+    db_session.flush()
+    building, zone, system, devices = buildings[1]
+    db_session.add_all([
+        Asset(project_id=test_project.id, building_id=building.id, zone_id=zone.id, system_id=system.id,
+              device_id=devices[0].id, modality="image", source="mobile", file_id=blob.id,
+              status="pending_scene_llm"),
+        Asset(project_id=test_project.id, building_id=building.id, system_id=system.id,
+              modality="image", source="mobile", file_id=blob.id),
+    ])
+    db_session.commit()
+    return test_project, buildings[1]
+
+
+def _children(client, project_id, **params):
+    return client.get(f"/api/v1/projects/{project_id}/structure_tree/children", params=params)
+
+
+def test_top_level_lists_buildings(client, campus):
+    project, (building, _zone, _system, _devices) = campus
+    response = _children(client, project.id)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["parent_type"] == "project" and body["parent_id"] is None
+    assert [b["name"] for b in body["children"]] == ["1号楼", "2号楼", "3号楼"]
+
+    first = body["children"][0]
+    assert first["id"] == str(building.id)
+    assert (first["child_count"], first["has_children"]) == (2, True)
+    assert (first["asset_count"], first["pending_count"]) == (2, 1)
+    assert body["children"][2]["has_children"] is False
+
+
+def test_building_and_system_levels(client, campus):
+    project, (building, zone, system, devices) = campus
+    body = _children(client, project.id, parent_type="building", parent_id=str(building.id)).json()
+    assert [(c["type"], c["name"]) for c in body["children"]] == [("system", "空调"), ("zone", "1F")]
+    sys_node, zone_node = body["children"]
+    assert (sys_node["child_count"], sys_node["has_children"], sys_node["asset_count"]) == (3, True, 2)
+    assert (zone_node["device_count"], zone_node["has_children"], zone_node["pending_count"]) == (1, False, 1)
+
+    body = _children(client, project.id, parent_type="system", parent_id=str(system.id)).json()
+    assert [d["name"] for d in body["children"]] == ["FCU-0", "FCU-1", "FCU-2"]
+    assert body["children"][0]["zone"] == {"id": str(zone.id), "name": "1F"}
+    assert (body["children"][0]["asset_count"], body["children"][0]["has_children"]) == (1, False)
+    assert body["children"][1]["zone"] is None
+
+    leaf = _children(client, project.id, parent_type="device", parent_id=str(devices[0].id))
+    assert leaf.json()["children"] == []
+    leaf = _children(client, project.id, parent_type="zone", parent_id=str(zone.id))
+    assert leaf.status_code == 200 and leaf.json()["children"] == []
+
+
+def test_query_count_bounded_by_level(client, campus):
+    project, _ = campus
+    response = _children(client, project.id)
+    assert_response_query_budget(response, 5)
+
+
+def test_children_etag(client, campus):
+    project, (building, *_rest) = campus
+    params = {"parent_type": "building", "parent_id": str(building.id)}
+    first = _children(client, project.id, **params)
+    etag = first.headers["etag"]
+    assert _children(client, project.id).headers["etag"] != etag
+
+    cached = client.get(f"/api/v1/projects/{project.id}/structure_tree/children", params=params,
+                        headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+
+    client.post(f"/api/v1/buildings/{building.id}/zones", json={"name": "2F"})
+    refreshed = client.get(f"/api/v1/projects/{project.id}/structure_tree/children", params=params,
+                           headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert [c["name"] for c in refreshed.json()["children"] if c["type"] == "zone"] == ["1F", "2F"]
+
+
+def test_children_errors(client, campus):
+    project, (building, *_rest) = campus
+    assert _children(client, project.id, parent_type="floor", parent_id=str(building.id)).status_code == 400
+    assert _children(client, project.id, parent_type="building").status_code == 400
+    assert _children(client, project.id, parent_type="building", parent_id=str(uuid.uuid4())).status_code == 404
+    for parent_type in ("system", "zone", "device"):
+        assert _children(client, project.id, parent_type=parent_type, parent_id=str(uuid.uuid4())).status_code == 404
+    assert _children(client, uuid.uuid4()).status_code == 404
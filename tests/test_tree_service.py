@@ -0,0 +1,111 @@
+"""
+工程结构树构建（逐层列查询 + 分组计数）单元测试
+
+运行测试: pytest tests/test_tree_service.py -v
+"""
+
+from shared.db.instrumentation import query_budget
+from shared.db.models_asset import Asset, FileBlob
+from shared.db.models_project import Building, BuildingSystem, Device, Project, Zone
+from services.backend.app.services.tree_service import EngineeringTreeService
+
+
+def _seed(db_session, project, devices_per_system: int = 3):
+    ids = {}
+    for b_name in ("B座", "A座"):
+        building = Building(project_id=project.id, name=b_name, usage_type="office")
+        db_session.add(building)
+        db_session.flush()
+        zone = Zone(building_id=building.id, name=f"{b_name} B1", type="plant_room")
+        system = BuildingSystem(building_id=building.id, type="HVAC", name="冷站")
+        db_session.add_all([zone, system])
+        db_session.flush()
+        devices = [
+            Device(system_id=system.id, zone_id=zone.id if i == 0 else None,
+                   device_type="chiller", model=f"CH-{i}")
+            for i in range(devices_per_system)
+        ]
+        db_session.add_all(devices)
+        db_session.flush()
+        ids[b_name] = (building, zone, system, devices)
+    db_session.commit()
+    return ids
+
+
+def _node(children, name):
+    return next(c for c in children if c["name"] == name)
+
+
+def test_tree_shape_and_counts(db_session, test_project):
+    ids = _seed(db_session, test_project)
+    building, zone, system, devices = ids["A座"]
+    blob = FileBlob(storage_type="local", bucket="assets", path="x.jpg", file_name="x.jpg")
+    db_session.add(blob)
+    db_session.flush()
+    common = dict(project_id=test_project.id, modality="image", source="mobile", file_id=blob.id)
+    db_session.add_all([
+        Asset(building_id=building.id, zone_id=zone.id, system_id=system.id, device_id=devices[0].id,
+              status="pending_scene_llm", **common),
+        Asset(building_id=building.id, system_id=system.id, device_id=devices[0].id,
+              status="parsed_scene_llm", **common),
+        Asset(building_id=building.id, system_id=system.id, **common),
+        Asset(building_id=building.id, **common),
+    ])
+    db_session.commit()
+
+    tree = EngineeringTreeService.build_project_tree(test_project.id, db_session)
+    assert tree["type"] == "project_root"
+    assert [b["name"] for b in tree["children"]] == ["A座", "B座"]
+
+    a = _node(tree["children"], "A座")
+    assert (a["usage_type"], a["asset_count"], a["pending_count"]) == ("office", 4, 1)
+    assert [c["type"] for c in a["children"]] == ["system", "zone"]
+
+    s = _node(a["children"], "冷站")
+    assert (s["system_type"], s["asset_count"], s["pending_count"]) == ("HVAC", 3, 1)
+    assert [d["name"] for d in s["children"]] == ["CH-0", "CH-1", "CH-2"]
+
+    d0 = _node(s["children"], "CH-0")
+    assert d0["zone"] == {"id": str(zone.id), "name": zone.name}
+    assert (d0["device_type"], d0["asset_count"], d0["pending_count"]) == ("chiller", 2, 1)
+    assert _node(s["children"], "CH-1")["zone"] is None
+
+    z = _node(a["children"], zone.name)
+    assert (z["zone_type"], z["device_count"], z["asset_count"], z["pending_count"]) == ("plant_room", 1, 1, 1)
+
+    b = _node(tree["children"], "B座")
+    assert b["asset_count"] == 0
+
+
+def test_query_count_independent_of_size(db_session, test_project):
+    _seed(db_session, test_project, devices_per_system=50)
+    project_id = test_project.id
+    with query_budget(6):
+        tree = EngineeringTreeService.build_project_tree(project_id, db_session)
+    assert sum(len(s["children"]) for b in tree["children"] for s in b["children"] if s["type"] == "system") == 100
+
+
+def test_empty_project(db_session, test_project):
+    tree = EngineeringTreeService.build_project_tree(test_project.id, db_session)
+    assert tree == {"id": "project-root", "name": "项目根", "type": "project_root", "children": []}
+
+
+def test_asset_changes_do_not_bump_tree_version(db_session, test_project):
+    """资产写入不递增树版本号（不争用项目行锁），计数由结构树缓存到期刷新"""
+    def version():
+        db_session.expire_all()
+        return db_session.query(Project.tree_version).filter(Project.id == test_project.id).scalar()
+
+    blob = FileBlob(storage_type="local", bucket="assets", path="x.jpg", file_name="x.jpg")
+    db_session.add(blob)
+    db_session.commit()
+    start = version()
+
+    asset = Asset(project_id=test_project.id, modality="image", source="mobile", file_id=blob.id)
+    db_session.add(asset)
+    db_session.commit()
+    asset.status = "pending_scene_llm"
+    db_session.commit()
+    db_session.delete(asset)
+    db_session.commit()
+    assert version() == start
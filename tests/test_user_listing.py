@@ -0,0 +1,125 @@
+"""
+用户列表（预加载角色、搜索、键集分页）单元测试
+
+运行测试: pytest tests/test_user_listing.py -v
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from shared.db.models_auth import Role, User, UserRole
+from shared.security.dependencies import get_current_superuser
+from services.backend.app.main import app
+from services.backend.app.services.auth_service import AuthService
+
+
+@pytest.fixture
+def field_accounts(db_session):
+    """30 个外业账号，交替分配两个角色"""
+    engineer = Role(name="engineer", display_name="工程师", level=10)
+    surveyor = Role(name="surveyor", display_name="勘测员", level=5)
+    db_session.add_all([engineer, surveyor])
+    db_session.flush()
+
+    base = datetime(2026, 1, 1)
+    users = []
+    for i in range(30):
+        user = User(
+            username=f"field{i:02d}",
+            full_name=f"外业{i:02d}",
+            email=f"field{i:02d}@example.com",
+            hashed_password="x",
+            is_active=i % 10 != 0,
+            created_at=base + timedelta(minutes=i // 2),
+        )
+        db_session.add(user)
+        db_session.flush()
+        db_session.add(UserRole(user_id=user.id, role_id=engineer.id if i % 2 else surveyor.id))
+        if i % 3 == 0:
+            db_session.add(UserRole(user_id=user.id, role_id=engineer.id if i % 2 == 0 else surveyor.id))
+        users.append(user)
+    db_session.commit()
+    db_session.expire_all()
+    return engineer, surveyor
+
+
+@pytest.fixture
+def query_counter(db_session):
+    counter = {"count": 0}
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        counter["count"] += 1
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", _count)
+    yield counter
+    event.remove(engine, "before_cursor_execute", _count)
+
+
+def test_roles_loaded_without_n_plus_one(db_session, field_accounts, query_counter):
+    """角色通过 selectinload 批量加载：用户数量不影响查询次数"""
+    users, _ = AuthService.list_users(db_session, limit=30)
+    roles = {user.username: [role.name for role in user.roles] for user in users}
+
+    assert len(users) == 30
+    assert query_counter["count"] == 2
+    assert roles["field00"] == ["engineer", "surveyor"]
+    assert roles["field01"] == ["engineer"]
+
+
+@pytest.mark.parametrize("sort,order", [("username", "asc"), ("created_at", "desc"), ("created_at", "asc")])
+def test_keyset_pages_are_complete_and_ordered(db_session, field_accounts, sort, order):
+    seen = []
+    cursor = None
+    while True:
+        users, cursor = AuthService.list_users(db_session, limit=7, cursor=cursor, sort=sort, order=order)
+        seen.extend(users)
+        if cursor is None:
+            break
+
+    assert len(seen) == 30
+    assert len({user.id for user in seen}) == 30
+    keys = [(getattr(user, sort), str(user.id)) for user in seen]
+    assert keys == sorted(keys, reverse=(order == "desc"))
+
+
+def test_search_and_filters(db_session, field_accounts):
+    engineer, _ = field_accounts
+
+    users, _ = AuthService.list_users(db_session, search="外业1", sort="username", order="asc")
+    assert [user.username for user in users] == [f"field1{i}" for i in range(10)]
+
+    users, _ = AuthService.list_users(db_session, search="FIELD2", is_active=True)
+    assert len(users) == 9
+
+    users, _ = AuthService.list_users(db_session, role_id=engineer.id)
+    assert all("engineer" in [role.name for role in user.roles] for user in users)
+    assert len(users) == 20
+
+
+def test_cursor_must_match_sort(db_session, field_accounts):
+    _, cursor = AuthService.list_users(db_session, limit=5, sort="username", order="asc")
+    with pytest.raises(ValueError):
+        AuthService.list_users(db_session, limit=5, cursor=cursor, sort="created_at")
+    with pytest.raises(ValueError):
+        AuthService.list_users(db_session, sort="password")
+
+
+def test_users_endpoint_returns_next_cursor(client, field_accounts):
+    app.dependency_overrides[get_current_superuser] = lambda: None
+
+    response = client.get("/api/v1/auth/users", params={"limit": 25, "sort": "username", "order": "asc"})
+    assert response.status_code == 200
+    first = response.json()
+    assert len(first) == 25
+    assert first[0]["roles"]
+
+    response = client.get("/api/v1/auth/users", params={
+        "limit": 25, "sort": "username", "order": "asc", "cursor": response.headers["X-Next-Cursor"],
+    })
+    assert [user["username"] for user in response.json()] == [f"field{i}" for i in range(25, 30)]
+    assert "X-Next-Cursor" not in response.headers
+
+    assert client.get("/api/v1/auth/users", params={"cursor": "bogus"}).status_code == 400
@@ -0,0 +1,148 @@
+"""
+GLM 批量回填（batch_backfill）单元测试
+
+使用 LocalBatchBackend 替身，不访问后端与 GLM。
+
+运行测试: pytest tests/test_worker_batch_backfill.py -v
+"""
+
+import json
+import os
+
+import pytest
+
+os.environ.setdefault("GLM_API_KEY", "test-key")
+
+from services.worker import batch_backfill  # noqa: E402
+from services.worker import scene_issue_glm_worker as worker  # noqa: E402
+
+
+IMAGE = {"type": "image_url", "image_url": {"url": "data:image/jpeg;base64,AAAA"}}
+
+
+@pytest.fixture
+def fake_backend_api(monkeypatch):
+    """替换资产详情获取与结果回写，记录回写调用。"""
+
+    details = {
+        "a-meter": {"id": "a-meter", "content_role": "meter", "file_path": "x.jpg", "location_meta": {}},
+        "a-plate": {"id": "a-plate", "content_role": "nameplate", "file_path": "y.jpg"},
+        "a-scene": {"id": "a-scene", "content_role": "scene_issue", "file_path": "z.jpg"},
+    }
+    posted = []
+
+    monkeypatch.setattr(worker, "get_asset_detail", lambda asset_id: details[asset_id])
+    monkeypatch.setattr(worker, "get_image_content_from_detail", lambda detail: IMAGE)
+    monkeypatch.setattr(worker, "post_meter_reading", lambda aid, r: posted.append(("meter", aid, r)) or True)
+    monkeypatch.setattr(worker, "post_nameplate_table", lambda aid, r: posted.append(("nameplate", aid, r)) or True)
+    monkeypatch.setattr(worker, "post_scene_issue_report", lambda aid, p: posted.append(("scene", aid, p)) or True)
+    return posted
+
+
+def test_write_batch_files_splits_by_request_count(tmp_path):
+    """超过单文件请求数上限时切分文件，并为每个文件写出 manifest"""
+    items = [
+        batch_backfill.BatchItem(custom_id=f"id-{i}", role="meter", note="", body={"model": "m"})
+        for i in range(5)
+    ]
+    files = batch_backfill.write_batch_files(items, str(tmp_path), max_requests=2)
+
+    assert len(files) == 3
+    lines = files[0].path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 2
+    first = json.loads(lines[0])
+    assert first["custom_id"] == "id-0"
+    assert first["method"] == "POST"
+    assert first["body"] == {"model": "m"}
+
+    manifest = json.loads(files[2].manifest_path.read_text(encoding="utf-8"))
+    assert manifest == {"id-4": {"role": "meter", "note": ""}}
+
+
+def test_run_backfill_ingests_through_online_posting_path(tmp_path, fake_backend_api):
+    """本地替身后端跑通 序列化 -> 提交 -> 轮询 -> 回写，按 role 分派到对应端点"""
+
+    def handler(body):
+        assert body["model"] == worker.VISION_MODEL
+        assert body["messages"][0]["content"][0] == IMAGE
+        return json.dumps({"reading": 12.5})
+
+    stats = batch_backfill.run_backfill(
+        batch_backfill.LocalBatchBackend(handler),
+        [{"id": "a-meter"}, {"id": "a-plate"}, {"id": "a-scene"}],
+        output_dir=str(tmp_path),
+        poll_interval=0,
+    )
+
+    assert stats["requests"] == 3
+    assert stats["ok"] == 3
+    assert stats["failed"] == 0
+    kinds = sorted((kind, aid) for kind, aid, _ in fake_backend_api)
+    assert kinds == [("meter", "a-meter"), ("nameplate", "a-plate"), ("scene", "a-scene")]
+
+
+def test_run_backfill_counts_failed_requests(tmp_path, fake_backend_api):
+    """单条请求失败或返回非 JSON 时计入失败，不影响其余结果回写"""
+
+    def handler(body):
+        prompt = body["messages"][0]["content"][1]["text"]
+        if "铭牌" in prompt:
+            raise RuntimeError("quota exceeded")
+        return "not-json" if "现场" in prompt else {"reading": 1}
+
+    stats = batch_backfill.run_backfill(
+        batch_backfill.LocalBatchBackend(handler),
+        [{"id": "a-meter"}, {"id": "a-plate"}, {"id": "a-scene"}],
+        output_dir=str(tmp_path),
+        poll_interval=0,
+    )
+
+    assert stats["ok"] == 1
+    assert stats["failed"] == 2
+    assert [(kind, aid) for kind, aid, _ in fake_backend_api] == [("meter", "a-meter")]
+
+
+def test_run_backfill_streams_items_and_submits_all_before_polling(tmp_path, fake_backend_api, monkeypatch):
+    """请求边构造边写文件；所有批量文件先提交，再统一轮询"""
+    build = batch_backfill.build_batch_item
+    files_seen = []
+
+    def spy_build(asset):
+        files_seen.append(len(list(tmp_path.glob("*.jsonl"))))
+        return build(asset)
+
+    monkeypatch.setattr(batch_backfill, "build_batch_item", spy_build)
+
+    events = []
+
+    class RecordingBackend(batch_backfill.LocalBatchBackend):
+        def submit(self, path):
+            events.append("submit")
+            return super().submit(path)
+
+        def status(self, batch_id):
+            events.append("status")
+            return super().status(batch_id)
+
+    stats = batch_backfill.run_backfill(
+        RecordingBackend(lambda body: {"reading": 1}),
+        [{"id": "a-meter"}, {"id": "a-plate"}, {"id": "a-scene"}],
+        output_dir=str(tmp_path),
+        poll_interval=0,
+        max_requests=1,
+    )
+
+    # 第二条请求构造时第一个文件已写出，说明未先在内存中收集全部请求
+    assert files_seen == [0, 1, 2]
+    assert events == ["submit"] * 3 + ["status"] * 3
+    assert (stats["requests"], stats["files"], stats["ok"]) == (3, 3, 3)
+
+
+def test_parse_result_line_reports_http_error():
+    """非 200 的批量输出行返回错误信息"""
+    custom_id, result, error = batch_backfill.parse_result_line(
+        {"custom_id": "x", "response": {"status_code": 429, "body": {}}}
+    )
+    assert custom_id == "x"
+    assert result is None
+    assert error == "HTTP 429"
@@ -0,0 +1,125 @@
+"""
+Worker ROI 裁剪单元测试
+
+运行测试: pytest tests/test_worker_image_roi.py -v
+"""
+
+import base64
+import io
+import os
+
+import numpy as np
+from PIL import Image
+
+os.environ.setdefault("GLM_API_KEY", "test-key")
+
+from services.worker import image_roi  # noqa: E402
+from services.worker import scene_issue_glm_worker as worker  # noqa: E402
+
+
+def _photo_with_text_patch(size=(800, 600), patch=(500, 350, 700, 450)):
+    """灰色背景 + 一块黑白条纹（模拟文字/刻度区域）。"""
+    arr = np.full((size[1], size[0], 3), 128, dtype=np.uint8)
+    left, top, right, bottom = patch
+    stripes = (np.indices((bottom - top, right - left)).sum(axis=0) // 3 % 2) * 255
+    arr[top:bottom, left:right] = stripes[..., None]
+    return Image.fromarray(arr)
+
+
+def _decoded_size(content):
+    raw = content["image_url"]["url"].split(",", 1)[1]
+    return Image.open(io.BytesIO(base64.b64decode(raw))).size
+
+
+def test_ocr_boxes_from_latest_annotation():
+    """使用最新 image_annotation 的 OCR 文本框，忽略低置信度行"""
+    detail = {
+        "structured_payloads": [
+            {"schema_type": "image_annotation", "version": 1, "payload": {"annotations": {"ocr_lines": [
+                {"bbox": [[0, 0], [5, 0], [5, 5], [0, 5]], "confidence": 0.9},
+            ]}}},
+            {"schema_type": "image_annotation", "version": 2, "payload": {"annotations": {"ocr_lines": [
+                {"bbox": [[10, 20], [60, 20], [60, 40], [10, 40]], "confidence": 0.95},
+                {"bbox": [[100, 100], [300, 100], [300, 150], [100, 150]], "confidence": 0.9},
+                {"bbox": [[0, 0], [790, 0], [790, 590], [0, 590]], "confidence": 0.1},
+            ]}}},
+        ]
+    }
+    boxes = image_roi.ocr_boxes_from_detail(detail)
+    assert image_roi.union_box(boxes) == (10, 20, 301, 151)
+
+
+def test_text_density_box_locates_text_patch():
+    """没有 OCR 结果时，文字密度启发式定位到条纹区域"""
+    img = _photo_with_text_patch()
+    left, top, right, bottom = image_roi.text_density_box(img)
+
+    assert 450 <= left <= 520 and 300 <= top <= 370
+    assert 680 <= right <= 760 and 430 <= bottom <= 500
+
+
+def test_build_roi_contents_crops_and_adds_context():
+    """ROI 图放大到长边上限，可选附带缩小的全景图"""
+    img = _photo_with_text_patch()
+    contents = image_roi.build_roi_image_contents(img, {}, include_context=True)
+
+    assert len(contents) == 2
+    assert max(_decoded_size(contents[0])) == image_roi.ROI_MAX_SIDE
+    assert max(_decoded_size(contents[1])) == image_roi.ROI_CONTEXT_SIDE
+
+
+def test_build_roi_contents_skips_uniform_image():
+    """纯色图片找不到 ROI，返回 None 以便退回整图"""
+    img = Image.new("RGB", (400, 300), (200, 200, 200))
+    assert image_roi.build_roi_image_contents(img, {}) is None
+
+
+def test_worker_sends_roi_for_meter_only(tmp_path, monkeypatch):
+    """meter 走 ROI 裁剪，scene_issue 仍发送整图"""
+    _photo_with_text_patch().save(tmp_path / "a.jpg")
+    monkeypatch.setattr(worker, "LOCAL_STORAGE_DIR", str(tmp_path))
+
+    meter = worker.get_image_content_from_detail({"file_path": "a.jpg", "content_role": "meter"})
+    scene = worker.get_image_content_from_detail({"file_path": "a.jpg", "content_role": "scene_issue"})
+
+    assert isinstance(meter, list)
+    assert isinstance(scene, dict)
+    assert _decoded_size(scene) == (800, 600)
+
+    messages = worker.build_vision_messages(meter + meter, "prompt")
+    assert len(messages[0]["content"]) == 3
+    assert messages[0]["content"][-1]["text"].endswith(worker.ROI_CONTEXT_HINT)
+
+
+def test_worker_applies_exif_orientation_before_roi(tmp_path, monkeypatch):
+    """EXIF 旋转的手机照片先摆正，OCR 文本框（摆正后的坐标）才能裁到正确区域"""
+    upright = _photo_with_text_patch()
+    exif = Image.Exif()
+    exif[0x0112] = 6  # 显示时需顺时针旋转 90°
+    upright.transpose(Image.Transpose.ROTATE_90).save(tmp_path / "rotated.jpg", exif=exif)
+    monkeypatch.setattr(worker, "LOCAL_STORAGE_DIR", str(tmp_path))
+
+    seen_sizes = []
+    find_roi = image_roi.find_roi
+
+    def spy(img, detail):
+        seen_sizes.append(img.size)
+        return find_roi(img, detail)
+
+    monkeypatch.setattr(image_roi, "find_roi", spy)
+    detail = {
+        "file_path": "rotated.jpg",
+        "content_role": "meter",
+        "structured_payloads": [
+            {"schema_type": "image_annotation", "version": 1, "payload": {"annotations": {"ocr_lines": [
+                {"bbox": [[500, 350], [700, 350], [700, 450], [500, 450]], "confidence": 0.95},
+            ]}}},
+        ],
+    }
+    contents = worker.get_image_content_from_detail(detail)
+
+    assert seen_sizes == [(800, 600)]
+    raw = contents[0]["image_url"]["url"].split(",", 1)[1]
+    crop = np.asarray(Image.open(io.BytesIO(base64.b64decode(raw))).convert("L"), dtype=float)
+    # 裁到条纹区域（而不是灰色背景）
+    assert crop.std() > 60
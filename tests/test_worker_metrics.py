@@ -0,0 +1,119 @@
+"""
+Worker 指标与结构化日志单元测试
+
+运行测试: pytest tests/test_worker_metrics.py -v
+"""
+
+import json
+import os
+from types import SimpleNamespace
+
+from prometheus_client import generate_latest
+
+os.environ.setdefault("GLM_API_KEY", "test-key")
+
+from services.worker import scene_issue_glm_worker as worker  # noqa: E402
+from services.worker import worker_metrics as metrics  # noqa: E402
+
+
+IMAGE = {"type": "image_url", "image_url": {"url": "data:image/jpeg;base64,AAAA"}}
+
+
+def _sample(name, **labels):
+    value = metrics.REGISTRY.get_sample_value(name, labels)
+    return value or 0.0
+
+
+def _fake_completion(content, prompt_tokens=100, completion_tokens=20, cached_tokens=40):
+    usage = SimpleNamespace(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=cached_tokens),
+    )
+    message = SimpleNamespace(content=content)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+def test_process_once_records_stage_metrics(monkeypatch):
+    """一轮处理后记录各阶段耗时、吞吐、token 用量与错误"""
+    assets = [
+        {"id": "m1", "content_role": "meter"},
+        {"id": "s1", "content_role": "scene_issue"},
+    ]
+    monkeypatch.setattr(worker, "refresh_queue_depth", lambda: None)
+    monkeypatch.setattr(worker, "get_pending_scene_assets", lambda: assets)
+    monkeypatch.setattr(
+        worker, "get_asset_detail", lambda aid: {"id": aid, "content_role": dict(m1="meter", s1="scene_issue")[aid]}
+    )
+    monkeypatch.setattr(worker, "get_image_content_from_detail", lambda detail: IMAGE)
+    monkeypatch.setattr(worker.client.chat.completions, "create", lambda **kw: _fake_completion('{"reading": 1}'))
+    monkeypatch.setattr(worker, "post_meter_reading", lambda aid, r: True)
+    monkeypatch.setattr(worker, "post_scene_issue_report", lambda aid, p: False)
+
+    ok_before = _sample("bdc_worker_assets_total", role="meter", outcome="ok")
+    failed_before = _sample("bdc_worker_assets_total", role="scene_issue", outcome="failed")
+    tokens_before = _sample("bdc_worker_llm_tokens_total", role="meter", kind="prompt")
+    llm_count_before = _sample("bdc_worker_stage_seconds_count", stage="llm_call", role="meter")
+    rejected_before = _sample("bdc_worker_errors_total", stage="post_result", error_type="rejected")
+
+    worker.process_once()
+
+    assert _sample("bdc_worker_assets_total", role="meter", outcome="ok") == ok_before + 1
+    assert _sample("bdc_worker_assets_total", role="scene_issue", outcome="failed") == failed_before + 1
+    assert _sample("bdc_worker_llm_tokens_total", role="meter", kind="prompt") == tokens_before + 100
+    assert _sample("bdc_worker_stage_seconds_count", stage="llm_call", role="meter") == llm_count_before + 1
+    assert _sample("bdc_worker_errors_total", stage="post_result", error_type="rejected") == rejected_before + 1
+    assert _sample("bdc_worker_llm_cache_hit_ratio") == 0.4
+    assert _sample("bdc_worker_inflight_requests", target="llm") == 0
+
+
+def test_llm_failure_counted_once(monkeypatch):
+    """GLM 调用抛出异常只按异常类型计一次；返回内容无法解析才计为 empty_result"""
+    monkeypatch.setattr(worker, "refresh_queue_depth", lambda: None)
+    monkeypatch.setattr(worker, "get_pending_scene_assets", lambda: [{"id": "m1", "content_role": "meter"}])
+    monkeypatch.setattr(worker, "get_asset_detail", lambda aid: {"id": aid, "content_role": "meter"})
+    monkeypatch.setattr(worker, "get_image_content_from_detail", lambda detail: IMAGE)
+
+    def raise_timeout(**kw):
+        raise TimeoutError("glm slow")
+
+    monkeypatch.setattr(worker.client.chat.completions, "create", raise_timeout)
+    timeout_before = _sample("bdc_worker_errors_total", stage="llm_call", error_type="TimeoutError")
+    empty_before = _sample("bdc_worker_errors_total", stage="llm_call", error_type="empty_result")
+    worker.process_once()
+    assert _sample("bdc_worker_errors_total", stage="llm_call", error_type="TimeoutError") == timeout_before + 1
+    assert _sample("bdc_worker_errors_total", stage="llm_call", error_type="empty_result") == empty_before
+
+    monkeypatch.setattr(worker.client.chat.completions, "create", lambda **kw: _fake_completion(None))
+    worker.process_once()
+    assert _sample("bdc_worker_errors_total", stage="llm_call", error_type="TimeoutError") == timeout_before + 1
+    assert _sample("bdc_worker_errors_total", stage="llm_call", error_type="empty_result") == empty_before + 1
+
+
+def test_stage_timer_counts_errors_by_type():
+    """阶段内抛出的异常按类型计数并继续抛出"""
+    before = _sample("bdc_worker_errors_total", stage="fetch_detail", error_type="TimeoutError")
+    try:
+        with metrics.stage_timer("fetch_detail", "meter"):
+            raise TimeoutError("backend slow")
+    except TimeoutError:
+        pass
+    assert _sample("bdc_worker_errors_total", stage="fetch_detail", error_type="TimeoutError") == before + 1
+
+
+def test_queue_depth_and_exposition_format():
+    """队列深度来自后端 stats，并以 Prometheus 文本格式输出"""
+    metrics.set_queue_depth({"by_priority_class": {"expedite": {"depth": 2}, "low": {"depth": 7}}})
+    text = generate_latest(metrics.REGISTRY).decode()
+    assert 'bdc_worker_queue_depth{priority_class="low"} 7.0' in text
+    assert "# TYPE bdc_worker_stage_seconds histogram" in text
+
+
+def test_log_event_json_includes_asset_id(monkeypatch, capsys):
+    """json 模式输出带 asset_id 的单行 JSON"""
+    monkeypatch.setattr(metrics, "LOG_FORMAT", "json")
+    metrics.log_event("info", "processed", "a-1", role="meter", llm_seconds=1.5)
+    record = json.loads(capsys.readouterr().out.strip())
+    assert record["event"] == "processed"
+    assert record["asset_id"] == "a-1"
+    assert record["role"] == "meter"